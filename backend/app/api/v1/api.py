@@ -4,7 +4,7 @@ Main API router for v1 endpoints
 
 from fastapi import APIRouter
 
-from .endpoints import analysis, languages, execution, optimization, health, batch, auth
+from .endpoints import analysis, languages, execution, optimization, health, batch, auth, visualization
 
 api_router = APIRouter()
 
@@ -15,4 +15,5 @@ api_router.include_router(languages.router, prefix="/languages", tags=["language
 api_router.include_router(execution.router, prefix="/execution", tags=["execution"])
 api_router.include_router(optimization.router, prefix="/optimization", tags=["optimization"])
 api_router.include_router(health.router, prefix="/health", tags=["health"])
-api_router.include_router(batch.router, prefix="/batch", tags=["batch"]) 
\ No newline at end of file
+api_router.include_router(batch.router, prefix="/batch", tags=["batch"])
+api_router.include_router(visualization.router, prefix="/visualization", tags=["visualization"]) 
\ No newline at end of file
@@ -17,13 +17,16 @@ from app.services.mock_analysis_service import (
     MockOptimizationService as OptimizationService,
     MockVisualizationService as VisualizationService
 )
+from app.services.incremental_parser import get_parse_session_manager
 from app.core.security import get_security, security
 from app.models.user import User
 from app.models.analysis import Analysis
 from app.core.database import get_db
+from app.core.serialization import FastJSONResponse
+from app.core.stages import Stage, run_stages
 from sqlalchemy.orm import Session
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 # Custom dependency for optional authentication
 async def get_optional_user(
@@ -88,6 +91,18 @@ class AIInsightRequest(BaseModel):
     context: Optional[str] = None
     focus_areas: Optional[List[str]] = None
 
+class ParseSessionRequest(BaseModel):
+    code: str
+    language: str
+
+class TextEdit(BaseModel):
+    start_byte: int
+    old_end_byte: int
+    text: str = ""
+
+class ParseEditsRequest(BaseModel):
+    edits: List[TextEdit]
+
 @router.post("/analyze")
 async def analyze_code(
     request: CodeAnalysisRequest,
@@ -106,51 +121,36 @@ async def analyze_code(
             "analysis": {}
         }
 
-        # Basic code analysis
+        # The stages are independent, so they run concurrently, each with its own timeout
+        stages = []
         if request.include_ast:
-            code_analyzer = CodeAnalyzer()
-            ast_result = await code_analyzer.analyze(request.code, request.language)
-            analysis_result["analysis"]["ast"] = ast_result
-
-        # Complexity analysis
+            stages.append(Stage("ast", CodeAnalyzer().analyze, (request.code, request.language)))
         if request.include_complexity:
-            complexity_analyzer = ComplexityAnalyzer()
-            complexity_result = await complexity_analyzer.analyze(request.code, request.language)
-            analysis_result["analysis"]["complexity"] = complexity_result
-
-        # AI-powered insights
+            stages.append(Stage("complexity", ComplexityAnalyzer().analyze, (request.code, request.language)))
         if request.include_ai_insights:
-            ai_analyzer = AIAnalyzer()
-            ai_insights = await ai_analyzer.get_insights(
-                request.code, 
-                request.language, 
-                request.user_context
-            )
-            analysis_result["analysis"]["ai_insights"] = ai_insights
-
-        # Optimization suggestions
+            stages.append(Stage(
+                "ai_insights",
+                AIAnalyzer().get_insights,
+                (request.code, request.language, request.user_context),
+            ))
         if request.include_optimization:
-            optimization_service = OptimizationService()
-            optimization_result = await optimization_service.get_suggestions(
-                request.code, 
-                request.language
-            )
-            analysis_result["analysis"]["optimization"] = optimization_result
-
-        # Visualization data
+            stages.append(Stage("optimization", OptimizationService().get_suggestions, (request.code, request.language)))
         if request.include_visualization:
-            visualization_service = VisualizationService()
-            viz_data = await visualization_service.generate_data(
-                request.code, 
-                request.language
-            )
-            analysis_result["analysis"]["visualization"] = viz_data
-
-        return {
-            "success": True,
-            "analysis_id": None,  # No analysis record for unauthenticated users
-            "result": analysis_result
-        }
+            stages.append(Stage("visualization", VisualizationService().generate_data, (request.code, request.language)))
+
+        report = await run_stages(stages)
+        analysis_result["analysis"] = report.values()
+        analysis_result["stages"] = report.statuses()
+
+        # Returning the response directly skips FastAPI's jsonable_encoder pass
+        return FastJSONResponse(
+            {
+                "success": True,
+                "analysis_id": None,  # No analysis record for unauthenticated users
+                "result": analysis_result
+            },
+            headers={"Server-Timing": report.server_timing()},
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -196,11 +196,11 @@ async def batch_analyze(
             batch_insights = await ai_analyzer.get_batch_insights(results)
             comparison_data["batch_insights"] = batch_insights
 
-        return {
+        return FastJSONResponse({
             "success": True,
             "results": results,
             "comparison": comparison_data
-        }
+        })
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
@@ -399,6 +399,55 @@ async def get_trending_topics(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Trending topics failed: {str(e)}")
 
+@router.post("/sessions")
+async def open_parse_session(request: ParseSessionRequest):
+    """
+    Start an incremental parse session for live editor analysis
+    """
+    try:
+        result = get_parse_session_manager().open_session(request.code, request.language)
+        return {
+            "success": True,
+            **result
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Parse session failed: {str(e)}")
+
+@router.post("/sessions/{session_id}/edits")
+async def apply_parse_edits(session_id: str, request: ParseEditsRequest):
+    """
+    Apply editor text edits and re-analyze only the changed regions
+    """
+    try:
+        result = get_parse_session_manager().apply_edits(
+            session_id,
+            [edit.model_dump() for edit in request.edits]
+        )
+        return {
+            "success": True,
+            **result
+        }
+
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Parse session not found or expired")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Incremental parse failed: {str(e)}")
+
+@router.delete("/sessions/{session_id}")
+async def close_parse_session(session_id: str):
+    """
+    Close an incremental parse session
+    """
+    closed = get_parse_session_manager().close_session(session_id)
+    return {
+        "success": closed
+    }
+
 async def perform_advanced_analytics(user_id: int, analysis_result: Dict[str, Any]):
     """
     Background task for advanced analytics
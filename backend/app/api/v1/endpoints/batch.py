@@ -2,19 +2,17 @@
 Batch analysis endpoint for processing multiple code files
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Literal, Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from app.core.logging import get_logger
-from app.services.code_analyzer import CodeAnalyzer
-from app.services.complexity_analyzer import ComplexityAnalyzer
-from app.services.optimization_service import OptimizationService
-from app.services.visualization import VisualizationService
+from app.core.serialization import FastJSONResponse
+from app.services.analysis_engine import get_analysis_engine
 from app.core.monitoring import metrics
 
 logger = get_logger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
 class BatchAnalysisRequest(BaseModel):
@@ -28,6 +26,11 @@ class BatchAnalysisRequest(BaseModel):
     ]
     analysis_types: List[str] = ["ast", "complexity", "optimization"]
     include_visualizations: bool = False
+    # "png" for base64 images, "spec" for declarative chart data the client draws,
+    # "ref" for URLs of cacheable images served by /visualization/{hash}.{ext}
+    visualization_format: Literal["png", "spec", "ref"] = "png"
+    # "tree" for nested AST nodes, "flat" for parallel lists with parent indices
+    ast_format: Literal["tree", "flat"] = "tree"
 
 
 class BatchAnalysisResponse(BaseModel):
@@ -50,61 +53,41 @@ async def analyze_batch(request: BatchAnalysisRequest) -> BatchAnalysisResponse:
         logger.info("Starting batch analysis", file_count=len(request.files))
         metrics.increment_counter("batch_analysis_requests")
         
-        # Initialize services
-        code_analyzer = CodeAnalyzer()
-        complexity_analyzer = ComplexityAnalyzer()
-        optimization_service = OptimizationService()
-        visualization_service = VisualizationService()
-        
         results = []
         processed_files = 0
         failed_files = 0
         
-        # Process each file
-        for file_data in request.files:
-            try:
-                file_name = file_data.get("name", "unknown")
-                content = file_data.get("content", "")
-                language = file_data.get("language", "python")
-                
-                logger.info(f"Processing file: {file_name}", language=language)
-                
-                file_result = {
-                    "file_name": file_name,
-                    "language": language,
-                    "file_size": len(content),
-                    "analysis": {}
-                }
-                
-                # Perform requested analyses
-                if "ast" in request.analysis_types:
-                    ast_analysis = await code_analyzer.analyze_ast(content, language)
-                    file_result["analysis"]["ast"] = ast_analysis
-                
-                if "complexity" in request.analysis_types:
-                    complexity_analysis = await complexity_analyzer.analyze_complexity(content, language)
-                    file_result["analysis"]["complexity"] = complexity_analysis
-                
-                if "optimization" in request.analysis_types:
-                    optimization_analysis = await optimization_service.analyze_optimization_opportunities(content, language)
-                    file_result["analysis"]["optimization"] = optimization_analysis
-                
-                if request.include_visualizations:
-                    visualization_data = await visualization_service.generate_visualizations(content, language, [])
-                    file_result["analysis"]["visualization"] = visualization_data
-                
-                results.append(file_result)
-                processed_files += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to process file {file_data.get('name', 'unknown')}", error=str(e))
+        # The analyzers run in the engine's worker processes, a chunk of files per task
+        names = [file_data.get("name", "unknown") for file_data in request.files]
+        languages = [file_data.get("language", "python") for file_data in request.files]
+        analyses = await get_analysis_engine().analyze_many(
+            [(file_data.get("content", ""), language) for file_data, language in zip(request.files, languages)],
+            {
+                "analysis_types": request.analysis_types,
+                "include_visualizations": request.include_visualizations,
+                "visualization_format": request.visualization_format,
+                "ast_format": request.ast_format,
+            },
+        )
+        
+        for file_data, file_name, language, analysis in zip(request.files, names, languages, analyses):
+            if "error" in analysis:
+                logger.error(f"Failed to process file {file_name}", error=analysis["error"])
                 failed_files += 1
                 results.append({
-                    "file_name": file_data.get("name", "unknown"),
+                    "file_name": file_name,
                     "language": file_data.get("language", "unknown"),
-                    "error": str(e),
+                    "error": analysis["error"],
                     "analysis": {}
                 })
+            else:
+                results.append({
+                    "file_name": file_name,
+                    "language": language,
+                    "file_size": len(file_data.get("content", "")),
+                    "analysis": analysis["analysis"]
+                })
+                processed_files += 1
         
         # Generate summary
         summary = _generate_batch_summary(results, request.analysis_types)
@@ -7,10 +7,11 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
 from app.core.logging import get_logger
+from app.core.serialization import FastJSONResponse
 from app.services.runx_executor import execute_code_with_runx
 
 logger = get_logger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
 class ExecutionRequest(BaseModel):
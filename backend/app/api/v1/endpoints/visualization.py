@@ -0,0 +1,213 @@
+"""
+Visualization endpoints
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.serialization import FastJSONResponse, dumps
+from app.services.chart_specs import chart_spec
+from app.services.dp_table import Window, get_dp_table_store, value_range
+from app.services.image_store import MIME_TYPES, get_image_store, image_key, is_image_key
+from app.services.structure_svg import MIME_TYPE as SVG_MIME_TYPE, RENDERERS as SVG_RENDERERS, iter_structure_svg
+from app.services.trace_frames import FRAME_FORMATS, export_trace
+from app.services.visualization import OUTPUT_FORMATS, chart_output, image_ref, memory_profile, stored_chart
+
+logger = get_logger(__name__)
+router = APIRouter(default_response_class=FastJSONResponse)
+
+# Stored images never change under their key
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names ``etag``; weak comparison, as RFC 9110 asks for GET"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+async def _image_response(key: str, ext: str, if_none_match: Optional[str]) -> Response:
+    """A stored image with caching headers, or 304 when the client has it"""
+    headers = {"ETag": f'"{key}"', "Cache-Control": IMMUTABLE}
+    # The key fixes the bytes, so a client holding it is up to date even if the store has evicted it
+    if _matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    data = await asyncio.to_thread(get_image_store().get, key, ext)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Visualization not found")
+    return Response(content=data, media_type=MIME_TYPES[ext], headers=headers)
+
+
+class DPTableRequest(BaseModel):
+    """Request model for storing a DP table"""
+    dp_table: List[List[Any]] = Field(..., description="Rows of the table; non-numeric cells are left blank")
+
+
+class DPTableResponse(BaseModel):
+    """Response model for a stored DP table"""
+    table_id: str
+    shape: List[int]
+    range: Optional[List[float]] = None
+
+
+@router.post("/dp-tables", response_model=DPTableResponse)
+async def store_dp_table(request: DPTableRequest) -> DPTableResponse:
+    """
+    Store a DP table so its viewports can be requested by id
+    """
+    rows = request.dp_table
+    cells = len(rows) * max((len(row) for row in rows), default=0)
+    if cells > settings.DP_TABLE_MAX_CELLS:
+        raise HTTPException(
+            status_code=413, detail=f"DP table has {cells} cells, more than the {settings.DP_TABLE_MAX_CELLS} allowed"
+        )
+    try:
+        table_id, table = get_dp_table_store().put(request.dp_table)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    limits = value_range(table)
+    return DPTableResponse(table_id=table_id, shape=list(table.shape), range=list(limits) if limits else None)
+
+
+@router.get("/dp-tables/{table_id}")
+async def dp_table_viewport(
+    table_id: str,
+    row_start: int = Query(0, ge=0),
+    row_end: Optional[int] = Query(None, ge=0),
+    col_start: int = Query(0, ge=0),
+    col_end: Optional[int] = Query(None, ge=0),
+    format: str = Query("spec", description="png for a rendered heatmap, spec for the cells, ref for the heatmap's URL"),
+    if_none_match: Optional[str] = Header(None),
+) -> Any:
+    """
+    One window of a stored DP table, as a heatmap spec, a PNG or a reference to the PNG
+    """
+    if format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    table = get_dp_table_store().get(table_id)
+    if table is None:
+        raise HTTPException(status_code=404, detail="DP table not found; store it again")
+
+    window = Window(row_start, row_end, col_start, col_end)
+    data: Dict[str, Any] = {"dp_table": table, "window": window.to_dict()}
+    if format == "spec":
+        return chart_spec("dp_table", data)
+
+    clamped = window.clamp(table.shape)
+    if clamped.row_start == clamped.row_end or clamped.col_start == clamped.col_end:
+        raise HTTPException(status_code=400, detail="The window has no cells")
+    # The table id already identifies the table, so the key need not hash its cells
+    key = image_key("dp_table", table_id, clamped.to_dict())
+    if format == "png" and _matches(if_none_match, f'"{key}"'):
+        return await _image_response(key, "png", if_none_match)
+    try:
+        await stored_chart("dp_table", data, key=key, size=(10, 8))
+    except Exception as e:
+        logger.error("DP table render failed", error=str(e), table_id=table_id)
+        raise HTTPException(status_code=500, detail=f"Render failed: {str(e)}")
+    if format == "ref":
+        return image_ref(key, "png")
+    return await _image_response(key, "png", None)
+
+
+# Bytes of SVG markup per streamed chunk
+SVG_CHUNK_SIZE = 16 * 1024
+
+
+async def _batched(chunks: Iterator[str]) -> AsyncIterator[str]:
+    """
+    Join small chunks into larger ones on the event loop; drawing takes
+    microseconds, while Starlette would hand each chunk of a plain
+    iterator to a thread
+    """
+    batch: List[str] = []
+    size = 0
+    for chunk in chunks:
+        batch.append(chunk)
+        size += len(chunk)
+        if size >= SVG_CHUNK_SIZE:
+            yield "".join(batch)
+            batch, size = [], 0
+    if batch:
+        yield "".join(batch)
+
+
+class StructureRequest(BaseModel):
+    """Request model for drawing a traced data structure"""
+    structure: Dict[str, Any] = Field(
+        ..., description="A structure from a trace step's data_structures, e.g. {type: stack, elements: [...]}"
+    )
+
+
+@router.post("/structures/svg")
+async def structure_svg(request: StructureRequest) -> StreamingResponse:
+    """
+    Draw a traced data structure as SVG, streamed as it is written
+    """
+    kind = request.structure.get("type")
+    if kind not in SVG_RENDERERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported structure type: {kind}")
+    return StreamingResponse(_batched(iter_structure_svg(request.structure)), media_type=SVG_MIME_TYPE)
+
+
+class TraceFramesRequest(BaseModel):
+    """Request model for exporting the frames of a trace"""
+    trace: List[Dict[str, Any]] = Field(..., description="Execution trace steps with their data_structures")
+    format: str = Field(default="svg", description="svg or png frames, or a gif, apng or webp animation")
+
+
+@router.post("/trace-frames")
+async def trace_frames(request: TraceFramesRequest) -> StreamingResponse:
+    """
+    Render a trace's frames and stream start, frame, progress and done
+    events as newline-delimited JSON
+    """
+    if request.format not in FRAME_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {request.format}")
+
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            async for event in export_trace(request.trace, request.format):
+                yield dumps(event) + b"\n"
+        except Exception as e:
+            logger.error("Trace frame export failed", error=str(e))
+            yield dumps({"event": "error", "detail": str(e)}) + b"\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+class MemoryUsageRequest(BaseModel):
+    """Request model for charting memory use over a trace"""
+    trace: List[Dict[str, Any]] = Field(..., description="Execution trace steps with their locals")
+    format: str = Field(default="png", description="png for a base64 image, spec for the chart data, ref for the image's URL")
+
+
+@router.post("/memory-usage")
+async def memory_usage(request: MemoryUsageRequest) -> Dict[str, Any]:
+    """
+    Chart the size of the live locals at each step of an execution trace
+    """
+    if request.format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {request.format}")
+    usage = memory_profile(request.trace)
+    if not usage:
+        raise HTTPException(status_code=400, detail="The trace has no steps with locals")
+    return {"memory_usage": await chart_output("memory_usage", {"usage": usage}, request.format)}
+
+
+@router.get("/{name}")
+async def visualization_image(name: str, if_none_match: Optional[str] = Header(None)) -> Response:
+    """
+    A rendered visualization by the ``{hash}.{ext}`` name analysis results reference
+    """
+    key, _, ext = name.partition(".")
+    if ext not in MIME_TYPES or not is_image_key(key):
+        raise HTTPException(status_code=404, detail="Visualization not found")
+    return await _image_response(key, ext, if_none_match)
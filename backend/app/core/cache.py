@@ -1,18 +1,69 @@
 """
 Cache configuration and Redis connection management
+
+``CacheManager`` has two tiers. ``LocalCache`` keeps recently used entries
+in process, so a hit costs a dict lookup and a decode instead of a round
+trip; Redis behind it is shared by every process. Values are encoded by
+``cache_codecs`` and kept locally as the bytes Redis stores, so a hit is
+always a fresh copy.
+
+Without ``REDIS_URL`` the local tier is the whole cache. With Redis, a
+local copy is served for at most ``CACHE_LOCAL_TTL`` seconds, and writes
+and deletes are published on ``CACHE_INVALIDATION_CHANNEL`` so the other
+processes drop their copies straight away.
+
+Entries can be written under tags (``lang:java``,
+``analyzer:complexity@v3``); Redis keeps a sorted set of the keys under
+each tag, scored by when each entry expires, so ``invalidate_tags`` drops
+them without looking at the rest of the keyspace and every tagged write
+trims the members that have expired since. ``clear_pattern`` walks the keyspace with SCAN instead of KEYS,
+which would block the server, and deletes in ``DELETE_BATCH`` sized
+UNLINKs that free memory in the background.
+
+``get_or_compute`` guards expensive values against stampedes. Its entries
+carry their logical expiry and how long they took to compute, and stay in
+the cache ``CACHE_STALE_TTL`` seconds past it:
+
+- A miss takes a per-key lock (``SET NX PX`` in Redis, ``LocalLocks``
+  without it), so one worker computes while the others, here or in other
+  processes, wait for its value.
+- A stale entry is served while one worker recomputes it in the
+  background.
+- Before expiry, each read may start that refresh early with a
+  probability that rises as expiry nears and with the compute time
+  (XFetch), so hot keys are usually refreshed before they go stale.
 """
 
 import json
 import asyncio
-from typing import Optional, Any, Dict, List
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterable, List, Set, Tuple
 import redis.asyncio as redis
 from redis.asyncio import Redis
 
+from .cache_codecs import decode_value, encode_value
 from .config import settings
 from .logging import get_logger
 
 logger = get_logger(__name__)
 
+# Redis set of the keys written under a tag
+TAG_PREFIX = "tags:"
+# Keys per SCAN step, and per UNLINK and invalidation message
+SCAN_COUNT = 1000
+DELETE_BATCH = 500
+# Per-key compute lock, and how often a worker waiting on one looks for the value
+LOCK_PREFIX = "lock:"
+LOCK_POLL = 0.05
+# Delete a lock only if it still holds our token, so an expired lock taken over is left alone
+RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
 # Global Redis client
 redis_client: Optional[Redis] = None
 
@@ -20,21 +71,26 @@ redis_client: Optional[Redis] = None
 async def init_cache() -> None:
     """Initialize Redis cache connection"""
     global redis_client
-    
+
+    if not settings.REDIS_URL:
+        logger.info("Redis cache not configured; using the in-process cache only")
+        return
+
     try:
         # Create Redis client
         redis_client = redis.from_url(
             settings.REDIS_URL,
             encoding="utf-8",
-            decode_responses=True,
+            # Values are binary (cache_codecs)
+            decode_responses=False,
             max_connections=settings.REDIS_POOL_SIZE,
         )
-        
+
         # Test connection
         await redis_client.ping()
-        
+
         logger.info("Redis cache connection established successfully")
-        
+
     except Exception as e:
         logger.error("Failed to initialize Redis cache", error=str(e))
         # Don't raise error for cache - it's optional
@@ -48,129 +104,587 @@ async def get_cache() -> Optional[Redis]:
 
 async def close_cache() -> None:
     """Close Redis cache connection"""
-    global redis_client
-    
+    global redis_client, cache_manager
+
+    if cache_manager:
+        await cache_manager.close()
+        cache_manager = None
+
     if redis_client:
         await redis_client.close()
+        redis_client = None
         logger.info("Redis cache connection closed")
 
 
+class LocalCache:
+    """
+    Encoded values by key, least recently used first out once there are
+    more than ``max_entries`` or their text passes ``max_bytes``; each
+    entry also expires after its own TTL and can be dropped by tag
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = settings.CACHE_MAX_SIZE if max_entries is None else max_entries
+        self.max_bytes = settings.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, float, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, encoded: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        with self._lock:
+            self._remove(key)
+            if ttl <= 0 or len(encoded) > self.max_bytes or self.max_entries <= 0:
+                return
+            tags = tuple(tags)
+            self._entries[key] = (encoded, time.monotonic() + ttl, tags)
+            self._bytes += len(encoded)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def expire(self, key: str, ttl: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            self._entries[key] = (entry[0], time.monotonic() + ttl, entry[2])
+            return True
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        with self._lock:
+            return sum(self._remove(key) for key in keys)
+
+    def delete_pattern(self, pattern: str) -> int:
+        """Delete the keys matching a Redis-style glob"""
+        with self._lock:
+            keys = [key for key in self._entries if fnmatchcase(key, pattern)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def delete_tags(self, tags: Iterable[str]) -> int:
+        """Delete the keys written under any of the tags"""
+        with self._lock:
+            keys = set().union(*(self._tags.get(tag, ()) for tag in tags))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= len(entry[0])
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Bytes of encoded values held"""
+        return self._bytes
+
+
+class LocalLocks:
+    """Per-key locks that expire, for a single process without Redis"""
+
+    def __init__(self):
+        self._locks: Dict[str, Tuple[str, float]] = {}
+        # Threads with their own event loops may share the manager
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, timeout: float) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            held = self._locks.get(key)
+            if held is not None and held[1] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._locks[key] = (token, now + timeout)
+        return token
+
+    async def release(self, key: str, token: str) -> None:
+        with self._lock:
+            if self._locks.get(key, (None,))[0] == token:
+                del self._locks[key]
+
+
+class RedisLocks:
+    """Per-key locks shared by every process: ``SET NX PX`` with a random token"""
+
+    def __init__(self, redis_client: Redis):
+        self.redis = redis_client
+
+    async def acquire(self, key: str, timeout: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        acquired = await self.redis.set(LOCK_PREFIX + key, token, nx=True, px=max(int(timeout * 1000), 1))
+        return token if acquired else None
+
+    async def release(self, key: str, token: str) -> None:
+        await self.redis.eval(RELEASE_SCRIPT, 1, LOCK_PREFIX + key, token)
+
+
 class CacheManager:
-    """Cache manager for the application"""
-    
-    def __init__(self, redis_client: Optional[Redis] = None):
+    """Cache manager for the application: an in-process tier in front of Redis"""
+
+    def __init__(self, redis_client: Optional[Redis] = None, local: Optional[LocalCache] = None):
         self.redis = redis_client
+        self.local = local if local is not None else LocalCache()
         self.default_ttl = settings.CACHE_TTL
-    
+        # Set by start_invalidation: writes are published once this process listens too
+        self.channel: Optional[str] = None
+        self.origin = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self.locks = RedisLocks(redis_client) if redis_client is not None else LocalLocks()
+        # get_or_compute misses and background refreshes running in this process, by
+        # event loop: threads that each run their own loop share the manager, and a
+        # task can only be awaited on its own loop
+        self._computing: Dict[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]] = {}
+        self._refreshing: Dict[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]] = {}
+
+    def _local_ttl(self, ttl: int) -> float:
+        # With Redis up, other processes may change a key, so local copies are short-lived
+        return ttl if self.redis is None else min(ttl, settings.CACHE_LOCAL_TTL)
+
+    def _hit_ttl(self, pttl: int) -> float:
+        """Local TTL of a value read from Redis: never past the key's own expiry (PTTL, ms; negative for none)"""
+        ttl = self._local_ttl(self.default_ttl)
+        return ttl if pttl < 0 else min(ttl, pttl / 1000)
+
+    def _invalidation(self, keys: Optional[List[str]] = None, pattern: Optional[str] = None) -> str:
+        return json.dumps({"origin": self.origin, "keys": keys, "pattern": pattern})
+
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
+        value = self.local.get(key)
+        if value is not None:
+            return decode_value(value)
         if not self.redis:
             return None
-        
+
         try:
-            value = await self.redis.get(key)
+            pipeline = self.redis.pipeline()
+            pipeline.get(key)
+            pipeline.pttl(key)
+            value, pttl = await pipeline.execute()
             if value:
-                return json.loads(value)
+                self.local.set(key, value, self._hit_ttl(pttl))
+                return decode_value(value)
             return None
         except Exception as e:
             logger.error("Cache get error", key=key, error=str(e))
             return None
-    
-    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set value in cache"""
-        if not self.redis:
-            return False
-        
+
+    def _tag(self, pipeline: Any, keys: List[str], tags: Iterable[str], ttl: int) -> None:
+        now = time.time()
+        members = {key: now + ttl for key in keys}
+        for tag in tags:
+            name = TAG_PREFIX + tag
+            pipeline.zremrangebyscore(name, "-inf", now)
+            pipeline.zadd(name, members)
+            # The index lives as long as its longest-lived entry: set a TTL once, then only extend it
+            pipeline.expire(name, ttl, nx=True)
+            pipeline.expire(name, ttl, gt=True)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()) -> bool:
+        """Set value in cache, optionally under tags for ``invalidate_tags``"""
         try:
             ttl = ttl or self.default_ttl
-            await self.redis.setex(key, ttl, json.dumps(value))
+            tags = tuple(tags)
+            encoded = encode_value(value)
+            self.local.set(key, encoded, self._local_ttl(ttl), tags)
+            if not self.redis:
+                return True
+            if self.channel or tags:
+                pipeline = self.redis.pipeline()
+                pipeline.setex(key, ttl, encoded)
+                self._tag(pipeline, [key], tags, ttl)
+                if self.channel:
+                    pipeline.publish(self.channel, self._invalidation(keys=[key]))
+                await pipeline.execute()
+            else:
+                await self.redis.setex(key, ttl, encoded)
             return True
         except Exception as e:
             logger.error("Cache set error", key=key, error=str(e))
             return False
-    
+
     async def delete(self, key: str) -> bool:
         """Delete value from cache"""
+        deleted = self.local.delete(key)
         if not self.redis:
-            return False
-        
+            return deleted
+
         try:
             await self.redis.delete(key)
+            await self._publish(keys=[key])
             return True
         except Exception as e:
             logger.error("Cache delete error", key=key, error=str(e))
             return False
-    
+
     async def exists(self, key: str) -> bool:
         """Check if key exists in cache"""
+        if self.local.get(key) is not None:
+            return True
         if not self.redis:
             return False
-        
+
         try:
             return await self.redis.exists(key) > 0
         except Exception as e:
             logger.error("Cache exists error", key=key, error=str(e))
             return False
-    
+
     async def expire(self, key: str, ttl: int) -> bool:
         """Set expiration for key"""
         if not self.redis:
-            return False
-        
+            return self.local.expire(key, ttl)
+
         try:
-            return await self.redis.expire(key, ttl)
+            self.local.delete(key)
+            expired = await self.redis.expire(key, ttl)
+            await self._publish(keys=[key])
+            return expired
         except Exception as e:
             logger.error("Cache expire error", key=key, error=str(e))
             return False
-    
+
     async def clear_pattern(self, pattern: str) -> int:
         """Clear all keys matching pattern"""
+        cleared = self.local.delete_pattern(pattern)
         if not self.redis:
-            return 0
-        
+            return cleared
+
         try:
-            keys = await self.redis.keys(pattern)
-            if keys:
-                return await self.redis.delete(*keys)
-            return 0
+            cleared = 0
+            batch: List[str] = []
+            async for key in self.redis.scan_iter(match=pattern, count=SCAN_COUNT):
+                batch.append(key)
+                if len(batch) >= DELETE_BATCH:
+                    cleared += await self.redis.unlink(*batch)
+                    batch = []
+            if batch:
+                cleared += await self.redis.unlink(*batch)
+            await self._publish(pattern=pattern)
+            return cleared
         except Exception as e:
             logger.error("Cache clear pattern error", pattern=pattern, error=str(e))
             return 0
-    
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """Clear every key written under any of the tags"""
+        cleared = self.local.delete_tags(tags)
+        if not self.redis:
+            return cleared
+
+        try:
+            cleared = 0
+            for tag in tags:
+                batch: List[str] = []
+                async for key, _ in self.redis.zscan_iter(TAG_PREFIX + tag, count=SCAN_COUNT):
+                    batch.append(key.decode() if isinstance(key, bytes) else key)
+                    if len(batch) >= DELETE_BATCH:
+                        cleared += await self._unlink_tagged(batch)
+                        batch = []
+                if batch:
+                    cleared += await self._unlink_tagged(batch)
+                await self.redis.unlink(TAG_PREFIX + tag)
+            return cleared
+        except Exception as e:
+            logger.error("Cache invalidate tags error", tags=list(tags), error=str(e))
+            return 0
+
+    async def _unlink_tagged(self, keys: List[str]) -> int:
+        # Other processes may hold copies they read from Redis, untagged, so name the keys
+        self.local.delete_many(keys)
+        unlinked = await self.redis.unlink(*keys)
+        await self._publish(keys=keys)
+        return unlinked
+
     async def get_many(self, keys: List[str]) -> Dict[str, Any]:
         """Get multiple values from cache"""
-        if not self.redis:
-            return {}
-        
+        result = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                result[key] = decode_value(value)
+            else:
+                missing.append(key)
+        if not self.redis or not missing:
+            return result
+
         try:
-            values = await self.redis.mget(keys)
-            result = {}
-            for key, value in zip(keys, values):
+            pipeline = self.redis.pipeline()
+            pipeline.mget(missing)
+            for key in missing:
+                pipeline.pttl(key)
+            values, *pttls = await pipeline.execute()
+            for key, value, pttl in zip(missing, values, pttls):
                 if value:
-                    result[key] = json.loads(value)
+                    self.local.set(key, value, self._hit_ttl(pttl))
+                    result[key] = decode_value(value)
             return result
         except Exception as e:
-            logger.error("Cache get many error", keys=keys, error=str(e))
-            return {}
-    
-    async def set_many(self, data: Dict[str, Any], ttl: Optional[int] = None) -> bool:
-        """Set multiple values in cache"""
-        if not self.redis:
-            return False
-        
+            logger.error("Cache get many error", keys=missing, error=str(e))
+            return result
+
+    async def set_many(self, data: Dict[str, Any], ttl: Optional[int] = None, tags: Iterable[str] = ()) -> bool:
+        """Set multiple values in cache, optionally all under tags"""
         try:
             ttl = ttl or self.default_ttl
+            tags = tuple(tags)
+            encoded = {key: encode_value(value) for key, value in data.items()}
+            for key, value in encoded.items():
+                self.local.set(key, value, self._local_ttl(ttl), tags)
+            if not self.redis:
+                return True
+
             pipeline = self.redis.pipeline()
-            
-            for key, value in data.items():
-                pipeline.setex(key, ttl, json.dumps(value))
-            
+
+            for key, value in encoded.items():
+                pipeline.setex(key, ttl, value)
+            if encoded:
+                self._tag(pipeline, list(encoded), tags, ttl)
+            if self.channel and encoded:
+                pipeline.publish(self.channel, self._invalidation(keys=list(encoded)))
+
             await pipeline.execute()
             return True
         except Exception as e:
             logger.error("Cache set many error", error=str(e))
             return False
 
+    async def _publish(self, keys: Optional[List[str]] = None, pattern: Optional[str] = None) -> None:
+        if self.channel:
+            await self.redis.publish(self.channel, self._invalidation(keys, pattern))
+
+    def invalidate(self, message: str) -> None:
+        """Drop the local copies an invalidation from another process names"""
+        try:
+            invalidation = json.loads(message)
+        except (TypeError, ValueError):
+            logger.warning("Malformed cache invalidation", payload=str(message)[:200])
+            return
+        if not isinstance(invalidation, dict) or invalidation.get("origin") == self.origin:
+            return
+        self.local.delete_many(invalidation.get("keys") or [])
+        if invalidation.get("pattern"):
+            self.local.delete_pattern(invalidation["pattern"])
+
+    async def start_invalidation(self, channel: str) -> None:
+        """Listen for other processes' writes and publish this one's"""
+        if not self.redis or not channel or self._listener:
+            return
+
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+        self.channel = channel
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub: Any) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self.invalidate(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Without invalidations local copies could go stale for CACHE_LOCAL_TTL, so stop using them
+            logger.error("Cache invalidation listener stopped", error=str(e))
+            self.local.max_entries = 0
+            self.local.clear()
+        finally:
+            await pubsub.close()
+
+    async def stop_invalidation(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def close(self) -> None:
+        """Stop listening for invalidations and drop background refreshes"""
+        await self.stop_invalidation()
+        refreshing = list(self._refreshing.get(asyncio.get_running_loop(), {}).values())
+        for task in refreshing:
+            task.cancel()
+        await asyncio.gather(*refreshing, return_exceptions=True)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        The cached value of ``compute``, computing it at most once at a time
+        per key across processes; values ``cacheable`` rejects are returned
+        but not stored. The key must only be used through this method.
+        """
+        ttl = ttl or self.default_ttl
+        entry = await self.get(key)
+        if isinstance(entry, dict) and "expires" in entry:
+            if not self._expiring(entry):
+                return entry["value"]
+            # Stale, or picked for an early refresh: serve it while one worker recomputes
+            self._refresh_later(key, compute, ttl, tags, cacheable)
+            return entry["value"]
+
+        computing = self._in_flight(self._computing)
+        task = computing.get(key)
+        if task is None:
+            # A task of its own, so a caller that is cancelled does not cancel it for the others
+            task = asyncio.create_task(self._compute_once(key, compute, ttl, tags, cacheable))
+            computing[key] = task
+            task.add_done_callback(lambda task: self._computed(key, task))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _in_flight(tasks: Dict[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]) -> Dict[str, asyncio.Task]:
+        """The running loop's share of ``_computing`` or ``_refreshing``"""
+        return tasks.setdefault(asyncio.get_running_loop(), {})
+
+    @staticmethod
+    def _discard(tasks: Dict[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]], key: str, task: asyncio.Task) -> None:
+        loop = task.get_loop()
+        in_flight = tasks.get(loop, {})
+        in_flight.pop(key, None)
+        if not in_flight:
+            # Loops come and go (asyncio.run per call), so empty ones are not kept
+            tasks.pop(loop, None)
+
+    def _computed(self, key: str, task: asyncio.Task) -> None:
+        self._discard(self._computing, key, task)
+        if not task.cancelled():
+            # Marks it retrieved: when every caller was cancelled asyncio would log it
+            task.exception()
+
+    async def drain_refreshes(self) -> None:
+        """
+        Wait for the background refreshes started so far; for callers whose
+        event loop only runs while they handle a job, where a pending refresh
+        would stall, holding its lock, or be cancelled with the loop
+        """
+        loop = asyncio.get_running_loop()
+        # Refreshes may start more refreshes; other loops' tasks are theirs to wait for
+        while self._refreshing.get(loop):
+            await asyncio.gather(*list(self._refreshing[loop].values()), return_exceptions=True)
+
+    def _expiring(self, entry: Dict[str, Any]) -> bool:
+        # XFetch: -log(u) is exponential, so refreshes start about delta * beta before expiry
+        early = entry.get("delta", 0.0) * settings.CACHE_XFETCH_BETA * -math.log(1.0 - random.random())
+        return time.time() + early >= entry["expires"]
+
+    async def _compute_once(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int,
+                            tags: Iterable[str], cacheable: Optional[Callable[[Any], bool]]) -> Any:
+        timeout = settings.CACHE_LOCK_TIMEOUT
+        deadline = time.monotonic() + timeout
+        token = await self._acquire(key, timeout)
+        while token is None and time.monotonic() < deadline:
+            # Another process is computing it
+            await asyncio.sleep(LOCK_POLL)
+            entry = await self.get(key)
+            if isinstance(entry, dict) and "expires" in entry:
+                return entry["value"]
+            token = await self._acquire(key, timeout)
+        if token is None:
+            logger.warning("Cache lock wait timed out; computing anyway", key=key)
+        try:
+            # The previous holder may have stored it between our miss and our lock
+            entry = await self.get(key)
+            if isinstance(entry, dict) and "expires" in entry:
+                return entry["value"]
+            return await self._store(key, compute, ttl, tags, cacheable)
+        finally:
+            if token is not None:
+                await self._release(key, token)
+
+    def _refresh_later(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int,
+                       tags: Iterable[str], cacheable: Optional[Callable[[Any], bool]]) -> None:
+        refreshing = self._in_flight(self._refreshing)
+        if key in refreshing:
+            return
+
+        async def refresh() -> None:
+            try:
+                token = await self._acquire(key, settings.CACHE_LOCK_TIMEOUT)
+                if token is None:
+                    return
+                try:
+                    await self._store(key, compute, ttl, tags, cacheable)
+                finally:
+                    await self._release(key, token)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Cache refresh error", key=key, error=str(e))
+
+        task = refreshing[key] = asyncio.create_task(refresh())
+        task.add_done_callback(lambda task: self._discard(self._refreshing, key, task))
+
+    async def _store(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int,
+                     tags: Iterable[str], cacheable: Optional[Callable[[Any], bool]]) -> Any:
+        start = time.monotonic()
+        value = await compute()
+        delta = time.monotonic() - start
+        if cacheable is None or cacheable(value):
+            entry = {"value": value, "delta": delta, "expires": time.time() + ttl}
+            await self.set(key, entry, ttl + settings.CACHE_STALE_TTL, tags)
+        return value
+
+    async def _acquire(self, key: str, timeout: float) -> Optional[str]:
+        try:
+            return await self.locks.acquire(key, timeout)
+        except Exception as e:
+            # Without Redis locks, computing twice beats not answering
+            logger.error("Cache lock error", key=key, error=str(e))
+            return ""
+
+    async def _release(self, key: str, token: str) -> None:
+        if not token:
+            return
+        try:
+            await self.locks.release(key, token)
+        except Exception as e:
+            logger.error("Cache unlock error", key=key, error=str(e))
+
 
 # Global cache manager instance
 cache_manager: Optional[CacheManager] = None
@@ -179,9 +693,14 @@ cache_manager: Optional[CacheManager] = None
 async def get_cache_manager() -> CacheManager:
     """Get cache manager instance"""
     global cache_manager
-    
+
     if not cache_manager:
         redis_client = await get_cache()
         cache_manager = CacheManager(redis_client)
-    
-    return cache_manager 
\ No newline at end of file
+        if redis_client is not None and settings.CACHE_INVALIDATION_CHANNEL:
+            try:
+                await cache_manager.start_invalidation(settings.CACHE_INVALIDATION_CHANNEL)
+            except Exception as e:
+                logger.error("Cache invalidation unavailable", error=str(e))
+
+    return cache_manager
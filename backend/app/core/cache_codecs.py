@@ -0,0 +1,170 @@
+"""
+Binary encoding of cache values
+
+A value is serialized (msgpack, or JSON through orjson; values neither
+can write exactly, such as integers past 64 bits, fall back to the
+standard library's JSON) and, past
+``CACHE_COMPRESS_MIN_BYTES``, compressed (zstd, lz4 or zlib), behind one
+header byte: the high bit set, the serializer in the next three bits and
+the compressor in the low four. Entries written before this had no header
+and are JSON text, which is ASCII, so a first byte under 0x80 means a
+legacy entry and is decoded as JSON.
+
+The ids are part of the stored format: an incompatible change to how a
+serializer or compressor writes takes a new id, and the old one stays
+registered so existing entries remain readable until they expire.
+
+msgpack, zstandard and lz4 are optional. Without msgpack values are
+written as JSON, and the configured compressor falls back to zlib, with a
+warning, when its module is missing.
+"""
+
+import json
+import zlib
+from typing import Any, Callable, Dict, NamedTuple, Tuple, Union
+
+from .config import settings
+from .logging import get_logger
+from .serialization import to_jsonable
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is in requirements.txt
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is in requirements.txt
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - lz4 is in requirements.txt
+    lz4_frame = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+logger = get_logger(__name__)
+
+HEADER_FLAG = 0x80
+
+
+class Codec(NamedTuple):
+    id: int
+    name: str
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+
+
+# Serializers by id (0-7) and compressors by id (0-15)
+SERIALIZERS: Dict[int, Codec] = {}
+COMPRESSORS: Dict[int, Codec] = {}
+
+
+def register(registry: Dict[int, Codec], codec_id: int, name: str, encode: Callable, decode: Callable) -> None:
+    """Register a serializer or compressor under the id written in its header"""
+    limit = 8 if registry is SERIALIZERS else 16
+    if not 0 <= codec_id < limit or codec_id in registry:
+        raise ValueError(f"Codec id {codec_id} for {name} is taken or out of range")
+    registry[codec_id] = Codec(codec_id, name, encode, decode)
+
+
+def _msgpack_default(obj: Any) -> Any:
+    # Anything msgpack has no type for (numpy values, sets, objects) as its JSON form
+    return to_jsonable(obj)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=_msgpack_default)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, strict_map_key=False)
+
+
+def _stdlib_json_dumps(value: Any) -> bytes:
+    return json.dumps(to_jsonable(value), ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def _json_dumps(value: Any) -> bytes:
+    # Unlike serialization.dumps this raises on integers past 64 bits, which orjson would read back as floats
+    if orjson is None:
+        return _stdlib_json_dumps(value)
+    return orjson.dumps(value, default=to_jsonable, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _json_loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+register(SERIALIZERS, 0, 'msgpack', _msgpack_dumps, _msgpack_loads)
+register(SERIALIZERS, 1, 'json', _json_dumps, _json_loads)
+register(SERIALIZERS, 2, 'json-stdlib', _stdlib_json_dumps, json.loads)
+
+register(COMPRESSORS, 0, 'none', bytes, bytes)
+register(COMPRESSORS, 1, 'zstd', lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+         lambda data: zstandard.ZstdDecompressor().decompress(data))
+register(COMPRESSORS, 2, 'lz4', lambda data: lz4_frame.compress(data), lambda data: lz4_frame.decompress(data))
+register(COMPRESSORS, 3, 'zlib', lambda data: zlib.compress(data, 6), zlib.decompress)
+
+_AVAILABLE = {'msgpack': msgpack is not None, 'zstd': zstandard is not None, 'lz4': lz4_frame is not None}
+
+
+def _by_name(registry: Dict[int, Codec], name: str) -> Codec:
+    for codec in registry.values():
+        if codec.name == name:
+            return codec
+    raise ValueError(f"Unknown cache codec: {name}")
+
+
+def _configured() -> Tuple[Codec, Codec]:
+    serializer = settings.CACHE_SERIALIZER if _AVAILABLE.get(settings.CACHE_SERIALIZER, True) else 'json'
+    compressor = settings.CACHE_COMPRESSION
+    if not _AVAILABLE.get(compressor, True):
+        logger.warning("Cache compressor not installed; using zlib", compressor=compressor)
+        compressor = 'zlib'
+    return _by_name(SERIALIZERS, serializer), _by_name(COMPRESSORS, compressor)
+
+
+_codecs = None
+
+
+def get_codecs() -> Tuple[Codec, Codec]:
+    """The serializer and compressor new values are written with"""
+    global _codecs
+
+    if _codecs is None:
+        _codecs = _configured()
+    return _codecs
+
+
+def encode_value(value: Any) -> bytes:
+    """A value as header byte and payload"""
+    serializer, compressor = get_codecs()
+    try:
+        data = serializer.encode(value)
+    except (TypeError, ValueError, OverflowError):
+        # msgpack and orjson reject integers past 64 bits, and cycles; the standard
+        # library's JSON keeps integers of any size, and to_jsonable breaks cycles
+        serializer = SERIALIZERS[2]
+        data = serializer.encode(value)
+    if len(data) < settings.CACHE_COMPRESS_MIN_BYTES:
+        compressor = COMPRESSORS[0]
+    return bytes([HEADER_FLAG | serializer.id << 4 | compressor.id]) + compressor.encode(data)
+
+
+def decode_value(data: Union[bytes, str]) -> Any:
+    """The value ``encode_value`` wrote, or a legacy JSON entry"""
+    if isinstance(data, str):
+        return json.loads(data)
+    if not data or data[0] < HEADER_FLAG:
+        return _json_loads(data)
+    header = data[0]
+    serializer = SERIALIZERS.get(header >> 4 & 0x7)
+    compressor = COMPRESSORS.get(header & 0xF)
+    if serializer is None or compressor is None:
+        raise ValueError(f"Unknown cache value header: {header:#x}")
+    return serializer.decode(compressor.decode(data[1:]))
@@ -62,8 +62,29 @@ class Settings:
     
     # Analysis settings
     MAX_AST_DEPTH: int = int(os.getenv("MAX_AST_DEPTH", "100"))
+    MAX_AST_NODES: int = int(os.getenv("MAX_AST_NODES", "200000"))
     MAX_COMPLEXITY_ANALYSIS_TIME: int = int(os.getenv("MAX_COMPLEXITY_ANALYSIS_TIME", "60"))
     MAX_VISUALIZATION_POINTS: int = int(os.getenv("MAX_VISUALIZATION_POINTS", "10000"))
+    RULE_SCAN_BUDGET_MS: int = int(os.getenv("RULE_SCAN_BUDGET_MS", "250"))  # per file
+    TREE_SITTER_PARSE_TIMEOUT_MS: int = int(os.getenv("TREE_SITTER_PARSE_TIMEOUT_MS", "2000"))  # per file
+    
+    # Concurrent analysis stages (app.core.stages)
+    ANALYSIS_STAGE_TIMEOUT: float = float(os.getenv("ANALYSIS_STAGE_TIMEOUT", "10"))  # seconds per stage
+    ANALYSIS_STAGE_THREADS: int = int(os.getenv("ANALYSIS_STAGE_THREADS", "8"))
+    # Timed-out offloaded stages still holding a thread before new ones are refused
+    ANALYSIS_STAGE_MAX_ABANDONED: int = int(os.getenv("ANALYSIS_STAGE_MAX_ABANDONED", "4"))
+    
+    # Process-pool analysis engine (app.services.analysis_engine); 0 workers runs in-process
+    ANALYSIS_WORKERS: int = int(os.getenv("ANALYSIS_WORKERS", str(os.cpu_count() or 1)))
+    ANALYSIS_CHUNK_SIZE: int = int(os.getenv("ANALYSIS_CHUNK_SIZE", "4"))
+    
+    # JSON serialization limits for traced values (app.core.serialization)
+    JSON_MAX_DEPTH: int = int(os.getenv("JSON_MAX_DEPTH", "128"))
+    JSON_MAX_ITEMS: int = int(os.getenv("JSON_MAX_ITEMS", "10000"))
+    
+    # Incremental parse session settings (editor-driven analysis)
+    PARSE_SESSION_IDLE_TIMEOUT: int = int(os.getenv("PARSE_SESSION_IDLE_TIMEOUT", "300"))  # seconds
+    PARSE_SESSION_MAX: int = int(os.getenv("PARSE_SESSION_MAX", "256"))
     
     # Language support settings
     SUPPORTED_LANGUAGES: Dict[str, Dict[str, Any]] = {
@@ -161,6 +182,17 @@ class Settings:
     ANIMATION_DURATION: int = int(os.getenv("ANIMATION_DURATION", "1000"))  # milliseconds
     MAX_GRAPH_NODES: int = int(os.getenv("MAX_GRAPH_NODES", "1000"))
     MAX_GRAPH_EDGES: int = int(os.getenv("MAX_GRAPH_EDGES", "5000"))
+    GRAPH_LAYOUT_CACHE_SIZE: int = int(os.getenv("GRAPH_LAYOUT_CACHE_SIZE", "128"))  # layouts per process
+    DP_ANNOTATED_CELLS: int = int(os.getenv("DP_ANNOTATED_CELLS", "400"))  # larger windows are drawn without values
+    DP_MAX_RENDER_SIZE: int = int(os.getenv("DP_MAX_RENDER_SIZE", "500"))  # cells per side of a DP heatmap image
+    DP_VIEWPORT_SIZE: int = int(os.getenv("DP_VIEWPORT_SIZE", "50"))  # cells per side of a DP spec viewport
+    DP_TABLE_MAX_CELLS: int = int(os.getenv("DP_TABLE_MAX_CELLS", "1000000"))  # largest table accepted for storing
+    DP_TABLE_CACHE_BYTES: int = int(os.getenv("DP_TABLE_CACHE_BYTES", str(128 * 1024 * 1024)))  # stored tables per process
+    MAX_SVG_CELLS: int = int(os.getenv("MAX_SVG_CELLS", "100"))  # elements drawn per structure
+    RENDER_WORKERS: int = int(os.getenv("RENDER_WORKERS", "2"))
+    RENDER_POOL: str = os.getenv("RENDER_POOL", "thread")  # thread or process
+    IMAGE_CACHE_DIR: str = os.getenv("IMAGE_CACHE_DIR", "./cache/visualizations")
+    IMAGE_CACHE_MAX_BYTES: int = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256MB
     
     # AI/ML settings
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
@@ -184,7 +216,22 @@ class Settings:
     
     # Cache settings
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))  # 1 hour
-    CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "1000"))
+    # Analyzer results keyed on normalized code (app.services.result_cache)
+    RESULT_CACHE_ENABLED: bool = os.getenv("RESULT_CACHE_ENABLED", "True").lower() == "true"
+    RESULT_CACHE_RENAME_LOCALS: bool = os.getenv("RESULT_CACHE_RENAME_LOCALS", "True").lower() == "true"
+    # In-process tier in front of Redis (app.core.cache.LocalCache)
+    CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "1000"))  # entries per process
+    CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # 64MB per process
+    CACHE_LOCAL_TTL: int = int(os.getenv("CACHE_LOCAL_TTL", "300"))  # longest a local copy is served with Redis up
+    CACHE_INVALIDATION_CHANNEL: str = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache:invalidate")  # "" disables pub/sub
+    # Cache value encoding (app.core.cache_codecs)
+    CACHE_SERIALIZER: str = os.getenv("CACHE_SERIALIZER", "msgpack")  # msgpack, json, json-stdlib
+    CACHE_COMPRESSION: str = os.getenv("CACHE_COMPRESSION", "zstd")  # zstd, lz4, zlib, none
+    CACHE_COMPRESS_MIN_BYTES: int = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+    # Stampede protection (CacheManager.get_or_compute)
+    CACHE_STALE_TTL: int = int(os.getenv("CACHE_STALE_TTL", "300"))  # seconds a stale value is served while it is recomputed
+    CACHE_LOCK_TIMEOUT: float = float(os.getenv("CACHE_LOCK_TIMEOUT", "30"))  # longest a compute holds its key's lock
+    CACHE_XFETCH_BETA: float = float(os.getenv("CACHE_XFETCH_BETA", "1.0"))  # > 1 refreshes earlier, 0 turns early refresh off
     
     # External services
     GITHUB_API_TOKEN: Optional[str] = os.getenv("GITHUB_API_TOKEN")
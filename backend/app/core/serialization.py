@@ -0,0 +1,205 @@
+"""
+JSON serialization for analysis results, traces and API responses
+
+``to_jsonable`` converts arbitrary Python values (for example the locals of a
+traced frame) into JSON-native values. It dispatches on the exact type
+through a table, so the common cases cost one dict lookup instead of an
+isinstance chain. It also replaces reference cycles with a marker and caps
+nesting depth and container size.
+
+``dumps`` encodes straight to bytes with orjson when it is installed. The
+value is handed to orjson as-is, and only when orjson rejects it (cycles,
+very deep nesting, unusual key types) is it converted with ``to_jsonable``
+first. ``FastJSONResponse`` uses ``dumps`` and is the default response
+class of the analysis, batch and execution routers.
+"""
+
+import json
+import math
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+CYCLE_MARKER = "<cycle>"
+DEPTH_MARKER = "<max depth exceeded>"
+
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+class _Encoder:
+    """One conversion: caps plus the ids of containers on the current path"""
+
+    __slots__ = ("max_depth", "max_items", "active")
+
+    def __init__(self, max_depth: int, max_items: Optional[int]):
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.active: set = set()
+
+    def encode(self, obj: Any, depth: int = 0) -> Any:
+        encoder = _ENCODERS.get(type(obj))
+        if encoder is None:
+            encoder = _resolve_encoder(type(obj))
+        return encoder(self, obj, depth)
+
+    def enter(self, obj: Any, depth: int) -> Optional[str]:
+        """Start encoding a container; returns a marker if it must be skipped"""
+        if depth >= self.max_depth:
+            return DEPTH_MARKER
+        if id(obj) in self.active:
+            return CYCLE_MARKER
+        self.active.add(id(obj))
+        return None
+
+    def truncated(self, size: int) -> Optional[int]:
+        """Number of items to keep, or None to keep them all"""
+        if self.max_items is not None and size > self.max_items:
+            return self.max_items
+        return None
+
+
+def _encode_native(encoder: _Encoder, obj: Any, depth: int) -> Any:
+    return obj
+
+
+def _encode_float(encoder: _Encoder, obj: Any, depth: int) -> Any:
+    # NaN and infinities have no JSON form; null matches what orjson emits
+    return obj if math.isfinite(obj) else None
+
+
+def _encode_sequence(encoder: _Encoder, obj: Any, depth: int) -> Any:
+    marker = encoder.enter(obj, depth)
+    if marker:
+        return marker
+    try:
+        keep = encoder.truncated(len(obj))
+        items = obj if keep is None else obj[:keep]
+        result = [encoder.encode(item, depth + 1) for item in items]
+        if keep is not None:
+            result.append(f"<{len(obj) - keep} more items>")
+        return result
+    finally:
+        encoder.active.discard(id(obj))
+
+
+def _encode_mapping(encoder: _Encoder, obj: Any, depth: int) -> Any:
+    marker = encoder.enter(obj, depth)
+    if marker:
+        return marker
+    try:
+        keep = encoder.truncated(len(obj))
+        result = {}
+        for index, (key, value) in enumerate(obj.items()):
+            if keep is not None and index >= keep:
+                result["<truncated>"] = f"<{len(obj) - keep} more items>"
+                break
+            result[key if type(key) is str else str(key)] = encoder.encode(value, depth + 1)
+        return result
+    finally:
+        encoder.active.discard(id(obj))
+
+
+def _encode_datetime(encoder: _Encoder, obj: Any, depth: int) -> Any:
+    return obj.isoformat()
+
+
+def _encode_ndarray(encoder: _Encoder, obj: Any, depth: int) -> Any:
+    return _encode_sequence(encoder, obj.tolist(), depth)
+
+
+def _encode_numpy_scalar(encoder: _Encoder, obj: Any, depth: int) -> Any:
+    return obj.item()
+
+
+def _encode_other(encoder: _Encoder, obj: Any, depth: int) -> Any:
+    """Types without a registered encoder: describe them, or use their attributes"""
+    if isinstance(obj, type):
+        return f"<type '{obj.__name__}'>"
+    if callable(obj):
+        return f"<function '{getattr(obj, '__name__', 'anonymous')}'>"
+    if hasattr(obj, '__dict__'):
+        try:
+            return _encode_mapping(encoder, vars(obj), depth)
+        except Exception:
+            return f"<object '{type(obj).__name__}'>"
+    return str(obj)
+
+
+_ENCODERS: Dict[type, Callable[[_Encoder, Any, int], Any]] = {
+    str: _encode_native,
+    int: _encode_native,
+    float: _encode_float,
+    bool: _encode_native,
+    type(None): _encode_native,
+    list: _encode_sequence,
+    tuple: _encode_sequence,
+    dict: _encode_mapping,
+    datetime: _encode_datetime,
+    date: _encode_datetime,
+    np.ndarray: _encode_ndarray,
+    np.generic: _encode_numpy_scalar,
+}
+# Registered types whose subclasses share their encoder (dict -> defaultdict)
+_BASE_TYPES = tuple(_ENCODERS)
+
+
+def _resolve_encoder(cls: type) -> Callable[[_Encoder, Any, int], Any]:
+    """Find the encoder of the nearest registered base class and cache it"""
+    encoder = _encode_other
+    for base in cls.__mro__[1:]:
+        if base in _BASE_TYPES:
+            encoder = _ENCODERS[base]
+            break
+    _ENCODERS[cls] = encoder
+    return encoder
+
+
+def to_jsonable(obj: Any, max_depth: Optional[int] = None, max_items: Optional[int] = None) -> Any:
+    """
+    Convert a value into JSON-native types.
+
+    Containers nested deeper than ``max_depth`` (default
+    ``settings.JSON_MAX_DEPTH``) and containers that contain themselves are
+    replaced with a marker string. With ``max_items``, longer lists and
+    dicts keep their first ``max_items`` entries plus a note of how many
+    were dropped.
+    """
+    encoder = _Encoder(settings.JSON_MAX_DEPTH if max_depth is None else max_depth, max_items)
+    return encoder.encode(obj)
+
+
+def _orjson_default(obj: Any) -> Any:
+    return to_jsonable(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a value as UTF-8 JSON bytes"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # orjson.JSONEncodeError subclasses TypeError
+            obj = to_jsonable(obj)
+            try:
+                return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+            except TypeError:
+                pass
+    else:
+        obj = to_jsonable(obj)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with ``dumps`` instead of the standard library"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,199 @@
+"""
+Concurrent execution of independent analysis stages
+
+Each ``Stage`` of a request runs at the same time as the others, under its
+own timeout. A stage that fails or runs out of time does not fail the
+request: its ``StageResult`` records the status and the other stages' values
+are still returned. Stage durations are reported in a ``Server-Timing``
+header.
+
+The analyzers are coroutines that do their work without awaiting, so a
+stage marked ``offload`` runs its coroutine to completion on a worker
+thread, keeping the event loop free while it computes. Its budget starts
+when a thread picks it up, not while it waits in the queue. A thread whose
+stage timed out runs on in the background and its result is discarded;
+while ``ANALYSIS_STAGE_MAX_ABANDONED`` of them hold a thread, new offloaded
+stages fail at once instead of queueing behind them, so the remaining
+threads keep the queue moving.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import settings
+from .logging import get_logger
+from .monitoring import get_metrics_collector
+
+logger = get_logger(__name__)
+
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+_executor: Optional[ThreadPoolExecutor] = None
+# Offloaded stages that timed out and still hold a thread
+_abandoned = 0
+_abandoned_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ANALYSIS_STAGE_THREADS,
+            thread_name_prefix="analysis-stage",
+        )
+    return _executor
+
+
+@dataclass
+class Stage:
+    """One independent unit of work in a request"""
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    args: tuple = ()
+    # Run on a worker thread instead of the event loop
+    offload: bool = True
+    # Seconds; defaults to ANALYSIS_STAGE_TIMEOUT
+    timeout: Optional[float] = None
+
+
+@dataclass
+class StageResult:
+    """Outcome of one stage"""
+    name: str
+    status: str
+    duration: float
+    value: Any = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+    def to_dict(self) -> Dict[str, Any]:
+        info: Dict[str, Any] = {"status": self.status, "duration_ms": round(self.duration * 1000, 3)}
+        if self.error is not None:
+            info["error"] = self.error
+        return info
+
+
+@dataclass
+class StageReport:
+    """Results of every stage of a request, in the order they were given"""
+    results: List[StageResult] = field(default_factory=list)
+
+    def values(self) -> Dict[str, Any]:
+        """Values of the stages that completed"""
+        return {result.name: result.value for result in self.results if result.ok}
+
+    def statuses(self) -> Dict[str, Dict[str, Any]]:
+        return {result.name: result.to_dict() for result in self.results}
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value, with the status of stages that did not complete"""
+        entries = []
+        for result in self.results:
+            entry = f"{result.name};dur={result.duration * 1000:.1f}"
+            if not result.ok:
+                entry += f';desc="{result.status}"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+def _set_started(started: asyncio.Future) -> None:
+    if not started.done():
+        started.set_result(None)
+
+
+def _record_abandoned(change: int) -> None:
+    global _abandoned
+    with _abandoned_lock:
+        _abandoned += change
+        count = _abandoned
+    get_metrics_collector().record_gauge("analysis_stages_abandoned", count)
+
+
+class _OffloadedRun:
+    """One offloaded stage, as seen from its worker thread and from the loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.started = loop.create_future()
+        self.running = False
+        self.done = False
+        self.abandoned = False
+        self.lock = threading.Lock()
+
+    def __call__(self, func: Callable[..., Awaitable[Any]], args: tuple) -> Any:
+        with self.lock:
+            self.running = True
+        try:
+            self.loop.call_soon_threadsafe(_set_started, self.started)
+        except RuntimeError:
+            pass  # the request's loop is gone; the result is discarded anyway
+        try:
+            return asyncio.run(func(*args))
+        finally:
+            with self.lock:
+                self.done = True
+                abandoned = self.abandoned
+            if abandoned:
+                _record_abandoned(-1)
+
+    def abandon(self) -> None:
+        with self.lock:
+            if self.done or not self.running:
+                return
+            self.abandoned = True
+        _record_abandoned(1)
+
+
+async def _run_offloaded(stage: Stage, timeout: Optional[float]) -> Any:
+    if _abandoned >= settings.ANALYSIS_STAGE_MAX_ABANDONED:
+        raise RuntimeError(f"{_abandoned} timed-out stages are still running")
+    loop = asyncio.get_running_loop()
+    run = _OffloadedRun(loop)
+    work = loop.run_in_executor(_get_executor(), run, stage.func, stage.args)
+    try:
+        # The budget covers the stage's own run, not its wait for a thread
+        await run.started
+        return await asyncio.wait_for(work, timeout)
+    except asyncio.TimeoutError:
+        work.cancel()
+        run.abandon()
+        raise
+
+
+async def run_stage(stage: Stage, default_timeout: Optional[float] = None) -> StageResult:
+    """Run one stage and capture its outcome instead of raising"""
+    timeout = stage.timeout if stage.timeout is not None else default_timeout
+    start = time.perf_counter()
+    try:
+        if stage.offload:
+            value = await _run_offloaded(stage, timeout)
+        else:
+            value = await asyncio.wait_for(stage.func(*stage.args), timeout)
+        return StageResult(stage.name, STATUS_OK, time.perf_counter() - start, value=value)
+    except asyncio.TimeoutError:
+        duration = time.perf_counter() - start
+        logger.warning("Analysis stage timed out", stage=stage.name, timeout=timeout)
+        return StageResult(stage.name, STATUS_TIMEOUT, duration, error=f"Exceeded {timeout:g}s budget")
+    except Exception as e:
+        duration = time.perf_counter() - start
+        logger.error("Analysis stage failed", stage=stage.name, error=str(e))
+        return StageResult(stage.name, STATUS_ERROR, duration, error=str(e))
+
+
+async def run_stages(stages: List[Stage], timeout: Optional[float] = None) -> StageReport:
+    """
+    Run stages concurrently, each under its own timeout (``timeout`` or
+    ``ANALYSIS_STAGE_TIMEOUT`` unless the stage sets one).
+    """
+    default_timeout = timeout if timeout is not None else settings.ANALYSIS_STAGE_TIMEOUT
+    results = await asyncio.gather(*(run_stage(stage, default_timeout) for stage in stages))
+    return StageReport(list(results))
@@ -4,9 +4,19 @@ AI-powered code analysis service for intelligent insights and suggestions
 
 import re
 import ast
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass
+from app.core.config import settings
 from app.core.logging import get_logger
+from .code_smells import (
+    DEEP_NESTING_LEVEL,
+    LONG_FUNCTION_LINES,
+    LONG_PARAMETER_LIST,
+    duplicate_blocks,
+    function_metrics,
+)
+from .parsed_source import ParsedSource
+from .rule_engine import Rule, RuleSet, ScanResult
 
 logger = get_logger(__name__)
 
@@ -35,155 +45,189 @@ class AlgorithmDetection:
     optimization_tips: List[str]
 
 
+ALGORITHM_PATTERNS = {
+    'binary_search': {
+        'patterns': [
+            r'while\s+left\s*<=\s*right',
+            r'mid\s*=\s*\(left\s*\+\s*right\)\s*//\s*2',
+            r'if\s+arr\[mid\]\s*==\s*target',
+            r'elif\s+arr\[mid\]\s*<\s*target'
+        ],
+        'complexity': 'O(log n)',
+        'description': 'Binary search algorithm for finding elements in sorted arrays',
+        'variations': ['recursive', 'iterative', 'lower_bound', 'upper_bound'],
+        'optimization_tips': [
+            'Use bit shifting for division by 2: mid = (left + right) >> 1',
+            'Avoid integer overflow: mid = left + (right - left) // 2',
+            'Consider using bisect module for Python'
+        ]
+    },
+    'quick_sort': {
+        'patterns': [
+            r'def\s+quick_sort',
+            r'pivot\s*=\s*arr\[',
+            r'partition\s*\(',
+            r'quick_sort\s*\(.*left.*\)',
+            r'quick_sort\s*\(.*right.*\)'
+        ],
+        'complexity': 'O(n log n) average, O(n²) worst case',
+        'description': 'Quick sort algorithm using divide and conquer',
+        'variations': ['lomuto', 'hoare', 'randomized', 'three_way'],
+        'optimization_tips': [
+            'Use median-of-three for pivot selection',
+            'Switch to insertion sort for small subarrays',
+            'Use three-way partitioning for duplicate elements'
+        ]
+    },
+    'dynamic_programming': {
+        'patterns': [
+            r'dp\s*=\s*\[',
+            r'memo\s*=\s*\{',
+            r'@lru_cache',
+            r'if\s+.*in\s+memo',
+            r'dp\[i\]\s*=\s*max\(',
+            r'dp\[i\]\s*=\s*min\('
+        ],
+        'complexity': 'Varies by problem',
+        'description': 'Dynamic programming with memoization',
+        'variations': ['top_down', 'bottom_up', 'space_optimized'],
+        'optimization_tips': [
+            'Use tabulation for better space efficiency',
+            'Consider rolling arrays for space optimization',
+            'Use bit manipulation for state compression'
+        ]
+    },
+    'dijkstra': {
+        'patterns': [
+            r'import\s+heapq',
+            r'heapq\.heappush',
+            r'heapq\.heappop',
+            r'distance\s*=\s*\[float\(',
+            r'while\s+pq'
+        ],
+        'complexity': 'O((V + E) log V)',
+        'description': "Dijkstra's shortest path algorithm",
+        'variations': ['priority_queue', 'fibonacci_heap', 'bidirectional'],
+        'optimization_tips': [
+            'Use Fibonacci heaps for better performance',
+            'Consider bidirectional search',
+            'Use A* with admissible heuristic'
+        ]
+    }
+}
+
+# Smells with a 'metric' are measured per function by code_smells, whose
+# linear passes replace regexes that backtracked badly on large files
+CODE_SMELLS = {
+    'long_function': {
+        'metric': 'length',
+        'threshold': LONG_FUNCTION_LINES,
+        'unit': 'lines',
+        'description': 'Function is too long and complex',
+        'suggestion': 'Break down into smaller, focused functions',
+        'severity': 'medium'
+    },
+    'deep_nesting': {
+        'metric': 'max_nesting',
+        'threshold': DEEP_NESTING_LEVEL,
+        'unit': 'nested levels',
+        'description': 'Code has too many nested levels',
+        'suggestion': 'Extract nested logic into separate functions',
+        'severity': 'medium'
+    },
+    'long_parameter_list': {
+        'metric': 'parameters',
+        'threshold': LONG_PARAMETER_LIST,
+        'unit': 'parameters',
+        'description': 'Function takes too many parameters',
+        'suggestion': 'Group related parameters into an object',
+        'severity': 'low'
+    },
+    'magic_numbers': {
+        'pattern': r'\b\d{2,}\b(?!\s*[a-zA-Z_])',
+        'description': 'Magic numbers without clear meaning',
+        'suggestion': 'Define constants with descriptive names',
+        'severity': 'low'
+    },
+    'duplicate_code': {
+        'description': 'Code duplication detected',
+        'suggestion': 'Extract common code into reusable functions',
+        'severity': 'high'
+    }
+}
+
+SECURITY_PATTERNS = {
+    'sql_injection': {
+        'patterns': [
+            r'f".*SELECT.*{.*}',
+            r'f".*INSERT.*{.*}',
+            r'f".*UPDATE.*{.*}',
+            r'f".*DELETE.*{.*}'
+        ],
+        'description': 'Potential SQL injection vulnerability',
+        'suggestion': 'Use parameterized queries or ORM',
+        'severity': 'critical'
+    },
+    'command_injection': {
+        'patterns': [
+            r'os\.system\(',
+            r'subprocess\.call\(',
+            r'eval\(',
+            r'exec\('
+        ],
+        'description': 'Potential command injection vulnerability',
+        'suggestion': 'Avoid executing user input directly',
+        'severity': 'critical'
+    },
+    'path_traversal': {
+        'patterns': [
+            r'open\(.*\+.*\)',
+            r'file\(.*\+.*\)'
+        ],
+        'description': 'Potential path traversal vulnerability',
+        'suggestion': 'Validate and sanitize file paths',
+        'severity': 'high'
+    }
+}
+
+# Every pattern above, compiled once into a single scan per source
+_RULES = RuleSet(
+    [Rule(f"algorithm:{name}", pattern, re.IGNORECASE, first_only=True)
+     for name, info in ALGORITHM_PATTERNS.items() for pattern in info['patterns']]
+    + [Rule(f"smell:{name}", info['pattern'], re.MULTILINE)
+       for name, info in CODE_SMELLS.items() if 'pattern' in info]
+    + [Rule(f"security:{name}", pattern, re.IGNORECASE)
+       for name, info in SECURITY_PATTERNS.items() for pattern in info['patterns']]
+)
+
+
 class AIAnalyzer:
     """AI-powered code analysis service"""
     
     def __init__(self):
-        self.algorithm_patterns = {
-            'binary_search': {
-                'patterns': [
-                    r'while\s+left\s*<=\s*right',
-                    r'mid\s*=\s*\(left\s*\+\s*right\)\s*//\s*2',
-                    r'if\s+arr\[mid\]\s*==\s*target',
-                    r'elif\s+arr\[mid\]\s*<\s*target'
-                ],
-                'complexity': 'O(log n)',
-                'description': 'Binary search algorithm for finding elements in sorted arrays',
-                'variations': ['recursive', 'iterative', 'lower_bound', 'upper_bound'],
-                'optimization_tips': [
-                    'Use bit shifting for division by 2: mid = (left + right) >> 1',
-                    'Avoid integer overflow: mid = left + (right - left) // 2',
-                    'Consider using bisect module for Python'
-                ]
-            },
-            'quick_sort': {
-                'patterns': [
-                    r'def\s+quick_sort',
-                    r'pivot\s*=\s*arr\[',
-                    r'partition\s*\(',
-                    r'quick_sort\s*\(.*left.*\)',
-                    r'quick_sort\s*\(.*right.*\)'
-                ],
-                'complexity': 'O(n log n) average, O(n²) worst case',
-                'description': 'Quick sort algorithm using divide and conquer',
-                'variations': ['lomuto', 'hoare', 'randomized', 'three_way'],
-                'optimization_tips': [
-                    'Use median-of-three for pivot selection',
-                    'Switch to insertion sort for small subarrays',
-                    'Use three-way partitioning for duplicate elements'
-                ]
-            },
-            'dynamic_programming': {
-                'patterns': [
-                    r'dp\s*=\s*\[',
-                    r'memo\s*=\s*\{',
-                    r'@lru_cache',
-                    r'if\s+.*in\s+memo',
-                    r'dp\[i\]\s*=\s*max\(',
-                    r'dp\[i\]\s*=\s*min\('
-                ],
-                'complexity': 'Varies by problem',
-                'description': 'Dynamic programming with memoization',
-                'variations': ['top_down', 'bottom_up', 'space_optimized'],
-                'optimization_tips': [
-                    'Use tabulation for better space efficiency',
-                    'Consider rolling arrays for space optimization',
-                    'Use bit manipulation for state compression'
-                ]
-            },
-            'dijkstra': {
-                'patterns': [
-                    r'import\s+heapq',
-                    r'heapq\.heappush',
-                    r'heapq\.heappop',
-                    r'distance\s*=\s*\[float\(',
-                    r'while\s+pq'
-                ],
-                'complexity': 'O((V + E) log V)',
-                'description': "Dijkstra's shortest path algorithm",
-                'variations': ['priority_queue', 'fibonacci_heap', 'bidirectional'],
-                'optimization_tips': [
-                    'Use Fibonacci heaps for better performance',
-                    'Consider bidirectional search',
-                    'Use A* with admissible heuristic'
-                ]
-            }
-        }
-        
-        self.code_smells = {
-            'long_function': {
-                'pattern': r'def\s+\w+\([^)]*\):[\s\S]{500,}',
-                'description': 'Function is too long and complex',
-                'suggestion': 'Break down into smaller, focused functions',
-                'severity': 'medium'
-            },
-            'deep_nesting': {
-                'pattern': r'(\s+){12,}(if|for|while|try)',
-                'description': 'Code has too many nested levels',
-                'suggestion': 'Extract nested logic into separate functions',
-                'severity': 'medium'
-            },
-            'magic_numbers': {
-                'pattern': r'\b\d{2,}\b(?!\s*[a-zA-Z_])',
-                'description': 'Magic numbers without clear meaning',
-                'suggestion': 'Define constants with descriptive names',
-                'severity': 'low'
-            },
-            'duplicate_code': {
-                'pattern': r'(.{20,})\1',
-                'description': 'Code duplication detected',
-                'suggestion': 'Extract common code into reusable functions',
-                'severity': 'high'
-            }
-        }
-        
-        self.security_patterns = {
-            'sql_injection': {
-                'patterns': [
-                    r'f".*SELECT.*{.*}',
-                    r'f".*INSERT.*{.*}',
-                    r'f".*UPDATE.*{.*}',
-                    r'f".*DELETE.*{.*}'
-                ],
-                'description': 'Potential SQL injection vulnerability',
-                'suggestion': 'Use parameterized queries or ORM',
-                'severity': 'critical'
-            },
-            'command_injection': {
-                'patterns': [
-                    r'os\.system\(',
-                    r'subprocess\.call\(',
-                    r'eval\(',
-                    r'exec\('
-                ],
-                'description': 'Potential command injection vulnerability',
-                'suggestion': 'Avoid executing user input directly',
-                'severity': 'critical'
-            },
-            'path_traversal': {
-                'patterns': [
-                    r'open\(.*\+.*\)',
-                    r'file\(.*\+.*\)'
-                ],
-                'description': 'Potential path traversal vulnerability',
-                'suggestion': 'Validate and sanitize file paths',
-                'severity': 'high'
-            }
-        }
+        self.algorithm_patterns = ALGORITHM_PATTERNS
+        self.code_smells = CODE_SMELLS
+        self.security_patterns = SECURITY_PATTERNS
     
-    async def analyze_code_intelligence(self, code: str, language: str) -> Dict[str, Any]:
+    async def analyze_code_intelligence(self, code: Union[str, ParsedSource], language: str) -> Dict[str, Any]:
         """
         Perform comprehensive AI-powered code analysis
         """
+        source = ParsedSource.coerce(code, language)
+        code = source.code
         try:
             logger.info("Starting AI code analysis", language=language)
             
             insights = []
             detected_algorithms = []
+            # One pass over the source finds matches for every pattern rule
+            scan = _RULES.scan(code, lowered=source.lower, budget=settings.RULE_SCAN_BUDGET_MS / 1000)
+            if not scan.complete:
+                logger.warning("Pattern scan stopped at its time budget", language=language, size=len(code))
             
             # Detect algorithms
             for algo_name, algo_info in self.algorithm_patterns.items():
-                confidence = self._calculate_algorithm_confidence(code, algo_info['patterns'])
+                confidence = self._calculate_algorithm_confidence(scan, algo_name, algo_info['patterns'])
                 if confidence > 0.3:  # Threshold for detection
                     detected_algorithms.append(AlgorithmDetection(
                         name=algo_name,
@@ -196,23 +240,28 @@ class AIAnalyzer:
             
             # Detect code smells
             for smell_name, smell_info in self.code_smells.items():
-                matches = re.finditer(smell_info['pattern'], code, re.MULTILINE)
-                for match in matches:
+                if 'pattern' in smell_info:
+                    found = [
+                        (self._get_line_number(source, match.start()), match.group(), smell_info['description'])
+                        for _, matches in scan.group(f"smell:{smell_name}") for match in matches
+                    ]
+                else:
+                    found = self._find_structural_smells(source, smell_name, smell_info)
+                for line_number, snippet, description in found:
                     insights.append(CodeInsight(
                         type='code_smell',
                         severity=smell_info['severity'],
                         title=f"{smell_name.replace('_', ' ').title()}",
-                        description=smell_info['description'],
+                        description=description,
                         suggestion=smell_info['suggestion'],
-                        line_number=self._get_line_number(code, match.start()),
-                        code_snippet=match.group(),
+                        line_number=line_number,
+                        code_snippet=snippet,
                         impact_score=self._calculate_impact_score(smell_info['severity'])
                     ))
             
             # Detect security issues
             for sec_name, sec_info in self.security_patterns.items():
-                for pattern in sec_info['patterns']:
-                    matches = re.finditer(pattern, code, re.IGNORECASE)
+                for _, matches in scan.group(f"security:{sec_name}"):
                     for match in matches:
                         insights.append(CodeInsight(
                             type='security',
@@ -220,13 +269,13 @@ class AIAnalyzer:
                             title=f"{sec_name.replace('_', ' ').title()}",
                             description=sec_info['description'],
                             suggestion=sec_info['suggestion'],
-                            line_number=self._get_line_number(code, match.start()),
+                            line_number=self._get_line_number(source, match.start()),
                             code_snippet=match.group(),
                             impact_score=self._calculate_impact_score(sec_info['severity'])
                         ))
             
             # Analyze code quality
-            quality_insights = self._analyze_code_quality(code, language)
+            quality_insights = self._analyze_code_quality(source, language)
             insights.extend(quality_insights)
             
             # Generate intelligent suggestions
@@ -257,25 +306,42 @@ class AIAnalyzer:
                 "quality_score": 0.0
             }
     
-    def _calculate_algorithm_confidence(self, code: str, patterns: List[str]) -> float:
+    def _calculate_algorithm_confidence(self, scan: ScanResult, algo_name: str, patterns: List[str]) -> float:
         """Calculate confidence score for algorithm detection"""
-        matches = 0
+        matches = scan.matched(f"algorithm:{algo_name}")
         total_patterns = len(patterns)
         
-        for pattern in patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                matches += 1
-        
         return matches / total_patterns if total_patterns > 0 else 0.0
     
-    def _analyze_code_quality(self, code: str, language: str) -> List[CodeInsight]:
+    def _find_structural_smells(
+        self, source: ParsedSource, smell_name: str, smell_info: Dict[str, Any]
+    ) -> List[Tuple[int, str, str]]:
+        """(line, snippet, description) for each occurrence of a measured smell"""
+        if smell_name == 'duplicate_code':
+            return [
+                (block.line, block.snippet,
+                 f"{smell_info['description']}: {block.lines} lines repeat line {block.first_line}")
+                for block in duplicate_blocks(source)
+            ]
+        found = []
+        for function in function_metrics(source, source.language) or []:
+            value = getattr(function, smell_info['metric'])
+            if value >= smell_info['threshold']:
+                found.append((
+                    function.line,
+                    function.signature,
+                    f"{smell_info['description']}: {function.name} has {value} {smell_info['unit']}",
+                ))
+        return found
+    
+    def _analyze_code_quality(self, source: ParsedSource, language: str) -> List[CodeInsight]:
         """Analyze code quality metrics"""
         insights = []
         
         # Analyze function complexity
         if language == 'python':
             try:
-                tree = ast.parse(code)
+                tree = source.python_ast
                 for node in ast.walk(tree):
                     if isinstance(node, ast.FunctionDef):
                         complexity = self._calculate_function_complexity(node)
@@ -293,7 +359,7 @@ class AIAnalyzer:
                 pass
         
         # Analyze naming conventions
-        naming_issues = self._check_naming_conventions(code, language)
+        naming_issues = self._check_naming_conventions(source.code, language)
         insights.extend(naming_issues)
         
         return insights
@@ -390,9 +456,9 @@ class AIAnalyzer:
         }
         return severity_scores.get(severity, 0.0)
     
-    def _get_line_number(self, code: str, position: int) -> int:
+    def _get_line_number(self, source: ParsedSource, position: int) -> int:
         """Get line number from character position"""
-        return code[:position].count('\n') + 1
+        return source.line_number(position)
     
     def _insight_to_dict(self, insight: CodeInsight) -> Dict[str, Any]:
         """Convert CodeInsight to dictionary"""
@@ -0,0 +1,227 @@
+"""
+Process-pool analysis engine for the CPU-bound analyzers
+
+The complexity, optimization, AI and visualization analyzers are pure
+Python, so running them on the event loop (or in threads) lets one heavy
+batch hold the GIL and stall every other request. ``AnalysisEngine`` runs
+them in a warm ``ProcessPoolExecutor`` instead: each worker imports and
+constructs the analyzers and renders the static charts once, in its
+initializer, and then serves jobs.
+
+Jobs carry only ``(code, language)`` pairs plus an options dict, and each
+file's analysis comes back as orjson bytes, which pickle as a single
+buffer. Batches are sent in chunks of ``ANALYSIS_CHUNK_SIZE`` files so the
+per-task overhead is paid per chunk rather than per file.
+
+With ``ANALYSIS_WORKERS=0`` the engine runs jobs inline, in-process, which
+is what tests and single-process development use. Inline jobs share one
+set of analyzers and the process's result cache, and CPython's
+``ast.parse`` is not thread-safe, so they run one at a time.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.serialization import dumps
+
+logger = get_logger(__name__)
+
+ANALYSIS_TYPES = ("ast", "complexity", "optimization", "ai_insights")
+
+# Analyzers and event loop of the current worker, built once by _init_worker
+_worker_state: Optional[Dict[str, Any]] = None
+# Held by the inline job running in this process
+_inline_lock = threading.Lock()
+
+
+def _init_worker() -> None:
+    global _worker_state
+    from .ai_analyzer import AIAnalyzer
+    from .code_analyzer import CodeAnalyzer
+    from .complexity_analyzer import ComplexityAnalyzer
+    from .optimization_service import OptimizationService
+    from .visualization import VisualizationService, render_static_charts
+
+    _worker_state = {
+        "loop": asyncio.new_event_loop(),
+        "ast": CodeAnalyzer(),
+        "complexity": ComplexityAnalyzer(),
+        "optimization": OptimizationService(),
+        "ai_insights": AIAnalyzer(),
+        "visualization": VisualizationService(),
+    }
+    if settings.ENABLE_VISUALIZATION:
+        render_static_charts()
+
+
+def _init_pool_worker() -> None:
+    from app.core.cache import init_cache
+
+    _init_worker()
+    # Each worker process reaches the shared result cache through its own connection
+    _worker_state["loop"].run_until_complete(init_cache())
+
+
+def _warm_up() -> bool:
+    """Runs once per worker when the pool starts, so the first job pays no import cost"""
+    return _worker_state is not None
+
+
+async def _with_refreshes(coroutine: Awaitable[Any]) -> Any:
+    """
+    Run an analyzer, then the result cache refreshes it started: the loop
+    only runs during a job (inline, only during this call), so a refresh
+    left behind would not finish until the next job, or ever
+    """
+    from app.core import cache
+
+    try:
+        return await coroutine
+    finally:
+        if cache.cache_manager is not None:
+            await cache.cache_manager.drain_refreshes()
+
+
+def _analyze_file(code: str, language: str, options: Dict[str, Any], run: Callable[[Any], Any]) -> Dict[str, Any]:
+    from .parsed_source import ParsedSource
+
+    state = _worker_state
+    # Parsed once here and shared by every analyzer below
+    source = ParsedSource(code, language)
+    analysis: Dict[str, Any] = {}
+    types = options.get("analysis_types", ANALYSIS_TYPES)
+
+    if "ast" in types:
+        analysis["ast"] = run(state["ast"].analyze_ast(source, language, ast_format=options.get("ast_format", "tree")))
+    if "complexity" in types:
+        analysis["complexity"] = run(state["complexity"].analyze_complexity(source, language))
+    if "optimization" in types:
+        analysis["optimization"] = run(state["optimization"].analyze_optimization_opportunities(source, language))
+    if "ai_insights" in types:
+        analysis["ai_insights"] = run(state["ai_insights"].analyze_code_intelligence(source, language))
+    if options.get("include_visualizations"):
+        # Batch files are not executed, so there is no trace and no memory chart
+        analysis["visualization"] = run(state["visualization"].generate_visualizations(
+            source, language, [], output_format=options.get("visualization_format", "png")
+        ))
+    return analysis
+
+
+def _analyze_chunk(
+    files: Sequence[Tuple[str, str]], options: Dict[str, Any], run: Optional[Callable[[Any], Any]] = None
+) -> List[bytes]:
+    """
+    Analyze each file of a chunk; a file that fails yields ``{"error": ...}``
+    without failing the rest of the chunk. ``run`` drives the analyzer
+    coroutines, by default on the worker's own event loop.
+    """
+    if _worker_state is None:
+        _init_worker()
+    run = run or _worker_state["loop"].run_until_complete
+
+    def drive(coroutine: Awaitable[Any]) -> Any:
+        return run(_with_refreshes(coroutine))
+
+    results = []
+    for code, language in files:
+        try:
+            result: Dict[str, Any] = {"analysis": _analyze_file(code, language, options, drive)}
+        except Exception as e:
+            result = {"error": str(e)}
+        results.append(dumps(result))
+    return results
+
+
+def _analyze_inline(files: Sequence[Tuple[str, str]], options: Dict[str, Any]) -> List[bytes]:
+    """``_analyze_chunk`` in this process, one chunk at a time, each analyzer call on its own loop"""
+    with _inline_lock:
+        return _analyze_chunk(files, options, asyncio.run)
+
+
+class AnalysisEngine:
+    """Dispatches analysis jobs to a pool of warm worker processes"""
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        self.workers = workers if workers is not None else settings.ANALYSIS_WORKERS
+        self.chunk_size = max(1, chunk_size if chunk_size is not None else settings.ANALYSIS_CHUNK_SIZE)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the workers and wait until each has built its analyzers"""
+        if self.workers <= 0:
+            if _worker_state is None:
+                _init_worker()
+            return
+        with self._lock:
+            if self._pool is not None:
+                return
+            # Spawned workers do not inherit the server's threads or open sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pool_worker,
+            )
+            pool = self._pool
+        for future in [pool.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+        logger.info("Analysis engine started", workers=self.workers, chunk_size=self.chunk_size)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+            logger.info("Analysis engine stopped")
+
+    async def analyze(self, code: str, language: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analyze one file; the result has "analysis" or "error" """
+        results = await self.analyze_many([(code, language)], options)
+        return results[0]
+
+    async def analyze_many(
+        self, files: Sequence[Tuple[str, str]], options: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Analyze files in chunks spread over the workers, returning results in input order"""
+        options = options or {}
+        chunks = [list(files[i:i + self.chunk_size]) for i in range(0, len(files), self.chunk_size)]
+        if self.workers <= 0:
+            # Inline: off the event loop, but in this process
+            encoded = [await asyncio.to_thread(_analyze_inline, chunk, options) for chunk in chunks]
+        else:
+            if self._pool is None:
+                # Normally done at application startup; spawning workers blocks
+                await asyncio.to_thread(self.start)
+            loop = asyncio.get_running_loop()
+            try:
+                encoded = await asyncio.gather(*(
+                    loop.run_in_executor(self._pool, _analyze_chunk, chunk, options) for chunk in chunks
+                ))
+            except BrokenProcessPool:
+                # A worker died (out of memory, crash); replace the pool for later requests
+                logger.error("Analysis worker died; restarting the pool")
+                self.shutdown()
+                raise
+        return [orjson.loads(result) for chunk in encoded for result in chunk]
+
+
+# Global analysis engine
+analysis_engine: Optional[AnalysisEngine] = None
+
+
+def get_analysis_engine() -> AnalysisEngine:
+    """Get the analysis engine instance"""
+    global analysis_engine
+
+    if not analysis_engine:
+        analysis_engine = AnalysisEngine()
+
+    return analysis_engine
@@ -0,0 +1,201 @@
+"""
+Animated data-structure visualizations
+
+``simulate`` replays a list of operations on a stack, queue or array and
+returns one ``Frame`` per state. ``render_animation`` draws them into a
+single animated image (GIF, APNG or WebP):
+
+- The figure, the cells and their labels are built once, sized for the
+  largest state, and every frame only updates those artists in place.
+- The static parts (axes, index labels) are drawn once and saved as a
+  background; each frame restores it and blits the updated artists, so a
+  frame costs a few ``draw_artist`` calls instead of a full redraw.
+- Frames are collected as raw RGBA buffers and encoded together by Pillow.
+
+At most ``MAX_VISUALIZATION_POINTS`` frames are drawn; longer runs are
+sampled evenly, keeping the first and last state.
+"""
+
+import io
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import matplotlib.patches as patches
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from app.core.config import settings
+
+STRUCTURES = ('stack', 'queue', 'array')
+
+# Pillow format name and MIME type of each animated output
+ANIMATION_FORMATS: Dict[str, Tuple[str, str]] = {
+    'gif': ('GIF', 'image/gif'),
+    'apng': ('PNG', 'image/apng'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+CELL_COLOR = 'lightblue'
+HIGHLIGHT_COLOR = 'orange'
+# Longest element label drawn in a cell
+MAX_LABEL = 8
+
+
+@dataclass
+class Frame:
+    """One state of the structure: its elements, the touched index and a caption"""
+    elements: List[Any]
+    caption: str
+    highlight: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'elements': self.elements, 'caption': self.caption, 'highlight': self.highlight}
+
+
+@dataclass
+class AnimationResult:
+    """An encoded animation and how long it took to make"""
+    data: bytes
+    format: str
+    frames: int
+    render_ms_per_frame: float
+    encode_ms: float
+
+
+def _apply(structure_type: str, elements: List[Any], op: Dict[str, Any]) -> Tuple[str, Optional[int]]:
+    """Apply one operation in place; returns its caption and the index it touched"""
+    kind = op['type']
+    if structure_type == 'stack':
+        if kind == 'push':
+            elements.append(op['value'])
+            return f"PUSH {op['value']}", len(elements) - 1
+        if kind == 'pop':
+            value = elements.pop() if elements else None
+            return f"POP {'' if value is None else value}".rstrip(), None
+    elif structure_type == 'queue':
+        if kind in ('enqueue', 'push'):
+            elements.append(op['value'])
+            return f"ENQUEUE {op['value']}", len(elements) - 1
+        if kind in ('dequeue', 'pop'):
+            value = elements.pop(0) if elements else None
+            return f"DEQUEUE {'' if value is None else value}".rstrip(), 0 if elements else None
+    elif structure_type == 'array':
+        if kind == 'set':
+            elements[op['index']] = op['value']
+            return f"SET [{op['index']}] = {op['value']}", op['index']
+        if kind == 'swap':
+            i, j = op['i'], op['j']
+            elements[i], elements[j] = elements[j], elements[i]
+            return f"SWAP [{i}] <-> [{j}]", j
+        if kind in ('append', 'push'):
+            elements.append(op['value'])
+            return f"APPEND {op['value']}", len(elements) - 1
+        if kind == 'insert':
+            elements.insert(op['index'], op['value'])
+            return f"INSERT [{op['index']}] = {op['value']}", op['index']
+        if kind in ('remove', 'pop'):
+            index = op.get('index', len(elements) - 1)
+            value = elements.pop(index)
+            return f"REMOVE [{index}] = {value}", None
+    raise ValueError(f"Unsupported {structure_type} operation: {kind}")
+
+
+def simulate(structure_type: str, operations: List[Dict[str, Any]], initial: Optional[List[Any]] = None) -> List[Frame]:
+    """The initial state and the state after each operation"""
+    if structure_type not in STRUCTURES:
+        raise ValueError(f"Unsupported structure type: {structure_type}")
+    elements = list(initial or [])
+    frames = [Frame(list(elements), 'INITIAL')]
+    for op in operations:
+        caption, highlight = _apply(structure_type, elements, op)
+        frames.append(Frame(list(elements), caption, highlight))
+    return frames
+
+
+def sample_frames(frames: List[Frame], limit: int) -> List[Frame]:
+    """At most ``limit`` frames, evenly spaced, keeping the first and the last"""
+    if len(frames) <= limit:
+        return frames
+    if limit < 2:
+        return frames[-1:]
+    last = len(frames) - 1
+    return [frames[round(i * last / (limit - 1))] for i in range(limit)]
+
+
+def _cell_positions(structure_type: str, capacity: int) -> List[Tuple[float, float]]:
+    if structure_type == 'stack':
+        # Bottom to top
+        return [(0.0, float(i)) for i in range(capacity)]
+    return [(float(i), 0.0) for i in range(capacity)]
+
+
+def render_animation(
+    structure_type: str, frames: List[Frame], animation_format: str = 'apng', frame_ms: Optional[int] = None
+) -> AnimationResult:
+    """Draw ``frames`` with artist reuse and blitting, and encode them as one animation"""
+    pillow_format, _ = ANIMATION_FORMATS[animation_format]
+    frame_ms = frame_ms or settings.ANIMATION_DURATION
+    capacity = max(1, max(len(frame.elements) for frame in frames))
+    positions = _cell_positions(structure_type, capacity)
+
+    vertical = structure_type == 'stack'
+    cells_across = 1 if vertical else capacity
+    cells_down = capacity if vertical else 1
+    figure = Figure(figsize=(min(16, 1.5 + 0.9 * cells_across), min(12, 1.8 + 0.9 * cells_down)), dpi=80)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_axes((0.05, 0.05, 0.9, 0.8))
+    ax.set_xlim(-0.6, cells_across - 0.4)
+    ax.set_ylim(-0.8 if not vertical else -0.6, cells_down - 0.4)
+    ax.set_aspect('equal')
+    ax.axis('off')
+    if structure_type == 'array':
+        for i, (x, y) in enumerate(positions):
+            ax.text(x, y - 0.65, str(i), ha='center', va='center', fontsize=8, color='gray')
+    elif structure_type == 'queue':
+        ax.text(-0.6, 0.65, 'front', ha='left', va='center', fontsize=8, color='gray')
+
+    # The artists every frame updates; drawn only through draw_artist
+    cells = []
+    labels = []
+    for x, y in positions:
+        cell = patches.Rectangle((x - 0.42, y - 0.42), 0.84, 0.84, facecolor=CELL_COLOR, edgecolor='black', animated=True)
+        ax.add_patch(cell)
+        cells.append(cell)
+        labels.append(ax.text(x, y, '', ha='center', va='center', fontsize=11, fontweight='bold', animated=True))
+    caption = figure.text(0.5, 0.93, '', ha='center', va='center', fontsize=12, animated=True)
+
+    canvas.draw()
+    background = canvas.copy_from_bbox(figure.bbox)
+
+    images = []
+    start = time.perf_counter()
+    for frame in frames:
+        canvas.restore_region(background)
+        for index, (cell, label) in enumerate(zip(cells, labels)):
+            if index < len(frame.elements):
+                cell.set_facecolor(HIGHLIGHT_COLOR if index == frame.highlight else CELL_COLOR)
+                label.set_text(str(frame.elements[index])[:MAX_LABEL])
+                ax.draw_artist(cell)
+                ax.draw_artist(label)
+        caption.set_text(f'{structure_type.title()}: {frame.caption}')
+        figure.draw_artist(caption)
+        images.append(Image.fromarray(np.asarray(canvas.buffer_rgba())).convert('RGB'))
+    render_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    images[0].save(
+        buffer, format=pillow_format, save_all=True, append_images=images[1:], duration=frame_ms, loop=0
+    )
+    encode_seconds = time.perf_counter() - start
+
+    return AnimationResult(
+        data=buffer.getvalue(),
+        format=animation_format,
+        frames=len(frames),
+        render_ms_per_frame=render_seconds * 1000 / len(frames),
+        encode_ms=encode_seconds * 1000,
+    )
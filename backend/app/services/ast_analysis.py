@@ -0,0 +1,273 @@
+"""
+Single-pass AST analysis
+
+Each analysis is an ``AnalysisPass`` that declares which node types it
+handles. ``ASTAnalysisEngine`` walks the tree once, dispatches every node to
+the passes registered for its type and builds the serialized tree in the
+same walk, so adding an analysis does not add another traversal.
+"""
+
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+
+class WalkSummary(NamedTuple):
+    """Whole-tree figures collected by the engine itself"""
+    total_nodes: int
+    max_depth: int
+
+
+class AnalysisPass(ABC):
+    """
+    Base class for an analysis that runs during the shared traversal.
+
+    ``handles`` must depend only on the node type: the engine caches its
+    answer per distinct type and only calls ``visit`` for matching nodes.
+    A fresh instance is created for every run.
+    """
+
+    key: str = ""
+
+    @classmethod
+    def handles(cls, node_type: str) -> bool:
+        return False
+
+    @abstractmethod
+    def visit(self, node, depth: int) -> None:
+        ...
+
+    @abstractmethod
+    def result(self, summary: WalkSummary) -> Any:
+        ...
+
+
+@lru_cache(maxsize=None)
+def _statistics_category(node_type: str) -> Optional[str]:
+    if "Function" in node_type:
+        return "function_definitions"
+    elif "Assign" in node_type:
+        return "variable_assignments"
+    elif "For" in node_type or "While" in node_type:
+        return "loops"
+    elif "If" in node_type:
+        return "conditionals"
+    return None
+
+
+class StatisticsPass(AnalysisPass):
+    """Node counts by category plus tree size and depth"""
+
+    key = "statistics"
+
+    def __init__(self):
+        self.counts = {
+            "function_definitions": 0,
+            "variable_assignments": 0,
+            "loops": 0,
+            "conditionals": 0,
+        }
+
+    @classmethod
+    def handles(cls, node_type: str) -> bool:
+        return _statistics_category(node_type) is not None
+
+    def visit(self, node, depth: int) -> None:
+        self.counts[_statistics_category(node.node_type)] += 1
+
+    def result(self, summary: WalkSummary) -> Dict[str, Any]:
+        return {
+            "total_nodes": summary.total_nodes,
+            "function_definitions": self.counts["function_definitions"],
+            "variable_assignments": self.counts["variable_assignments"],
+            "loops": self.counts["loops"],
+            "conditionals": self.counts["conditionals"],
+            "max_depth": summary.max_depth,
+        }
+
+
+class _ListPass(AnalysisPass):
+    """A pass that collects one entry per matching node"""
+
+    def __init__(self):
+        self.items: List[Dict[str, Any]] = []
+
+    def result(self, summary: WalkSummary) -> List[Dict[str, Any]]:
+        return self.items
+
+
+class ComplexityIndicatorPass(_ListPass):
+    """Loops and conditionals with their per-node cost"""
+
+    key = "complexity_indicators"
+
+    @classmethod
+    def handles(cls, node_type: str) -> bool:
+        return "For" in node_type or "While" in node_type or "If" in node_type
+
+    def visit(self, node, depth: int) -> None:
+        if "For" in node.node_type or "While" in node.node_type:
+            self.items.append({"type": "loop", "line": node.line_number, "complexity": "O(n)"})
+        else:
+            self.items.append({"type": "conditional", "line": node.line_number, "complexity": "O(1)"})
+
+
+class DataStructurePass(_ListPass):
+    """Container literals and constructors"""
+
+    key = "data_structures"
+
+    @classmethod
+    def handles(cls, node_type: str) -> bool:
+        lowered = node_type.lower()
+        return any(ds in lowered for ds in ["list", "dict", "set", "tuple", "array"])
+
+    def visit(self, node, depth: int) -> None:
+        self.items.append({"type": str(node.node_type), "line": node.line_number, "usage": "data_storage"})
+
+
+class AlgorithmPass(_ListPass):
+    """Simple pattern matching for common algorithms"""
+
+    key = "algorithms"
+
+    @classmethod
+    def handles(cls, node_type: str) -> bool:
+        return "Sort" in node_type or "Search" in node_type
+
+    def visit(self, node, depth: int) -> None:
+        if "Sort" in node.node_type:
+            self.items.append({"type": "sorting", "line": node.line_number, "algorithm": "sort"})
+        else:
+            self.items.append({"type": "searching", "line": node.line_number, "algorithm": "search"})
+
+
+class FunctionPass(_ListPass):
+    """Function definitions"""
+
+    key = "functions"
+
+    @classmethod
+    def handles(cls, node_type: str) -> bool:
+        return "Function" in node_type
+
+    def visit(self, node, depth: int) -> None:
+        self.items.append({
+            "name": getattr(node, 'name', 'anonymous'),
+            "line": node.line_number,
+            "type": str(node.node_type),
+        })
+
+
+class VariablePass(_ListPass):
+    """Variable assignments"""
+
+    key = "variables"
+
+    @classmethod
+    def handles(cls, node_type: str) -> bool:
+        return "Assign" in node_type
+
+    def visit(self, node, depth: int) -> None:
+        self.items.append({"line": node.line_number, "type": "assignment"})
+
+
+DEFAULT_PASSES: Tuple[Type[AnalysisPass], ...] = (
+    StatisticsPass,
+    ComplexityIndicatorPass,
+    DataStructurePass,
+    AlgorithmPass,
+    FunctionPass,
+    VariablePass,
+)
+
+
+def _node_dict(node) -> Dict[str, Any]:
+    return {
+        "node_type": str(node.node_type),
+        "line_number": node.line_number,
+        "column": node.column,
+        "value": str(node.value) if node.value is not None else None,
+        "start_byte": node.start_byte,
+        "end_byte": node.end_byte,
+        "children": [],
+    }
+
+
+class ASTAnalysisEngine:
+    """Runs a set of analysis passes over an ASTNode tree in one traversal"""
+
+    def __init__(self, passes: Sequence[Type[AnalysisPass]] = DEFAULT_PASSES):
+        self.passes = tuple(passes)
+        self._dispatch: Dict[str, Tuple[int, ...]] = {}
+
+    def _handlers_for(self, node_type: str) -> Tuple[int, ...]:
+        handlers = self._dispatch.get(node_type)
+        if handlers is None:
+            handlers = tuple(i for i, cls in enumerate(self.passes) if cls.handles(node_type))
+            self._dispatch[node_type] = handlers
+        return handlers
+
+    def run(self, root, include_tree: bool = True) -> Dict[str, Any]:
+        """
+        Walk the tree once in pre-order and return every pass result keyed by
+        ``AnalysisPass.key``, plus the JSON-ready tree under ``"ast"``.
+        """
+        instances = [cls() for cls in self.passes]
+        dispatch = self._dispatch
+        total_nodes = 0
+        max_depth = 0
+
+        root_dict = _node_dict(root) if include_tree else None
+        stack: List[Tuple[Any, int, Optional[Dict[str, Any]]]] = [(root, 0, root_dict)]
+        while stack:
+            node, depth, node_dict = stack.pop()
+            total_nodes += 1
+            if depth > max_depth:
+                max_depth = depth
+
+            node_type = node.node_type
+            handlers = dispatch.get(node_type)
+            if handlers is None:
+                handlers = self._handlers_for(node_type)
+            for index in handlers:
+                instances[index].visit(node, depth)
+
+            children = node.children
+            if not children:
+                continue
+            if node_dict is not None:
+                # Child dicts are attached in source order; the reversed push
+                # keeps the walk pre-order so list results keep that order too
+                child_dicts = [_node_dict(child) for child in children]
+                node_dict["children"] = child_dicts
+                stack.extend(zip(reversed(children), [depth + 1] * len(children), reversed(child_dicts)))
+            else:
+                stack.extend((child, depth + 1, None) for child in reversed(children))
+
+        summary = WalkSummary(total_nodes=total_nodes, max_depth=max_depth)
+        results: Dict[str, Any] = {}
+        if include_tree:
+            results["ast"] = root_dict
+        for instance in instances:
+            results[instance.key] = instance.result(summary)
+        return results
+
+    def run_store(self, store) -> Dict[str, Any]:
+        """
+        Run the passes over an ``ASTStore``. Nodes are already in pre-order,
+        so this is a single scan of the type column; a node view is only
+        built for nodes some pass handles.
+        """
+        instances = [cls() for cls in self.passes]
+        handlers_by_id = [self._handlers_for(node_type) for node_type in store.node_types]
+        for index, type_id in enumerate(store.type_id):
+            handlers = handlers_by_id[type_id]
+            if handlers:
+                view = store.node(index)
+                depth = store.depth[index]
+                for handler in handlers:
+                    instances[handler].visit(view, depth)
+
+        summary = WalkSummary(total_nodes=len(store), max_depth=store.max_depth())
+        return {instance.key: instance.result(summary) for instance in instances}
@@ -0,0 +1,239 @@
+"""
+Compact struct-of-arrays AST representation
+
+Nodes are stored in pre-order as parallel integer columns (type id, parent
+index, depth, line, column, start/end byte) with an interned node-type
+table, instead of one Python object and one dict per node. Pre-order means
+every parent index is smaller than its children's and each subtree is a
+contiguous slice. Source text is only kept for leaf nodes, in a sparse map.
+"""
+
+import ast
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from .tree_sitter_parser import get_parser, parse_source, walk_tree_sitter
+
+# Column type code: signed 32-bit integers
+_INT = "i"
+# Byte offsets are unknown for nodes built from Python's ast module
+NO_BYTE = -1
+
+
+def is_loop_type(node_type: str) -> bool:
+    """Loop node types for both Python ast and tree-sitter grammars"""
+    return (
+        "For" in node_type
+        or "While" in node_type
+        or node_type.startswith(("for_", "while_", "do_", "enhanced_for", "loop_"))
+        or node_type.endswith("_loop")
+    )
+
+
+class ASTNodeView:
+    """Read-only view of one stored node, shaped like ``ASTNode`` without children"""
+
+    __slots__ = ("node_type", "line_number", "column", "value", "start_byte", "end_byte")
+
+    def __init__(self, node_type, line_number, column, value, start_byte, end_byte):
+        self.node_type = node_type
+        self.line_number = line_number
+        self.column = column
+        self.value = value
+        self.start_byte = start_byte
+        self.end_byte = end_byte
+
+
+class ASTStore:
+    """AST held as parallel integer columns in pre-order"""
+
+    def __init__(self):
+        self.node_types: List[str] = []
+        self._type_ids: Dict[str, int] = {}
+        self.type_id = array(_INT)
+        self.parent = array(_INT)
+        self.depth = array(_INT)
+        self.line = array(_INT)
+        self.column = array(_INT)
+        self.start_byte = array(_INT)
+        self.end_byte = array(_INT)
+        self.values: Dict[int, str] = {}
+        self.truncated = False
+
+    def __len__(self) -> int:
+        return len(self.type_id)
+
+    def intern(self, node_type: str) -> int:
+        """Return the id for a node type, adding it to the table if new"""
+        type_id = self._type_ids.get(node_type)
+        if type_id is None:
+            type_id = self._type_ids[node_type] = len(self.node_types)
+            self.node_types.append(node_type)
+        return type_id
+
+    def append(self, node_type: str, parent: int, depth: int, line: int, column: int,
+               start_byte: int = NO_BYTE, end_byte: int = NO_BYTE, value: Optional[str] = None) -> int:
+        """Append a node after its parent (pre-order) and return its index"""
+        index = len(self.type_id)
+        self.type_id.append(self.intern(node_type))
+        self.parent.append(parent)
+        self.depth.append(depth)
+        self.line.append(line)
+        self.column.append(column)
+        self.start_byte.append(start_byte)
+        self.end_byte.append(end_byte)
+        if value is not None:
+            self.values[index] = value
+        return index
+
+    def node(self, index: int) -> ASTNodeView:
+        """Materialize a lightweight view of one node"""
+        start = self.start_byte[index]
+        end = self.end_byte[index]
+        return ASTNodeView(
+            self.node_types[self.type_id[index]],
+            self.line[index],
+            self.column[index],
+            self.values.get(index),
+            None if start == NO_BYTE else start,
+            None if end == NO_BYTE else end,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the integer columns"""
+        return sum(column.itemsize * len(column) for column in (
+            self.type_id, self.parent, self.depth, self.line, self.column, self.start_byte, self.end_byte,
+        ))
+
+    # Builders
+
+    @classmethod
+    def from_python_ast(cls, tree: ast.AST) -> "ASTStore":
+        """Build from a Python ``ast`` tree, matching ``CodeAnalyzer`` node fields"""
+        store = cls()
+        stack: List[Tuple[ast.AST, int, int]] = [(tree, -1, 0)]
+        while stack:
+            node, parent, depth = stack.pop()
+            index = store.append(
+                type(node).__name__, parent, depth,
+                getattr(node, 'lineno', 0), getattr(node, 'col_offset', 0),
+            )
+            children = list(ast.iter_child_nodes(node))
+            stack.extend((child, index, depth + 1) for child in reversed(children))
+        return store
+
+    @classmethod
+    def from_tree_sitter(cls, tree, code: str, max_depth: Optional[int] = None,
+                         max_nodes: Optional[int] = None) -> "ASTStore":
+        """Build straight from a tree-sitter tree; leaf nodes keep their source text"""
+        store = cls()
+        source = code.encode("utf8")
+        path: List[int] = []
+
+        def visit(node, depth: int) -> None:
+            del path[depth:]
+            value = None
+            if not node.child_count:
+                value = source[node.start_byte:node.end_byte].decode("utf8", errors="replace")
+            row, column = node.start_point
+            path.append(store.append(
+                node.type, path[depth - 1] if depth else -1, depth, row + 1, column,
+                node.start_byte, node.end_byte, value,
+            ))
+
+        _, store.truncated = walk_tree_sitter(
+            tree,
+            max_depth if max_depth is not None else settings.MAX_AST_DEPTH,
+            max_nodes if max_nodes is not None else settings.MAX_AST_NODES,
+            visit,
+        )
+        return store
+
+    @classmethod
+    def from_code(cls, code: str, language: str) -> Optional["ASTStore"]:
+        """Parse code with tree-sitter into a store, or None if the language is unsupported"""
+        parser = get_parser(language)
+        if parser is None:
+            return None
+        tree = parse_source(parser, code.encode("utf8"))
+        if tree is None:
+            return None
+        return cls.from_tree_sitter(tree, code)
+
+    @classmethod
+    def from_ast_node(cls, root) -> "ASTStore":
+        """Build from an ``ASTNode`` tree"""
+        store = cls()
+        stack: List[Tuple[Any, int, int]] = [(root, -1, 0)]
+        while stack:
+            node, parent, depth = stack.pop()
+            index = store.append(
+                node.node_type, parent, depth, node.line_number, node.column,
+                NO_BYTE if node.start_byte is None else node.start_byte,
+                NO_BYTE if node.end_byte is None else node.end_byte,
+                None if node.value is None else str(node.value),
+            )
+            stack.extend((child, index, depth + 1) for child in reversed(node.children))
+        return store
+
+    # Vectorized queries
+
+    def _column(self, column: array) -> np.ndarray:
+        return np.frombuffer(column, dtype=np.int32) if len(column) else np.zeros(0, dtype=np.int32)
+
+    def type_mask(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        """Boolean mask of nodes whose type matches, evaluating the predicate once per type"""
+        matches = np.fromiter((predicate(t) for t in self.node_types), dtype=bool, count=len(self.node_types))
+        return matches[self._column(self.type_id)]
+
+    def counts_by_type(self) -> Dict[str, int]:
+        """Number of nodes of every type"""
+        counts = np.bincount(self._column(self.type_id), minlength=len(self.node_types))
+        return {node_type: int(count) for node_type, count in zip(self.node_types, counts)}
+
+    def max_depth(self) -> int:
+        return int(self._column(self.depth).max()) if len(self) else 0
+
+    def loop_depths(self, predicate: Callable[[str], bool] = is_loop_type) -> np.ndarray:
+        """
+        Number of loops on the path from the root to each node, inclusive.
+
+        Uses pointer jumping, so it takes O(log depth) vectorized steps.
+        """
+        totals = self.type_mask(predicate).astype(np.int32)
+        ancestors = self._column(self.parent).copy()
+        while True:
+            has_ancestor = ancestors >= 0
+            if not has_ancestor.any():
+                return totals
+            # Each step adds the sum over the next segment of the path, then doubles the jump
+            totals = totals + np.where(has_ancestor, totals[ancestors], 0)
+            ancestors = np.where(has_ancestor, ancestors[ancestors], -1)
+
+    def max_loop_nesting(self, predicate: Callable[[str], bool] = is_loop_type) -> int:
+        return int(self.loop_depths(predicate).max()) if len(self) else 0
+
+    # Serialization
+
+    def to_flat_dict(self) -> Dict[str, Any]:
+        """
+        Flat JSON encoding: parallel lists in pre-order plus a parent-index
+        list, so clients rebuild the tree with a single loop.
+        """
+        return {
+            "format": "flat",
+            "node_types": list(self.node_types),
+            "type": self.type_id.tolist(),
+            "parent": self.parent.tolist(),
+            "line": self.line.tolist(),
+            "column": self.column.tolist(),
+            "start_byte": self.start_byte.tolist(),
+            "end_byte": self.end_byte.tolist(),
+            "values": {str(index): value for index, value in self.values.items()},
+            "node_count": len(self),
+            "truncated": self.truncated,
+        }
@@ -0,0 +1,179 @@
+"""
+Declarative chart specs, the client-rendered alternative to PNG charts
+
+A spec carries the data a chart shows instead of its pixels: rows of
+series values for line, area and bar charts, nodes and edges for graphs
+and trees, the cells of one viewport for heatmaps, plus the highlights
+the PNG would draw. The shapes follow the frontend components: ``rows``
+with one key per series feed recharts (``ComplexityChart``), graph
+``nodes`` are plain ids with ``{from, to}`` edges (``GraphVisualizer``),
+and trees and stacks use the ``value``/``left``/``right`` and
+``elements`` forms ``DataStructureVisualizer`` renders.
+
+Specs are registered under the same chart names as the drawing functions
+in ``charts``, and built from the same data dict, so any spec has a PNG
+counterpart that can be rendered on demand.
+"""
+
+import math
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+from .dp_table import Window, as_array, downsample, to_cells, value_range
+from .graph_layout import layout_graph
+
+SpecFunction = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+SPECS: Dict[str, SpecFunction] = {}
+
+# Points per curve of the complexity comparison; the client interpolates
+COMPLEXITY_POINTS = 21
+
+
+def spec(name: str) -> Callable[[SpecFunction], SpecFunction]:
+    """Register a spec builder under ``name``"""
+    def register(func: SpecFunction) -> SpecFunction:
+        SPECS[name] = func
+        return func
+    return register
+
+
+def chart_spec(chart: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """The spec of ``chart`` for ``data``, tagged with the chart name"""
+    return {'chart': chart, **SPECS[chart](data)}
+
+
+@spec('complexity_chart')
+def complexity_chart_spec(data: Dict[str, Any]) -> Dict[str, Any]:
+    step = 100 / (COMPLEXITY_POINTS - 1)
+    rows = []
+    for i in range(COMPLEXITY_POINTS):
+        n = max(1, round(i * step))
+        rows.append({'n': n, 'O(n)': n, 'O(n log n)': round(n * math.log(n), 1), 'O(n²)': n * n})
+    return {
+        'kind': 'line',
+        'title': 'Algorithm Complexity Comparison',
+        'x': {'key': 'n', 'label': 'Input Size (n)'},
+        'y': {'label': 'Time Complexity'},
+        'series': ['O(n)', 'O(n log n)', 'O(n²)'],
+        'rows': rows,
+    }
+
+
+@spec('execution_flow')
+def execution_flow_spec(data: Dict[str, Any]) -> Dict[str, Any]:
+    steps = ['Input', 'Process', 'Decision', 'Output']
+    return {
+        'kind': 'flow',
+        'title': 'Execution Flow',
+        'nodes': steps,
+        'edges': [{'from': a, 'to': b} for a, b in zip(steps, steps[1:])],
+    }
+
+
+@spec('memory_usage')
+def memory_usage_spec(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'kind': 'area',
+        'title': 'Memory Usage Over Time',
+        'x': {'key': 'step', 'label': 'Execution Step'},
+        'y': {'label': 'Live Locals (bytes)'},
+        'series': ['bytes'],
+        'rows': [{'step': step, 'bytes': size} for step, size in enumerate(data['usage'], 1)],
+    }
+
+
+@spec('sorting_comparison')
+def sorting_comparison_spec(data: Dict[str, Any]) -> Dict[str, Any]:
+    array = data['array']
+    return {
+        'kind': 'bar',
+        'title': 'Before and After Sorting',
+        'x': {'key': 'index', 'label': 'Index'},
+        'y': {'label': 'Value'},
+        'series': ['before', 'after'],
+        'rows': [
+            {'index': i, 'before': before, 'after': after}
+            for i, (before, after) in enumerate(zip(array, sorted(array)))
+        ],
+    }
+
+
+@spec('searching_visualization')
+def searching_visualization_spec(data: Dict[str, Any]) -> Dict[str, Any]:
+    array = data['array']
+    target = data['target']
+    return {
+        'kind': 'bar',
+        'title': f'Searching for {target}',
+        'x': {'key': 'index', 'label': 'Index'},
+        'y': {'label': 'Value'},
+        'series': ['value'],
+        'rows': [{'index': i, 'value': value} for i, value in enumerate(array)],
+        'highlights': [i for i, value in enumerate(array) if value == target],
+        'reference_line': {'y': target, 'label': f'Target: {target}'},
+    }
+
+
+def _visit_order(nodes: List[Any], traversal_order: List[Any]) -> List[Any]:
+    known = set(nodes)
+    return [node for node in traversal_order if node in known]
+
+
+@spec('graph_traversal')
+def graph_traversal_spec(data: Dict[str, Any]) -> Dict[str, Any]:
+    layout = layout_graph(data['nodes'], data.get('edges', []), data.get('layout'))
+    nodes = layout.nodes
+    return {
+        'kind': 'graph',
+        'title': 'Graph Traversal Visualization',
+        'layout': layout.engine,
+        'nodes': nodes,
+        'edges': [{'from': nodes[a], 'to': nodes[b]} for a, b in layout.edges.tolist()],
+        # [x, y] of each node, in [-1, 1]
+        'positions': np.round(layout.positions, 4).tolist(),
+        # Visit order; a node's position in it is the number the PNG labels it with
+        'order': _visit_order(nodes, data.get('traversal_order', [])),
+        'total_nodes': layout.total_nodes,
+        'total_edges': layout.total_edges,
+    }
+
+
+@spec('tree_traversal')
+def tree_traversal_spec(data: Dict[str, Any]) -> Dict[str, Any]:
+    def prune(node):
+        if not node:
+            return None
+        return {'value': node['value'], 'left': prune(node.get('left')), 'right': prune(node.get('right'))}
+
+    return {
+        'kind': 'tree',
+        'title': 'Tree Traversal Visualization',
+        'tree': prune(data['tree']),
+        'order': list(data.get('traversal_order', [])),
+    }
+
+
+@spec('dp_table')
+def dp_table_spec(data: Dict[str, Any]) -> Dict[str, Any]:
+    table = as_array(data['dp_table'])
+    # One viewport of a large table; the client asks for others as it pans
+    window = Window.from_dict(data.get('window')).clamp(table.shape, settings.DP_VIEWPORT_SIZE)
+    limits = value_range(table)
+    heatmap = {
+        'kind': 'heatmap',
+        'title': 'Dynamic Programming Table',
+        'x': {'label': 'Column'},
+        'y': {'label': 'Row'},
+        'shape': list(table.shape),
+        'window': window.to_dict(),
+        'cells': to_cells(window.of(table)),
+        'range': list(limits) if limits else None,
+    }
+    if window.of(table).shape != table.shape:
+        # The whole table at low resolution, for navigating between viewports
+        overview, block = downsample(table, settings.DP_VIEWPORT_SIZE)
+        heatmap['overview'] = {'block': block, 'cells': to_cells(np.round(overview, 4))}
+    return heatmap
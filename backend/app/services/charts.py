@@ -0,0 +1,247 @@
+"""
+Chart drawing functions for the render pool
+
+Each chart draws onto a ``matplotlib.figure.Figure`` it is handed, through
+the object-oriented API only: no pyplot and no global figure state, so
+charts can be drawn concurrently on different figures. Charts are looked
+up by name in ``CHARTS``, which keeps render jobs down to a name and a
+plain data dict.
+"""
+
+from typing import Any, Callable, Dict
+
+import matplotlib
+import matplotlib.patches as patches
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from app.core.config import settings
+from .dp_table import Window, as_array, downsample, value_range
+from .graph_layout import layout_graph
+
+ChartFunction = Callable[[Figure, Dict[str, Any]], None]
+
+CHARTS: Dict[str, ChartFunction] = {}
+
+# Graphs with more nodes are drawn without labels
+LABELLED_NODES = 100
+
+
+def chart(name: str) -> Callable[[ChartFunction], ChartFunction]:
+    """Register a drawing function under ``name``"""
+    def register(func: ChartFunction) -> ChartFunction:
+        CHARTS[name] = func
+        return func
+    return register
+
+
+@chart('complexity_chart')
+def draw_complexity_chart(fig: Figure, data: Dict[str, Any]) -> None:
+    ax = fig.subplots()
+
+    x = np.linspace(1, 100, 100)
+    ax.plot(x, x, label='O(n)', linewidth=2)
+    ax.plot(x, x * np.log(x), label='O(n log n)', linewidth=2)
+    ax.plot(x, x**2, label='O(n²)', linewidth=2)
+
+    ax.set_xlabel('Input Size (n)')
+    ax.set_ylabel('Time Complexity')
+    ax.set_title('Algorithm Complexity Comparison')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+@chart('execution_flow')
+def draw_execution_flow(fig: Figure, data: Dict[str, Any]) -> None:
+    ax = fig.subplots()
+
+    # Simple flow diagram
+    flow_steps = ['Input', 'Process', 'Decision', 'Output']
+    y_positions = [0.8, 0.6, 0.4, 0.2]
+
+    for i, (step, y) in enumerate(zip(flow_steps, y_positions)):
+        # Draw box
+        rect = patches.Rectangle((0.1, y-0.1), 0.8, 0.15,
+                              facecolor='lightblue', edgecolor='black')
+        ax.add_patch(rect)
+        ax.text(0.5, y, step, ha='center', va='center', fontsize=12, fontweight='bold')
+
+        # Draw arrow
+        if i < len(flow_steps) - 1:
+            ax.arrow(0.5, y-0.1, 0, -0.05, head_width=0.02, head_length=0.02,
+                   fc='black', ec='black')
+
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.set_title('Execution Flow')
+    ax.axis('off')
+
+
+@chart('memory_usage')
+def draw_memory_usage(fig: Figure, data: Dict[str, Any]) -> None:
+    ax = fig.subplots()
+
+    usage = data['usage']
+    steps = np.arange(1, len(usage) + 1)
+    kilobytes = np.array(usage) / 1024
+
+    ax.plot(steps, kilobytes, 'b-', linewidth=2, alpha=0.7)
+    ax.fill_between(steps, kilobytes, alpha=0.3, color='blue')
+
+    ax.set_xlabel('Execution Step')
+    ax.set_ylabel('Live Locals (KB)')
+    ax.set_title('Memory Usage Over Time')
+    ax.grid(True, alpha=0.3)
+
+
+@chart('sorting_comparison')
+def draw_sorting_comparison(fig: Figure, data: Dict[str, Any]) -> None:
+    array = data['array']
+    ax1, ax2 = fig.subplots(1, 2)
+
+    # Before sorting
+    ax1.bar(range(len(array)), array, color='lightblue', alpha=0.7)
+    ax1.set_title('Before Sorting')
+    ax1.set_xlabel('Index')
+    ax1.set_ylabel('Value')
+
+    # After sorting
+    sorted_array = sorted(array)
+    ax2.bar(range(len(sorted_array)), sorted_array, color='lightgreen', alpha=0.7)
+    ax2.set_title('After Sorting')
+    ax2.set_xlabel('Index')
+    ax2.set_ylabel('Value')
+
+
+@chart('searching_visualization')
+def draw_searching_visualization(fig: Figure, data: Dict[str, Any]) -> None:
+    array = data['array']
+    target = data['target']
+    ax = fig.subplots()
+
+    # Bar chart with every occurrence of the target highlighted
+    colors = ['red' if x == target else 'lightblue' for x in array]
+    alphas = [1.0 if x == target else 0.7 for x in array]
+    bars = ax.bar(range(len(array)), array, color=colors)
+    for bar, alpha in zip(bars, alphas):
+        bar.set_alpha(alpha)
+
+    ax.set_title(f'Searching for {target}')
+    ax.set_xlabel('Index')
+    ax.set_ylabel('Value')
+    ax.axhline(y=target, color='red', linestyle='--', alpha=0.5, label=f'Target: {target}')
+    ax.legend()
+
+
+@chart('graph_traversal')
+def draw_graph_traversal(fig: Figure, data: Dict[str, Any]) -> None:
+    traversal_order = data.get('traversal_order', [])
+    layout = layout_graph(data['nodes'], data.get('edges', []), data.get('layout'))
+    positions = layout.positions
+    ax = fig.subplots()
+    viridis = matplotlib.colormaps['viridis']
+
+    # First visit of each node, looked up once per node
+    visit: Dict[Any, int] = {}
+    for i, node in enumerate(traversal_order):
+        visit.setdefault(node, i)
+    ranks = np.array([visit.get(node, -1) for node in layout.nodes])
+    visited = ranks >= 0
+
+    # All edges as one collection
+    ax.add_collection(LineCollection(positions[layout.edges], colors='k', alpha=0.3, linewidths=1))
+
+    # Nodes colored by traversal order, in one scatter per group
+    size = 200 if len(layout.nodes) <= LABELLED_NODES else max(8, 20000 / len(layout.nodes))
+    ax.scatter(positions[~visited, 0], positions[~visited, 1], c='lightgray', s=size * 0.75, alpha=0.6)
+    if visited.any():
+        ax.scatter(positions[visited, 0], positions[visited, 1],
+                   c=viridis(ranks[visited] / len(traversal_order)), s=size, alpha=0.8)
+    if len(layout.nodes) <= LABELLED_NODES:
+        for node, (x, y), rank in zip(layout.nodes, positions, ranks):
+            label = f'{node}\n({rank+1})' if rank >= 0 else str(node)
+            ax.annotate(label, (x, y),
+                      xytext=(5, 5), textcoords='offset points',
+                      ha='center', va='center', fontsize=10)
+
+    title = 'Graph Traversal Visualization'
+    if layout.reduced:
+        title += f' ({len(layout.nodes)} of {layout.total_nodes} nodes, {len(layout.edges)} of {layout.total_edges} edges)'
+    ax.set_title(title)
+    ax.set_xlim(-1.2, 1.2)
+    ax.set_ylim(-1.2, 1.2)
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+
+@chart('tree_traversal')
+def draw_tree_traversal(fig: Figure, data: Dict[str, Any]) -> None:
+    traversal_order = data.get('traversal_order', [])
+    ax = fig.subplots()
+
+    def draw_tree(node_data, x=0, y=0, level=0):
+        if not node_data:
+            return
+
+        # Draw current node
+        color = 'red' if node_data['value'] in traversal_order else 'lightblue'
+        ax.add_patch(patches.Circle((x, y), 0.3, facecolor=color, alpha=0.7))
+
+        # Add label
+        order = traversal_order.index(node_data['value']) + 1 if node_data['value'] in traversal_order else ''
+        ax.text(x, y, f"{node_data['value']}\n{order}",
+               ha='center', va='center', fontsize=10, fontweight='bold')
+
+        # Draw children
+        spacing = 2 ** (3 - level) if level < 3 else 0.5
+        if node_data.get('left'):
+            ax.plot([x, x - spacing], [y, y - 1], 'k-', alpha=0.5)
+            draw_tree(node_data['left'], x - spacing, y - 1, level + 1)
+
+        if node_data.get('right'):
+            ax.plot([x, x + spacing], [y, y - 1], 'k-', alpha=0.5)
+            draw_tree(node_data['right'], x + spacing, y - 1, level + 1)
+
+    draw_tree(data['tree'])
+
+    ax.set_title('Tree Traversal Visualization')
+    ax.set_xlim(-5, 5)
+    ax.set_ylim(-4, 1)
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+
+@chart('dp_table')
+def draw_dp_table(fig: Figure, data: Dict[str, Any]) -> None:
+    table = as_array(data['dp_table'])
+    window = Window.from_dict(data.get('window')).clamp(table.shape)
+    shown, block = downsample(window.of(table), settings.DP_MAX_RENDER_SIZE)
+    limits = value_range(table)
+    ax = fig.subplots()
+
+    # One image for the whole window, with axes in table indices
+    rows, cols = window.row_end - window.row_start, window.col_end - window.col_start
+    extent = (window.col_start - 0.5, window.col_start + cols - 0.5, window.row_start + rows - 0.5, window.row_start - 0.5)
+    im = ax.imshow(np.ma.masked_invalid(shown), cmap='YlOrRd', aspect='auto', interpolation='nearest',
+                   extent=extent, vmin=limits[0] if limits else None, vmax=limits[1] if limits else None)
+
+    # Values are only readable on small windows
+    if block == 1 and shown.size <= settings.DP_ANNOTATED_CELLS:
+        for (i, j), value in np.ndenumerate(shown):
+            if not np.isnan(value):
+                ax.text(window.col_start + j, window.row_start + i, f'{value:g}',
+                        ha="center", va="center", color="black", fontsize=10)
+
+    notes = []
+    if (rows, cols) != table.shape:
+        notes.append(f'rows {window.row_start}-{window.row_end - 1}, columns {window.col_start}-{window.col_end - 1}'
+                     f' of {table.shape[0]}×{table.shape[1]}')
+    if block > 1:
+        notes.append(f'{block}×{block} cell averages')
+    ax.set_title('Dynamic Programming Table' + (f' ({"; ".join(notes)})' if notes else ''))
+    ax.set_xlabel('Column')
+    ax.set_ylabel('Row')
+
+    cbar = fig.colorbar(im, ax=ax)
+    cbar.set_label('Value')
@@ -4,47 +4,25 @@ Code analyzer service for AST parsing and code analysis
 
 import ast
 import re
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Union
 from dataclasses import dataclass, field
 
 from app.core.logging import get_logger
 from app.core.config import settings
+from app.core.serialization import to_jsonable
 from .execution_tracer import trace_code
-from .tree_sitter_parser import parse_code_with_tree_sitter
+from .tree_sitter_parser import parse_code_with_tree_sitter, node_text, tree_to_dict
+from .ast_analysis import ASTAnalysisEngine
+from .ast_store import ASTStore
+from .parsed_source import ParsedSource
 # Add import for runx execution service
 from .runx_executor import execute_code_with_runx
 
 
-def _make_json_serializable(obj):
-    """
-    Recursively convert objects to JSON-serializable types.
-    Handles Python types, functions, and other non-serializable objects.
-    """
-    if obj is None:
-        return None
-    elif isinstance(obj, (str, int, float, bool)):
-        return obj
-    elif isinstance(obj, (list, tuple)):
-        return [_make_json_serializable(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {str(k): _make_json_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, type):
-        return f"<type '{obj.__name__}'>"
-    elif callable(obj):
-        return f"<function '{getattr(obj, '__name__', 'anonymous')}'>"
-    elif hasattr(obj, '__dict__'):
-        # For objects with __dict__, try to serialize their attributes
-        try:
-            return {str(k): _make_json_serializable(v) for k, v in obj.__dict__.items()}
-        except:
-            return f"<object '{type(obj).__name__}'>"
-    else:
-        return str(obj)
-
 logger = get_logger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ASTNode:
     """AST node representation"""
     node_type: str
@@ -52,6 +30,8 @@ class ASTNode:
     column: int
     value: Optional[str] = None
     children: List['ASTNode'] = field(default_factory=list)
+    start_byte: Optional[int] = None
+    end_byte: Optional[int] = None
     
 
 @dataclass
@@ -76,17 +56,20 @@ class CodeAnalyzer:
             'java': self._parse_java_ast,
             'cpp': self._parse_cpp_ast,
         }
+        self.ast_engine = ASTAnalysisEngine()
     
-    def detect_input_schema(self, code: str, language: str) -> dict:
+    def detect_input_schema(self, code: Union[str, ParsedSource], language: str) -> dict:
         """
         Analyze code to detect input requirements and return an input schema.
         For Python, extract function arguments from the first function definition.
         For Java, detect Scanner usage and method parameters.
         For other languages, return None for now.
         """
+        source = ParsedSource.coerce(code, language)
+        code = source.code
         if language.lower() == 'python':
             try:
-                tree = ast.parse(code)
+                tree = source.python_ast
                 for node in ast.walk(tree):
                     if isinstance(node, ast.FunctionDef):
                         args = node.args
@@ -137,40 +120,30 @@ class CodeAnalyzer:
         # For other languages, could add heuristics or AST parsing
         return {'input_required': False, 'input_schema': []}
 
-    async def analyze_ast(self, code: str, language: str) -> Any:
+    async def analyze_ast(self, code: Union[str, ParsedSource], language: str, ast_format: str = "tree") -> Any:
         """
         Analyze code and generate AST
+
+        ``ast_format="flat"`` returns the AST as parallel pre-order lists with
+        parent indices (see ``ASTStore.to_flat_dict``) and never builds the
+        node-per-object tree.
         """
+        source = ParsedSource.coerce(code, language)
         try:
             logger.info("Starting AST analysis", language=language)
             
-            if language.lower() == 'python':
-                ast_tree = self._parse_python_ast(code)
+            if ast_format == "flat":
+                store = self._build_ast_store(source)
+                analysis = {"ast": store.to_flat_dict(), **self.ast_engine.run_store(store)}
             else:
-                ts_tree = parse_code_with_tree_sitter(code, language)
-                if ts_tree is None or 'error' in ts_tree:
-                    ast_tree = self._create_placeholder_ast(code, language)
-                else:
-                    ast_tree = self._convert_tree_sitter_dict_to_astnode(ts_tree)
-            
-            # Analyze AST structure
-            analysis = {
-                "ast": self._ast_node_to_dict(ast_tree),
-                "statistics": self._analyze_ast_statistics(ast_tree),
-                "complexity_indicators": self._find_complexity_indicators(ast_tree),
-                "data_structures": self._identify_data_structures(ast_tree),
-                "algorithms": self._identify_algorithms(ast_tree),
-                "functions": self._extract_functions(ast_tree),
-                "variables": self._extract_variables(ast_tree),
-            }
+                # Analyze AST structure; every analysis shares one traversal and
+                # the engine already emits JSON-ready values
+                analysis = self.ast_engine.run(self._build_ast_tree(source))
             # Detect input requirements
-            input_schema = self.detect_input_schema(code, language)
+            input_schema = to_jsonable(self.detect_input_schema(source, language))
             analysis["input_required"] = input_schema["input_required"]
             analysis["input_schema"] = input_schema["input_schema"]
             
-            # Apply defensive serialization to ensure all data is JSON-serializable
-            analysis = _make_json_serializable(analysis)
-            
             logger.info("AST analysis completed", language=language)
             return analysis  # type: ignore
         except Exception as e:
@@ -186,17 +159,16 @@ class CodeAnalyzer:
             if language.lower() == 'python':
                 result = trace_code(code, input_data)
                 if isinstance(result, dict) and 'trace' in result:
-                    # Apply defensive serialization to trace data
-                    trace_data = _make_json_serializable(result['trace'])
-                    return trace_data  # type: ignore
+                    # The tracer converts each snapshot to JSON-native values as it records it
+                    return result['trace']
                 else:
-                    return [_make_json_serializable(result)]  # wrap error or unexpected result in a list
+                    return [to_jsonable(result)]  # wrap error or unexpected result in a list
             elif language.lower() == 'java':
                 from app.services.java_executor import execute_java_with_trace
                 result = execute_java_with_trace(code, input_data)
                 if isinstance(result, dict) and 'trace' in result and result['trace']:
                     # Apply defensive serialization to trace data
-                    trace_data = _make_json_serializable(result['trace'])
+                    trace_data = to_jsonable(result['trace'])
                     return trace_data  # type: ignore
                 else:
                     # Return empty trace if no trace data available
@@ -205,10 +177,10 @@ class CodeAnalyzer:
                 result = execute_code_with_runx(code, language, input_data)
                 if isinstance(result, dict) and 'trace' in result:
                     # Apply defensive serialization to trace data
-                    trace_data = _make_json_serializable(result['trace'])
+                    trace_data = to_jsonable(result['trace'])
                     return trace_data  # type: ignore
                 else:
-                    return [_make_json_serializable(result)]
+                    return [to_jsonable(result)]
         except Exception as e:
             logger.error("Code execution tracing failed", error=str(e))
             raise
@@ -240,10 +212,32 @@ class CodeAnalyzer:
         
         return suggestions
     
-    def _parse_python_ast(self, code: str) -> ASTNode:
+    def _build_ast_tree(self, source: ParsedSource) -> ASTNode:
+        """Parse code into an ASTNode tree"""
+        if source.language == 'python':
+            return self._parse_python_ast(source)
+        tree = source.tree_sitter_tree
+        if tree is None:
+            return self._create_placeholder_ast(source.code, source.language)
+        return self._convert_tree_sitter_dict_to_astnode(tree_to_dict(tree), source.code)
+    
+    def _build_ast_store(self, source: ParsedSource) -> ASTStore:
+        """Parse straight into the compact AST store"""
+        if source.language == 'python':
+            try:
+                return ASTStore.from_python_ast(source.python_ast)
+            except SyntaxError as e:
+                logger.error("Python AST parsing failed", error=str(e))
+                raise
+        tree = source.tree_sitter_tree
+        if tree is None:
+            return ASTStore.from_ast_node(self._create_placeholder_ast(source.code, source.language))
+        return ASTStore.from_tree_sitter(tree, source.code)
+    
+    def _parse_python_ast(self, code: Union[str, ParsedSource]) -> ASTNode:
         """Parse Python code to AST"""
         try:
-            tree = ast.parse(code)
+            tree = ParsedSource.coerce(code, 'python').python_ast
             return self._convert_ast_node(tree)
         except SyntaxError as e:
             logger.error("Python AST parsing failed", error=str(e))
@@ -254,7 +248,7 @@ class CodeAnalyzer:
         try:
             tree_data = parse_code_with_tree_sitter(code, "javascript")
             if tree_data and "error" not in tree_data:
-                return self._convert_tree_sitter_dict_to_astnode(tree_data)
+                return self._convert_tree_sitter_dict_to_astnode(tree_data, code)
             else:
                 return self._create_basic_ast(code, "javascript")
         except Exception as e:
@@ -266,7 +260,7 @@ class CodeAnalyzer:
         try:
             tree_data = parse_code_with_tree_sitter(code, "java")
             if tree_data and "error" not in tree_data:
-                return self._convert_tree_sitter_dict_to_astnode(tree_data)
+                return self._convert_tree_sitter_dict_to_astnode(tree_data, code)
             else:
                 return self._create_basic_ast(code, "java")
         except Exception as e:
@@ -278,7 +272,7 @@ class CodeAnalyzer:
         try:
             tree_data = parse_code_with_tree_sitter(code, "cpp")
             if tree_data and "error" not in tree_data:
-                return self._convert_tree_sitter_dict_to_astnode(tree_data)
+                return self._convert_tree_sitter_dict_to_astnode(tree_data, code)
             else:
                 return self._create_basic_ast(code, "cpp")
         except Exception as e:
@@ -355,158 +349,33 @@ class CodeAnalyzer:
             children=children
         )
     
-    def _analyze_ast_statistics(self, ast_tree: ASTNode) -> Dict[str, Any]:
-        """Analyze AST statistics"""
-        stats = {
-            "total_nodes": 0,
-            "function_definitions": 0,
-            "variable_assignments": 0,
-            "loops": 0,
-            "conditionals": 0,
-            "max_depth": 0
-        }
-        
-        def count_nodes(node: ASTNode, depth: int = 0):
-            stats["total_nodes"] += 1
-            stats["max_depth"] = max(stats["max_depth"], depth)
-            
-            if "Function" in node.node_type:
-                stats["function_definitions"] += 1
-            elif "Assign" in node.node_type:
-                stats["variable_assignments"] += 1
-            elif "For" in node.node_type or "While" in node.node_type:
-                stats["loops"] += 1
-            elif "If" in node.node_type:
-                stats["conditionals"] += 1
-            
-            for child in node.children:
-                count_nodes(child, depth + 1)
-        
-        count_nodes(ast_tree)
-        return stats
-    
-    def _find_complexity_indicators(self, ast_tree: ASTNode) -> List[Dict[str, Any]]:
-        """Find indicators of code complexity"""
-        indicators = []
-        
-        def analyze_complexity(node: ASTNode):
-            if "For" in node.node_type or "While" in node.node_type:
-                indicators.append({
-                    "type": "loop",
-                    "line": node.line_number,
-                    "complexity": "O(n)"
-                })
-            elif "If" in node.node_type:
-                indicators.append({
-                    "type": "conditional",
-                    "line": node.line_number,
-                    "complexity": "O(1)"
-                })
-            
-            for child in node.children:
-                analyze_complexity(child)
-        
-        analyze_complexity(ast_tree)
-        return indicators
-    
-    def _identify_data_structures(self, ast_tree: ASTNode) -> List[Dict[str, Any]]:
-        """Identify data structures used in code"""
-        data_structures = []
-        
-        def find_data_structures(node: ASTNode):
-            node_type = node.node_type.lower()
-            if any(ds in node_type for ds in ["list", "dict", "set", "tuple", "array"]):
-                data_structures.append({
-                    "type": str(node.node_type),
-                    "line": node.line_number,
-                    "usage": "data_storage"
-                })
-            
-            for child in node.children:
-                find_data_structures(child)
-        
-        find_data_structures(ast_tree)
-        return data_structures
-    
-    def _identify_algorithms(self, ast_tree: ASTNode) -> List[Dict[str, Any]]:
-        """Identify algorithms used in code"""
-        algorithms = []
-        
-        def find_algorithms(node: ASTNode):
-            # Simple pattern matching for common algorithms
-            if "Sort" in node.node_type:
-                algorithms.append({
-                    "type": "sorting",
-                    "line": node.line_number,
-                    "algorithm": "sort"
-                })
-            elif "Search" in node.node_type:
-                algorithms.append({
-                    "type": "searching",
-                    "line": node.line_number,
-                    "algorithm": "search"
-                })
-            
-            for child in node.children:
-                find_algorithms(child)
-        
-        find_algorithms(ast_tree)
-        return algorithms
-    
-    def _extract_functions(self, ast_tree: ASTNode) -> List[Dict[str, Any]]:
-        """Extract function definitions"""
-        functions = []
-        
-        def find_functions(node: ASTNode):
-            if "Function" in node.node_type:
-                functions.append({
-                    "name": getattr(node, 'name', 'anonymous'),
-                    "line": node.line_number,
-                    "type": str(node.node_type)
-                })
-            
-            for child in node.children:
-                find_functions(child)
-        
-        find_functions(ast_tree)
-        return functions
-    
-    def _extract_variables(self, ast_tree: ASTNode) -> List[Dict[str, Any]]:
-        """Extract variable declarations"""
-        variables = []
-        
-        def find_variables(node: ASTNode):
-            if "Assign" in node.node_type:
-                variables.append({
-                    "line": node.line_number,
-                    "type": "assignment"
-                })
-            
-            for child in node.children:
-                find_variables(child)
-        
-        find_variables(ast_tree)
-        return variables
-    
-    def _ast_node_to_dict(self, node: ASTNode) -> Dict[str, Any]:
-        """Convert AST node to dictionary for JSON serialization"""
-        # Defensive: ensure no ASTNode objects leak into the output
-        return {
-            "node_type": str(node.node_type),
-            "line_number": node.line_number,
-            "column": node.column,
-            "value": str(node.value) if node.value is not None else None,
-            "children": [self._ast_node_to_dict(child) if isinstance(child, ASTNode) else str(child) for child in node.children]
-        } 
-
-    def _convert_tree_sitter_dict_to_astnode(self, node_dict) -> ASTNode:
+    def _convert_tree_sitter_dict_to_astnode(self, node_dict, code: Optional[str] = None) -> ASTNode:
         """
-        Convert a tree-sitter node dict to ASTNode format recursively.
+        Convert a tree-sitter node dict to ASTNode format with an explicit stack.
+
+        Only leaf nodes get their source text as ``value``, so the total text
+        copied is bounded by the size of the source.
         """
-        return ASTNode(
-            node_type=node_dict.get('type', 'Node'),
-            line_number=node_dict.get('start_point', (0, 0))[0] + 1,
-            column=node_dict.get('start_point', (0, 0))[1],
-            value=node_dict.get('text', None),
-            children=[self._convert_tree_sitter_dict_to_astnode(child) for child in node_dict.get('children', [])]
-        ) 
\ No newline at end of file
+        source = code.encode("utf8") if code is not None else None
+
+        def make(item) -> ASTNode:
+            start_point = item.get('start_point', (0, 0))
+            children = item.get('children', [])
+            return ASTNode(
+                node_type=item.get('type', 'Node'),
+                line_number=start_point[0] + 1,
+                column=start_point[1],
+                value=node_text(source, item) if source is not None and not children and 'start_byte' in item else None,
+                start_byte=item.get('start_byte'),
+                end_byte=item.get('end_byte'),
+            )
+
+        root = make(node_dict)
+        stack = [(node_dict, root)]
+        while stack:
+            item, ast_node = stack.pop()
+            for child in item.get('children', []):
+                child_node = make(child)
+                ast_node.children.append(child_node)
+                stack.append((child, child_node))
+        return root
@@ -0,0 +1,219 @@
+"""
+Formatting-independent fingerprints of source code for result caching
+
+Two submissions that differ only in whitespace, comments or the names of
+function-local variables analyze the same way, so they should share cache
+entries. ``normalize_code`` hashes a normalized form of the source:
+
+- Python: a dump of the AST, which has no comments or formatting, with the
+  locals of each function renamed in order of first binding. Names that are
+  ever called are kept, since the analyzers compare call targets with
+  function and builtin names.
+- Other languages with a grammar: the tree-sitter token stream without
+  comments.
+- Anything else, or a file that does not parse: the raw text.
+
+Alongside the digest it records the line of every node or token in that
+order. The order is the same for any two sources with the same digest, so
+line numbers in a cached result can be mapped onto the current source.
+"""
+
+import ast
+import builtins
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from .parsed_source import ParsedSource
+from .tree_sitter_parser import walk_tree_sitter
+
+# Bump when the normalized forms change, so old cache entries are not reused
+NORMALIZATION_VERSION = 1
+
+# Result fields that hold a source line number
+LINE_FIELDS = frozenset({"line", "line_number", "lineno"})
+
+_BUILTINS = frozenset(dir(builtins))
+_FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+_SCOPE_NODES = _FUNCTION_NODES + (ast.ClassDef,)
+# Not part of the program's meaning
+_IGNORED_FIELDS = frozenset({"type_comment", "kind"})
+
+
+@dataclass
+class NormalizedCode:
+    """Digest of a normalized source and the line of each of its anchors"""
+    form: str
+    digest: str
+    lines: List[int] = field(default_factory=list)
+
+
+def _bound_names(function: ast.AST) -> List[str]:
+    """Names a function binds, in order of first binding, not looking into nested scopes"""
+    names: Dict[str, None] = {}
+    declared: Set[str] = set()
+    arguments = function.args
+    for arg in arguments.posonlyargs + arguments.args + [arguments.vararg] + arguments.kwonlyargs + [arguments.kwarg]:
+        if arg is not None:
+            names.setdefault(arg.arg)
+    body = function.body if isinstance(function.body, list) else [function.body]
+    stack = list(reversed(body))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Global, ast.Nonlocal)):
+            declared.update(node.names)
+        elif isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.setdefault(node.id)
+        if isinstance(node, _SCOPE_NODES):
+            continue
+        stack.extend(reversed(list(ast.iter_child_nodes(node))))
+    return [name for name in names if name not in declared]
+
+
+class _PythonNormalizer:
+    def __init__(self, tree: ast.AST, rename_locals: bool):
+        self.rename_locals = rename_locals
+        self.hasher = hashlib.blake2b(digest_size=16)
+        self.lines: List[int] = []
+        # Called names must keep their spelling; so must builtins
+        self.fixed = set(_BUILTINS)
+        self.fixed.update(
+            node.func.id for node in ast.walk(tree)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+        )
+
+    def _scope_for(self, node: ast.AST, scope: Dict[str, str]) -> Dict[str, str]:
+        inner = dict(scope)
+        for name in _bound_names(node):
+            if name not in self.fixed and name not in inner:
+                # "$" cannot appear in an identifier, so renamed locals never collide
+                inner[name] = f"${len(inner)}"
+        return inner
+
+    def visit(self, node: ast.AST, scope: Dict[str, str]) -> None:
+        update = self.hasher.update
+        update(type(node).__name__.encode())
+        lineno = getattr(node, "lineno", None)
+        if lineno is not None:
+            self.lines.append(lineno)
+        if self.rename_locals and isinstance(node, _FUNCTION_NODES):
+            scope = self._scope_for(node, scope)
+        for name, value in ast.iter_fields(node):
+            if name in _IGNORED_FIELDS:
+                continue
+            update(b"(")
+            if isinstance(value, ast.AST):
+                self.visit(value, scope)
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        self.visit(item, scope)
+                    else:
+                        update(repr(item).encode())
+                    update(b",")
+            else:
+                if name in ("id", "arg") and value in scope:
+                    value = scope[value]
+                update(repr(value).encode())
+            update(b")")
+
+
+def _normalize_python(source: ParsedSource, rename_locals: bool) -> Optional[NormalizedCode]:
+    try:
+        tree = source.python_ast
+        normalizer = _PythonNormalizer(tree, rename_locals)
+        normalizer.visit(tree, {})
+    except (SyntaxError, ValueError, RecursionError):
+        return None
+    return NormalizedCode("python-ast", normalizer.hasher.hexdigest(), normalizer.lines)
+
+
+def _normalize_tokens(source: ParsedSource) -> Optional[NormalizedCode]:
+    tree = source.tree_sitter_tree
+    if tree is None:
+        return None
+    code = source.code.encode("utf8")
+    hasher = hashlib.blake2b(digest_size=16)
+    lines: List[int] = []
+
+    def visit(node, depth: int) -> None:
+        if node.child_count or "comment" in node.type:
+            return
+        hasher.update(node.type.encode())
+        if node.is_named:
+            # Identifiers and literals; keywords and punctuation are their type
+            hasher.update(b"=" + code[node.start_byte:node.end_byte])
+        hasher.update(b"\x00")
+        lines.append(node.start_point[0] + 1)
+
+    _, truncated = walk_tree_sitter(tree, settings.MAX_AST_DEPTH, settings.MAX_AST_NODES, visit)
+    if truncated:
+        # Tokens past the caps were not hashed, so the digest would not identify the file
+        return None
+    return NormalizedCode("tokens", hasher.hexdigest(), lines)
+
+
+def _normalize_raw(source: ParsedSource) -> NormalizedCode:
+    digest = hashlib.blake2b(source.code.encode("utf8", errors="surrogatepass"), digest_size=16).hexdigest()
+    return NormalizedCode("raw", digest, list(range(1, len(source.lines) + 1)))
+
+
+def normalize_code(code: Any, language: str, rename_locals: bool = True) -> NormalizedCode:
+    """Normalized fingerprint of a source, memoized on its ParsedSource"""
+    source = ParsedSource.coerce(code, language)
+
+    def compute() -> NormalizedCode:
+        normalized = None
+        if source.language == "python":
+            normalized = _normalize_python(source, rename_locals)
+        else:
+            normalized = _normalize_tokens(source)
+        return normalized or _normalize_raw(source)
+
+    return source.derived(f"normalized:{rename_locals}", compute)
+
+
+def _line_values(value: Any, found: Set[int]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in LINE_FIELDS and isinstance(item, int):
+                found.add(item)
+            else:
+                _line_values(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _line_values(item, found)
+
+
+def line_anchors(result: Any, lines: List[int]) -> Optional[Dict[str, int]]:
+    """
+    For each line number in ``result``, the index of the first anchor on that
+    line, or None if some line has no anchor and so could not be remapped.
+    """
+    found: Set[int] = set()
+    _line_values(result, found)
+    if not found:
+        return {}
+    first: Dict[int, int] = {}
+    for index, line in enumerate(lines):
+        if line in found and line not in first:
+            first[line] = index
+    if len(first) != len(found):
+        return None
+    return {str(line): index for line, index in first.items()}
+
+
+def remap_lines(value: Any, anchors: Dict[str, int], lines: List[int]) -> Any:
+    """Copy of a cached result with its line numbers moved to the current source"""
+    if isinstance(value, dict):
+        remapped = {}
+        for key, item in value.items():
+            if key in LINE_FIELDS and isinstance(item, int) and str(item) in anchors:
+                remapped[key] = lines[anchors[str(item)]]
+            else:
+                remapped[key] = remap_lines(item, anchors, lines)
+        return remapped
+    if isinstance(value, list):
+        return [remap_lines(item, anchors, lines) for item in value]
+    return value
@@ -0,0 +1,217 @@
+"""
+Structural code-smell metrics computed in linear time
+
+Function length, parameter count and control-flow nesting come from one
+pre-order walk of the tree-sitter tree, which tolerates syntax errors and
+works the same for every supported language. Open functions and open
+control blocks are tracked as stacks of end bytes, as in
+``structural_analysis``. Duplicated code is found by hashing windows of
+consecutive normalized lines. Neither pass can backtrack, unlike the
+regexes these metrics replace.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+from app.core.config import settings
+from .parsed_source import ParsedSource
+from .tree_sitter_parser import walk_tree_sitter
+
+# Smell thresholds
+LONG_FUNCTION_LINES = 50
+DEEP_NESTING_LEVEL = 4
+LONG_PARAMETER_LIST = 5
+DUPLICATE_WINDOW_LINES = 4
+# Lines this short ("}", "else:", "end") are ignored when looking for duplicates
+DUPLICATE_MIN_LINE_LENGTH = 4
+
+FUNCTION_TYPES = frozenset({
+    'function_definition',              # python, c, cpp
+    'method_declaration',               # java, go
+    'constructor_declaration',          # java
+    'function_declaration',             # javascript, typescript, go
+    'generator_function_declaration',   # javascript
+    'method_definition',                # javascript
+    'arrow_function',                   # javascript
+    'function',                         # javascript function expressions
+    'function_expression',
+    'func_literal',                     # go
+    'function_item',                    # rust
+    'closure_expression',               # rust
+})
+
+NESTING_TYPES = frozenset({
+    'if_statement', 'for_statement', 'enhanced_for_statement', 'for_range_loop',
+    'for_in_statement', 'while_statement', 'do_statement', 'try_statement',
+    'with_statement', 'switch_statement', 'switch_expression',
+    'expression_switch_statement', 'type_switch_statement', 'select_statement',
+    'if_expression', 'for_expression', 'while_expression', 'loop_expression',
+    'match_expression',
+})
+_IF_TYPES = frozenset({'if_statement', 'if_expression'})
+_ELSE_TYPES = frozenset({'else_clause', 'else'})
+
+# Parameter list children that are not parameters
+_NON_PARAMETERS = frozenset({'comment', 'keyword_separator', 'positional_separator'})
+_RECEIVERS = frozenset({'self', 'cls'})
+
+
+@dataclass
+class FunctionMetrics:
+    """Size and shape of one function"""
+    name: str
+    line: int
+    length: int
+    parameters: int
+    max_nesting: int = 0
+    signature: str = ""
+
+
+@dataclass
+class DuplicateBlock:
+    """A window of lines that repeats an earlier one"""
+    line: int
+    first_line: int
+    lines: int
+    snippet: str
+
+
+def _text(source: bytes, node) -> str:
+    return source[node.start_byte:node.end_byte].decode("utf8", errors="replace")
+
+
+def _parameter_list(node):
+    """The parameter list node of a function, looking through C declarators"""
+    parameters = node.child_by_field_name('parameters')
+    if parameters is not None:
+        return parameters
+    declarator = node.child_by_field_name('declarator')
+    while declarator is not None:
+        parameters = declarator.child_by_field_name('parameters')
+        if parameters is not None:
+            return parameters
+        declarator = declarator.child_by_field_name('declarator')
+    return None
+
+
+def _function_name(source: bytes, node) -> str:
+    name = node.child_by_field_name('name')
+    if name is None:
+        declarator = node.child_by_field_name('declarator')
+        while declarator is not None and declarator.child_by_field_name('declarator') is not None:
+            declarator = declarator.child_by_field_name('declarator')
+        name = declarator
+    if name is None and node.parent is not None and node.parent.type == 'variable_declarator':
+        name = node.parent.child_by_field_name('name')
+    return _text(source, name) if name is not None else "<anonymous>"
+
+
+def _count_parameters(source: bytes, node) -> int:
+    if node.child_by_field_name('parameter') is not None:
+        return 1  # javascript: x => x
+    parameters = _parameter_list(node)
+    if parameters is None:
+        return 0
+    names = [child for child in parameters.named_children if child.type not in _NON_PARAMETERS]
+    if names and names[0].type == 'identifier' and _text(source, names[0]) in _RECEIVERS:
+        names = names[1:]
+    # Go declares several names at once: (a, b int)
+    return sum(max(1, len(child.children_by_field_name('name'))) for child in names)
+
+
+def _opens_level(node) -> bool:
+    """Whether a control node adds a nesting level; ``else if`` chains do not"""
+    if node.type not in _IF_TYPES:
+        return True
+    parent = node.parent
+    if parent is not None and parent.type in _ELSE_TYPES:
+        parent = parent.parent
+    return parent is None or parent.type not in _IF_TYPES
+
+
+def _compute_function_metrics(source: ParsedSource) -> Optional[List[FunctionMetrics]]:
+    tree = source.tree_sitter_tree
+    if tree is None:
+        return None
+    code = source.code.encode("utf8")
+    functions: List[FunctionMetrics] = []
+    # Open functions as [end_byte, metrics, open control block end bytes]
+    open_functions: List[List[Any]] = []
+
+    def visit(node, depth: int) -> None:
+        start = node.start_byte
+        while open_functions and open_functions[-1][0] <= start:
+            open_functions.pop()
+        if open_functions:
+            blocks = open_functions[-1][2]
+            while blocks and blocks[-1] <= start:
+                blocks.pop()
+
+        node_type = node.type
+        if node_type in FUNCTION_TYPES and node.is_named:
+            first_line = code[start:node.end_byte].split(b"\n", 1)[0].decode("utf8", errors="replace")
+            metrics = FunctionMetrics(
+                name=_function_name(code, node),
+                line=node.start_point[0] + 1,
+                length=node.end_point[0] - node.start_point[0] + 1,
+                parameters=_count_parameters(code, node),
+                signature=first_line.strip(),
+            )
+            functions.append(metrics)
+            open_functions.append([node.end_byte, metrics, []])
+        elif node_type in NESTING_TYPES and open_functions and _opens_level(node):
+            _, metrics, blocks = open_functions[-1]
+            blocks.append(node.end_byte)
+            metrics.max_nesting = max(metrics.max_nesting, len(blocks))
+
+    walk_tree_sitter(tree, settings.MAX_AST_DEPTH, settings.MAX_AST_NODES, visit)
+    return functions
+
+
+def function_metrics(code: Union[str, ParsedSource], language: str) -> Optional[List[FunctionMetrics]]:
+    """
+    Metrics for every function, in source order, or None when the language
+    has no tree-sitter grammar. Memoized on the ParsedSource.
+    """
+    source = ParsedSource.coerce(code, language)
+    return source.derived("function_metrics", lambda: _compute_function_metrics(source))
+
+
+def duplicate_blocks(code: Union[str, ParsedSource], language: str = "") -> List[DuplicateBlock]:
+    """
+    Windows of ``DUPLICATE_WINDOW_LINES`` significant lines (whitespace
+    collapsed) that already appeared earlier in the file. A long duplicated
+    region is reported once, at its start.
+    """
+    source = ParsedSource.coerce(code, language)
+    significant = []
+    for number, line in enumerate(source.lines, start=1):
+        normalized = " ".join(line.split())
+        if len(normalized) >= DUPLICATE_MIN_LINE_LENGTH:
+            significant.append((number, normalized))
+
+    # Window of normalized lines -> index of its first occurrence
+    seen: Dict[tuple, int] = {}
+    duplicates: List[DuplicateBlock] = []
+    index = 0
+    last = len(significant) - DUPLICATE_WINDOW_LINES
+    while index <= last:
+        window = tuple(text for _, text in significant[index:index + DUPLICATE_WINDOW_LINES])
+        first = seen.setdefault(window, index)
+        if first + DUPLICATE_WINDOW_LINES <= index:
+            # Extend the match as far as the copy goes, then report it once
+            size = DUPLICATE_WINDOW_LINES
+            while (index + size < len(significant) and first + size < index
+                   and significant[index + size][1] == significant[first + size][1]):
+                size += 1
+            line = significant[index][0]
+            duplicates.append(DuplicateBlock(
+                line=line,
+                first_line=significant[first][0],
+                lines=significant[index + size - 1][0] - line + 1,
+                snippet="\n".join(window),
+            ))
+            index += size
+        else:
+            index += 1
+    return duplicates
@@ -5,9 +5,14 @@ Analyzes time and space complexity of algorithms and code structures.
 
 import ast
 import re
-from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import asdict
+from typing import Dict, List, Any, Optional, Tuple, Union
 import structlog
 
+from .parsed_source import ParsedSource
+from .result_cache import cached_result
+from .structural_analysis import StructuralSummary, analyze_structure
+
 logger = structlog.get_logger(__name__)
 
 
@@ -36,10 +41,19 @@ class ComplexityAnalyzer:
             'O(2ⁿ)': ['exponential space', 'recursive tree']
         }
     
-    async def analyze_complexity(self, code: str, language: str):
-        # Use the real analysis methods for time and space complexity
-        time_result = self.analyze_time_complexity(code, language)
-        space_result = self.analyze_space_complexity(code, language)
+    async def analyze_complexity(self, code: Union[str, ParsedSource], language: str):
+        # Use the real analysis methods for time and space complexity; both
+        # share one ParsedSource so the code is parsed once
+        source = ParsedSource.coerce(code, language)
+        fingerprint = ""
+        if source.language != "python" and self._structure(source) is None:
+            # The phrase fallback also reads comments, so only identical text may share a result
+            fingerprint = source.code
+        return await cached_result("complexity", source, lambda: self._analyze_complexity(source, language), fingerprint)
+    
+    async def _analyze_complexity(self, source: ParsedSource, language: str) -> Dict[str, Any]:
+        time_result = self.analyze_time_complexity(source, language)
+        space_result = self.analyze_space_complexity(source, language)
         return {
             "time_complexity": time_result.get("complexity"),
             "time_analysis": time_result.get("analysis"),
@@ -51,50 +65,52 @@ class ComplexityAnalyzer:
             "space_details": space_result.get("details"),
         }
     
-    def analyze_time_complexity(self, code: str, language: str = "python") -> Dict[str, Any]:
+    def analyze_time_complexity(self, code: Union[str, ParsedSource], language: str = "python") -> Dict[str, Any]:
         """
         Analyze the time complexity of the given code.
         
         Args:
-            code: Source code to analyze
+            code: Source code to analyze, or a ParsedSource shared with other analyzers
             language: Programming language of the code
             
         Returns:
             Dictionary containing time complexity analysis
         """
         try:
+            source = ParsedSource.coerce(code, language)
             if language.lower() == "python":
-                return self._analyze_python_time_complexity(code)
+                return self._analyze_python_time_complexity(source)
             else:
-                return self._analyze_generic_time_complexity(code)
+                return self._analyze_generic_time_complexity(source)
         except Exception as e:
             logger.error(f"Error analyzing time complexity: {e}")
             return {"error": str(e), "complexity": "Unknown"}
     
-    def analyze_space_complexity(self, code: str, language: str = "python") -> Dict[str, Any]:
+    def analyze_space_complexity(self, code: Union[str, ParsedSource], language: str = "python") -> Dict[str, Any]:
         """
         Analyze the space complexity of the given code.
         
         Args:
-            code: Source code to analyze
+            code: Source code to analyze, or a ParsedSource shared with other analyzers
             language: Programming language of the code
             
         Returns:
             Dictionary containing space complexity analysis
         """
         try:
+            source = ParsedSource.coerce(code, language)
             if language.lower() == "python":
-                return self._analyze_python_space_complexity(code)
+                return self._analyze_python_space_complexity(source)
             else:
-                return self._analyze_generic_space_complexity(code)
+                return self._analyze_generic_space_complexity(source)
         except Exception as e:
             logger.error(f"Error analyzing space complexity: {e}")
             return {"error": str(e), "complexity": "Unknown"}
     
-    def _analyze_python_time_complexity(self, code: str) -> Dict[str, Any]:
+    def _analyze_python_time_complexity(self, source: ParsedSource) -> Dict[str, Any]:
         """Analyze time complexity for Python code using AST."""
         try:
-            tree = ast.parse(code)
+            tree = source.python_ast
             analyzer = PythonTimeComplexityAnalyzer()
             analyzer.visit(tree)
             
@@ -108,10 +124,10 @@ class ComplexityAnalyzer:
             logger.error(f"Error in Python time complexity analysis: {e}")
             return {"complexity": "Unknown", "error": str(e)}
     
-    def _analyze_python_space_complexity(self, code: str) -> Dict[str, Any]:
+    def _analyze_python_space_complexity(self, source: ParsedSource) -> Dict[str, Any]:
         """Analyze space complexity for Python code using AST."""
         try:
-            tree = ast.parse(code)
+            tree = source.python_ast
             analyzer = PythonSpaceComplexityAnalyzer()
             analyzer.visit(tree)
             
@@ -125,15 +141,85 @@ class ComplexityAnalyzer:
             logger.error(f"Error in Python space complexity analysis: {e}")
             return {"complexity": "Unknown", "error": str(e)}
     
-    def _analyze_generic_time_complexity(self, code: str) -> Dict[str, Any]:
-        """Analyze time complexity for generic code using pattern matching."""
+    def _structure(self, source: ParsedSource) -> Optional[StructuralSummary]:
+        """Structural facts from tree-sitter queries, shared by time and space analysis."""
+        return source.derived("structure", lambda: analyze_structure(source, source.language))
+    
+    def _loop_complexity(self, depth: int) -> str:
+        """Complexity label for loops nested ``depth`` deep."""
+        labels = {0: "O(1)", 1: "O(n)", 2: "O(n²)", 3: "O(n³)"}
+        return labels.get(depth, f"O(n^{depth})")
+    
+    def _structural_time_complexity(self, structure: StructuralSummary) -> Dict[str, Any]:
+        """Derive time complexity from loop nesting and recursion."""
+        depth = structure.max_loop_depth
+        branching = max(structure.recursive_functions.values(), default=0)
+        
+        if branching >= 2:
+            name = max(structure.recursive_functions, key=structure.recursive_functions.get)
+            complexity = "O(2ⁿ)"
+            confidence = 0.7
+            analysis = f"Function {name} calls itself {branching} times - exponential time complexity"
+        elif branching == 1:
+            complexity = self._loop_complexity(max(depth, 1))
+            confidence = 0.6
+            analysis = f"Linear recursion with loops nested {depth} deep - {complexity}"
+        elif depth:
+            complexity = self._loop_complexity(depth)
+            confidence = 0.8
+            analysis = f"Loops nested {depth} deep - {complexity}"
+        else:
+            complexity = "O(1)"
+            confidence = 0.7
+            analysis = "No loops or recursion - constant time complexity"
+        
+        return {
+            "complexity": complexity,
+            "confidence": confidence,
+            "analysis": analysis,
+            "details": asdict(structure)
+        }
+    
+    def _structural_space_complexity(self, structure: StructuralSummary) -> Dict[str, Any]:
+        """Derive space complexity from recursion and allocations."""
+        if structure.recursive_functions:
+            complexity = "O(n)"
+            confidence = 0.8
+            analysis = "Recursive calls use the call stack - linear space complexity"
+        elif structure.collections or structure.allocations_in_loops:
+            complexity = "O(n)"
+            confidence = 0.7
+            analysis = "Collections or allocations inside loops - linear space complexity"
+        elif structure.allocations:
+            complexity = "O(n)"
+            confidence = 0.6
+            analysis = "Dynamic allocation detected - linear space complexity"
+        else:
+            complexity = "O(1)"
+            confidence = 0.7
+            analysis = "No significant allocations - constant space complexity"
+        
+        return {
+            "complexity": complexity,
+            "confidence": confidence,
+            "analysis": analysis,
+            "details": asdict(structure)
+        }
+    
+    def _analyze_generic_time_complexity(self, source: ParsedSource) -> Dict[str, Any]:
+        """Analyze time complexity for generic code using tree-sitter queries, or pattern matching as a fallback."""
         try:
+            structure = self._structure(source)
+            if structure is not None:
+                return self._structural_time_complexity(structure)
+            
             complexity_scores = {}
+            code_lower = source.lower
             
             for complexity, patterns in self.complexity_patterns.items():
                 score = 0
                 for pattern in patterns:
-                    if pattern.lower() in code.lower():
+                    if pattern.lower() in code_lower:
                         score += 1
                 
                 if score > 0:
@@ -157,15 +243,20 @@ class ComplexityAnalyzer:
             logger.error(f"Error in generic time complexity analysis: {e}")
             return {"complexity": "Unknown", "error": str(e)}
     
-    def _analyze_generic_space_complexity(self, code: str) -> Dict[str, Any]:
-        """Analyze space complexity for generic code using pattern matching."""
+    def _analyze_generic_space_complexity(self, source: ParsedSource) -> Dict[str, Any]:
+        """Analyze space complexity for generic code using tree-sitter queries, or pattern matching as a fallback."""
         try:
+            structure = self._structure(source)
+            if structure is not None:
+                return self._structural_space_complexity(structure)
+            
             complexity_scores = {}
+            code_lower = source.lower
             
             for complexity, patterns in self.space_complexity_patterns.items():
                 score = 0
                 for pattern in patterns:
-                    if pattern.lower() in code.lower():
+                    if pattern.lower() in code_lower:
                         score += 1
                 
                 if score > 0:
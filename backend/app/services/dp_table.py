@@ -0,0 +1,182 @@
+"""
+Dynamic programming tables for heatmap visualizations
+
+A DP table arrives as a list of rows and is turned into one float array
+once by ``as_array``. Non-numeric cells, missing cells of ragged rows and
+infinities (the usual "unreachable" value) become NaN, which the heatmap
+leaves blank and the spec sends as null.
+
+Large tables are never drawn or sent whole:
+
+- ``Window`` selects the rows and columns to show, so a client can pan
+  through a table one viewport at a time.
+- ``downsample`` reduces a window to at most a given number of cells per
+  side by averaging blocks of cells, so the image stays one ``imshow`` of
+  bounded size however large the table is.
+
+``DPTableStore`` keeps recently submitted tables by content id, so viewport
+queries name a table instead of sending it again.
+"""
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+def as_array(table: Any) -> np.ndarray:
+    """A DP table as a 2-D float array, with NaN for cells that are not finite numbers"""
+    if isinstance(table, np.ndarray) and table.dtype.kind == 'f' and table.ndim == 2:
+        return table
+    try:
+        array = np.array(table, dtype=float)
+    except (TypeError, ValueError):
+        # Ragged rows or non-numeric cells: convert cell by cell
+        rows = [row if isinstance(row, (list, tuple)) else [row] for row in table]
+        array = np.full((len(rows), max((len(row) for row in rows), default=0)), np.nan)
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    array[i, j] = value
+    if array.ndim == 1:
+        array = array.reshape(1, -1)
+    elif array.ndim != 2:
+        raise ValueError(f"A DP table has two dimensions, got {array.ndim}")
+    if not np.isfinite(array).all():
+        array = np.where(np.isfinite(array), array, np.nan)
+    return array
+
+
+def value_range(array: np.ndarray) -> Optional[Tuple[float, float]]:
+    """Smallest and largest value of the table, or None when it has none"""
+    if not array.size or np.isnan(array).all():
+        return None
+    return float(np.nanmin(array)), float(np.nanmax(array))
+
+
+@dataclass(frozen=True)
+class Window:
+    """Rows ``[row_start, row_end)`` and columns ``[col_start, col_end)`` of a table; None ends run to the edge"""
+    row_start: int = 0
+    row_end: Optional[int] = None
+    col_start: int = 0
+    col_end: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, window: Optional[Dict[str, Any]]) -> 'Window':
+        window = window or {}
+        return cls(**{key: window[key] for key in ('row_start', 'row_end', 'col_start', 'col_end') if key in window})
+
+    def clamp(self, shape: Tuple[int, int], size: Optional[int] = None) -> 'Window':
+        """The window within a table of ``shape``; open ends stop ``size`` cells from the start when given"""
+        rows, cols = shape
+
+        def bounds(start: int, end: Optional[int], length: int) -> Tuple[int, int]:
+            start = min(max(start, 0), length)
+            if end is None:
+                end = start + size if size else length
+            return start, min(max(end, start), length)
+
+        row_start, row_end = bounds(self.row_start, self.row_end, rows)
+        col_start, col_end = bounds(self.col_start, self.col_end, cols)
+        return Window(row_start, row_end, col_start, col_end)
+
+    def of(self, array: np.ndarray) -> np.ndarray:
+        return array[self.row_start:self.row_end, self.col_start:self.col_end]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'row_start': self.row_start, 'row_end': self.row_end,
+            'col_start': self.col_start, 'col_end': self.col_end,
+        }
+
+
+def downsample(array: np.ndarray, max_side: int) -> Tuple[np.ndarray, int]:
+    """Average square blocks of cells until no side exceeds ``max_side``; returns the array and the block size"""
+    rows, cols = array.shape
+    factor = max(1, math.ceil(max(rows, cols) / max(max_side, 1)))
+    if factor == 1:
+        return array, 1
+    # Pad to whole blocks with NaN, which the block mean ignores
+    padded = np.full((math.ceil(rows / factor) * factor, math.ceil(cols / factor) * factor), np.nan)
+    padded[:rows, :cols] = array
+    blocks = padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor)
+    counts = np.count_nonzero(~np.isnan(blocks), axis=(1, 3))
+    sums = np.nansum(blocks, axis=(1, 3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan), factor
+
+
+def to_cells(array: np.ndarray) -> list:
+    """Rows of cell values for JSON, with null for empty cells"""
+    return [[None if math.isnan(value) else value for value in row] for row in array.tolist()]
+
+
+def table_id(array: np.ndarray) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(repr(array.shape).encode())
+    hasher.update(np.ascontiguousarray(array).tobytes())
+    return hasher.hexdigest()
+
+
+class DPTableStore:
+    """
+    Recently submitted DP tables by content id, up to ``max_bytes`` of cells
+    in all, least recently used first out
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or settings.DP_TABLE_CACHE_BYTES
+        self._tables: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, table: Any) -> Tuple[str, np.ndarray]:
+        array = as_array(table)
+        # Shared by concurrent viewport queries, so it must not be modified
+        array.flags.writeable = False
+        key = table_id(array)
+        with self._lock:
+            stored = self._tables.pop(key, None)
+            if stored is None:
+                self._bytes += array.nbytes
+            else:
+                array = stored
+            self._tables[key] = array
+            # The table just stored stays even if it alone is over the limit
+            while self._bytes > self.max_bytes and len(self._tables) > 1:
+                _, evicted = self._tables.popitem(last=False)
+                self._bytes -= evicted.nbytes
+        return key, array
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            array = self._tables.get(key)
+            if array is not None:
+                self._tables.move_to_end(key)
+            return array
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+            self._bytes = 0
+
+
+# Global DP table store
+dp_table_store: Optional[DPTableStore] = None
+
+
+def get_dp_table_store() -> DPTableStore:
+    """Get the DP table store instance"""
+    global dp_table_store
+
+    if not dp_table_store:
+        dp_table_store = DPTableStore()
+
+    return dp_table_store
@@ -1,34 +1,10 @@
 import sys
 import ast
 import types
-import copy
 import traceback
 
-def _make_json_serializable(obj):
-    """
-    Recursively convert objects to JSON-serializable types.
-    Handles Python types, functions, and other non-serializable objects.
-    """
-    if obj is None:
-        return None
-    elif isinstance(obj, (str, int, float, bool)):
-        return obj
-    elif isinstance(obj, (list, tuple)):
-        return [_make_json_serializable(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {str(k): _make_json_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, type):
-        return f"<type '{obj.__name__}'>"
-    elif callable(obj):
-        return f"<function '{getattr(obj, '__name__', 'anonymous')}'>"
-    elif hasattr(obj, '__dict__'):
-        # For objects with __dict__, try to serialize their attributes
-        try:
-            return {str(k): _make_json_serializable(v) for k, v in obj.__dict__.items()}
-        except:
-            return f"<object '{type(obj).__name__}'>"
-    else:
-        return str(obj)
+from app.core.config import settings
+from app.core.serialization import to_jsonable
 
 class ExecutionTracer:
     def __init__(self, code, input_data=None):
@@ -114,14 +90,17 @@ class ExecutionTracer:
         
         return structures
 
+    def _to_jsonable(self, value):
+        return to_jsonable(value, max_items=settings.JSON_MAX_ITEMS)
+
     def _snapshot(self, frame):
-        # Make a deep copy of frame locals and ensure they're JSON-serializable
-        local_vars = copy.deepcopy(frame.f_locals)
-        # Apply defensive serialization to all frame locals
-        serializable_locals = _make_json_serializable(local_vars)
+        # Converting to JSON-native values copies the locals, so the snapshot
+        # is not affected by later mutation and needs no deep copy
+        local_vars = dict(frame.f_locals)
+        serializable_locals = self._to_jsonable(local_vars)
         
         # Detect data structures for visualization
-        data_structures = self._detect_data_structures(local_vars)
+        data_structures = self._to_jsonable(self._detect_data_structures(local_vars))
         
         # Get call stack information
         call_stack = []
@@ -147,7 +126,7 @@ class ExecutionTracer:
             'locals': serializable_locals,
             'data_structures': data_structures,
             'call_stack': call_stack,
-            'graph': self._serialize_graph(local_vars) if any(self._is_graph(v) for v in local_vars.values()) else None
+            'graph': self._to_jsonable(self._serialize_graph(local_vars)) if any(self._is_graph(v) for v in local_vars.values()) else None
         })
 
     def tracer(self, frame, event, arg):
@@ -0,0 +1,277 @@
+"""
+Graph layout engine for graph visualizations
+
+``layout_graph`` places the nodes of a ``{nodes, edges}`` graph with one of
+three engines, chosen by ``GRAPH_LAYOUT_ENGINE`` or per call:
+
+- ``forceatlas2``: force-directed, with ForceAtlas2's degree-weighted
+  repulsion, linear edge attraction and gravity, vectorized with NumPy.
+  Above ``BARNES_HUT_THRESHOLD`` nodes, repulsion from distant nodes is
+  approximated Barnes-Hut style by the centres of mass of grid cells, and
+  only nodes in neighbouring cells interact exactly.
+- ``layered``: BFS levels from the source nodes, top to bottom, each level
+  ordered by the mean position of its parents.
+- ``circular``: evenly spaced on a circle.
+
+Graphs over ``MAX_GRAPH_NODES`` or ``MAX_GRAPH_EDGES`` are reduced first
+(level of detail): the highest-degree nodes are kept, then the edges
+between them with the highest-degree endpoints.
+
+Positions are normalized to [-1, 1]. Layouts are cached by a hash of the
+engine and the graph, so the frames of a step-by-step traversal, which
+share a graph and differ only in the visit order, reuse one layout.
+"""
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+ENGINES = ('forceatlas2', 'layered', 'circular')
+
+# Node count above which force-directed repulsion is approximated
+BARNES_HUT_THRESHOLD = 400
+# ForceAtlas2 repulsion and gravity constants
+REPULSION = 1.0
+GRAVITY = 1.0
+
+
+@dataclass(frozen=True)
+class GraphLayout:
+    """Positions of a graph's shown nodes, and its edges as node indices"""
+    engine: str
+    nodes: List[Any]
+    index: Dict[Any, int]
+    positions: np.ndarray
+    edges: np.ndarray
+    total_nodes: int
+    total_edges: int
+
+    @property
+    def reduced(self) -> bool:
+        """Whether nodes or edges were dropped to stay within the limits"""
+        return len(self.nodes) < self.total_nodes or len(self.edges) < self.total_edges
+
+
+_cache: "OrderedDict[str, GraphLayout]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _edge_indices(index: Dict[Any, int], edges: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """Edges as an (m, 2) array of node indices; edges to unknown nodes are dropped"""
+    pairs = [
+        (index[edge['from']], index[edge['to']]) for edge in edges
+        if edge.get('from') in index and edge.get('to') in index
+    ]
+    return np.array(pairs, dtype=np.int64).reshape(-1, 2)
+
+
+def reduce_graph(nodes: List[Any], pairs: np.ndarray, max_nodes: int, max_edges: int):
+    """Keep the ``max_nodes`` highest-degree nodes and the ``max_edges`` edges between them with the highest-degree ends"""
+    degree = np.bincount(pairs.ravel(), minlength=len(nodes))
+    if len(nodes) > max_nodes:
+        # Stable, so equal degrees keep input order
+        keep = np.sort(np.argsort(-degree, kind='stable')[:max_nodes])
+        remap = np.full(len(nodes), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        pairs = remap[pairs]
+        pairs = pairs[(pairs >= 0).all(axis=1)]
+        nodes = [nodes[i] for i in keep]
+        degree = degree[keep]
+    if len(pairs) > max_edges:
+        weight = degree[pairs[:, 0]] + degree[pairs[:, 1]]
+        pairs = pairs[np.sort(np.argsort(-weight, kind='stable')[:max_edges])]
+    return nodes, pairs
+
+
+def _normalize(positions: np.ndarray) -> np.ndarray:
+    positions = positions - positions.mean(axis=0)
+    extent = np.abs(positions).max() if len(positions) else 0.0
+    return positions / extent if extent > 0 else positions
+
+
+def circular_layout(n: int, pairs: np.ndarray) -> np.ndarray:
+    angles = 2 * np.pi * np.arange(n) / max(n, 1)
+    return np.column_stack((np.cos(angles), np.sin(angles))) if n > 1 else np.zeros((n, 2))
+
+
+def layered_layout(n: int, pairs: np.ndarray) -> np.ndarray:
+    children: List[List[int]] = [[] for _ in range(n)]
+    has_parent = np.zeros(n, dtype=bool)
+    for source, target in pairs.tolist():
+        if source != target:
+            children[source].append(target)
+            has_parent[target] = True
+
+    level = np.full(n, -1, dtype=np.int64)
+    # Sources first, then whatever they do not reach, in input order
+    starts = [i for i in range(n) if not has_parent[i]] + list(range(n))
+    for start in starts:
+        if level[start] >= 0:
+            continue
+        level[start] = 0
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for child in children[node]:
+                if level[child] < 0:
+                    level[child] = level[node] + 1
+                    queue.append(child)
+
+    positions = np.zeros((n, 2))
+    x_of = np.zeros(n)
+    parents: List[List[int]] = [[] for _ in range(n)]
+    for source, target in pairs.tolist():
+        if level[target] == level[source] + 1:
+            parents[target].append(source)
+    for depth in range(int(level.max()) + 1 if n else 0):
+        members = np.flatnonzero(level == depth)
+        if depth:
+            # Barycentre ordering: fewer crossings between consecutive levels
+            keys = [np.mean(x_of[parents[i]]) if parents[i] else math.inf for i in members]
+            members = members[np.argsort(keys, kind='stable')]
+        x_of[members] = np.arange(len(members)) - (len(members) - 1) / 2
+        positions[members, 1] = -depth
+    positions[:, 0] = x_of
+    return positions
+
+
+def _repulsion_exact(positions: np.ndarray, mass: np.ndarray) -> np.ndarray:
+    delta = positions[:, None, :] - positions[None, :, :]
+    distance2 = np.einsum('ijk,ijk->ij', delta, delta)
+    np.fill_diagonal(distance2, np.inf)
+    strength = mass[:, None] * mass[None, :] / np.maximum(distance2, 1e-9)
+    return np.einsum('ij,ijk->ik', strength, delta)
+
+
+def _repulsion_grid(positions: np.ndarray, mass: np.ndarray) -> np.ndarray:
+    """Barnes-Hut style: exact within neighbouring grid cells, centres of mass beyond"""
+    n = len(positions)
+    # About 3 * sqrt(n) cells balances the far-field and near-field work
+    side = max(2, int(math.ceil(math.sqrt(3 * math.sqrt(n)))))
+    low = positions.min(axis=0)
+    span = np.maximum(positions.max(axis=0) - low, 1e-9)
+    cell_xy = np.minimum((positions - low) / span * side, side - 1).astype(np.int64)
+    cell = cell_xy[:, 0] * side + cell_xy[:, 1]
+
+    cell_mass = np.bincount(cell, weights=mass, minlength=side * side)
+    occupied = np.flatnonzero(cell_mass)
+    centre = np.column_stack([
+        np.bincount(cell, weights=mass * positions[:, axis], minlength=side * side)[occupied] / cell_mass[occupied]
+        for axis in (0, 1)
+    ])
+    occupied_xy = np.column_stack((occupied // side, occupied % side))
+
+    # Far field: every node against the centre of every cell that is not a neighbour of its own
+    delta = positions[:, None, :] - centre[None, :, :]
+    distance2 = np.einsum('ijk,ijk->ij', delta, delta)
+    far = (np.abs(cell_xy[:, None, :] - occupied_xy[None, :, :]) > 1).any(axis=2)
+    strength = np.where(far, mass[:, None] * cell_mass[occupied][None, :] / np.maximum(distance2, 1e-9), 0.0)
+    force = np.einsum('ij,ijk->ik', strength, delta)
+
+    # Near field: exact, block by block
+    order = np.argsort(cell, kind='stable')
+    bounds = np.searchsorted(cell[order], np.arange(side * side + 1))
+    for c in occupied:
+        members = order[bounds[c]:bounds[c + 1]]
+        cx, cy = divmod(int(c), side)
+        neighbours = np.concatenate([
+            order[bounds[x * side + y]:bounds[x * side + y + 1]]
+            for x in range(max(cx - 1, 0), min(cx + 2, side))
+            for y in range(max(cy - 1, 0), min(cy + 2, side))
+        ])
+        near = positions[members][:, None, :] - positions[neighbours][None, :, :]
+        near_distance2 = np.einsum('ijk,ijk->ij', near, near)
+        near_distance2[members[:, None] == neighbours[None, :]] = np.inf
+        near_strength = mass[members][:, None] * mass[neighbours][None, :] / np.maximum(near_distance2, 1e-9)
+        force[members] += np.einsum('ij,ijk->ik', near_strength, near)
+    return force
+
+
+def force_directed_layout(n: int, pairs: np.ndarray, iterations: Optional[int] = None) -> np.ndarray:
+    if n < 2:
+        return np.zeros((n, 2))
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    mass = np.bincount(pairs.ravel(), minlength=n).astype(float) + 1
+    repulsion = _repulsion_exact if n <= BARNES_HUT_THRESHOLD else _repulsion_grid
+    iterations = iterations or (100 if n <= BARNES_HUT_THRESHOLD else 50)
+
+    # Seeded, so a graph always gets the same layout
+    scale = math.sqrt(n)
+    positions = np.random.default_rng(0).uniform(-scale, scale, size=(n, 2))
+    temperature = scale / 4
+    cooling = 0.01 ** (1 / iterations)
+    for _ in range(iterations):
+        force = REPULSION * repulsion(positions, mass)
+        delta = positions[pairs[:, 0]] - positions[pairs[:, 1]]
+        np.add.at(force, pairs[:, 0], -delta)
+        np.add.at(force, pairs[:, 1], delta)
+        distance = np.linalg.norm(positions, axis=1, keepdims=True)
+        force -= GRAVITY * mass[:, None] * positions / np.maximum(distance, 1e-9)
+
+        # Move along the force, at most the current temperature
+        length = np.linalg.norm(force, axis=1, keepdims=True)
+        positions += force * np.minimum(1.0, temperature / np.maximum(length, 1e-9))
+        temperature *= cooling
+    return positions
+
+
+_LAYOUTS = {
+    'forceatlas2': force_directed_layout,
+    'layered': layered_layout,
+    'circular': circular_layout,
+}
+
+
+def graph_hash(engine: str, nodes: Sequence[Any], edges: Sequence[Dict[str, Any]]) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f"{engine}:{settings.MAX_GRAPH_NODES}:{settings.MAX_GRAPH_EDGES}".encode())
+    hasher.update(repr(list(nodes)).encode())
+    hasher.update(repr([(edge.get('from'), edge.get('to')) for edge in edges]).encode())
+    return hasher.hexdigest()
+
+
+def layout_graph(nodes: Sequence[Any], edges: Sequence[Dict[str, Any]], engine: Optional[str] = None) -> GraphLayout:
+    """Layout of a graph, from the cache when the same graph was laid out before"""
+    engine = engine or settings.GRAPH_LAYOUT_ENGINE
+    if engine not in _LAYOUTS:
+        raise ValueError(f"Unknown graph layout engine: {engine}")
+
+    key = graph_hash(engine, nodes, edges)
+    with _cache_lock:
+        layout = _cache.get(key)
+        if layout is not None:
+            _cache.move_to_end(key)
+            return layout
+
+    # Duplicate node ids collapse onto their first occurrence
+    shown = list(dict.fromkeys(nodes))
+    pairs = _edge_indices({node: i for i, node in enumerate(shown)}, edges)
+    total_nodes, total_edges = len(shown), len(pairs)
+    shown, pairs = reduce_graph(shown, pairs, settings.MAX_GRAPH_NODES, settings.MAX_GRAPH_EDGES)
+
+    positions = _normalize(_LAYOUTS[engine](len(shown), pairs).astype(float))
+    # The layout is shared through the cache, so it must not be modified
+    positions.flags.writeable = False
+    pairs.flags.writeable = False
+    layout = GraphLayout(
+        engine=engine,
+        nodes=shown,
+        index={node: i for i, node in enumerate(shown)},
+        positions=positions,
+        edges=pairs,
+        total_nodes=total_nodes,
+        total_edges=total_edges,
+    )
+
+    with _cache_lock:
+        _cache[key] = layout
+        while len(_cache) > settings.GRAPH_LAYOUT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return layout
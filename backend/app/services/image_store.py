@@ -0,0 +1,211 @@
+"""
+Content-addressed store for rendered visualizations
+
+Rendered charts and animations are kept on disk under the hash of what
+was rendered (``image_key``): the chart name, its data and options, and
+the renderer version. The same input therefore always maps to the same
+URL, ``{API_PREFIX}/visualization/{key}.{ext}``, whose bytes never change,
+so the key doubles as a strong ETag and the response can be cached by the
+browser as immutable. A repeated analysis references the image it already
+has instead of re-sending it, and the server serves it from disk instead
+of rendering it again.
+
+The store is bounded by ``IMAGE_CACHE_MAX_BYTES`` and evicts the least
+recently used images first. Recency is kept in memory and mirrored to
+file modification times, so the order survives a restart. Processes
+sharing the directory (the API and the analysis workers) each keep their
+own index and pick up files the others wrote on first lookup. Since no
+process sees all the writes, each re-measures the directory itself after
+storing ``1 / RESCAN_FRACTION`` of the limit, and evicts by what is on
+disk, so together they stay near the limit rather than a multiple of it.
+
+Lookups stat the directory, so async callers run them in a thread like
+reads and writes.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import matplotlib
+
+from app.core.config import settings
+from app.core.serialization import dumps
+
+MIME_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'gif': 'image/gif',
+    'apng': 'image/apng',
+    'webp': 'image/webp',
+}
+
+# Bump when a drawing function changes, so old renders are not served for new input
+RENDER_VERSION = 1
+
+KEY_LENGTH = 32
+
+# Share of the size limit a process stores before re-measuring the directory
+RESCAN_FRACTION = 16
+
+
+def image_key(*parts: Any) -> str:
+    """Hash of everything that determines a rendered image"""
+    hasher = hashlib.blake2b(digest_size=KEY_LENGTH // 2)
+    hasher.update(f"{RENDER_VERSION}:{matplotlib.__version__}:".encode())
+    hasher.update(dumps(list(parts)))
+    return hasher.hexdigest()
+
+
+def is_image_key(key: str) -> bool:
+    return len(key) == KEY_LENGTH and all(c in '0123456789abcdef' for c in key)
+
+
+def image_url(key: str, ext: str) -> str:
+    return f"{settings.API_PREFIX}/visualization/{key}.{ext}"
+
+
+def image_ref(key: str, ext: str) -> Dict[str, Any]:
+    """The reference to a stored image that ``ref`` outputs carry"""
+    return {'url': image_url(key, ext), 'hash': key, 'mime_type': MIME_TYPES[ext]}
+
+
+class ImageStore:
+    """Rendered images on disk by key and extension, least recently used first out"""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or settings.IMAGE_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.IMAGE_CACHE_MAX_BYTES
+        # File name -> size, least recently used first
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        # Bytes this process stored since it last measured the directory
+        self._written = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    @property
+    def size(self) -> int:
+        """Total bytes of the stored images"""
+        return self._bytes
+
+    def _load(self) -> None:
+        """Index the images a previous process left, oldest use first"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+        self._loaded = True
+        self._evict()
+
+    def _scan(self) -> None:
+        """Rebuild the index from the directory, including other processes' images, oldest use first"""
+        # Modification times can be coarser than the gaps between uses; ties go by this process's order
+        rank = {name: i for i, name in enumerate(self._index)}
+        files = []
+        for entry in os.scandir(self.directory):
+            key, _, ext = entry.name.partition('.')
+            if entry.is_file() and ext in MIME_TYPES and is_image_key(key):
+                stat = entry.stat()
+                files.append((stat.st_mtime, rank.get(entry.name, -1), entry.name, stat.st_size))
+        self._index.clear()
+        self._bytes = 0
+        self._written = 0
+        for _, _, name, size in sorted(files):
+            self._index[name] = size
+            self._bytes += size
+
+    def _evict(self) -> None:
+        if self._bytes > self.max_bytes or self._written > self.max_bytes // RESCAN_FRACTION:
+            self._scan()
+        while self._bytes > self.max_bytes and self._index:
+            name, size = self._index.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _adopt(self, name: str) -> bool:
+        """Index an image another process stored since this one loaded; call with the lock held"""
+        try:
+            size = os.stat(os.path.join(self.directory, name)).st_size
+        except FileNotFoundError:
+            return False
+        self._index[name] = size
+        self._bytes += size
+        self._evict()
+        return name in self._index
+
+    def contains(self, key: str, ext: str) -> bool:
+        name = f"{key}.{ext}"
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return name in self._index or self._adopt(name)
+
+    def get(self, key: str, ext: str) -> Optional[bytes]:
+        name = f"{key}.{ext}"
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if name not in self._index and not self._adopt(name):
+                return None
+            self._index.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another process
+            with self._lock:
+                self._bytes -= self._index.pop(name, 0)
+            return None
+        return data
+
+    def put(self, key: str, ext: str, data: bytes) -> None:
+        name = f"{key}.{ext}"
+        with self._lock:
+            if not self._loaded:
+                self._load()
+        # Written under a temporary name and renamed, so readers never see a partial file
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temporary, os.path.join(self.directory, name))
+        except OSError:
+            os.unlink(temporary)
+            raise
+        with self._lock:
+            self._bytes += len(data) - self._index.pop(name, 0)
+            self._index[name] = len(data)
+            self._written += len(data)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in self._index:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+            self._index.clear()
+            self._bytes = 0
+            self._written = 0
+
+
+# Global image store
+image_store: Optional[ImageStore] = None
+
+
+def get_image_store() -> ImageStore:
+    """Get the image store instance"""
+    global image_store
+
+    if not image_store:
+        image_store = ImageStore()
+
+    return image_store
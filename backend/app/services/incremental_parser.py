@@ -0,0 +1,281 @@
+"""
+Incremental tree-sitter parsing for editor-driven analysis
+
+Each editor session keeps the source bytes and the last tree-sitter tree.
+Text edits are applied with ``Tree.edit()`` and the file is reparsed against
+the old tree, so tree-sitter only re-lexes the damaged region. Only the
+regions touched by the edit are re-analyzed and returned to the client.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from .tree_sitter_parser import LANGUAGE_MAP, get_parser, parse_source
+
+logger = get_logger(__name__)
+
+# Node types that mark a unit worth re-analyzing on its own
+_ANALYSIS_UNIT_SUFFIXES = ("definition", "declaration", "statement", "item", "declarator")
+_LOOP_MARKERS = ("for", "while", "loop", "do_statement")
+_FUNCTION_MARKERS = ("function", "method", "lambda", "constructor")
+
+
+@dataclass
+class ParseSession:
+    """State kept for one editor session"""
+    session_id: str
+    language: str
+    source: bytes
+    tree: Any
+    version: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+def _point_for_byte(source: bytes, offset: int) -> Tuple[int, int]:
+    """Convert a byte offset into a tree-sitter (row, byte column) point"""
+    row = source.count(b"\n", 0, offset)
+    line_start = source.rfind(b"\n", 0, offset) + 1
+    return row, offset - line_start
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or touching byte ranges"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _summarize_node(node) -> Dict[str, Any]:
+    """Walk one subtree iteratively and collect the statistics the editor shows"""
+    stats = {
+        "total_nodes": 0,
+        "loops": 0,
+        "functions": [],
+        "max_depth": 0,
+        "has_error": node.has_error,
+    }
+    cursor = node.walk()
+    depth = 0
+    while True:
+        current = cursor.node
+        stats["total_nodes"] += 1
+        stats["max_depth"] = max(stats["max_depth"], depth)
+        node_type = current.type
+        if current.is_named:
+            if any(marker in node_type for marker in _LOOP_MARKERS):
+                stats["loops"] += 1
+            elif any(marker in node_type for marker in _FUNCTION_MARKERS) and node_type.endswith(
+                ("definition", "declaration", "item")
+            ):
+                name_node = current.child_by_field_name("name")
+                stats["functions"].append({
+                    "name": name_node.text.decode("utf8", errors="replace") if name_node else "anonymous",
+                    "line": current.start_point[0] + 1,
+                    "type": node_type,
+                })
+        if cursor.goto_first_child():
+            depth += 1
+            continue
+        # The cursor is rooted at ``node`` so it never climbs above it
+        while depth > 0 and not cursor.goto_next_sibling():
+            cursor.goto_parent()
+            depth -= 1
+        if depth == 0:
+            return stats
+
+
+def _analysis_unit(root, start: int, end: int):
+    """Find the smallest statement-level node enclosing a byte range"""
+    node = root.named_descendant_for_byte_range(start, max(start, end - 1)) or root
+    while node.parent is not None and not node.type.endswith(_ANALYSIS_UNIT_SUFFIXES):
+        node = node.parent
+    return node
+
+
+class IncrementalParseManager:
+    """Keeps per-session tree-sitter trees and reparses them incrementally"""
+
+    def __init__(self, idle_timeout: Optional[int] = None, max_sessions: Optional[int] = None):
+        self.idle_timeout = idle_timeout if idle_timeout is not None else settings.PARSE_SESSION_IDLE_TIMEOUT
+        self.max_sessions = max_sessions if max_sessions is not None else settings.PARSE_SESSION_MAX
+        self._sessions: "OrderedDict[str, ParseSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open_session(self, code: str, language: str) -> Dict[str, Any]:
+        """Parse the full file once and start a session for it"""
+        if not LANGUAGE_MAP.get(language.lower()):
+            raise ValueError(f"Incremental parsing is not supported for {language}")
+        source = code.encode("utf8")
+        if len(source) > settings.MAX_FILE_SIZE:
+            raise ValueError("Source exceeds the maximum file size")
+
+        tree = parse_source(get_parser(language), source)
+        if tree is None:
+            raise ValueError("Parsing exceeded its time budget")
+        session = ParseSession(
+            session_id=str(uuid.uuid4()),
+            language=language.lower(),
+            source=source,
+            tree=tree,
+        )
+        with self._lock:
+            self._evict_locked(time.monotonic())
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+            self._sessions[session.session_id] = session
+
+        root = tree.root_node
+        return {
+            "session_id": session.session_id,
+            "version": session.version,
+            "language": session.language,
+            "has_error": root.has_error,
+            "summary": _summarize_node(root),
+        }
+
+    def apply_edits(self, session_id: str, edits: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply text edits to a session and reparse incrementally.
+
+        Each edit is ``{"start_byte", "old_end_byte", "text"}`` with offsets into
+        the document as left by the previous edit (LSP content-change order).
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            self._sessions.move_to_end(session_id)
+
+        with session.lock:
+            return self._apply_edits_locked(session, edits)
+
+    def _apply_edits_locked(self, session: ParseSession, edits: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Validate every edit before touching the tree, since Tree.edit mutates it
+        normalized = []
+        length = len(session.source)
+        for edit in edits:
+            start = int(edit["start_byte"])
+            old_end = int(edit["old_end_byte"])
+            if not 0 <= start <= old_end <= length:
+                raise ValueError(f"Edit range {start}-{old_end} is outside the document")
+            new_text = edit.get("text", "").encode("utf8")
+            length += len(new_text) - (old_end - start)
+            normalized.append((start, old_end, new_text))
+        if length > settings.MAX_FILE_SIZE:
+            raise ValueError("Source exceeds the maximum file size")
+
+        source = session.source
+        tree = session.tree
+        edited_ranges: List[Tuple[int, int]] = []
+        for start, old_end, new_text in normalized:
+            new_end = start + len(new_text)
+
+            start_point = _point_for_byte(source, start)
+            old_end_point = _point_for_byte(source, old_end)
+            source = source[:start] + new_text + source[old_end:]
+            new_end_point = _point_for_byte(source, new_end)
+
+            tree.edit(
+                start_byte=start,
+                old_end_byte=old_end,
+                new_end_byte=new_end,
+                start_point=start_point,
+                old_end_point=old_end_point,
+                new_end_point=new_end_point,
+            )
+            # Shift earlier edited ranges that sit after this edit
+            delta = new_end - old_end
+            edited_ranges = [
+                (s + delta if s >= old_end else s, e + delta if e >= old_end else e)
+                for s, e in edited_ranges
+            ]
+            edited_ranges.append((start, new_end))
+
+        new_tree = parse_source(get_parser(session.language), source, tree)
+        if new_tree is None:
+            # The old tree has already been edited, so the session cannot continue
+            self.close_session(session.session_id)
+            raise ValueError("Parsing exceeded its time budget; open a new session")
+        changed = [(r.start_byte, r.end_byte) for r in tree.changed_ranges(new_tree)]
+
+        session.source = source
+        session.tree = new_tree
+        session.version += 1
+        session.last_used = time.monotonic()
+
+        root = new_tree.root_node
+        regions = []
+        seen_units = set()
+        for start, end in _merge_ranges(changed + edited_ranges):
+            unit = _analysis_unit(root, start, end)
+            unit_key = (unit.start_byte, unit.end_byte, unit.type)
+            if unit_key in seen_units:
+                continue
+            seen_units.add(unit_key)
+            regions.append({
+                "start_byte": unit.start_byte,
+                "end_byte": unit.end_byte,
+                "start_point": unit.start_point,
+                "end_point": unit.end_point,
+                "node_type": unit.type,
+                "summary": _summarize_node(unit),
+            })
+
+        return {
+            "session_id": session.session_id,
+            "version": session.version,
+            "has_error": root.has_error,
+            "changed_ranges": [{"start_byte": s, "end_byte": e} for s, e in _merge_ranges(changed)],
+            "regions": regions,
+        }
+
+    def close_session(self, session_id: str) -> bool:
+        """Drop a session explicitly"""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Evict sessions that have been idle longer than the timeout"""
+        with self._lock:
+            return self._evict_locked(now if now is not None else time.monotonic())
+
+    def _evict_locked(self, now: float) -> int:
+        evicted = 0
+        # Sessions are kept in least-recently-used order
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used < self.idle_timeout:
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+        if evicted:
+            logger.info("Evicted idle parse sessions", count=evicted)
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+# Global parse session manager
+parse_session_manager: Optional[IncrementalParseManager] = None
+
+
+def get_parse_session_manager() -> IncrementalParseManager:
+    """Get the parse session manager instance"""
+    global parse_session_manager
+
+    if parse_session_manager is None:
+        parse_session_manager = IncrementalParseManager()
+
+    return parse_session_manager
@@ -4,76 +4,93 @@ Real optimization service for code analysis and improvement
 
 import ast
 import re
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from app.core.logging import get_logger
+from .parsed_source import ParsedSource
+from .result_cache import cached_result
+from .rule_engine import Rule, RuleSet
 
 logger = get_logger(__name__)
 
 
+OPTIMIZATION_PATTERNS = {
+    'recursive_to_iterative': {
+        'patterns': ['def.*fibonacci', 'def.*factorial', 'recursive'],
+        'suggestions': [
+            'Consider converting recursive function to iterative to reduce stack space',
+            'Use memoization to cache recursive results',
+            'Implement tail recursion optimization'
+        ]
+    },
+    'nested_loops': {
+        'patterns': ['for.*for', 'while.*for', 'for.*while'],
+        'suggestions': [
+            'Consider using list comprehension for simple nested loops',
+            'Look for opportunities to break early from inner loops',
+            'Consider using itertools for complex iterations'
+        ]
+    },
+    'inefficient_data_structures': {
+        'patterns': ['list.*search', 'in.*list', 'list.*remove'],
+        'suggestions': [
+            'Use set() for membership testing instead of list',
+            'Consider using dict for key-value lookups',
+            'Use collections.defaultdict for counting operations'
+        ]
+    },
+    'string_concatenation': {
+        'patterns': ['\\+.*string', 'string.*\\+'],
+        'suggestions': [
+            'Use str.join() for multiple string concatenations',
+            'Consider using f-strings for string formatting',
+            'Use list comprehension with join for better performance'
+        ]
+    },
+    'unnecessary_computations': {
+        'patterns': ['len\\(.*\\)\\s*in\\s*for', 'range\\(len\\(.*\\)\\)'],
+        'suggestions': [
+            'Cache len() results in variables to avoid repeated calls',
+            'Use enumerate() instead of range(len())',
+            'Consider using zip() for parallel iteration'
+        ]
+    }
+}
+
+# Compiled once; a source is scanned a single time for all patterns
+_RULES = RuleSet([
+    Rule(opt_type, pattern, re.IGNORECASE, first_only=True)
+    for opt_type, config in OPTIMIZATION_PATTERNS.items()
+    for pattern in config['patterns']
+])
+
+
 class OptimizationService:
     """Service for analyzing and optimizing code performance and readability."""
     
     def __init__(self):
-        self.optimization_patterns = {
-            'recursive_to_iterative': {
-                'patterns': ['def.*fibonacci', 'def.*factorial', 'recursive'],
-                'suggestions': [
-                    'Consider converting recursive function to iterative to reduce stack space',
-                    'Use memoization to cache recursive results',
-                    'Implement tail recursion optimization'
-                ]
-            },
-            'nested_loops': {
-                'patterns': ['for.*for', 'while.*for', 'for.*while'],
-                'suggestions': [
-                    'Consider using list comprehension for simple nested loops',
-                    'Look for opportunities to break early from inner loops',
-                    'Consider using itertools for complex iterations'
-                ]
-            },
-            'inefficient_data_structures': {
-                'patterns': ['list.*search', 'in.*list', 'list.*remove'],
-                'suggestions': [
-                    'Use set() for membership testing instead of list',
-                    'Consider using dict for key-value lookups',
-                    'Use collections.defaultdict for counting operations'
-                ]
-            },
-            'string_concatenation': {
-                'patterns': ['\\+.*string', 'string.*\\+'],
-                'suggestions': [
-                    'Use str.join() for multiple string concatenations',
-                    'Consider using f-strings for string formatting',
-                    'Use list comprehension with join for better performance'
-                ]
-            },
-            'unnecessary_computations': {
-                'patterns': ['len\\(.*\\)\\s*in\\s*for', 'range\\(len\\(.*\\)\\)'],
-                'suggestions': [
-                    'Cache len() results in variables to avoid repeated calls',
-                    'Use enumerate() instead of range(len())',
-                    'Consider using zip() for parallel iteration'
-                ]
-            }
-        }
+        self.optimization_patterns = OPTIMIZATION_PATTERNS
     
-    async def analyze_optimization_opportunities(self, code: str, language: str) -> Dict[str, Any]:
+    async def analyze_optimization_opportunities(self, code: Union[str, ParsedSource], language: str) -> Dict[str, Any]:
         """
         Analyze code for optimization opportunities
         """
         try:
+            source = ParsedSource.coerce(code, language)
+            # The pattern rules see comments and names, so their findings are part of the cache key
+            fingerprint = repr([(o['type'], o['pattern']) for o in self._find_pattern_optimizations(source)])
             if language.lower() == 'python':
-                return await self._analyze_python_optimizations(code)
+                analyze = self._analyze_python_optimizations
             else:
-                return await self._analyze_generic_optimizations(code)
+                analyze = self._analyze_generic_optimizations
+            return await cached_result("optimization", source, lambda: analyze(source), fingerprint)
         except Exception as e:
             logger.error(f"Optimization analysis failed: {e}")
             return {"error": str(e)}
     
-    async def _analyze_python_optimizations(self, code: str) -> Dict[str, Any]:
+    async def _analyze_python_optimizations(self, source: ParsedSource) -> Dict[str, Any]:
         """Analyze Python code for specific optimization opportunities"""
         try:
-            tree = ast.parse(code)
+            tree = source.python_ast
             analyzer = PythonOptimizationAnalyzer()
             analyzer.visit(tree)
             
@@ -81,7 +98,7 @@ class OptimizationService:
             ast_optimizations = analyzer.get_optimizations()
             
             # Get pattern-based optimizations
-            pattern_optimizations = self._find_pattern_optimizations(code)
+            pattern_optimizations = self._find_pattern_optimizations(source)
             
             # Combine and rank optimizations
             all_optimizations = ast_optimizations + pattern_optimizations
@@ -98,10 +115,10 @@ class OptimizationService:
             logger.error(f"Python optimization analysis failed: {e}")
             return {"error": str(e)}
     
-    async def _analyze_generic_optimizations(self, code: str) -> Dict[str, Any]:
+    async def _analyze_generic_optimizations(self, source: ParsedSource) -> Dict[str, Any]:
         """Analyze generic code for optimization opportunities"""
         try:
-            optimizations = self._find_pattern_optimizations(code)
+            optimizations = self._find_pattern_optimizations(source)
             ranked_optimizations = self._rank_optimizations(optimizations)
             
             return {
@@ -115,19 +132,22 @@ class OptimizationService:
             logger.error(f"Generic optimization analysis failed: {e}")
             return {"error": str(e)}
     
-    def _find_pattern_optimizations(self, code: str) -> List[Dict[str, Any]]:
+    def _find_pattern_optimizations(self, source: ParsedSource) -> List[Dict[str, Any]]:
         """Find optimization opportunities based on code patterns"""
+        return source.derived("pattern_optimizations", lambda: self._scan_pattern_optimizations(source))
+    
+    def _scan_pattern_optimizations(self, source: ParsedSource) -> List[Dict[str, Any]]:
         optimizations = []
+        scan = _RULES.scan(source.code, lowered=source.lower)
         
         for opt_type, config in self.optimization_patterns.items():
-            patterns = config['patterns']
             suggestions = config['suggestions']
             
-            for pattern in patterns:
-                if re.search(pattern, code, re.IGNORECASE):
+            for rule, matches in scan.group(opt_type):
+                if matches:
                     optimizations.append({
                         'type': opt_type,
-                        'pattern': pattern,
+                        'pattern': rule.pattern,
                         'suggestions': suggestions,
                         'priority': self._determine_priority(opt_type),
                         'impact': self._estimate_impact(opt_type)
@@ -0,0 +1,134 @@
+"""
+Parsed source shared by every analyzer in one request
+
+A ``ParsedSource`` wraps the code once and lazily memoizes each derived
+representation (Python AST, tree-sitter tree, lowercase text, line offsets,
+tokens), so several analyzers working on the same file parse it at most
+once per representation. Analyzers accept either a plain string or a
+``ParsedSource``; ``ParsedSource.coerce`` handles both.
+"""
+
+import ast
+import io
+import re
+import tokenize
+from bisect import bisect_right
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .tree_sitter_parser import get_parser, parse_source
+
+_GENERIC_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+class ParsedSource:
+    """Source code plus lazily computed, memoized parse results"""
+
+    def __init__(self, code: str, language: str):
+        self.code = code
+        self.language = language.lower()
+        # How many times each representation was actually computed
+        self.parse_counts: Counter = Counter()
+        self._python_ast: Optional[ast.AST] = None
+        self._python_ast_error: Optional[SyntaxError] = None
+        self._tree_sitter_tree: Any = None
+        self._tree_sitter_done = False
+        self._lower: Optional[str] = None
+        self._lines: Optional[List[str]] = None
+        self._line_offsets: Optional[List[int]] = None
+        self._tokens: Optional[List[str]] = None
+        self._derived: Dict[str, Any] = {}
+
+    @classmethod
+    def coerce(cls, source: Union[str, "ParsedSource"], language: str) -> "ParsedSource":
+        """Wrap a plain string, or return an existing ParsedSource unchanged"""
+        if isinstance(source, ParsedSource):
+            return source
+        return cls(source, language)
+
+    @property
+    def python_ast(self) -> ast.AST:
+        """
+        The ``ast.parse`` result. A syntax error is memoized too and re-raised
+        on every access, so invalid code is not reparsed either.
+        """
+        if self._python_ast is None and self._python_ast_error is None:
+            self.parse_counts["python_ast"] += 1
+            try:
+                self._python_ast = ast.parse(self.code)
+            except SyntaxError as e:
+                self._python_ast_error = e
+        if self._python_ast_error is not None:
+            raise self._python_ast_error
+        return self._python_ast
+
+    @property
+    def tree_sitter_tree(self) -> Any:
+        """The tree-sitter tree, or None if the language has no grammar or parsing timed out"""
+        if not self._tree_sitter_done:
+            self._tree_sitter_done = True
+            parser = get_parser(self.language)
+            if parser is not None:
+                self.parse_counts["tree_sitter"] += 1
+                self._tree_sitter_tree = parse_source(parser, self.code.encode("utf8"))
+        return self._tree_sitter_tree
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self.parse_counts["lower"] += 1
+            self._lower = self.code.lower()
+        return self._lower
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self.parse_counts["lines"] += 1
+            self._lines = self.code.split('\n')
+        return self._lines
+
+    @property
+    def line_offsets(self) -> List[int]:
+        """Character offset at which each line starts"""
+        if self._line_offsets is None:
+            self.parse_counts["line_offsets"] += 1
+            offsets = [0]
+            for line in self.lines[:-1]:
+                offsets.append(offsets[-1] + len(line) + 1)
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    def line_number(self, position: int) -> int:
+        """1-based line number of a character offset"""
+        return bisect_right(self.line_offsets, position)
+
+    @property
+    def tokens(self) -> List[str]:
+        """
+        Token strings: Python's tokenizer for Python, otherwise words and
+        single punctuation characters.
+        """
+        if self._tokens is None:
+            self.parse_counts["tokens"] += 1
+            if self.language == 'python':
+                try:
+                    self._tokens = [
+                        token.string
+                        for token in tokenize.generate_tokens(io.StringIO(self.code).readline)
+                        if token.string
+                    ]
+                except (tokenize.TokenError, SyntaxError):
+                    pass
+            if self._tokens is None:
+                self._tokens = _GENERIC_TOKEN.findall(self.code)
+        return self._tokens
+
+    def derived(self, name: str, compute: Callable[[], Any]) -> Any:
+        """
+        Memoize a result computed from this source, such as a structural
+        summary shared by the time and space analyses.
+        """
+        if name not in self._derived:
+            self.parse_counts[name] += 1
+            self._derived[name] = compute()
+        return self._derived[name]
@@ -0,0 +1,132 @@
+"""
+Chart rendering off the event loop
+
+Rendering a chart with matplotlib takes tens to hundreds of milliseconds
+of CPU, and pyplot keeps global figure state, so it can neither run on the
+event loop nor be moved to threads as is. ``RenderPool`` renders with the
+object-oriented Agg API instead: each worker thread (or process, with
+``RENDER_POOL=process``) owns one ``Figure``, which it clears and reuses
+for every job, so workers share no matplotlib state.
+
+A job is a ``RenderJob``: the name of a chart in ``charts.CHARTS``, a plain
+data dict, a size and a dpi. The result is the PNG bytes. Renderers that
+build their own figures, like animations, run on the pool through ``run``.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from .charts import CHARTS
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    """One chart to render: its name in ``CHARTS`` and the data it draws"""
+    chart: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    size: Tuple[float, float] = (10, 6)
+    dpi: int = 150
+
+
+# The figure each worker thread reuses
+_local = threading.local()
+
+
+def _figure() -> Figure:
+    figure = getattr(_local, "figure", None)
+    if figure is None:
+        figure = _local.figure = Figure()
+        FigureCanvasAgg(figure)
+        _local.subplot_params = vars(figure.subplotpars).copy()
+    return figure
+
+
+def render_chart(job: RenderJob) -> bytes:
+    """Render a job on the calling thread's figure and return the PNG bytes"""
+    draw = CHARTS[job.chart]
+    figure = _figure()
+    try:
+        figure.set_size_inches(job.size)
+        draw(figure, job.data)
+        figure.tight_layout()
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format="png", dpi=job.dpi, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        # Leave the figure as new for the next job, including the margins tight_layout set
+        figure.clear()
+        figure.subplots_adjust(**_local.subplot_params)
+
+
+def _warm_up() -> bool:
+    """Create the worker's figure and load the fonts before the first job"""
+    render_chart(RenderJob("complexity_chart", dpi=10))
+    return True
+
+
+class RenderPool:
+    """Renders ``RenderJob``s on a pool of worker threads or processes"""
+
+    def __init__(self, workers: Optional[int] = None, mode: Optional[str] = None):
+        self.workers = max(1, workers if workers is not None else settings.RENDER_WORKERS)
+        self.mode = mode or settings.RENDER_POOL
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+                for future in [self._executor.submit(_warm_up) for _ in range(self.workers)]:
+                    future.result()
+                logger.info("Render pool started", workers=self.workers, mode=self.mode)
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Render pool stopped")
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a rendering function on the pool; in process mode it must be picklable"""
+        executor = self._executor or await asyncio.to_thread(self.start)
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    async def render(self, chart: str, data: Optional[Dict[str, Any]] = None, **options: Any) -> bytes:
+        """Render a chart on the pool without blocking the event loop"""
+        return await self.run(render_chart, RenderJob(chart, data or {}, **options))
+
+
+# Global render pool
+render_pool: Optional[RenderPool] = None
+
+
+def get_render_pool() -> RenderPool:
+    """Get the render pool instance"""
+    global render_pool
+
+    if not render_pool:
+        render_pool = RenderPool()
+
+    return render_pool
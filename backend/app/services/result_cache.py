@@ -0,0 +1,86 @@
+"""
+Analyzer result cache keyed on normalized code
+
+Results are stored through ``CacheManager`` under a key built from the
+analyzer name, the language and the ``normalize_code`` digest, so a
+resubmission that only changes formatting, comments or local names is a
+hit. Analyzers whose results also depend on the raw text (regex rules that
+can match comments or identifiers) pass a ``fingerprint`` of those
+text-level findings, which becomes part of the key.
+
+Line numbers in a cached result belong to the source that produced it; an
+entry stores, for each of them, the position of an anchor on that line,
+and a hit maps them onto the current source.
+
+Entries are tagged with their language and with the analyzer and app
+version that produced them (``lang:python``, ``analyzer:complexity@v1.0.0``),
+so ``invalidate_results`` can drop one analyzer's results, for example
+after a release changes its output, without scanning the cache.
+"""
+
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.cache import get_cache_manager
+from app.core.config import settings
+from app.core.logging import get_logger
+from .code_normalizer import NORMALIZATION_VERSION, line_anchors, normalize_code, remap_lines
+from .parsed_source import ParsedSource
+
+logger = get_logger(__name__)
+
+
+def result_cache_key(analyzer: str, source: ParsedSource, fingerprint: str = "") -> str:
+    normalized = normalize_code(source, source.language, settings.RESULT_CACHE_RENAME_LOCALS)
+    key = f"analysis:{analyzer}:v{NORMALIZATION_VERSION}:{source.language}:{normalized.form}:{normalized.digest}"
+    if fingerprint:
+        key += ":" + hashlib.blake2b(fingerprint.encode("utf8"), digest_size=8).hexdigest()
+    return key
+
+
+def analyzer_tag(analyzer: str, version: Optional[str] = None) -> str:
+    return f"analyzer:{analyzer}@v{version or settings.VERSION}"
+
+
+async def invalidate_results(analyzer: str, version: Optional[str] = None) -> int:
+    """Drop the cached results of one analyzer version, the running one by default"""
+    cache = await get_cache_manager()
+    return await cache.invalidate_tags(analyzer_tag(analyzer, version))
+
+
+async def cached_result(
+    analyzer: str,
+    source: ParsedSource,
+    compute: Callable[[], Awaitable[Dict[str, Any]]],
+    fingerprint: str = "",
+) -> Dict[str, Any]:
+    """
+    The cached result of ``compute`` for an equivalent source, or compute and
+    store it. With ``RESULT_CACHE_ENABLED`` off this is just ``compute()``.
+    """
+    if not settings.RESULT_CACHE_ENABLED:
+        return await compute()
+    cache = await get_cache_manager()
+
+    key = result_cache_key(analyzer, source, fingerprint)
+    lines = normalize_code(source, source.language, settings.RESULT_CACHE_RENAME_LOCALS).lines
+    computed = []
+
+    async def compute_entry() -> Dict[str, Any]:
+        result = await compute()
+        computed.append(result)
+        return {"result": result, "anchors": None if "error" in result else line_anchors(result, lines)}
+
+    # Concurrent requests for the same code share one computation
+    entry = await cache.get_or_compute(
+        key, compute_entry,
+        tags=(f"lang:{source.language}", analyzer_tag(analyzer)),
+        cacheable=lambda entry: entry["anchors"] is not None,
+    )
+    if computed:
+        return computed[0]
+    if entry["anchors"] is None:
+        # Shared with a concurrent request whose result could not be cached
+        return entry["result"]
+    logger.debug("Analysis result cache hit", analyzer=analyzer, key=key)
+    return remap_lines(entry["result"], entry["anchors"], lines)
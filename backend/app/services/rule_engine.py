@@ -0,0 +1,296 @@
+"""
+Multi-pattern rule engine for the regex and phrase based analyzers
+
+A ``RuleSet`` is compiled once, when its owning module is imported, from
+``Rule`` entries (a group such as an algorithm or smell name, plus a
+pattern). Scanning a source is a single pass of one combined regex over
+the lowercased text: it finds every position where the literal prefix of
+some rule starts, and only there are the rules with that prefix tried with
+an anchored ``match`` on the original text. Pure case-insensitive literals
+need no second step. Rules without a literal prefix keep their own
+precompiled scan.
+
+Results follow the semantics of the per-pattern loops they replace: a
+rule's matches are those ``re.finditer`` would return (leftmost,
+non-overlapping), or for a ``first_only`` rule just the first one, as
+with ``re.search``.
+
+Two guards bound the cost of a scan. Patterns that can backtrack
+exponentially (nested unbounded quantifiers, backreferences) are rejected
+when the rule set is built. A scan given a time budget stops trying
+further candidates and rules once the budget is spent and reports itself
+incomplete.
+"""
+
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import re._parser as _sre_parse
+    from re import _constants as _sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+    import sre_constants as _sre_constants
+
+LITERAL = _sre_constants.LITERAL
+MAXREPEAT = _sre_constants.MAXREPEAT
+_REPEATS = tuple(
+    getattr(_sre_constants, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(_sre_constants, name)
+)
+_BACKREFERENCES = (_sre_constants.GROUPREF, _sre_constants.GROUPREF_EXISTS)
+
+# Shortest literal prefix worth indexing; shorter prefixes match almost
+# everywhere and are cheaper to scan for with the rule's own regex
+MIN_PREFIX = 2
+# Prefilter candidates between two checks of the scan budget
+_BUDGET_CHECK_INTERVAL = 32
+
+
+class UnsafePatternError(ValueError):
+    """A rule pattern whose matching time can grow super-linearly"""
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One pattern belonging to a group (an algorithm, a smell, ...)"""
+    group: str
+    pattern: str
+    flags: int = 0
+    # Only whether and where the rule first matches is needed
+    first_only: bool = False
+
+    @classmethod
+    def literal(cls, group: str, text: str, flags: int = 0, first_only: bool = False) -> "Rule":
+        return cls(group, re.escape(text), flags, first_only)
+
+
+def literal_prefix(pattern: str, flags: int = 0) -> Tuple[str, bool]:
+    """
+    The ASCII literal text every match of ``pattern`` starts with, and
+    whether the pattern is nothing but that literal.
+    """
+    parsed = _sre_parse.parse(pattern, flags)
+    chars = []
+    for op, value in parsed:
+        if op is not LITERAL or value > 127:
+            break
+        chars.append(chr(value))
+    return "".join(chars), len(chars) == len(parsed)
+
+
+def _subpatterns(value: Any) -> Iterator[Any]:
+    """Parsed subpatterns nested in an opcode argument"""
+    if isinstance(value, _sre_parse.SubPattern):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _subpatterns(item)
+
+
+def _unsafe_reason(parsed: Any, in_repeat: bool = False, in_unbounded: bool = False) -> Optional[str]:
+    for op, value in parsed:
+        if op in _BACKREFERENCES:
+            return "backreference"
+        if op in _REPEATS:
+            _, high, body = value
+            unbounded = high == MAXREPEAT
+            if high > 1 and (in_unbounded or (unbounded and in_repeat)):
+                return "nested quantifier"
+            children = [body]
+            in_body = (in_repeat or high > 1, in_unbounded or unbounded)
+        else:
+            children = list(_subpatterns(value))
+            in_body = (in_repeat, in_unbounded)
+        for child in children:
+            reason = _unsafe_reason(child, *in_body)
+            if reason:
+                return reason
+    return None
+
+
+def check_pattern(pattern: str, flags: int = 0) -> None:
+    """
+    Reject patterns that can backtrack exponentially: a repeated group
+    containing an unbounded repeat, such as ``(\\s+){12,}``, or a
+    backreference, such as ``(.{20,})\\1``.
+    """
+    reason = _unsafe_reason(_sre_parse.parse(pattern, flags))
+    if reason:
+        raise UnsafePatternError(f"Pattern {pattern!r} is not allowed in a rule set: {reason}")
+
+
+class _CompiledRule:
+    __slots__ = ("index", "rule", "first_only", "regex", "prefix", "is_literal")
+
+    def __init__(self, index: int, rule: Rule):
+        self.index = index
+        self.rule = rule
+        self.first_only = rule.first_only
+        check_pattern(rule.pattern, rule.flags)
+        self.regex = re.compile(rule.pattern, rule.flags)
+        self.prefix, self.is_literal = literal_prefix(rule.pattern, rule.flags)
+        self.prefix = self.prefix.lower()
+        if rule.flags & re.IGNORECASE == 0 and self.is_literal:
+            # Case-sensitive literals are still confirmed with the regex
+            self.is_literal = False
+
+
+class ScanResult:
+    """Matches of one scan, per rule, in the order the rules were declared"""
+
+    def __init__(self, rules: Sequence[Rule], matches: List[List["re.Match"]], complete: bool = True):
+        self.rules = rules
+        self.matches = matches
+        # False when the scan ran out of time budget before trying every rule
+        self.complete = complete
+
+    def __iter__(self) -> Iterator[Tuple[Rule, List["re.Match"]]]:
+        return iter(zip(self.rules, self.matches))
+
+    def group(self, name: str) -> List[Tuple[Rule, List["re.Match"]]]:
+        """The group's rules with their matches, in declaration order"""
+        return [(rule, matches) for rule, matches in self if rule.group == name]
+
+    def matched(self, name: str) -> int:
+        """How many of the group's rules matched at least once"""
+        return sum(1 for rule, matches in self if rule.group == name and matches)
+
+
+class RuleSet:
+    """Rules compiled into one prefilter scan plus per-rule anchored matches"""
+
+    def __init__(self, rules: Sequence[Rule]):
+        self.rules = list(rules)
+        compiled = [_CompiledRule(i, rule) for i, rule in enumerate(self.rules)]
+        self._by_prefix: Dict[str, List[_CompiledRule]] = {}
+        self._unindexed: List[_CompiledRule] = []
+        for rule in compiled:
+            if len(rule.prefix) >= MIN_PREFIX:
+                self._by_prefix.setdefault(rule.prefix, []).append(rule)
+            else:
+                self._unindexed.append(rule)
+        self._prefilter: Optional["re.Pattern"] = None
+        if self._by_prefix:
+            # Longest first, so the reported prefix is the longest one starting
+            # at a position; every shorter indexed prefix there is its prefix.
+            # The leading character class lets the engine skip most positions.
+            alternatives = sorted(self._by_prefix, key=len, reverse=True)
+            first_chars = "".join(sorted({re.escape(prefix[0]) for prefix in alternatives}))
+            self._prefilter = re.compile(
+                "(?=[" + first_chars + "])(?=(" + "|".join(re.escape(prefix) for prefix in alternatives) + "))"
+            )
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._by_prefix})
+
+        # Once these have all matched, the prefilter can stop early
+        self._first_only_indexed = sum(
+            rule.first_only for rules in self._by_prefix.values() for rule in rules
+        )
+        self._all_first_only = self._first_only_indexed == sum(len(rules) for rules in self._by_prefix.values())
+
+    def scan(self, text: str, lowered: Optional[str] = None, budget: Optional[float] = None) -> ScanResult:
+        """
+        Match every rule against ``text`` with a single prefilter pass.
+
+        ``lowered`` is ``text.lower()`` if the caller already has it, such as
+        ``ParsedSource.lower``. With a ``budget`` in seconds, the scan stops
+        once it is spent and the result is marked incomplete; a single regex
+        call is not interrupted, which the pattern check keeps linear.
+        """
+        deadline = time.perf_counter() + budget if budget is not None else None
+        matches: List[List["re.Match"]] = [[] for _ in self.rules]
+        # Per rule: position its next match may start at, or -1 once done
+        resume = [0] * len(self.rules)
+        pending = self._first_only_indexed
+
+        if self._prefilter is not None:
+            if lowered is None:
+                lowered = text.lower()
+            if len(lowered) != len(text):
+                # A few characters lowercase to several; positions would shift
+                return self._scan_separately(text, deadline)
+            by_prefix = self._by_prefix
+            lengths = self._prefix_lengths
+            countdown = _BUDGET_CHECK_INTERVAL
+            for candidate in self._prefilter.finditer(lowered):
+                if deadline is not None:
+                    countdown -= 1
+                    if countdown == 0:
+                        if time.perf_counter() > deadline:
+                            return ScanResult(self.rules, matches, complete=False)
+                        countdown = _BUDGET_CHECK_INTERVAL
+                position = candidate.start()
+                found = candidate.group(1)
+                for length in lengths:
+                    if length > len(found):
+                        break
+                    for rule in by_prefix.get(found[:length], ()):
+                        index = rule.index
+                        if resume[index] < 0 or position < resume[index]:
+                            continue
+                        if rule.is_literal:
+                            match = _LiteralMatch(text, position, length)
+                        else:
+                            match = rule.regex.match(text, position)
+                            if match is None:
+                                continue
+                        matches[index].append(match)
+                        if rule.first_only:
+                            resume[index] = -1
+                            pending -= 1
+                        else:
+                            resume[index] = max(match.end(), position + 1)
+                if self._all_first_only and pending == 0:
+                    break
+
+        complete = self._scan_rules(self._unindexed, text, matches, deadline)
+        return ScanResult(self.rules, matches, complete)
+
+    def _scan_separately(self, text: str, deadline: Optional[float] = None) -> ScanResult:
+        """Run each rule's own regex over the text"""
+        matches: List[List["re.Match"]] = [[] for _ in self.rules]
+        indexed = [rule for rules in self._by_prefix.values() for rule in rules]
+        complete = self._scan_rules(indexed + self._unindexed, text, matches, deadline)
+        return ScanResult(self.rules, matches, complete)
+
+    @staticmethod
+    def _scan_rules(
+        rules: List[_CompiledRule],
+        text: str,
+        matches: List[List["re.Match"]],
+        deadline: Optional[float] = None,
+    ) -> bool:
+        """Run each rule's own regex; False if the deadline passed first"""
+        for rule in rules:
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            if rule.first_only:
+                match = rule.regex.search(text)
+                if match is not None:
+                    matches[rule.index].append(match)
+            else:
+                matches[rule.index].extend(rule.regex.finditer(text))
+        return True
+
+
+class _LiteralMatch:
+    """The parts of ``re.Match`` callers use, for literal rules"""
+
+    __slots__ = ("string", "_start", "_end")
+
+    def __init__(self, string: str, start: int, length: int):
+        self.string = string
+        self._start = start
+        self._end = start + length
+
+    def start(self) -> int:
+        return self._start
+
+    def end(self) -> int:
+        return self._end
+
+    def group(self, index: int = 0) -> str:
+        return self.string[self._start:self._end]
@@ -0,0 +1,220 @@
+"""
+Structural complexity facts from precompiled tree-sitter queries
+
+Each supported language has one query capturing loops, function
+definitions, calls, allocations and collection constructors. Queries are
+compiled once per language and cached; a file is analyzed with a single
+captures pass over its tree. Captures arrive in document order, so loop
+nesting and the enclosing function of a call are tracked with two stacks
+of byte ranges.
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+from tree_sitter_languages import get_language
+
+from app.core.logging import get_logger
+from .parsed_source import ParsedSource
+from .tree_sitter_parser import LANGUAGE_MAP
+
+logger = get_logger(__name__)
+
+# Capture names used by every query:
+#   @loop              a loop statement or expression
+#   @function          a function definition, with its name in @function.name
+#   @call.name         the callee of a plain call, for recursion and allocator calls
+#   @alloc             an allocation
+#   @alloc.type        a constructed type: a collection if it matches
+#                      COLLECTION_TYPES, otherwise a plain allocation
+#   @collection        a collection literal
+#   @collection.type   a type that is a collection only if it matches COLLECTION_TYPES
+#   @constructor       a Rust path call such as Vec::new
+#   @macro             a Rust macro name such as vec
+_QUERY_SOURCES = {
+    'java': """
+        [(for_statement) (enhanced_for_statement) (while_statement) (do_statement)] @loop
+        (method_declaration name: (identifier) @function.name) @function
+        (constructor_declaration name: (identifier) @function.name) @function
+        (method_invocation !object name: (identifier) @call.name)
+        (method_invocation object: (this) name: (identifier) @call.name)
+        (object_creation_expression type: (_) @alloc.type)
+        (array_creation_expression) @alloc
+        (array_initializer) @collection
+    """,
+    'cpp': """
+        [(for_statement) (for_range_loop) (while_statement) (do_statement)] @loop
+        (function_definition declarator: (function_declarator declarator: (_) @function.name)) @function
+        (function_definition declarator: (pointer_declarator declarator: (function_declarator declarator: (_) @function.name))) @function
+        (function_definition declarator: (reference_declarator (function_declarator declarator: (_) @function.name))) @function
+        (call_expression function: (identifier) @call.name)
+        (new_expression) @alloc
+        (template_type name: (type_identifier) @collection.type)
+        (initializer_list) @collection
+    """,
+    'c': """
+        [(for_statement) (while_statement) (do_statement)] @loop
+        (function_definition declarator: (function_declarator declarator: (identifier) @function.name)) @function
+        (function_definition declarator: (pointer_declarator declarator: (function_declarator declarator: (identifier) @function.name))) @function
+        (call_expression function: (identifier) @call.name)
+        (initializer_list) @collection
+    """,
+    'javascript': """
+        [(for_statement) (for_in_statement) (while_statement) (do_statement)] @loop
+        (function_declaration name: (identifier) @function.name) @function
+        (generator_function_declaration name: (identifier) @function.name) @function
+        (method_definition name: (property_identifier) @function.name) @function
+        (variable_declarator name: (identifier) @function.name value: [(arrow_function) (function)]) @function
+        (call_expression function: (identifier) @call.name)
+        (call_expression function: (member_expression object: (this) property: (property_identifier) @call.name))
+        (new_expression constructor: (identifier) @alloc.type)
+        [(array) (object)] @collection
+    """,
+    'go': """
+        (for_statement) @loop
+        (function_declaration name: (identifier) @function.name) @function
+        (method_declaration name: (field_identifier) @function.name) @function
+        (call_expression function: (identifier) @call.name)
+        (composite_literal) @collection
+    """,
+    'rust': """
+        [(for_expression) (while_expression) (loop_expression)] @loop
+        (function_item name: (identifier) @function.name) @function
+        (call_expression function: (identifier) @call.name)
+        (call_expression function: (scoped_identifier) @constructor)
+        (macro_invocation macro: (identifier) @macro)
+        (array_expression) @collection
+    """,
+}
+
+COLLECTION_TYPES = re.compile(
+    r"(List|Map|Set|Queue|Deque|Stack|Vector|Heap|Array|Vec|vector|map|set|deque|queue|stack|list|array)"
+)
+
+# Calls that allocate, per language: name -> "alloc" or "collection"
+_ALLOCATOR_CALLS = {
+    'c': {'malloc': 'alloc', 'calloc': 'alloc', 'realloc': 'alloc'},
+    'cpp': {'malloc': 'alloc', 'calloc': 'alloc', 'realloc': 'alloc', 'make_unique': 'alloc', 'make_shared': 'alloc'},
+    'go': {'make': 'collection', 'new': 'alloc', 'append': 'collection'},
+    'rust': {},
+    'java': {},
+    'javascript': {},
+}
+_RUST_CONSTRUCTORS = ("new", "with_capacity", "from")
+_RUST_COLLECTION_MACROS = ("vec",)
+
+_queries: Dict[str, Any] = {}
+_queries_lock = threading.Lock()
+
+
+def supports_language(language: str) -> bool:
+    return language.lower() in _QUERY_SOURCES
+
+
+def get_query(language: str):
+    """Return the compiled query for a language, compiling it on first use"""
+    language = language.lower()
+    query = _queries.get(language)
+    if query is None and language in _QUERY_SOURCES:
+        with _queries_lock:
+            query = _queries.get(language)
+            if query is None:
+                query = get_language(LANGUAGE_MAP[language]).query(_QUERY_SOURCES[language])
+                _queries[language] = query
+    return query
+
+
+@dataclass
+class StructuralSummary:
+    """Structural facts about one file"""
+    language: str
+    loops: int = 0
+    max_loop_depth: int = 0
+    functions: List[str] = field(default_factory=list)
+    # Function name -> number of call sites that call the function itself
+    recursive_functions: Dict[str, int] = field(default_factory=dict)
+    allocations: int = 0
+    collections: int = 0
+    allocations_in_loops: int = 0
+
+
+def _short_name(name: str) -> str:
+    """Last component of a qualified name such as ``Solver::solve``"""
+    return re.split(r"::|\.", name)[-1]
+
+
+def analyze_structure(code: Union[str, ParsedSource], language: str) -> Optional[StructuralSummary]:
+    """
+    Run the language's query over the file once and summarize the captures.
+
+    Returns None when the language has no query or no grammar.
+    """
+    query = get_query(language)
+    if query is None:
+        return None
+    source = ParsedSource.coerce(code, language)
+    tree = source.tree_sitter_tree
+    if tree is None:
+        return None
+
+    language = language.lower()
+    allocator_calls = _ALLOCATOR_CALLS.get(language, {})
+    summary = StructuralSummary(language=language)
+    # Open ranges as [end_byte] for loops and [end_byte, name] for functions
+    loop_ends: List[int] = []
+    functions: List[List[Any]] = []
+
+    def count_allocation(kind: str) -> None:
+        if kind == "collection":
+            summary.collections += 1
+        else:
+            summary.allocations += 1
+            if loop_ends:
+                summary.allocations_in_loops += 1
+
+    for node, capture in query.captures(tree.root_node):
+        start = node.start_byte
+        while loop_ends and loop_ends[-1] <= start:
+            loop_ends.pop()
+        while functions and functions[-1][0] <= start:
+            functions.pop()
+
+        if capture == "loop":
+            loop_ends.append(node.end_byte)
+            summary.loops += 1
+            summary.max_loop_depth = max(summary.max_loop_depth, len(loop_ends))
+        elif capture == "function":
+            functions.append([node.end_byte, None])
+        elif capture == "function.name":
+            name = _short_name(node.text.decode("utf8", errors="replace"))
+            for frame in reversed(functions):
+                if frame[1] is None:
+                    frame[1] = name
+                    summary.functions.append(name)
+                    break
+        elif capture == "call.name":
+            name = node.text.decode("utf8", errors="replace")
+            if name in allocator_calls:
+                count_allocation(allocator_calls[name])
+            elif any(frame[1] == name for frame in functions):
+                summary.recursive_functions[name] = summary.recursive_functions.get(name, 0) + 1
+        elif capture == "alloc":
+            count_allocation("alloc")
+        elif capture == "alloc.type":
+            count_allocation("collection" if COLLECTION_TYPES.search(node.text.decode("utf8", errors="replace")) else "alloc")
+        elif capture == "collection.type":
+            if COLLECTION_TYPES.search(node.text.decode("utf8", errors="replace")):
+                count_allocation("collection")
+        elif capture == "collection":
+            count_allocation("collection")
+        elif capture == "constructor":
+            path, _, name = node.text.decode("utf8", errors="replace").rpartition("::")
+            if name in _RUST_CONSTRUCTORS:
+                count_allocation("collection" if COLLECTION_TYPES.search(path) else "alloc")
+        elif capture == "macro":
+            if node.text.decode("utf8", errors="replace") in _RUST_COLLECTION_MACROS:
+                count_allocation("collection")
+
+    return summary
@@ -0,0 +1,245 @@
+"""
+SVG drawings of the data structures a traced program holds
+
+The tracers (``ExecutionTracer._detect_data_structures`` and the Java
+executor) describe each variable as a small dict: a stack, queue or array
+with its ``elements``, a dictionary with its ``keys`` and ``values``, or a
+graph with the ``nodes`` and ``edges`` of an adjacency list. Drawing those
+with matplotlib means a figure, a layout pass and rasterizing at 150 dpi,
+for what is a handful of rectangles. Here they are written as SVG markup
+directly: no dependencies, a few microseconds per structure, and text the
+browser scales and styles itself.
+
+``iter_structure_svg`` yields the markup in chunks (the header, one chunk
+per element, the footer), so a large structure can be streamed as it is
+written; ``structure_svg`` joins them. Shared styles live in one
+``<style>`` block, which keeps each cell to a rect and a text element.
+At most ``MAX_SVG_CELLS`` elements are drawn; the rest are summarized in
+one extra cell.
+"""
+
+import math
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from xml.sax.saxutils import escape
+
+from app.core.config import settings
+
+RendererFunction = Callable[[Dict[str, Any]], Iterator[str]]
+
+RENDERERS: Dict[str, RendererFunction] = {}
+
+CELL = 48
+GAP = 10
+PAD = 24
+# Longest element label drawn in a cell
+MAX_LABEL = 8
+
+MIME_TYPE = 'image/svg+xml'
+
+STYLE = (
+    '<style>'
+    '.c{fill:#add8e6;stroke:#000}.h{fill:#ffa500;stroke:#000}.n{fill:#add8e6;stroke:#333}'
+    '.e{stroke:#555;stroke-opacity:.6;marker-end:url(#a)}'
+    'text{font:14px sans-serif;text-anchor:middle;dominant-baseline:central}'
+    '.s{font-size:11px;fill:#666}.t{font-size:16px;font-weight:bold}'
+    '</style>'
+    '<defs><marker id="a" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" markerHeight="6" orient="auto">'
+    '<path d="M0,0L10,5L0,10z" fill="#555"/></marker></defs>'
+)
+
+
+def renderer(kind: str) -> Callable[[RendererFunction], RendererFunction]:
+    """Register a structure renderer under its ``type``"""
+    def register(func: RendererFunction) -> RendererFunction:
+        RENDERERS[kind] = func
+        return func
+    return register
+
+
+def _label(value: Any) -> str:
+    text = value if isinstance(value, str) else 'None' if value is None else str(value)
+    if len(text) > MAX_LABEL:
+        text = text[:MAX_LABEL - 1] + '…'
+    return escape(text)
+
+
+def _header(width: float, height: float, title: str) -> str:
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:g}" height="{height:g}" '
+        f'viewBox="0 0 {width:g} {height:g}"><title>{escape(title)}</title>{STYLE}'
+        f'<text class="t" x="{width / 2:g}" y="{PAD / 2 + 4:g}">{escape(title)}</text>'
+    )
+
+
+def _cell(x: float, y: float, text: str, css: str = 'c', width: float = CELL) -> str:
+    return (
+        f'<rect class="{css}" x="{x:g}" y="{y:g}" width="{width:g}" height="{CELL}"/>'
+        f'<text x="{x + width / 2:g}" y="{y + CELL / 2:g}">{text}</text>'
+    )
+
+
+def _shown(elements: List[Any]) -> Tuple[List[Any], int]:
+    """The elements to draw and how many were left out"""
+    limit = settings.MAX_SVG_CELLS
+    return (elements[:limit], len(elements) - limit) if len(elements) > limit else (elements, 0)
+
+
+def _row(elements: List[Any], title: str, first: str, last: str, indices: bool) -> Iterator[str]:
+    """Elements left to right, with captions under the first and last cell and optional indices"""
+    shown, hidden = _shown(elements)
+    cells = len(shown) + (1 if hidden else 0)
+    width = 2 * PAD + max(cells, 1) * (CELL + GAP) - GAP
+    top = PAD + 16
+    yield _header(max(width, 160), top + CELL + 40, title)
+    for i, value in enumerate(shown):
+        x = PAD + i * (CELL + GAP)
+        yield _cell(x, top, _label(value))
+        if indices:
+            yield f'<text class="s" x="{x + CELL / 2:g}" y="{top + CELL + 12:g}">{i}</text>'
+    if hidden:
+        yield _cell(PAD + len(shown) * (CELL + GAP), top, f'+{hidden}', 'n')
+    if shown and first:
+        caption_y = top + CELL + (28 if indices else 14)
+        yield f'<text class="s" x="{PAD + CELL / 2:g}" y="{caption_y:g}">{first}</text>'
+        if len(elements) > 1:
+            x = PAD + (cells - 1) * (CELL + GAP) + CELL / 2
+            yield f'<text class="s" x="{x:g}" y="{caption_y:g}">{last}</text>'
+    yield '</svg>'
+
+
+@renderer('stack')
+def stack_svg(structure: Dict[str, Any]) -> Iterator[str]:
+    elements = list(structure.get('elements', []))
+    shown, hidden = _shown(elements)
+    if hidden:
+        # The top of the stack is what matters; the bottom is summarized
+        shown = elements[-len(shown):]
+    cells = len(shown) + (1 if hidden else 0)
+    width = CELL * 2 + 2 * PAD + 40
+    height = PAD + 16 + max(cells, 1) * (CELL + GAP) + PAD
+    yield _header(width, height, f'Stack ({len(elements)})')
+    # Bottom to top
+    slot = 0
+    if hidden:
+        yield _cell(PAD, height - PAD - CELL - GAP, f'+{hidden} below', 'n', width=CELL * 2)
+        slot = 1
+    for i, value in enumerate(shown, slot):
+        yield _cell(PAD, height - PAD - (i + 1) * (CELL + GAP), _label(value), 'h' if i == cells - 1 else 'c', width=CELL * 2)
+    if elements:
+        yield f'<text class="s" x="{PAD + CELL * 2 + 20:g}" y="{height - PAD - cells * (CELL + GAP) + CELL / 2:g}">top</text>'
+    yield '</svg>'
+
+
+@renderer('queue')
+def queue_svg(structure: Dict[str, Any]) -> Iterator[str]:
+    elements = list(structure.get('elements', []))
+    return _row(elements, f'Queue ({len(elements)})', 'front', 'rear', indices=False)
+
+
+@renderer('array')
+def array_svg(structure: Dict[str, Any]) -> Iterator[str]:
+    elements = list(structure.get('elements', []))
+    return _row(elements, f'Array ({len(elements)})', '', '', indices=True)
+
+
+@renderer('linked_list')
+def linked_list_svg(structure: Dict[str, Any]) -> Iterator[str]:
+    elements = list(structure.get('elements', []))
+    shown, hidden = _shown(elements)
+    step = CELL + 3 * GAP
+    top = PAD + 16
+    width = 2 * PAD + (len(shown) + 1) * step
+    yield _header(max(width, 160), top + CELL + PAD, f'Linked List ({len(elements)})')
+    for i, value in enumerate(shown):
+        x = PAD + i * step
+        yield _cell(x, top, _label(value))
+        yield f'<line class="e" x1="{x + CELL:g}" y1="{top + CELL / 2:g}" x2="{x + step:g}" y2="{top + CELL / 2:g}"/>'
+    end = f'+{hidden}' if hidden else 'null'
+    yield f'<text class="s" x="{PAD + len(shown) * step + CELL / 2:g}" y="{top + CELL / 2:g}">{end}</text>'
+    yield '</svg>'
+
+
+@renderer('dictionary')
+def dictionary_svg(structure: Dict[str, Any]) -> Iterator[str]:
+    keys = list(structure.get('keys', []))
+    values = list(structure.get('values', []))
+    shown, hidden = _shown(keys)
+    top = PAD + 16
+    rows = len(shown) + (1 if hidden else 0)
+    yield _header(2 * PAD + 4 * CELL, top + max(rows, 1) * CELL + PAD, f'Dictionary ({len(keys)})')
+    for i, key in enumerate(shown):
+        y = top + i * CELL
+        yield _cell(PAD, y, _label(key), 'n', width=2 * CELL)
+        yield _cell(PAD + 2 * CELL, y, _label(values[i] if i < len(values) else None), width=2 * CELL)
+    if hidden:
+        yield _cell(PAD, top + len(shown) * CELL, f'+{hidden} more', 'n', width=4 * CELL)
+    yield '</svg>'
+
+
+def _node_id(node: Any) -> Any:
+    """A node as a dict key; list nodes, such as grid coordinates, become tuples"""
+    if isinstance(node, list):
+        return tuple(_node_id(part) for part in node)
+    return str(node) if isinstance(node, dict) else node
+
+
+def _weighted(edges: List[Dict[str, Any]]) -> bool:
+    """
+    Whether the targets are [node, weight] pairs: every target is a pair
+    whose first item is the same kind of node as the source, so pairs that
+    are nodes themselves (coordinates between coordinates) stay whole
+    """
+    return bool(edges) and all(
+        isinstance(edge.get('to'), list) and len(edge['to']) == 2
+        and isinstance(edge['to'][0], list) == isinstance(edge.get('from'), list)
+        for edge in edges
+    )
+
+
+@renderer('graph')
+def graph_svg(structure: Dict[str, Any]) -> Iterator[str]:
+    graph = structure.get('data', structure)
+    raw_edges = graph.get('edges', [])
+    weighted = _weighted(raw_edges)
+    edges = [
+        (_node_id(edge.get('from')), _node_id(edge['to'][0] if weighted else edge.get('to')))
+        for edge in raw_edges
+    ]
+    # Adjacency lists name leaf targets only in edges
+    nodes = list(dict.fromkeys([_node_id(node) for node in graph.get('nodes', [])] + [end for edge in edges for end in edge]))
+    shown, hidden = _shown(nodes)
+    radius = max(80.0, len(shown) * (CELL * 0.8) / (2 * math.pi))
+    size = 2 * (radius + PAD + CELL / 2)
+    centre = size / 2
+    node_radius = CELL / 2 - 4
+    position = {}
+    for i, node in enumerate(shown):
+        angle = 2 * math.pi * i / max(len(shown), 1) - math.pi / 2
+        position[node] = (centre + radius * math.cos(angle), centre + PAD / 2 + radius * math.sin(angle))
+
+    title = f'Graph ({len(nodes)} nodes)' + (f', {len(shown)} shown' if hidden else '')
+    yield _header(size, size + PAD, title)
+    for source, target in edges:
+        if source in position and target in position and source != target:
+            (x1, y1), (x2, y2) = position[source], position[target]
+            length = math.hypot(x2 - x1, y2 - y1) or 1.0
+            # Stop at the rim of the target so the arrowhead shows
+            x2 -= (x2 - x1) * node_radius / length
+            y2 -= (y2 - y1) * node_radius / length
+            yield f'<line class="e" x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}"/>'
+    for node, (x, y) in position.items():
+        yield f'<circle class="n" cx="{x:.1f}" cy="{y:.1f}" r="{node_radius:g}"/><text x="{x:.1f}" y="{y:.1f}">{_label(node)}</text>'
+    yield '</svg>'
+
+
+def iter_structure_svg(structure: Dict[str, Any]) -> Iterator[str]:
+    """The SVG of a traced data structure, in chunks"""
+    kind = structure.get('type')
+    if kind not in RENDERERS:
+        raise ValueError(f"Unsupported structure type: {kind}")
+    return RENDERERS[kind](structure)
+
+
+def structure_svg(structure: Dict[str, Any]) -> str:
+    """The SVG of a traced data structure"""
+    return ''.join(iter_structure_svg(structure))
@@ -0,0 +1,265 @@
+"""
+Step-by-step frames of a traced execution
+
+Each step of an ``ExecutionTracer`` trace carries the ``data_structures``
+live at that line. ``export_trace`` turns a trace into frames for sharing
+and export:
+
+- Consecutive steps with the same structures share one frame, so a loop
+  that only moves a counter costs one frame instead of one per line. The
+  result keeps, for every step, the index of its frame.
+- Unique states are drawn in chunks of ``CHUNK_STATES`` on the render
+  pool, so chunks render in parallel across its workers, and progress is
+  reported as each chunk finishes.
+- Frames are per-structure SVGs (``svg``, drawn by ``structure_svg``), PNG
+  images (``png``) or a single animation (``gif``, ``apng``, ``webp``) in
+  which each frame lasts as long as the steps it stands for. Raster frames
+  are drawn with Pillow directly, a row of cells per structure, at one
+  size for the whole trace, and kept PNG-compressed until the animation
+  is encoded. PNG frames and animations go to the image store, so a
+  repeated export renders nothing and frames are shared by URL.
+
+``export_trace`` is an async generator of events: ``start``, then
+``frame`` and ``progress`` events as chunks finish (frames arrive out of
+order and carry their index), and ``done`` with the step-to-frame index.
+"""
+
+import asyncio
+import io
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.core.config import settings
+from app.core.serialization import dumps
+from .animation import ANIMATION_FORMATS
+from .image_store import get_image_store, image_key, image_ref
+from .render_pool import get_render_pool
+from .structure_svg import RENDERERS as SVG_RENDERERS, structure_svg
+
+FRAME_FORMATS = ('svg', 'png') + tuple(ANIMATION_FORMATS)
+
+# Unique states per render pool job
+CHUNK_STATES = 50
+# How long one trace step shows in an animation, in milliseconds
+STEP_MS = 100
+
+# Raster frame layout, in pixels
+PAD = 12
+LABEL_WIDTH = 120
+CELL_WIDTH = 64
+CELL_HEIGHT = 28
+ROW_HEIGHT = 40
+# Cells drawn per structure in a raster frame, and characters per cell
+MAX_FRAME_CELLS = 24
+MAX_LABEL = 9
+
+# Frames are drawn in palette mode with these colors: no quantizing for GIF, small PNGs
+PALETTE = [255, 255, 255, 0, 0, 0, 128, 128, 128, 173, 216, 230, 255, 165, 0]
+WHITE, BLACK, GRAY, CELL_COLOR, TOP_COLOR = range(5)
+# Drawn cells and labels kept per worker, by text, color and width
+MAX_TILES = 4096
+# Encoder settings for flat palette frames: GIF's transparency optimization
+# costs ten times the encoding, and lossless WebP is faster and smaller than lossy
+ENCODER_OPTIONS: Dict[str, Dict[str, Any]] = {
+    'gif': {'optimize': False},
+    'webp': {'lossless': True, 'method': 0},
+}
+
+
+def step_states(trace: List[Any]) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """The states of a trace with consecutive duplicates merged, and for each step the index of its state"""
+    states: List[Dict[str, Any]] = []
+    index: List[int] = []
+    previous = None
+    for step in trace:
+        state = step.get('data_structures') if isinstance(step, dict) else None
+        state = {
+            name: structure for name, structure in (state or {}).items()
+            if isinstance(structure, dict) and structure.get('type') in SVG_RENDERERS
+        }
+        encoded = dumps(state)
+        if encoded != previous:
+            states.append(state)
+            previous = encoded
+        index.append(len(states) - 1)
+    return states, index
+
+
+def _step_ranges(index: List[int], count: int) -> List[List[int]]:
+    """First and last step of each state"""
+    ranges = [[0, 0] for _ in range(count)]
+    for step, state in enumerate(index):
+        if step == 0 or index[step - 1] != state:
+            ranges[state][0] = step
+        ranges[state][1] = step
+    return ranges
+
+
+def _label(value: Any) -> str:
+    text = value if isinstance(value, str) else str(value)
+    return text if len(text) <= MAX_LABEL else text[:MAX_LABEL - 1] + '…'
+
+
+def _cells(structure: Dict[str, Any]) -> List[str]:
+    """The values a structure shows in its row of a raster frame"""
+    kind = structure['type']
+    if kind == 'dictionary':
+        return [f'{_label(key)}:{_label(value)}' for key, value in zip(structure.get('keys', []), structure.get('values', []))]
+    if kind == 'graph':
+        graph = structure.get('data', structure)
+        return [f"{_label(edge.get('from'))}→{_label(edge.get('to'))}" for edge in graph.get('edges', [])]
+    return [_label(value) for value in structure.get('elements', [])]
+
+
+def frame_size(states: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """One raster size that fits every state, as an animation needs"""
+    rows = max((len(state) for state in states), default=0)
+    cells = max((min(len(_cells(s)), MAX_FRAME_CELLS + 1) for state in states for s in state.values()), default=0)
+    return 2 * PAD + LABEL_WIDTH + max(cells, 1) * CELL_WIDTH, 2 * PAD + max(rows, 1) * ROW_HEIGHT
+
+
+_tiles: Dict[Tuple[str, int, int], Image.Image] = {}
+
+
+@lru_cache(maxsize=1)
+def _font() -> ImageFont.ImageFont:
+    return ImageFont.load_default()
+
+
+def _tile(text: str, fill: int, width: int) -> Image.Image:
+    """
+    A cell with its text, or plain text with ``fill`` WHITE; drawn once per
+    worker and pasted after, since values repeat from frame to frame and
+    rendering text is most of the cost of a frame
+    """
+    key = (text, fill, width)
+    tile = _tiles.get(key)
+    if tile is None:
+        if len(_tiles) >= MAX_TILES:
+            _tiles.clear()
+        tile = Image.new('P', (width, CELL_HEIGHT + 1), WHITE)
+        tile.putpalette(PALETTE)
+        draw = ImageDraw.Draw(tile)
+        if fill == WHITE:
+            draw.text((0, CELL_HEIGHT / 2), text, fill=BLACK if width > CELL_WIDTH else GRAY, font=_font(), anchor='lm')
+        else:
+            draw.rectangle((0, 0, width - 1, CELL_HEIGHT), fill=fill, outline=BLACK)
+            draw.text((width / 2, CELL_HEIGHT / 2), text, fill=BLACK, font=_font(), anchor='mm')
+        _tiles[key] = tile
+    return tile
+
+
+def draw_state(state: Dict[str, Any], size: Tuple[int, int]) -> Image.Image:
+    """One raster frame: a row of cells per structure, labelled with its variable"""
+    image = Image.new('P', size, WHITE)
+    image.putpalette(PALETTE)
+    for row, (name, structure) in enumerate(state.items()):
+        y = PAD + row * ROW_HEIGHT
+        image.paste(_tile(f"{_label(name)} ({structure['type']})", WHITE, LABEL_WIDTH), (PAD, y))
+        cells = _cells(structure)
+        shown = cells[:MAX_FRAME_CELLS]
+        top = len(shown) - 1 if structure['type'] == 'stack' and len(cells) <= MAX_FRAME_CELLS else -1
+        for i, text in enumerate(shown):
+            x = PAD + LABEL_WIDTH + i * CELL_WIDTH
+            image.paste(_tile(text, TOP_COLOR if i == top else CELL_COLOR, CELL_WIDTH - 4), (x, y))
+        if len(cells) > MAX_FRAME_CELLS:
+            x = PAD + LABEL_WIDTH + MAX_FRAME_CELLS * CELL_WIDTH
+            image.paste(_tile(f'+{len(cells) - MAX_FRAME_CELLS}', WHITE, CELL_WIDTH), (x + 4, y))
+    return image
+
+
+def render_states(states: List[Dict[str, Any]], frame_format: str, size: Tuple[int, int]) -> List[Any]:
+    """Render a chunk of states on a pool worker: per-structure SVGs for "svg", PNG bytes otherwise"""
+    if frame_format == 'svg':
+        return [{name: structure_svg(structure) for name, structure in state.items()} for state in states]
+    frames = []
+    for state in states:
+        buffer = io.BytesIO()
+        draw_state(state, size).save(buffer, format='PNG', compress_level=1)
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def encode_animation(frames: List[bytes], durations: List[int], animation_format: str) -> bytes:
+    """
+    Encode PNG frames as one animation, each shown for its duration; frames
+    are decoded one at a time as the encoder asks for them
+    """
+    images = (Image.open(io.BytesIO(frame)) for frame in frames)
+    buffer = io.BytesIO()
+    next(images).save(
+        buffer, format=ANIMATION_FORMATS[animation_format][0], save_all=True,
+        append_images=images, duration=durations, loop=0,
+        **ENCODER_OPTIONS.get(animation_format, {}),
+    )
+    return buffer.getvalue()
+
+
+async def export_trace(trace: List[Any], frame_format: str = 'svg') -> AsyncIterator[Dict[str, Any]]:
+    """Render a trace's frames on the render pool, yielding start, frame, progress and done events"""
+    if frame_format not in FRAME_FORMATS:
+        raise ValueError(f"Unsupported frame format: {frame_format}")
+    states, index = step_states(trace)
+    ranges = _step_ranges(index, len(states))
+    size = frame_size(states)
+    store = get_image_store()
+    pool = get_render_pool()
+    yield {'event': 'start', 'format': frame_format, 'steps': len(index), 'frames': len(states)}
+    if not states:
+        yield {'event': 'done', 'format': frame_format, 'index': index}
+        return
+
+    video_key: Optional[str] = None
+    keys: List[Optional[str]] = [None] * len(states)
+    todo = list(range(len(states)))
+    if frame_format == 'png':
+        keys = [image_key('trace_frame', state, size) for state in states]
+        todo = await asyncio.to_thread(lambda: [i for i in todo if not store.contains(keys[i], 'png')])
+    elif frame_format in ANIMATION_FORMATS:
+        video_key = image_key('trace_animation', states, index, size, frame_format, STEP_MS)
+        if await asyncio.to_thread(store.contains, video_key, frame_format):
+            todo = []
+
+    done = len(states) - len(todo)
+    if frame_format == 'png':
+        # Frames a previous export stored
+        pending = set(todo)
+        for i in range(len(states)):
+            if i not in pending:
+                yield {'event': 'frame', 'frame': i, 'steps': ranges[i], **image_ref(keys[i], 'png')}
+
+    async def render(chunk: List[int]) -> Tuple[List[int], List[Any]]:
+        return chunk, await pool.run(render_states, [states[i] for i in chunk], frame_format, size)
+
+    raw: List[Any] = [None] * len(states)
+    jobs = [
+        asyncio.ensure_future(render(todo[start:start + CHUNK_STATES]))
+        for start in range(0, len(todo), CHUNK_STATES)
+    ]
+    try:
+        for job in asyncio.as_completed(jobs):
+            chunk, frames = await job
+            for i, frame in zip(chunk, frames):
+                if frame_format == 'svg':
+                    yield {'event': 'frame', 'frame': i, 'steps': ranges[i], 'structures': frame}
+                elif frame_format == 'png':
+                    await asyncio.to_thread(store.put, keys[i], 'png', frame)
+                    yield {'event': 'frame', 'frame': i, 'steps': ranges[i], **image_ref(keys[i], 'png')}
+                else:
+                    raw[i] = frame
+            done += len(chunk)
+            yield {'event': 'progress', 'done': done, 'total': len(states)}
+    finally:
+        for job in jobs:
+            job.cancel()
+
+    result: Dict[str, Any] = {'event': 'done', 'format': frame_format, 'index': index}
+    if video_key is not None:
+        if todo:
+            durations = [min((last - first + 1) * STEP_MS, settings.ANIMATION_DURATION) for first, last in ranges]
+            video = await pool.run(encode_animation, raw, durations, frame_format)
+            await asyncio.to_thread(store.put, video_key, frame_format, video)
+        result.update(image_ref(video_key, frame_format))
+    yield result
@@ -2,9 +2,13 @@
 Multi-language AST parsing using tree-sitter
 """
 
+import threading
+
 from tree_sitter import Language, Parser
 from tree_sitter_languages import get_language
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from app.core.config import settings
 
 # Supported languages mapping (add more as needed)
 LANGUAGE_MAP = {
@@ -19,32 +23,158 @@ LANGUAGE_MAP = {
     # Add more as needed
 }
 
-def parse_code_with_tree_sitter(code: str, language: str) -> Optional[Dict[str, Any]]:
+# Parsers are not thread-safe, so each thread keeps its own per-language cache
+_parser_cache = threading.local()
+
+
+def get_parser(language: str) -> Optional[Parser]:
     """
-    Parse code using tree-sitter and return a tree in a generic dict format.
+    Return a cached tree-sitter parser for the language, or None if unsupported.
     """
     lang_key = LANGUAGE_MAP.get(language.lower())
     if not lang_key:
         return None
-    try:
-        lang = get_language(lang_key)
+    parsers = getattr(_parser_cache, "parsers", None)
+    if parsers is None:
+        parsers = _parser_cache.parsers = {}
+    parser = parsers.get(lang_key)
+    if parser is None:
         parser = Parser()
-        parser.set_language(lang)
-        tree = parser.parse(bytes(code, "utf8"))
-        root_node = tree.root_node
-        return _tree_sitter_node_to_dict(root_node, code)
+        parser.set_language(get_language(lang_key))
+        parser.set_timeout_micros(settings.TREE_SITTER_PARSE_TIMEOUT_MS * 1000)
+        parsers[lang_key] = parser
+    return parser
+
+
+def parse_source(parser: Parser, source: bytes, old_tree: Any = None) -> Any:
+    """
+    Parse within the parser's time budget, or return None if it ran out.
+
+    Error recovery on some malformed inputs takes super-linear time; a timed
+    out parser is reset so its next parse starts from scratch.
+    """
+    try:
+        if old_tree is not None:
+            return parser.parse(source, old_tree)
+        return parser.parse(source)
+    except ValueError:
+        parser.reset()
+        return None
+
+
+def parse_code_with_tree_sitter(
+    code: str,
+    language: str,
+    max_depth: Optional[int] = None,
+    max_nodes: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Parse code using tree-sitter and return a tree in a generic dict format.
+
+    Nodes carry byte and point ranges only; use ``node_text`` to resolve the
+    source text of a node when it is actually needed.
+    """
+    if not LANGUAGE_MAP.get(language.lower()):
+        return None
+    try:
+        parser = get_parser(language)
+        tree = parse_source(parser, bytes(code, "utf8"))
+        if tree is None:
+            return {"error": "Parsing exceeded its time budget"}
+        return tree_to_dict(tree, max_depth, max_nodes)
     except Exception as e:
         return {"error": str(e)}
 
-def _tree_sitter_node_to_dict(node, code: str) -> Dict[str, Any]:
+
+def tree_to_dict(tree, max_depth: Optional[int] = None, max_nodes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Convert an already parsed tree-sitter tree to the generic dict format.
+    """
+    return _tree_sitter_node_to_dict(
+        tree,
+        max_depth if max_depth is not None else settings.MAX_AST_DEPTH,
+        max_nodes if max_nodes is not None else settings.MAX_AST_NODES,
+    )
+
+
+def node_text(source: Union[str, bytes], node_dict: Dict[str, Any]) -> str:
     """
-    Recursively convert a tree-sitter node to a dict.
+    Resolve the source text covered by a converted node.
     """
-    node_dict = {
-        "type": str(node.type),
+    if isinstance(source, str):
+        source = source.encode("utf8")
+    return source[node_dict["start_byte"]:node_dict["end_byte"]].decode("utf8", errors="replace")
+
+
+def walk_tree_sitter(tree, max_depth: int, max_nodes: int, visit: Callable[[Any, int], None]) -> Tuple[int, bool]:
+    """
+    Walk a tree-sitter tree in pre-order with an explicit cursor, calling
+    ``visit(node, depth)`` for every node.
+
+    Subtrees below ``max_depth`` are not expanded and the walk stops after
+    ``max_nodes`` nodes. Returns the number of nodes visited and whether
+    either cap was hit.
+    """
+    cursor = tree.walk()
+    visit(cursor.node, 0)
+    depth = 0
+    node_count = 1
+    truncated = False
+
+    while True:
+        if depth < max_depth:
+            if cursor.goto_first_child():
+                if node_count >= max_nodes:
+                    return node_count, True
+                depth += 1
+                visit(cursor.node, depth)
+                node_count += 1
+                continue
+        elif cursor.node.child_count:
+            truncated = True
+
+        # Move to the next sibling, climbing back up as subtrees finish
+        while depth > 0:
+            if cursor.goto_next_sibling():
+                if node_count >= max_nodes:
+                    return node_count, True
+                visit(cursor.node, depth)
+                node_count += 1
+                break
+            cursor.goto_parent()
+            depth -= 1
+        else:
+            return node_count, truncated
+
+
+def _make_node_dict(node) -> Dict[str, Any]:
+    return {
+        "type": node.type,
+        "start_byte": node.start_byte,
+        "end_byte": node.end_byte,
         "start_point": node.start_point,
         "end_point": node.end_point,
-        "text": code[node.start_byte:node.end_byte],
-        "children": [_tree_sitter_node_to_dict(child, code) for child in node.children]
+        "children": [],
     }
-    return node_dict 
\ No newline at end of file
+
+
+def _tree_sitter_node_to_dict(tree, max_depth: int, max_nodes: int) -> Dict[str, Any]:
+    """
+    Convert a tree-sitter tree to nested dicts without recursion.
+
+    Either cap marks the root as ``truncated``; see ``walk_tree_sitter``.
+    """
+    path: List[Dict[str, Any]] = []
+
+    def visit(node, depth: int) -> None:
+        node_dict = _make_node_dict(node)
+        if depth:
+            path[depth - 1]["children"].append(node_dict)
+        del path[depth:]
+        path.append(node_dict)
+
+    node_count, truncated = walk_tree_sitter(tree, max_depth, max_nodes, visit)
+    root = path[0]
+    root["node_count"] = node_count
+    root["truncated"] = truncated
+    return root
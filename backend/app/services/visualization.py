@@ -1,22 +1,107 @@
 """
 Enhanced visualization service for DSA algorithms
+
+Charts are drawn by the functions in ``charts`` and rendered on the render
+pool, off the event loop; the services here pick the charts and the data
+they show. With ``output_format="png"`` (the default) each chart comes back
+as a base64 PNG; with ``"spec"`` it is a declarative spec from
+``chart_specs`` for the client to draw, and nothing is rendered; with
+``"ref"`` it is a reference to the image in the ``image_store``, rendered
+only if the store does not have it yet, which the client fetches (and
+caches) from the image endpoint.
 """
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
-import io
+import asyncio
 import base64
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.serialization import dumps
+from .animation import ANIMATION_FORMATS, render_animation, sample_frames, simulate
+from .chart_specs import chart_spec
+from .image_store import get_image_store, image_key, image_ref
+from .parsed_source import ParsedSource
+from .render_pool import RenderJob, get_render_pool, render_chart
+from .structure_svg import MIME_TYPE as SVG_MIME_TYPE, RENDERERS as SVG_RENDERERS, structure_svg
+from .trace_frames import export_trace
 
 logger = get_logger(__name__)
 
+OUTPUT_FORMATS = ('png', 'spec', 'ref')
+
+# Charts that do not depend on the submission, rendered once per process
+STATIC_CHARTS = ('complexity_chart', 'execution_flow')
+_static_charts: Dict[str, str] = {}
+
+
+def _to_base64(png: bytes) -> str:
+    return base64.b64encode(png).decode()
+
+
+async def render_base64(chart: str, data: Optional[Dict[str, Any]] = None, **options: Any) -> str:
+    """Render a chart on the render pool as a base64 PNG"""
+    return _to_base64(await get_render_pool().render(chart, data, **options))
+
+
+async def stored_chart(chart: str, data: Dict[str, Any], key: Optional[str] = None, **options: Any) -> str:
+    """
+    Render a chart into the image store unless it is there already, and
+    return its key; ``key`` names the render when the caller can identify
+    the data more cheaply than by hashing it
+    """
+    key = key or image_key('chart', chart, data, options)
+    store = get_image_store()
+    if not await asyncio.to_thread(store.contains, key, 'png'):
+        png = await get_render_pool().render(chart, data, **options)
+        await asyncio.to_thread(store.put, key, 'png', png)
+    return key
+
+
+async def chart_output(
+    chart: str, data: Dict[str, Any], output_format: str = 'png', **options: Any
+) -> Union[str, Dict[str, Any]]:
+    """A chart as a base64 PNG, its spec with "spec", or an image reference with "ref" """
+    if output_format == 'spec':
+        return chart_spec(chart, data)
+    if output_format == 'ref':
+        return image_ref(await stored_chart(chart, data, **options), 'png')
+    return await render_base64(chart, data, **options)
+
+
+async def static_chart(name: str, output_format: str = 'png') -> Union[str, Dict[str, Any]]:
+    """A static chart as base64 PNG, rendered on first use and then served from memory"""
+    if output_format != 'png':
+        return await chart_output(name, {}, output_format)
+    chart = _static_charts.get(name)
+    if chart is None:
+        chart = _static_charts[name] = await render_base64(name)
+    return chart
+
+
+def render_static_charts() -> None:
+    """Render every static chart now, on this thread, so no request pays for it"""
+    for name in STATIC_CHARTS:
+        if name not in _static_charts:
+            _static_charts[name] = _to_base64(render_chart(RenderJob(name)))
+
+
+def memory_profile(trace: List[Any]) -> List[int]:
+    """
+    Size of the live locals at each traced step, in bytes of their JSON
+    encoding; a stand-in for memory use that the tracer records anyway.
+    """
+    return [
+        len(dumps(step['locals'])) for step in trace
+        if isinstance(step, dict) and isinstance(step.get('locals'), dict)
+    ]
+
 class EnhancedVisualizationService:
     def __init__(self):
         self.supported_structures = ['stack', 'queue', 'array', 'graph', 'tree', 'linked_list']
     
-    async def generate_algorithm_visualization(self, algorithm_type: str, data: Dict[str, Any]) -> Dict[str, str]:
+    async def generate_algorithm_visualization(
+        self, algorithm_type: str, data: Dict[str, Any], output_format: str = 'png'
+    ) -> Dict[str, Any]:
         """
         Generate algorithm-specific visualizations
         """
@@ -24,58 +109,35 @@ class EnhancedVisualizationService:
             visualizations = {}
             
             if algorithm_type == 'sorting':
-                visualizations.update(await self._generate_sorting_visualization(data))
+                visualizations.update(await self._generate_sorting_visualization(data, output_format))
             elif algorithm_type == 'searching':
-                visualizations.update(await self._generate_searching_visualization(data))
+                visualizations.update(await self._generate_searching_visualization(data, output_format))
             elif algorithm_type == 'graph_traversal':
-                visualizations.update(await self._generate_graph_visualization(data))
+                visualizations.update(await self._generate_graph_visualization(data, output_format))
             elif algorithm_type == 'tree_traversal':
-                visualizations.update(await self._generate_tree_visualization(data))
+                visualizations.update(await self._generate_tree_visualization(data, output_format))
             elif algorithm_type == 'dynamic_programming':
-                visualizations.update(await self._generate_dp_visualization(data))
+                visualizations.update(await self._generate_dp_visualization(data, output_format))
             
             return visualizations
         except Exception as e:
             logger.error(f"Algorithm visualization failed: {e}")
             return {}
     
-    async def _generate_sorting_visualization(self, data: Dict[str, Any]) -> Dict[str, str]:
+    async def _generate_sorting_visualization(self, data: Dict[str, Any], output_format: str = 'png') -> Dict[str, Any]:
         """Generate sorting algorithm visualizations"""
         try:
             array = data.get('array', [])
             if not array:
                 return {}
             
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-            
-            # Before sorting
-            ax1.bar(range(len(array)), array, color='lightblue', alpha=0.7)
-            ax1.set_title('Before Sorting')
-            ax1.set_xlabel('Index')
-            ax1.set_ylabel('Value')
-            
-            # After sorting
-            sorted_array = sorted(array)
-            ax2.bar(range(len(sorted_array)), sorted_array, color='lightgreen', alpha=0.7)
-            ax2.set_title('After Sorting')
-            ax2.set_xlabel('Index')
-            ax2.set_ylabel('Value')
-            
-            plt.tight_layout()
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return {'sorting_comparison': image_base64}
+            image = await chart_output('sorting_comparison', {'array': array}, output_format, size=(15, 6))
+            return {'sorting_comparison': image}
         except Exception as e:
             logger.error(f"Sorting visualization failed: {e}")
             return {}
     
-    async def _generate_searching_visualization(self, data: Dict[str, Any]) -> Dict[str, str]:
+    async def _generate_searching_visualization(self, data: Dict[str, Any], output_format: str = 'png') -> Dict[str, Any]:
         """Generate searching algorithm visualizations"""
         try:
             array = data.get('array', [])
@@ -83,284 +145,189 @@ class EnhancedVisualizationService:
             if not array or target is None:
                 return {}
             
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-            # Create bar chart with target highlighted
-            colors = ['red' if x == target else 'lightblue' for x in array]
-            bars = ax.bar(range(len(array)), array, color=colors, alpha=0.7)
-            
-            # Highlight target
-            if target in array:
-                target_indices = [i for i, x in enumerate(array) if x == target]
-                for idx in target_indices:
-                    bars[idx].set_color('red')
-                    bars[idx].set_alpha(1.0)
-            
-            ax.set_title(f'Searching for {target}')
-            ax.set_xlabel('Index')
-            ax.set_ylabel('Value')
-            ax.axhline(y=target, color='red', linestyle='--', alpha=0.5, label=f'Target: {target}')
-            ax.legend()
-            
-            plt.tight_layout()
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return {'searching_visualization': image_base64}
+            image = await chart_output(
+                'searching_visualization', {'array': array, 'target': target}, output_format, size=(12, 6)
+            )
+            return {'searching_visualization': image}
         except Exception as e:
             logger.error(f"Searching visualization failed: {e}")
             return {}
     
-    async def _generate_graph_visualization(self, data: Dict[str, Any]) -> Dict[str, str]:
+    async def _generate_graph_visualization(self, data: Dict[str, Any], output_format: str = 'png') -> Dict[str, Any]:
         """Generate graph traversal visualizations"""
         try:
-            nodes = data.get('nodes', [])
-            edges = data.get('edges', [])
-            traversal_order = data.get('traversal_order', [])
-            
-            if not nodes:
+            if not data.get('nodes'):
                 return {}
             
-            fig, ax = plt.subplots(figsize=(10, 8))
-            
-            # Create graph layout
-            pos = {}
-            n = len(nodes)
-            for i, node in enumerate(nodes):
-                angle = 2 * np.pi * i / n
-                pos[node] = (np.cos(angle), np.sin(angle))
-            
-            # Draw edges
-            for edge in edges:
-                start, end = edge['from'], edge['to']
-                if start in pos and end in pos:
-                    x1, y1 = pos[start]
-                    x2, y2 = pos[end]
-                    ax.plot([x1, x2], [y1, y2], 'k-', alpha=0.3, linewidth=1)
-            
-            # Draw nodes with traversal order coloring
-            for i, node in enumerate(nodes):
-                x, y = pos[node]
-                if node in traversal_order:
-                    order = traversal_order.index(node)
-                    color = plt.cm.viridis(order / len(traversal_order))
-                    ax.scatter(x, y, c=[color], s=200, alpha=0.8)
-                    ax.annotate(f'{node}\n({order+1})', (x, y), 
-                              xytext=(5, 5), textcoords='offset points',
-                              ha='center', va='center', fontsize=10)
-                else:
-                    ax.scatter(x, y, c='lightgray', s=150, alpha=0.6)
-                    ax.annotate(str(node), (x, y), 
-                              xytext=(5, 5), textcoords='offset points',
-                              ha='center', va='center', fontsize=10)
-            
-            ax.set_title('Graph Traversal Visualization')
-            ax.set_xlim(-1.2, 1.2)
-            ax.set_ylim(-1.2, 1.2)
-            ax.set_aspect('equal')
-            ax.axis('off')
-            
-            plt.tight_layout()
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return {'graph_traversal': image_base64}
+            image = await chart_output('graph_traversal', data, output_format, size=(10, 8))
+            return {'graph_traversal': image}
         except Exception as e:
             logger.error(f"Graph visualization failed: {e}")
             return {}
     
-    async def _generate_tree_visualization(self, data: Dict[str, Any]) -> Dict[str, str]:
+    async def _generate_tree_visualization(self, data: Dict[str, Any], output_format: str = 'png') -> Dict[str, Any]:
         """Generate tree traversal visualizations"""
         try:
-            tree_data = data.get('tree', {})
-            traversal_order = data.get('traversal_order', [])
-            
-            if not tree_data:
+            if not data.get('tree'):
                 return {}
             
-            fig, ax = plt.subplots(figsize=(12, 8))
-            
-            # Simple tree visualization
-            def draw_tree(node_data, x=0, y=0, level=0):
-                if not node_data:
-                    return
-                
-                # Draw current node
-                color = 'red' if node_data['value'] in traversal_order else 'lightblue'
-                circle = patches.Circle((x, y), 0.3, facecolor=color, alpha=0.7)
-                ax.add_patch(circle)
-                
-                # Add label
-                order = traversal_order.index(node_data['value']) + 1 if node_data['value'] in traversal_order else ''
-                ax.text(x, y, f"{node_data['value']}\n{order}", 
-                       ha='center', va='center', fontsize=10, fontweight='bold')
-                
-                # Draw children
-                spacing = 2 ** (3 - level) if level < 3 else 0.5
-                if 'left' in node_data and node_data['left']:
-                    ax.plot([x, x - spacing], [y, y - 1], 'k-', alpha=0.5)
-                    draw_tree(node_data['left'], x - spacing, y - 1, level + 1)
-                
-                if 'right' in node_data and node_data['right']:
-                    ax.plot([x, x + spacing], [y, y - 1], 'k-', alpha=0.5)
-                    draw_tree(node_data['right'], x + spacing, y - 1, level + 1)
-            
-            draw_tree(tree_data)
-            
-            ax.set_title('Tree Traversal Visualization')
-            ax.set_xlim(-5, 5)
-            ax.set_ylim(-4, 1)
-            ax.set_aspect('equal')
-            ax.axis('off')
-            
-            plt.tight_layout()
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return {'tree_traversal': image_base64}
+            image = await chart_output('tree_traversal', data, output_format, size=(12, 8))
+            return {'tree_traversal': image}
         except Exception as e:
             logger.error(f"Tree visualization failed: {e}")
             return {}
     
-    async def _generate_dp_visualization(self, data: Dict[str, Any]) -> Dict[str, str]:
+    async def _generate_dp_visualization(self, data: Dict[str, Any], output_format: str = 'png') -> Dict[str, Any]:
         """Generate dynamic programming visualizations"""
         try:
-            dp_table = data.get('dp_table', [])
-            if not dp_table:
+            if not data.get('dp_table'):
                 return {}
             
-            fig, ax = plt.subplots(figsize=(10, 8))
-            
-            # Create heatmap
-            im = ax.imshow(dp_table, cmap='YlOrRd', aspect='auto')
-            
-            # Add text annotations
-            for i in range(len(dp_table)):
-                for j in range(len(dp_table[0])):
-                    text = ax.text(j, i, dp_table[i][j],
-                                 ha="center", va="center", color="black", fontsize=10)
-            
-            ax.set_title('Dynamic Programming Table')
-            ax.set_xlabel('Column')
-            ax.set_ylabel('Row')
-            
-            # Add colorbar
-            cbar = plt.colorbar(im, ax=ax)
-            cbar.set_label('Value')
-            
-            plt.tight_layout()
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return {'dp_table': image_base64}
+            image = await chart_output('dp_table', data, output_format, size=(10, 8))
+            return {'dp_table': image}
         except Exception as e:
             logger.error(f"DP visualization failed: {e}")
             return {}
     
-    async def generate_data_structure_animation(self, structure_type: str, operations: List[Dict[str, Any]]) -> str:
+    async def generate_structure_visualizations(
+        self, structures: Dict[str, Dict[str, Any]], output_format: str = 'png'
+    ) -> Dict[str, Any]:
+        """
+        Draw the data structures of one trace step (its ``data_structures``)
+        as SVG, without matplotlib: inline SVG markup by default, the
+        structures as they are with "spec", or references to the stored
+        SVGs with "ref". Structures of unknown types are left out.
+        """
+        visualizations: Dict[str, Any] = {}
+        store = get_image_store()
+        for name, structure in structures.items():
+            if not isinstance(structure, dict) or structure.get('type') not in SVG_RENDERERS:
+                continue
+            try:
+                if output_format == 'spec':
+                    visualizations[name] = {'kind': 'structure', **structure}
+                elif output_format == 'ref':
+                    key = image_key('structure', structure)
+                    if not await asyncio.to_thread(store.contains, key, 'svg'):
+                        await asyncio.to_thread(store.put, key, 'svg', structure_svg(structure).encode())
+                    visualizations[name] = image_ref(key, 'svg')
+                else:
+                    visualizations[name] = {'format': 'svg', 'mime_type': SVG_MIME_TYPE, 'image': structure_svg(structure)}
+            except Exception as e:
+                logger.error(f"Structure visualization failed: {e}")
+        return visualizations
+    
+    async def generate_trace_frames(self, trace: List[Any], frame_format: str = 'svg') -> Dict[str, Any]:
         """
-        Generate animated visualization for data structure operations
+        Frames of a trace's data structures, one per run of identical
+        steps, with ``index`` giving each step's frame (see
+        ``trace_frames``); {} on failure
         """
         try:
-            if structure_type == 'stack':
-                return await self._generate_stack_animation(operations)
-            elif structure_type == 'queue':
-                return await self._generate_queue_animation(operations)
-            elif structure_type == 'array':
-                return await self._generate_array_animation(operations)
-            
-            return ""
+            result: Dict[str, Any] = {}
+            frames: List[Any] = []
+            async for event in export_trace(trace, frame_format):
+                kind = event.pop('event')
+                if kind == 'start':
+                    frames = [None] * event['frames']
+                elif kind == 'frame':
+                    frames[event.pop('frame')] = event
+                elif kind == 'done':
+                    result = event
+            if frame_format in ('svg', 'png'):
+                result['frames'] = frames
+            return result
         except Exception as e:
-            logger.error(f"Data structure animation failed: {e}")
-            return ""
+            logger.error(f"Trace frame export failed: {e}")
+            return {}
     
-    async def _generate_stack_animation(self, operations: List[Dict[str, Any]]) -> str:
-        """Generate stack operation animation"""
+    async def generate_data_structure_animation(
+        self,
+        structure_type: str,
+        operations: List[Dict[str, Any]],
+        output_format: str = 'png',
+        initial: Optional[List[Any]] = None,
+        animation_format: str = 'apng',
+    ) -> Dict[str, Any]:
+        """
+        Animate operations on a stack, queue or array as one animated image
+        (``animation_format`` gif, apng or webp), as the list of frames with
+        ``output_format="spec"``, or as a reference to the stored image
+        with ``"ref"``
+        """
         try:
-            fig, ax = plt.subplots(figsize=(8, 10))
-            
-            stack = []
-            max_frames = len(operations)
-            
-            for i, op in enumerate(operations):
-                ax.clear()
-                
-                if op['type'] == 'push':
-                    stack.append(op['value'])
-                elif op['type'] == 'pop':
-                    if stack:
-                        stack.pop()
-                
-                # Draw stack
-                for j, value in enumerate(stack):
-                    rect = patches.Rectangle((0.3, j * 0.8), 0.4, 0.7, 
-                                          facecolor='lightblue', edgecolor='black')
-                    ax.add_patch(rect)
-                    ax.text(0.5, j * 0.8 + 0.35, str(value), 
-                           ha='center', va='center', fontsize=12, fontweight='bold')
-                
-                ax.set_xlim(0, 1)
-                ax.set_ylim(0, max(len(stack) * 0.8 + 0.5, 1))
-                ax.set_title(f'Stack Operation: {op["type"].upper()} {op.get("value", "")}')
-                ax.set_aspect('equal')
-                ax.axis('off')
-                
-                # Save frame
-                buffer = io.BytesIO()
-                plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-                buffer.seek(0)
-                frame_base64 = base64.b64encode(buffer.getvalue()).decode()
-                buffer.close()
-            
-            plt.close()
-            return frame_base64
+            frames = simulate(structure_type, operations, initial)
+            shown = sample_frames(frames, settings.MAX_VISUALIZATION_POINTS)
+            animation = {
+                'structure': structure_type,
+                'operations': len(operations),
+                'frame_count': len(shown),
+                'sampled': len(shown) < len(frames),
+                'frame_duration_ms': settings.ANIMATION_DURATION,
+            }
+            if output_format == 'spec':
+                animation.update(kind='animation', frames=[frame.to_dict() for frame in shown])
+                return animation
+            
+            if output_format == 'ref':
+                key = image_key(
+                    'animation', structure_type, [frame.to_dict() for frame in shown],
+                    animation_format, settings.ANIMATION_DURATION,
+                )
+                store = get_image_store()
+                if not await asyncio.to_thread(store.contains, key, animation_format):
+                    result = await get_render_pool().run(render_animation, structure_type, shown, animation_format)
+                    await asyncio.to_thread(store.put, key, animation_format, result.data)
+                animation.update(format=animation_format, **image_ref(key, animation_format))
+                return animation
+            
+            result = await get_render_pool().run(render_animation, structure_type, shown, animation_format)
+            animation.update(
+                format=result.format,
+                mime_type=ANIMATION_FORMATS[result.format][1],
+                image=_to_base64(result.data),
+                render_ms_per_frame=round(result.render_ms_per_frame, 3),
+                encode_ms=round(result.encode_ms, 3),
+            )
+            return animation
         except Exception as e:
-            logger.error(f"Stack animation failed: {e}")
-            return ""
+            logger.error(f"Data structure animation failed: {e}")
+            return {}
+
 
 # Legacy compatibility
 class VisualizationService:
     def __init__(self):
         self.enhanced_service = EnhancedVisualizationService()
     
-    async def generate_visualizations(self, code: str, language: str, input_data: List[Any]) -> Dict[str, Any]:
+    async def generate_visualizations(
+        self,
+        code: Union[str, ParsedSource],
+        language: str,
+        input_data: List[Any],
+        trace: Optional[List[Any]] = None,
+        output_format: str = 'png',
+    ) -> Dict[str, Any]:
         """
-        Generate comprehensive visualizations for code execution
+        Generate comprehensive visualizations for code execution; the memory
+        chart is drawn from ``trace`` and left out without one
         """
         try:
             visualizations = {}
             
             # Generate basic visualizations
-            visualizations['complexity_chart'] = await self._generate_complexity_chart()
-            visualizations['execution_flow'] = await self._generate_execution_flow()
-            visualizations['memory_usage'] = await self._generate_memory_usage()
+            visualizations['complexity_chart'] = await self._generate_complexity_chart(output_format)
+            visualizations['execution_flow'] = await self._generate_execution_flow(output_format)
+            if trace:
+                visualizations['memory_usage'] = await self._generate_memory_usage(trace, output_format)
             
             # Generate algorithm-specific visualizations if detected
-            algorithm_type = self._detect_algorithm_type(code)
+            source = ParsedSource.coerce(code, language)
+            algorithm_type = self._detect_algorithm_type(source)
             if algorithm_type:
-                algorithm_data = self._extract_algorithm_data(code, input_data)
+                algorithm_data = self._extract_algorithm_data(source, input_data)
                 algorithm_viz = await self.enhanced_service.generate_algorithm_visualization(
-                    algorithm_type, algorithm_data
+                    algorithm_type, algorithm_data, output_format
                 )
                 visualizations.update(algorithm_viz)
             
@@ -369,9 +336,9 @@ class VisualizationService:
             logger.error(f"Visualization generation failed: {e}")
             return {}
     
-    def _detect_algorithm_type(self, code: str) -> Optional[str]:
+    def _detect_algorithm_type(self, code: Union[str, ParsedSource]) -> Optional[str]:
         """Detect algorithm type from code"""
-        code_lower = code.lower()
+        code_lower = code.lower if isinstance(code, ParsedSource) else code.lower()
         
         if any(word in code_lower for word in ['sort', 'bubble', 'quick', 'merge', 'heap']):
             return 'sorting'
@@ -386,12 +353,13 @@ class VisualizationService:
         
         return None
     
-    def _extract_algorithm_data(self, code: str, input_data: List[Any]) -> Dict[str, Any]:
+    def _extract_algorithm_data(self, code: Union[str, ParsedSource], input_data: List[Any]) -> Dict[str, Any]:
         """Extract relevant data for algorithm visualization"""
         data = {}
+        algorithm_type = self._detect_algorithm_type(code)
         
         # For sorting algorithms
-        if self._detect_algorithm_type(code) == 'sorting':
+        if algorithm_type == 'sorting':
             if input_data and len(input_data) > 0:
                 data['array'] = input_data
             else:
@@ -399,7 +367,7 @@ class VisualizationService:
                 data['array'] = [64, 34, 25, 12, 22, 11, 90]
         
         # For searching algorithms
-        elif self._detect_algorithm_type(code) == 'searching':
+        elif algorithm_type == 'searching':
             if input_data and len(input_data) > 1:
                 data['array'] = input_data[:-1]
                 data['target'] = input_data[-1]
@@ -409,104 +377,33 @@ class VisualizationService:
         
         return data
     
-    async def _generate_complexity_chart(self) -> str:
-        """Generate complexity analysis chart"""
+    async def _generate_complexity_chart(self, output_format: str = 'png') -> Union[str, Dict[str, Any]]:
+        """Complexity comparison chart; the same for every request"""
         try:
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            x = np.linspace(1, 100, 100)
-            y1 = x  # O(n)
-            y2 = x * np.log(x)  # O(n log n)
-            y3 = x**2  # O(n²)
-            
-            ax.plot(x, y1, label='O(n)', linewidth=2)
-            ax.plot(x, y2, label='O(n log n)', linewidth=2)
-            ax.plot(x, y3, label='O(n²)', linewidth=2)
-            
-            ax.set_xlabel('Input Size (n)')
-            ax.set_ylabel('Time Complexity')
-            ax.set_title('Algorithm Complexity Comparison')
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-            
-            plt.tight_layout()
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return image_base64
+            return await static_chart('complexity_chart', output_format)
         except Exception as e:
             logger.error(f"Complexity chart generation failed: {e}")
             return ""
     
-    async def _generate_execution_flow(self) -> str:
-        """Generate execution flow diagram"""
+    async def _generate_execution_flow(self, output_format: str = 'png') -> Union[str, Dict[str, Any]]:
+        """Execution flow diagram; the same for every request"""
         try:
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            # Simple flow diagram
-            flow_steps = ['Input', 'Process', 'Decision', 'Output']
-            y_positions = [0.8, 0.6, 0.4, 0.2]
-            
-            for i, (step, y) in enumerate(zip(flow_steps, y_positions)):
-                # Draw box
-                rect = patches.Rectangle((0.1, y-0.1), 0.8, 0.15, 
-                                      facecolor='lightblue', edgecolor='black')
-                ax.add_patch(rect)
-                ax.text(0.5, y, step, ha='center', va='center', fontsize=12, fontweight='bold')
-                
-                # Draw arrow
-                if i < len(flow_steps) - 1:
-                    ax.arrow(0.5, y-0.1, 0, -0.05, head_width=0.02, head_length=0.02, 
-                           fc='black', ec='black')
-            
-            ax.set_xlim(0, 1)
-            ax.set_ylim(0, 1)
-            ax.set_title('Execution Flow')
-            ax.axis('off')
-            
-            plt.tight_layout()
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return image_base64
+            return await static_chart('execution_flow', output_format)
         except Exception as e:
             logger.error(f"Execution flow generation failed: {e}")
             return ""
     
-    async def _generate_memory_usage(self) -> str:
-        """Generate memory usage visualization"""
+    async def _generate_memory_usage(
+        self, trace: Optional[List[Any]] = None, output_format: str = 'png'
+    ) -> Union[str, Dict[str, Any]]:
+        """Generate memory usage visualization from an execution trace"""
         try:
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            # Simulate memory usage over time
-            time_steps = np.linspace(0, 10, 50)
-            memory_usage = 100 + 50 * np.sin(time_steps) + np.random.normal(0, 5, 50)
+            usage = memory_profile(trace or [])
+            if not usage:
+                # Nothing was traced, so there is nothing to plot
+                return ""
             
-            ax.plot(time_steps, memory_usage, 'b-', linewidth=2, alpha=0.7)
-            ax.fill_between(time_steps, memory_usage, alpha=0.3, color='blue')
-            
-            ax.set_xlabel('Time')
-            ax.set_ylabel('Memory Usage (MB)')
-            ax.set_title('Memory Usage Over Time')
-            ax.grid(True, alpha=0.3)
-            
-            plt.tight_layout()
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return image_base64
+            return await chart_output('memory_usage', {'usage': usage}, output_format)
         except Exception as e:
             logger.error(f"Memory usage generation failed: {e}")
-            return "" 
\ No newline at end of file
+            return ""
@@ -0,0 +1,5 @@
+"""
+Benchmark scripts for DSA Code Analysis Platform
+
+Run from the backend directory, e.g. ``python -m benchmarks.bench_tree_sitter_conversion``.
+"""
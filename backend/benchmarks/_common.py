@@ -0,0 +1,53 @@
+"""
+Shared helpers for benchmark scripts
+"""
+
+import io
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from matplotlib import patches
+from matplotlib.figure import Figure
+
+
+def measure(func: Callable[[], Any], repeat: int = 3) -> Tuple[Any, Dict[str, float]]:
+    """
+    Run ``func`` ``repeat`` times and report best wall time and peak traced memory.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {"seconds": best, "peak_mb": peak / (1024 * 1024)}
+
+
+def print_row(label: str, stats: Dict[str, float], **extra: Any) -> None:
+    """Print one aligned benchmark result row"""
+    extras = "  ".join(f"{key}={value}" for key, value in extra.items())
+    print(f"{label:<40} {stats['seconds'] * 1000:>10.1f} ms  {stats['peak_mb']:>8.1f} MB  {extras}")
+
+
+def legacy_stack_png(stack: List[Any]) -> bytes:
+    """A stack drawn as the matplotlib chart the SVG renderer replaced drew it"""
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    for j, value in enumerate(stack):
+        ax.add_patch(patches.Rectangle((0.3, j * 0.8), 0.4, 0.7, facecolor="lightblue", edgecolor="black"))
+        ax.text(0.5, j * 0.8 + 0.35, str(value), ha="center", va="center", fontsize=12, fontweight="bold")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, max(len(stack) * 0.8 + 0.5, 1))
+    ax.set_aspect("equal")
+    ax.axis("off")
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
+    return buffer.getvalue()
@@ -0,0 +1,55 @@
+"""
+Load benchmark for the process-pool analysis engine.
+
+The corpus is this backend's own Python source, analyzed for complexity,
+optimization opportunities and AI insights. It is run in-process (one
+thread, as the batch endpoint used to do) and through engines with a
+growing number of workers; throughput should scale with the number of
+cores until it is reached.
+
+    python -m benchmarks.bench_analysis_engine
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from app.services.analysis_engine import AnalysisEngine
+
+CORPUS_ROOT = Path(__file__).resolve().parent.parent / "app" / "services"
+OPTIONS = {"analysis_types": ["complexity", "optimization", "ai_insights"]}
+REPEAT = 2
+
+
+def load_corpus():
+    return [(path.read_text(encoding="utf8"), "python") for path in sorted(CORPUS_ROOT.glob("*.py"))] * REPEAT
+
+
+def throughput(engine: AnalysisEngine, corpus) -> float:
+    engine.start()
+    start = time.perf_counter()
+    results = asyncio.run(engine.analyze_many(corpus, OPTIONS))
+    elapsed = time.perf_counter() - start
+    engine.shutdown()
+    assert all("analysis" in result for result in results)
+    return len(corpus) / elapsed
+
+
+def main() -> None:
+    corpus = load_corpus()
+    cores = os.cpu_count() or 1
+    print(f"corpus: {len(corpus)} files, {cores} cores")
+
+    baseline = throughput(AnalysisEngine(workers=0, chunk_size=4), corpus)
+    print(f"{'workers':<10} {'files/s':>9} {'speedup':>8}")
+    print(f"{'inline':<10} {baseline:>9.1f} {1.0:>7.1f}x")
+    workers = 1
+    while workers <= cores:
+        rate = throughput(AnalysisEngine(workers=workers, chunk_size=4), corpus)
+        print(f"{workers:<10} {rate:>9.1f} {rate / baseline:>7.1f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
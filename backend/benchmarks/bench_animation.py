@@ -0,0 +1,76 @@
+"""
+Per-frame cost of data-structure animations.
+
+Compares the previous stack animation, which cleared and redrew the axes
+and encoded a PNG for every operation (keeping only the last one), with
+``render_animation``, which updates the same artists in place, blits them
+onto a saved background and encodes all frames into one animated image.
+
+    python -m benchmarks.bench_animation
+"""
+
+import io
+import time
+
+import matplotlib.patches as patches
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from app.services.animation import render_animation, simulate
+
+OPERATIONS = [{"type": "push", "value": i} for i in range(12)] + [{"type": "pop"}] * 12
+ROUNDS = 3
+
+
+def legacy_animation(operations) -> bytes:
+    """Full redraw and a PNG per operation, as the stack animation used to do"""
+    figure = Figure(figsize=(8, 10))
+    FigureCanvasAgg(figure)
+    ax = figure.subplots()
+    stack = []
+    frame = b""
+    for op in operations:
+        ax.clear()
+        if op["type"] == "push":
+            stack.append(op["value"])
+        elif stack:
+            stack.pop()
+        for j, value in enumerate(stack):
+            ax.add_patch(patches.Rectangle((0.3, j * 0.8), 0.4, 0.7, facecolor="lightblue", edgecolor="black"))
+            ax.text(0.5, j * 0.8 + 0.35, str(value), ha="center", va="center", fontsize=12, fontweight="bold")
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, max(len(stack) * 0.8 + 0.5, 1))
+        ax.set_title(f'Stack Operation: {op["type"].upper()} {op.get("value", "")}')
+        ax.set_aspect("equal")
+        ax.axis("off")
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
+        frame = buffer.getvalue()
+    return frame
+
+
+def main() -> None:
+    frames = simulate("stack", OPERATIONS)
+    print(f"{len(OPERATIONS)} stack operations, best of {ROUNDS}")
+    print(f"{'pipeline':<26} {'ms/frame':>9} {'total ms':>9} {'bytes':>8}")
+
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        output = legacy_animation(OPERATIONS)
+        best = min(best, time.perf_counter() - start)
+    print(f"{'redraw + PNG per frame':<26} {best * 1000 / len(OPERATIONS):>9.1f} {best * 1000:>9.0f} {len(output):>8}")
+
+    for animation_format in ("gif", "apng", "webp"):
+        results = []
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            result = render_animation("stack", frames, animation_format)
+            results.append((time.perf_counter() - start, result))
+        total, result = min(results, key=lambda item: item[0])
+        label = f"blitted, {animation_format}"
+        print(f"{label:<26} {result.render_ms_per_frame:>9.1f} {total * 1000:>9.0f} {len(result.data):>8}")
+
+
+if __name__ == "__main__":
+    main()
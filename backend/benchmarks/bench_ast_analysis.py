@@ -0,0 +1,115 @@
+"""
+Benchmark AST analysis on large generated files.
+
+Compares the previous approach, six recursive analysis walks followed by the
+recursive tree-to-dict conversion and a defensive serialization walk, with
+the single-pass ``ASTAnalysisEngine``.
+
+    python -m benchmarks.bench_ast_analysis
+"""
+
+from app.services.ast_analysis import ASTAnalysisEngine
+from app.services.code_analyzer import CodeAnalyzer, _make_json_serializable
+from app.services.tree_sitter_parser import parse_code_with_tree_sitter
+from benchmarks._common import measure, print_row
+from benchmarks.bench_tree_sitter_conversion import generate_flat_python
+
+
+def _legacy_analysis(tree):
+    """The separate walks this benchmark measures against"""
+    stats = {"total_nodes": 0, "function_definitions": 0, "variable_assignments": 0,
+             "loops": 0, "conditionals": 0, "max_depth": 0}
+
+    def count_nodes(node, depth=0):
+        stats["total_nodes"] += 1
+        stats["max_depth"] = max(stats["max_depth"], depth)
+        if "Function" in node.node_type:
+            stats["function_definitions"] += 1
+        elif "Assign" in node.node_type:
+            stats["variable_assignments"] += 1
+        elif "For" in node.node_type or "While" in node.node_type:
+            stats["loops"] += 1
+        elif "If" in node.node_type:
+            stats["conditionals"] += 1
+        for child in node.children:
+            count_nodes(child, depth + 1)
+
+    def collect(predicate, make):
+        items = []
+
+        def walk(node):
+            if predicate(node.node_type):
+                items.append(make(node))
+            for child in node.children:
+                walk(child)
+
+        walk(tree)
+        return items
+
+    def to_dict(node):
+        return {
+            "node_type": str(node.node_type),
+            "line_number": node.line_number,
+            "column": node.column,
+            "value": str(node.value) if node.value is not None else None,
+            "start_byte": node.start_byte,
+            "end_byte": node.end_byte,
+            "children": [to_dict(child) for child in node.children],
+        }
+
+    count_nodes(tree)
+    analysis = {
+        "ast": to_dict(tree),
+        "statistics": stats,
+        "complexity_indicators": collect(
+            lambda t: "For" in t or "While" in t or "If" in t,
+            lambda n: {"type": "loop" if ("For" in n.node_type or "While" in n.node_type) else "conditional",
+                       "line": n.line_number},
+        ),
+        "data_structures": collect(
+            lambda t: any(ds in t.lower() for ds in ["list", "dict", "set", "tuple", "array"]),
+            lambda n: {"type": n.node_type, "line": n.line_number},
+        ),
+        "algorithms": collect(lambda t: "Sort" in t or "Search" in t, lambda n: {"line": n.line_number}),
+        "functions": collect(lambda t: "Function" in t, lambda n: {"line": n.line_number}),
+        "variables": collect(lambda t: "Assign" in t, lambda n: {"line": n.line_number}),
+    }
+    return _make_json_serializable(analysis)
+
+
+def generate_java(methods: int) -> str:
+    body = "\n".join(
+        f"  int m{i}(int[] a) {{ int t = 0; for (int x : a) {{ if (x > {i}) t += x; }} return t; }}"
+        for i in range(methods)
+    )
+    return f"class Big {{\n{body}\n}}"
+
+
+def run_case(label: str, tree) -> None:
+    engine = ASTAnalysisEngine()
+    _, legacy_stats = measure(lambda: _legacy_analysis(tree))
+    print_row(f"{label} separate walks", legacy_stats)
+    result, stats = measure(lambda: engine.run(tree))
+    print_row(
+        f"{label} single pass",
+        stats,
+        speedup=f"{legacy_stats['seconds'] / stats['seconds']:.2f}x",
+        nodes=result["statistics"]["total_nodes"],
+    )
+
+
+def main() -> None:
+    analyzer = CodeAnalyzer()
+    for functions in (2000, 8000):
+        tree = analyzer._parse_python_ast(generate_flat_python(functions))
+        run_case(f"python {functions // 1000}k functions", tree)
+    for methods in (2000, 8000):
+        code = generate_java(methods)
+        tree = analyzer._convert_tree_sitter_dict_to_astnode(
+            parse_code_with_tree_sitter(code, "java", max_nodes=10 ** 7), code
+        )
+        run_case(f"java {methods // 1000}k methods", tree)
+
+
+if __name__ == "__main__":
+    main()
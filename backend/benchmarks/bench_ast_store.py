@@ -0,0 +1,39 @@
+"""
+Benchmark the compact AST store against the ASTNode tree.
+
+Measures the full ``analyze_ast`` path for both AST formats: building the
+tree, running the analyses and producing the JSON-ready output.
+
+    python -m benchmarks.bench_ast_store
+"""
+
+import asyncio
+import json
+
+from app.services.code_analyzer import CodeAnalyzer
+from benchmarks._common import measure, print_row
+from benchmarks.bench_ast_analysis import generate_java
+from benchmarks.bench_tree_sitter_conversion import generate_flat_python
+
+
+def run_case(label: str, code: str, language: str) -> None:
+    analyzer = CodeAnalyzer()
+    for ast_format in ("tree", "flat"):
+        result, stats = measure(
+            lambda: asyncio.run(analyzer.analyze_ast(code, language, ast_format=ast_format))
+        )
+        print_row(
+            f"{label} {ast_format}",
+            stats,
+            nodes=result["statistics"]["total_nodes"],
+            json_kb=len(json.dumps(result["ast"])) // 1024,
+        )
+
+
+def main() -> None:
+    run_case("python 50k nodes", generate_flat_python(1500), "python")
+    run_case("java 50k nodes", generate_java(900), "java")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Two-tier cache benchmark: local hits versus a Redis round trip per read.
+
+Reads a working set of analysis-sized results repeatedly, as requests for
+popular submissions would, through a Redis stand-in that waits
+``LATENCY_MS`` per command (a round trip on a local network), once with
+the local tier disabled and once in front of it.
+
+Then a stampede: ``STAMPEDE`` concurrent requests, split over two
+processes (two managers on the same Redis), for a key that takes
+``COMPUTE_MS`` to compute, first missing and then expired. The plain
+get-then-set path computes it once per request; ``get_or_compute``
+computes it once and, for the expired key, answers from the stale value.
+
+    python -m benchmarks.bench_cache
+"""
+
+import asyncio
+import time
+
+from app.core.cache import CacheManager, LocalCache
+
+LATENCY_MS = 0.5
+KEYS = 200
+READS = 5000
+STAMPEDE = 50
+COMPUTE_MS = 50
+RESULT = {
+    "time_complexity": "O(n²)",
+    "optimizations": [{"type": "nested_loops", "line": i, "description": "x" * 80} for i in range(20)],
+}
+
+
+class SlowRedis:
+    def __init__(self):
+        self.data = {}
+        self.commands = 0
+
+    async def get(self, key):
+        self.commands += 1
+        await asyncio.sleep(LATENCY_MS / 1000)
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.commands += 1
+        await asyncio.sleep(LATENCY_MS / 1000)
+        self.data[key] = value
+
+    async def set(self, key, value, nx=False, px=None):
+        self.commands += 1
+        await asyncio.sleep(LATENCY_MS / 1000)
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        self.commands += 1
+        await asyncio.sleep(LATENCY_MS / 1000)
+        if self.data.get(key) == token:
+            del self.data[key]
+
+    def pipeline(self):
+        return SlowPipeline(self)
+
+
+class SlowPipeline:
+    """Queued commands sent in one round trip"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.results = []
+
+    def get(self, key):
+        self.results.append(self.redis.data.get(key))
+
+    def pttl(self, key):
+        self.results.append(-1 if key in self.redis.data else -2)
+
+    async def execute(self):
+        self.redis.commands += 1
+        await asyncio.sleep(LATENCY_MS / 1000)
+        return self.results
+
+
+async def reads(manager):
+    for i in range(KEYS):
+        await manager.set(f"analysis:{i}", RESULT)
+    start = time.perf_counter()
+    for i in range(READS):
+        assert await manager.get(f"analysis:{(i * 7919) % KEYS}") is not None
+    return time.perf_counter() - start
+
+
+async def stampede(expired: bool, protected: bool):
+    redis = SlowRedis()
+    managers = [CacheManager(redis), CacheManager(redis)]
+    computes = []
+
+    async def compute():
+        computes.append(1)
+        await asyncio.sleep(COMPUTE_MS / 1000)
+        return RESULT
+
+    async def plain(manager):
+        value = await manager.get("hot")
+        if value is None:
+            value = await compute()
+            await manager.set("hot", value)
+        return value
+
+    if expired:
+        # Computed a second ago with a one second TTL; without stale values it is gone
+        await managers[0].get_or_compute("hot", compute, ttl=1)
+        managers[0].local.clear()
+        if not protected:
+            del redis.data["hot"]
+        await asyncio.sleep(1.05)
+        computes.clear()
+
+    latencies = []
+
+    async def request(manager):
+        start = time.perf_counter()
+        await (manager.get_or_compute("hot", compute, ttl=1) if protected else plain(manager))
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(request(managers[i % 2]) for i in range(STAMPEDE)))
+    for manager in managers:
+        await manager.drain_refreshes()
+        await manager.close()
+    return len(computes), max(latencies) * 1000
+
+
+def main() -> None:
+    print(f"{KEYS} keys, {READS} reads, {LATENCY_MS} ms per Redis command")
+    for label, local in (("redis only", LocalCache(max_entries=0)), ("local tier + redis", LocalCache())):
+        redis = SlowRedis()
+        seconds = asyncio.run(reads(CacheManager(redis, local)))
+        print(f"{label:<24} {seconds * 1000:>9.1f} ms  {seconds / READS * 1e6:>7.1f} us/read  redis commands={redis.commands}")
+
+    print(f"\n{STAMPEDE} concurrent requests over 2 processes, {COMPUTE_MS} ms to compute")
+    for expired in (False, True):
+        for protected in (False, True):
+            computes, slowest = asyncio.run(stampede(expired, protected))
+            label = f"{'expired' if expired else 'missing'} key, {'get_or_compute' if protected else 'get then set'}"
+            print(f"{label:<36} computes={computes:<3} slowest request={slowest:>6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
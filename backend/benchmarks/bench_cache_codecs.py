@@ -0,0 +1,90 @@
+"""
+Cache value encoding benchmark on real analysis payloads.
+
+Produces the values the cache holds (complexity and optimization results
+for a classic DSA program, its tree-sitter AST and an execution trace of
+it) and, for the JSON text the cache stored before and for each codec
+pair, reports the stored size, which is what the value costs in Redis
+memory and on the wire, and the encode and decode time of a set and a get.
+The round trip itself is left out: it is the same for every codec apart
+from the bytes sent.
+
+    python -m benchmarks.bench_cache_codecs
+"""
+
+import asyncio
+import json
+import time
+
+from app.core import cache_codecs
+from app.core.cache_codecs import COMPRESSORS, SERIALIZERS, decode_value, encode_value
+from app.services.complexity_analyzer import ComplexityAnalyzer
+from app.services.execution_tracer import trace_code
+from app.services.optimization_service import OptimizationService
+from app.services.tree_sitter_parser import parse_code_with_tree_sitter
+
+PROGRAM = """
+def longest_common_subsequence(a, b):
+    dp = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            if a[i - 1] == b[j - 1]:
+                dp[i][j] = dp[i - 1][j - 1] + 1
+            else:
+                dp[i][j] = max(dp[i - 1][j], dp[i][j - 1])
+    return dp[len(a)][len(b)]
+
+
+def bubble_sort(arr):
+    n = len(arr)
+    for i in range(n):
+        for j in range(0, n - i - 1):
+            if arr[j] > arr[j + 1]:
+                arr[j], arr[j + 1] = arr[j + 1], arr[j]
+    return arr
+
+
+result = longest_common_subsequence("dynamicprogramming", "programmingdynamic")
+ordered = bubble_sort([64, 34, 25, 12, 22, 11, 90, 5, 77, 31])
+"""
+
+PAIRS = [("msgpack", "none"), ("msgpack", "lz4"), ("msgpack", "zstd"), ("json", "zstd"), ("msgpack", "zlib")]
+REPEAT = 20
+
+
+def payloads():
+    yield "complexity result", asyncio.run(ComplexityAnalyzer().analyze_complexity(PROGRAM, "python"))
+    yield "optimization result", asyncio.run(OptimizationService().analyze_optimization_opportunities(PROGRAM, "python"))
+    yield "tree-sitter AST", parse_code_with_tree_sitter(PROGRAM, "python")
+    yield "execution trace", trace_code(PROGRAM)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func(*args)
+    return result, (time.perf_counter() - start) / REPEAT * 1e6
+
+
+def codec(name, registry):
+    return next(c for c in registry.values() if c.name == name)
+
+
+def main() -> None:
+    print(f"{'payload':<22} {'encoding':<16} {'bytes':>10} {'ratio':>7} {'set us':>9} {'get us':>9}")
+    for label, value in payloads():
+        text, set_us = timed(json.dumps, value)
+        _, get_us = timed(json.loads, text)
+        baseline = len(text.encode())
+        print(f"{label:<22} {'json text':<16} {baseline:>10} {1:>7.3f} {set_us:>9.0f} {get_us:>9.0f}")
+        for serializer, compressor in PAIRS:
+            cache_codecs._codecs = (codec(serializer, SERIALIZERS), codec(compressor, COMPRESSORS))
+            encoded, set_us = timed(encode_value, value)
+            _, get_us = timed(decode_value, encoded)
+            name = f"{serializer}+{compressor}"
+            print(f"{'':<22} {name:<16} {len(encoded):>10} {len(encoded) / baseline:>7.3f} {set_us:>9.0f} {get_us:>9.0f}")
+    cache_codecs._codecs = None
+
+
+if __name__ == "__main__":
+    main()
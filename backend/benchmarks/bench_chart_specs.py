@@ -0,0 +1,57 @@
+"""
+Response size and server CPU of PNG charts versus declarative specs.
+
+Runs VisualizationService.generate_visualizations over a few programs that
+trigger each algorithm-specific chart, once per output format, and reports
+the JSON-encoded response size and the process CPU time per request (the
+render pool runs on threads here, so its CPU is counted). The static
+charts are rendered beforehand, as at startup.
+
+    python -m benchmarks.bench_chart_specs
+"""
+
+import asyncio
+import time
+
+from app.core.serialization import dumps
+from app.services import visualization
+from app.services.execution_tracer import trace_code
+from app.services.visualization import VisualizationService
+
+REQUESTS = [
+    ("def bubble_sort(arr): pass", [64, 34, 25, 12, 22, 11, 90, 5]),
+    ("def binary_search(arr, target): pass", [1, 3, 5, 7, 9, 11, 7]),
+    ("def solve(): total = 0", []),
+]
+TRACE = trace_code("values = []\nfor i in range(200):\n    values.append(i % 7)\n")["trace"]
+REPEAT = 5
+
+
+def run(service: VisualizationService, output_format: str):
+    sizes, cpu = [], []
+    for _ in range(REPEAT):
+        for code, input_data in REQUESTS:
+            start = time.process_time()
+            result = asyncio.run(service.generate_visualizations(
+                code, "python", input_data, TRACE, output_format=output_format
+            ))
+            body = dumps(result)
+            cpu.append(time.process_time() - start)
+            sizes.append(len(body))
+    return sum(sizes) / len(sizes), sum(cpu) / len(cpu)
+
+
+def main() -> None:
+    visualization.render_static_charts()
+    service = VisualizationService()
+    print(f"{len(REQUESTS)} requests x {REPEAT}, trace of {len(TRACE)} steps")
+    print(f"{'format':<8} {'avg bytes':>10} {'cpu ms/request':>15}")
+    png_size, png_cpu = run(service, "png")
+    print(f"{'png':<8} {png_size:>10.0f} {png_cpu * 1000:>15.1f}")
+    spec_size, spec_cpu = run(service, "spec")
+    print(f"{'spec':<8} {spec_size:>10.0f} {spec_cpu * 1000:>15.1f}")
+    print(f"spec is {png_size / spec_size:.0f}x smaller and {png_cpu / spec_cpu:.0f}x cheaper")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark structural code-smell detection against the regexes it replaced.
+
+The old ``long_function``, ``deep_nesting`` and ``duplicate_code`` patterns
+backtrack on long whitespace runs and long lines, so each legacy scan runs
+in a child process that is killed after ``LEGACY_TIMEOUT`` seconds. The
+structural pass (one tree-sitter walk plus line-window hashing) runs in
+this process on the same inputs, which grow by doubling.
+
+    python -m benchmarks.bench_code_smells
+"""
+
+import multiprocessing
+import re
+import time
+
+from app.services.code_smells import duplicate_blocks, function_metrics
+from app.services.parsed_source import ParsedSource
+
+LEGACY_PATTERNS = {
+    'long_function': r'def\s+\w+\([^)]*\):[\s\S]{500,}',
+    'deep_nesting': r'(\s+){12,}(if|for|while|try)',
+    'duplicate_code': r'(.{20,})\1',
+}
+LEGACY_TIMEOUT = 10.0
+SIZES = (1000, 2000, 4000, 8000, 16000)
+
+INPUTS = {
+    "whitespace before keyword": lambda n: " " * n + "if",
+    "unclosed signature": lambda n: "def f(" + " " * n,
+    "long line": lambda n: "x = " + "a" * n,
+    "indented program": lambda n: "".join(
+        f"def f{i}(a, b):\n    for x in a:\n        if x:\n            b += x\n    return b\n"
+        for i in range(n // 80)
+    ),
+}
+
+
+def legacy_scan(code: str) -> None:
+    for pattern in LEGACY_PATTERNS.values():
+        for _ in re.finditer(pattern, code, re.MULTILINE):
+            pass
+
+
+def time_legacy(code: str) -> float:
+    """Seconds for the legacy scan, or infinity if it was killed"""
+    process = multiprocessing.Process(target=legacy_scan, args=(code,))
+    start = time.perf_counter()
+    process.start()
+    process.join(LEGACY_TIMEOUT)
+    if process.is_alive():
+        process.kill()
+        process.join()
+        return float("inf")
+    return time.perf_counter() - start
+
+
+def time_structural(code: str) -> float:
+    start = time.perf_counter()
+    source = ParsedSource(code, "python")
+    function_metrics(source, "python")
+    duplicate_blocks(source)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{'input':<28} {'chars':>7} {'legacy s':>10} {'structural s':>13}")
+    for label, make in INPUTS.items():
+        for size in SIZES:
+            code = make(size)
+            legacy = time_legacy(code)
+            legacy_text = f"> {LEGACY_TIMEOUT:.0f}" if legacy == float("inf") else f"{legacy:.4f}"
+            print(f"{label:<28} {len(code):>7} {legacy_text:>10} {time_structural(code):>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
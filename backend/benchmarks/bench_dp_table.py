@@ -0,0 +1,70 @@
+"""
+DP table heatmap benchmark.
+
+For square DP tables of growing size, compares the previous heatmap (one
+``ax.text`` per cell) with the large-table path: a full-table render,
+downsampled past ``DP_MAX_RENDER_SIZE``, one viewport render, and the
+spec of the default viewport. The previous heatmap is skipped above
+``LEGACY_LIMIT`` cells per side, where it takes minutes.
+
+    python -m benchmarks.bench_dp_table
+"""
+
+import io
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from app.core.serialization import dumps
+from app.services.chart_specs import chart_spec
+from app.services.render_pool import RenderJob, render_chart
+
+SIZES = (50, 200, 500, 2000)
+LEGACY_LIMIT = 200
+# Cells per side of the viewport, taken from the middle of the table
+VIEWPORT = 40
+
+
+def dp_table(n: int) -> list:
+    """A table that grows along rows and columns, like most DP tables"""
+    steps = np.random.default_rng(n).integers(0, 2, (n, n))
+    return (steps.cumsum(axis=0).cumsum(axis=1) // n).tolist()
+
+
+def legacy_render(table) -> bytes:
+    figure = Figure(figsize=(10, 8))
+    FigureCanvasAgg(figure)
+    ax = figure.subplots()
+    im = ax.imshow(table, cmap="YlOrRd", aspect="auto")
+    for i, row in enumerate(table):
+        for j, value in enumerate(row):
+            ax.text(j, i, value, ha="center", va="center", color="black", fontsize=10)
+    figure.colorbar(im, ax=ax)
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    print(f"{'cells':>10} {'legacy ms':>10} {'full ms':>8} {'viewport ms':>12} {'spec ms':>8} {'spec KB':>8}")
+    for n in SIZES:
+        table = dp_table(n)
+        legacy = f"{timed(lambda: legacy_render(table)):>10.0f}" if n <= LEGACY_LIMIT else f"{'skipped':>10}"
+        full = timed(lambda: render_chart(RenderJob("dp_table", {"dp_table": table}, size=(10, 8))))
+        window = {"row_start": n // 2, "row_end": n // 2 + VIEWPORT, "col_start": n // 2, "col_end": n // 2 + VIEWPORT}
+        viewport = timed(lambda: render_chart(RenderJob("dp_table", {"dp_table": table, "window": window}, size=(10, 8))))
+        spec_ms = timed(lambda: chart_spec("dp_table", {"dp_table": table}))
+        spec_kb = len(dumps(chart_spec("dp_table", {"dp_table": table}))) / 1024
+        print(f"{n}x{n:<{9 - len(str(n))}} {legacy} {full:>8.0f} {viewport:>12.0f} {spec_ms:>8.1f} {spec_kb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
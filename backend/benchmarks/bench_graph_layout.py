@@ -0,0 +1,89 @@
+"""
+Graph chart rendering and layout benchmark.
+
+For random graphs of growing size, compares the previous graph chart
+(circular placement, ``traversal_order.index`` per node, one plot call per
+edge) with the layout engine: the cost of each layout on its own, a full
+render with a cold layout cache, and the cost of the later frames of a
+step-by-step traversal, which reuse the cached layout.
+
+    python -m benchmarks.bench_graph_layout
+"""
+
+import io
+import time
+
+import matplotlib
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from app.services import graph_layout
+from app.services.graph_layout import layout_graph
+from app.services.render_pool import RenderJob, render_chart
+
+SIZES = (50, 200, 1000)
+FRAMES = 5
+
+
+def random_graph(n: int):
+    rng = np.random.default_rng(n)
+    nodes = list(range(n))
+    edges = [{"from": int(a), "to": int(b)} for a, b in rng.integers(0, n, (2 * n, 2)) if a != b]
+    return nodes, edges
+
+
+def legacy_render(nodes, edges, traversal_order) -> bytes:
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    ax = figure.subplots()
+    pos = {}
+    for i, node in enumerate(nodes):
+        angle = 2 * np.pi * i / len(nodes)
+        pos[node] = (np.cos(angle), np.sin(angle))
+    for edge in edges:
+        (x1, y1), (x2, y2) = pos[edge["from"]], pos[edge["to"]]
+        ax.plot([x1, x2], [y1, y2], "k-", alpha=0.3, linewidth=1)
+    for node in nodes:
+        x, y = pos[node]
+        if node in traversal_order:
+            order = traversal_order.index(node)
+            ax.scatter(x, y, c=[matplotlib.colormaps["viridis"](order / len(traversal_order))], s=200, alpha=0.8)
+            ax.annotate(f"{node}\n({order+1})", (x, y), xytext=(5, 5), textcoords="offset points")
+        else:
+            ax.scatter(x, y, c="lightgray", s=150, alpha=0.6)
+            ax.annotate(str(node), (x, y), xytext=(5, 5), textcoords="offset points")
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    print(f"{'nodes':>6} {'legacy ms':>10} {'fa2 ms':>8} {'layered':>8} {'circular':>9} {'render cold':>12} {'frame warm':>11}")
+    for n in SIZES:
+        nodes, edges = random_graph(n)
+        order = nodes[: n // 2]
+        legacy = timed(lambda: legacy_render(nodes, edges, order))
+        layouts = []
+        for engine in ("forceatlas2", "layered", "circular"):
+            graph_layout._cache.clear()
+            layouts.append(timed(lambda: layout_graph(nodes, edges, engine)))
+        graph_layout._cache.clear()
+        cold = timed(lambda: render_chart(RenderJob("graph_traversal", {"nodes": nodes, "edges": edges, "traversal_order": order})))
+        warm = min(
+            timed(lambda: render_chart(RenderJob(
+                "graph_traversal", {"nodes": nodes, "edges": edges, "traversal_order": order[: step + 1]}
+            )))
+            for step in range(FRAMES)
+        )
+        print(f"{n:>6} {legacy:>10.0f} {layouts[0]:>8.0f} {layouts[1]:>8.0f} {layouts[2]:>9.0f} {cold:>12.0f} {warm:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Visualization delivery benchmark: inline base64 versus stored references.
+
+Runs the same analysis visualizations several times, as a client that
+re-analyzes unchanged code would, and reports server time and bytes sent
+per run. Inline PNGs are rendered and sent in full every time; references
+render once into the image store, after which a run costs a store lookup,
+and the browser revalidates its cached images with a 304.
+
+    python -m benchmarks.bench_image_store
+"""
+
+import asyncio
+import tempfile
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import visualization as visualization_endpoints
+from app.core.serialization import dumps
+from app.services import image_store
+from app.services.image_store import ImageStore
+from app.services.visualization import EnhancedVisualizationService
+
+RUNS = 5
+DATA = {
+    "sorting": {"array": [64, 34, 25, 12, 22, 11, 90] * 5},
+    "graph_traversal": {
+        "nodes": list(range(60)),
+        "edges": [{"from": i, "to": (i * 7 + 1) % 60} for i in range(60)],
+        "traversal_order": list(range(30)),
+    },
+    "dynamic_programming": {"dp_table": [[i * j for j in range(30)] for i in range(30)]},
+}
+
+
+async def visualize(service, output_format):
+    results = {}
+    for algorithm_type, data in DATA.items():
+        results.update(await service.generate_algorithm_visualization(algorithm_type, data, output_format))
+    return results
+
+
+def main() -> None:
+    service = EnhancedVisualizationService()
+    image_store.image_store = ImageStore(tempfile.mkdtemp())
+    app = FastAPI()
+    app.include_router(visualization_endpoints.router, prefix="/api/v1/visualization")
+    client = TestClient(app)
+    etags = {}
+
+    print(f"{'run':>4} {'inline ms':>10} {'inline KB':>10} {'ref ms':>8} {'ref KB':>8} {'image GETs':>11} {'image KB':>9}")
+    for run in range(1, RUNS + 1):
+        start = time.perf_counter()
+        inline = asyncio.run(visualize(service, "png"))
+        inline_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        refs = asyncio.run(visualize(service, "ref"))
+        statuses = []
+        image_bytes = 0
+        for ref in refs.values():
+            headers = {"If-None-Match": etags[ref["url"]]} if ref["url"] in etags else {}
+            response = client.get(ref["url"], headers=headers)
+            etags[ref["url"]] = response.headers["etag"]
+            statuses.append(str(response.status_code))
+            image_bytes += len(response.content)
+        ref_ms = (time.perf_counter() - start) * 1000
+
+        print(
+            f"{run:>4} {inline_ms:>10.0f} {len(dumps(inline)) / 1024:>10.1f} {ref_ms:>8.0f} "
+            f"{len(dumps(refs)) / 1024:>8.1f} {','.join(statuses):>11} {image_bytes / 1024:>9.1f}"
+        )
+    image_store.image_store.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Latency benchmark for concurrent analysis requests that render charts.
+
+Serves an ``/analyze`` route whose visualization stage renders the
+sorting, searching and memory charts for each request, and fires a burst of
+concurrent requests at it while probing a trivial ``/health`` route. It
+compares rendering with pyplot inside the request coroutine, as the
+visualization service used to, with rendering on the render pool, in
+thread and in process mode. The health probe shows how long the event loop
+is blocked while charts render; with one core the pool cannot speed up
+the burst itself, only keep the loop responsive.
+
+    python -m benchmarks.bench_render_pool
+"""
+
+import asyncio
+import base64
+import io
+import statistics
+import time
+
+import httpx
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from fastapi import FastAPI
+
+from app.core.stages import Stage, run_stages
+from app.services import render_pool, visualization
+from app.services.execution_tracer import trace_code
+from app.services.render_pool import RenderPool
+
+CONCURRENCY = 8
+ROUNDS = 2
+ARRAY = [64, 34, 25, 12, 22, 11, 90, 5, 47, 31]
+TRACE = trace_code("total = 0\nfor i in range(100):\n    total += i\n")["trace"]
+
+
+def legacy_png(draw, figsize) -> str:
+    """How each chart used to be rendered: pyplot on the calling coroutine"""
+    fig, ax = plt.subplots(figsize=figsize)
+    draw(ax)
+    plt.tight_layout()
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
+    plt.close()
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+async def legacy_visualize() -> dict:
+    usage = visualization.memory_profile(TRACE)
+    return {
+        "sorting_comparison": legacy_png(lambda ax: ax.bar(range(len(ARRAY)), sorted(ARRAY)), (15, 6)),
+        "searching_visualization": legacy_png(lambda ax: ax.bar(range(len(ARRAY)), ARRAY), (12, 6)),
+        "memory_usage": legacy_png(lambda ax: ax.plot(range(len(usage)), usage), (10, 6)),
+    }
+
+
+async def pooled_visualize() -> dict:
+    usage = visualization.memory_profile(TRACE)
+    charts = await asyncio.gather(
+        visualization.render_base64("sorting_comparison", {"array": ARRAY}, size=(15, 6)),
+        visualization.render_base64("searching_visualization", {"array": ARRAY, "target": 12}, size=(12, 6)),
+        visualization.render_base64("memory_usage", {"usage": usage}),
+    )
+    return dict(zip(("sorting_comparison", "searching_visualization", "memory_usage"), charts))
+
+
+def build_app(visualize) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/analyze")
+    async def analyze():
+        # Coroutines that render on the loop cannot be offloaded: pyplot is not thread-safe
+        report = await run_stages([Stage("visualization", visualize, offload=False)])
+        return {"stages": report.statuses()}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+async def burst(app: FastAPI):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies, probes = [], []
+        done = asyncio.Event()
+
+        async def request():
+            start = time.perf_counter()
+            response = await client.post("/analyze")
+            assert response.json()["stages"]["visualization"]["status"] == "ok"
+            latencies.append(time.perf_counter() - start)
+
+        async def probe():
+            # A blocked loop shows up as a late wake-up from the sleep
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                await client.get("/health")
+                probes.append(time.perf_counter() - start - 0.01)
+
+        prober = asyncio.create_task(probe())
+        for _ in range(ROUNDS):
+            await asyncio.gather(*(request() for _ in range(CONCURRENCY)))
+        done.set()
+        await prober
+        return latencies, probes
+
+
+def report(label: str, latencies, probes) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<22} {statistics.median(latencies) * 1000:>9.0f} {p95 * 1000:>9.0f}"
+        f" {max(probes) * 1000:>12.0f}"
+    )
+
+
+def main() -> None:
+    print(f"{CONCURRENCY} concurrent requests x {ROUNDS} rounds, 3 charts each")
+    print(f"{'rendering':<22} {'p50 ms':>9} {'p95 ms':>9} {'max probe ms':>12}")
+    report("pyplot on the loop", *asyncio.run(burst(build_app(legacy_visualize))))
+    for mode in ("thread", "process"):
+        render_pool.render_pool = RenderPool(workers=2, mode=mode)
+        render_pool.render_pool.start()
+        report(f"render pool ({mode})", *asyncio.run(burst(build_app(pooled_visualize))))
+        render_pool.render_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
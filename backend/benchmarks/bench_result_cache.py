@@ -0,0 +1,125 @@
+"""
+Hit-rate benchmark for the normalized-code result cache.
+
+The corpus is a few classic DSA programs, each submitted several times the
+way students resubmit: reformatted, with comments added, with locals
+renamed, and verbatim. It counts the distinct cache keys a raw-text hash,
+the normalized form without renaming, and the normalized form with renaming
+would produce; every repeated key is a cache hit. It also checks that a
+hit, remapped onto the current source, equals a fresh analysis of it.
+
+    python -m benchmarks.bench_result_cache
+"""
+
+import ast
+import asyncio
+import hashlib
+import re
+
+from app.core import cache
+from app.core.config import settings
+from app.services.code_normalizer import normalize_code
+from app.services.optimization_service import OptimizationService
+
+PROGRAMS = [
+    """def binary_search(arr, target):
+    lo, hi = 0, len(arr) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if arr[mid] == target:
+            return mid
+        if arr[mid] < target:
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return -1
+""",
+    """def bubble_sort(arr):
+    n = len(arr)
+    for i in range(n):
+        for j in range(0, n - i - 1):
+            if arr[j] > arr[j + 1]:
+                arr[j], arr[j + 1] = arr[j + 1], arr[j]
+    return arr
+""",
+    """def two_sum(nums, target):
+    for i in range(len(nums)):
+        for j in range(i + 1, len(nums)):
+            if nums[i] + nums[j] == target:
+                return [i, j]
+    return []
+""",
+    """def max_subarray(nums):
+    best = current = nums[0]
+    for value in nums[1:]:
+        current = max(value, current + value)
+        best = max(best, current)
+    return best
+""",
+]
+
+JS_PROGRAM = """function sum(values) {
+  let total = 0;
+  for (let i = 0; i < values.length; i++) {
+    total += values[i];
+  }
+  return total;
+}
+"""
+
+
+def reformat(code: str) -> str:
+    return ast.unparse(ast.parse(code)) + "\n"
+
+
+def commented(code: str) -> str:
+    lines = code.splitlines()
+    return "# Solution\n\n" + "\n".join(line + "  # step" if line.strip().startswith("return") else line for line in lines) + "\n"
+
+
+def renamed(code: str) -> str:
+    for old, new in (("arr", "items"), ("nums", "data"), ("lo", "left"), ("hi", "right"), ("best", "answer")):
+        code = re.sub(rf"\b{old}\b", new, code)
+    return code
+
+
+def submissions():
+    for program in PROGRAMS:
+        for variant in (program, program, reformat(program), commented(program), renamed(program), commented(renamed(program))):
+            yield variant, "python"
+    for variant in (JS_PROGRAM, "// sum\n" + JS_PROGRAM, JS_PROGRAM.replace("\n  ", "\n    ")):
+        yield variant, "javascript"
+
+
+def hit_rate(keys) -> float:
+    return 1 - len(set(keys)) / len(keys)
+
+
+def check_remapped_hits(corpus) -> int:
+    service = OptimizationService()
+    cache.cache_manager = cache.CacheManager(None)
+    cached = [asyncio.run(service.analyze_optimization_opportunities(code, language)) for code, language in corpus]
+    enabled, settings.RESULT_CACHE_ENABLED = settings.RESULT_CACHE_ENABLED, False
+    try:
+        for (code, language), result in zip(corpus, cached):
+            assert result == asyncio.run(service.analyze_optimization_opportunities(code, language)), code
+    finally:
+        settings.RESULT_CACHE_ENABLED = enabled
+    return len(corpus)
+
+
+def main() -> None:
+    corpus = list(submissions())
+    raw = [hashlib.blake2b(code.encode(), digest_size=16).hexdigest() for code, _ in corpus]
+    plain = [normalize_code(code, language, rename_locals=False).digest for code, language in corpus]
+    renaming = [normalize_code(code, language).digest for code, language in corpus]
+
+    print(f"corpus: {len(corpus)} submissions of {len(PROGRAMS) + 1} programs")
+    print(f"{'key':<24} {'distinct':>8} {'hit rate':>9}")
+    for name, keys in (("raw text", raw), ("normalized", plain), ("normalized + renaming", renaming)):
+        print(f"{name:<24} {len(set(keys)):>8} {hit_rate(keys):>8.0%}")
+    print(f"remapped hits equal to fresh results: {check_remapped_hits(corpus)}/{len(corpus)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark rule-set scanning against per-pattern regex loops.
+
+The corpus is this backend's own source tree. Each rule table is scanned
+the way the analyzers used to do it (one ``re.search``/``re.finditer`` per
+pattern) and with its compiled ``RuleSet`` (one prefilter pass per
+source), and the results are checked to be identical. The code-smell
+patterns are left out: several of them backtrack badly on large files.
+
+The complexity phrase lists are plain substrings; for comparison they are
+also scanned as literal rules against the ``in`` tests ComplexityAnalyzer
+keeps using, which remain faster for a few dozen short literals.
+
+    python -m benchmarks.bench_rule_engine
+"""
+
+import re
+import time
+from pathlib import Path
+
+from app.services import ai_analyzer, optimization_service
+from app.services.complexity_analyzer import ComplexityAnalyzer
+from app.services.rule_engine import Rule, RuleSet
+
+CORPUS_ROOT = Path(__file__).resolve().parent.parent / "app"
+REPEAT = 3
+
+
+def load_corpus():
+    return [path.read_text(encoding="utf8") for path in sorted(CORPUS_ROOT.rglob("*.py"))]
+
+
+def legacy_scan(rules, code):
+    results = []
+    for rule in rules:
+        if rule.first_only:
+            match = re.search(rule.pattern, code, rule.flags)
+            results.append([match.start()] if match else [])
+        else:
+            results.append([match.start() for match in re.finditer(rule.pattern, code, rule.flags)])
+    return results
+
+
+def legacy_phrase_scan(patterns, code):
+    lowered = code.lower()
+    results = []
+    for phrases in patterns.values():
+        for phrase in phrases:
+            position = lowered.find(phrase.lower())
+            results.append([position] if position >= 0 else [])
+    return results
+
+
+def rule_set_scan(rule_set, code):
+    return [[match.start() for match in matches] for _, matches in rule_set.scan(code)]
+
+
+def best_rate(func, corpus):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        results = [func(code) for code in corpus]
+        best = min(best, time.perf_counter() - start)
+    return results, len(corpus) / best
+
+
+def main() -> None:
+    corpus = load_corpus()
+    size_kb = sum(len(code) for code in corpus) / 1024
+    print(f"corpus: {len(corpus)} files, {size_kb:.0f} KB")
+
+    phrases = ComplexityAnalyzer().complexity_patterns
+    phrase_rules = RuleSet([
+        Rule.literal(complexity, phrase, re.IGNORECASE, first_only=True)
+        for complexity, group in phrases.items() for phrase in group
+    ])
+    ai_rules = RuleSet([rule for rule in ai_analyzer._RULES.rules if not rule.group.startswith("smell:")])
+    legacy_scans = {
+        "ai analyzer (algorithms, security)": (ai_rules, lambda code: legacy_scan(ai_rules.rules, code)),
+        "optimization patterns": (
+            optimization_service._RULES,
+            lambda code: legacy_scan(optimization_service._RULES.rules, code),
+        ),
+        "complexity phrases": (
+            phrase_rules,
+            lambda code: legacy_phrase_scan(phrases, code),
+        ),
+    }
+
+    print(f"{'rule set':<38} {'rules':>6} {'legacy scans/s':>15} {'rule set scans/s':>17} {'speedup':>8}")
+    for label, (rule_set, legacy_func) in legacy_scans.items():
+        legacy, legacy_rate = best_rate(legacy_func, corpus)
+        scanned, rate = best_rate(lambda code: rule_set_scan(rule_set, code), corpus)
+        assert legacy == scanned, label
+        print(f"{label:<38} {len(rule_set.rules):>6} {legacy_rate:>15.0f} {rate:>17.0f} {rate / legacy_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark JSON serialization of large execution traces.
+
+Traces a loop-heavy program, then compares the previous response path
+(recursive ``_make_json_serializable`` walk, then FastAPI's
+``jsonable_encoder`` and ``JSONResponse``) with ``FastJSONResponse``, both
+as a direct render and as request latency through a test client.
+
+    python -m benchmarks.bench_serialization
+"""
+
+import json
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.core.serialization import FastJSONResponse
+from app.services.execution_tracer import trace_code
+from benchmarks._common import measure, print_row
+
+
+def generate_program(iterations: int, size: int) -> str:
+    return f"""
+counts = {{i: 0 for i in range({size})}}
+matrix = [[i * j for j in range(8)] for i in range({size} // 8)]
+values = list(range({size}))
+seen = set()
+total = 0.5
+for step in range({iterations}):
+    node = step % {size}
+    values[node] = values[node] * 3 % 101
+    counts[node] += 1
+    seen.add(node)
+    total += values[node]
+"""
+
+
+def legacy_serializable(obj):
+    """The recursive conversion both services used before app.core.serialization"""
+    if obj is None:
+        return None
+    elif isinstance(obj, (str, int, float, bool)):
+        return obj
+    elif isinstance(obj, (list, tuple)):
+        return [legacy_serializable(item) for item in obj]
+    elif isinstance(obj, dict):
+        return {str(k): legacy_serializable(v) for k, v in obj.items()}
+    elif isinstance(obj, type):
+        return f"<type '{obj.__name__}'>"
+    elif callable(obj):
+        return f"<function '{getattr(obj, '__name__', 'anonymous')}'>"
+    elif hasattr(obj, '__dict__'):
+        try:
+            return {str(k): legacy_serializable(v) for k, v in obj.__dict__.items()}
+        except Exception:
+            return f"<object '{type(obj).__name__}'>"
+    else:
+        return str(obj)
+
+
+def legacy_render(trace) -> bytes:
+    return JSONResponse(jsonable_encoder(legacy_serializable(trace))).body
+
+
+def fast_render(trace) -> bytes:
+    return FastJSONResponse(trace).body
+
+
+def build_app(trace) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy")
+    async def legacy():
+        return legacy_serializable(trace)
+
+    @app.get("/fast", response_class=FastJSONResponse)
+    async def fast():
+        return FastJSONResponse(trace)
+
+    return app
+
+
+def main() -> None:
+    for iterations, size in ((200, 200), (500, 300)):
+        code = generate_program(iterations, size)
+        trace, stats = measure(lambda: trace_code(code)["trace"], repeat=1)
+        label = f"{iterations} iterations x {size}"
+        print_row(f"trace {label}", stats, steps=len(trace))
+
+        legacy, stats = measure(lambda: legacy_render(trace), repeat=1)
+        print_row(f"render legacy {label}", stats, response_mb=round(len(legacy) / 2**20, 1))
+        fast, stats = measure(lambda: fast_render(trace))
+        print_row(f"render fast {label}", stats, response_mb=round(len(fast) / 2**20, 1))
+        assert json.loads(legacy) == json.loads(fast)
+
+        client = TestClient(build_app(trace))
+        for route in ("legacy", "fast"):
+            _, stats = measure(lambda: client.get(f"/{route}"), repeat=1)
+            print_row(f"request {route} {label}", stats)
+
+
+
+if __name__ == "__main__":
+    main()
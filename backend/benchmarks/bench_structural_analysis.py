@@ -0,0 +1,86 @@
+"""
+Benchmark structural analysis throughput per language.
+
+Reports query compile time (paid once per process), then files per second
+for parse plus the single captures pass, and for the captures pass alone
+on an already parsed tree.
+
+    python -m benchmarks.bench_structural_analysis
+"""
+
+import time
+
+from app.services.parsed_source import ParsedSource
+from app.services.structural_analysis import _QUERY_SOURCES, analyze_structure, get_query
+
+FUNCTIONS_PER_FILE = 40
+FILES = 200
+
+TEMPLATES = {
+    'java': (
+        "class Gen {{\n{body}\n}}",
+        "  int m{i}(int[] a) {{ int t = 0; for (int x : a) {{ for (int y : a) {{ t += x * y; }} }}"
+        " java.util.List<Integer> l = new java.util.ArrayList<>(); return m{i}(a) + t; }}",
+    ),
+    'cpp': (
+        "{body}",
+        "int f{i}(std::vector<int>& a) {{ int t = 0; for (int x : a) {{ for (int y : a) {{ t += x * y; }} }}"
+        " int* p = new int[4]; return t; }}",
+    ),
+    'c': (
+        "{body}",
+        "int f{i}(int* a, int n) {{ int t = 0; for (int i = 0; i < n; i++) {{ while (t < i) t++; }}"
+        " int* p = malloc(16); return f{i}(a, n - 1) + t; }}",
+    ),
+    'javascript': (
+        "{body}",
+        "function f{i}(a) {{ let t = 0; for (const x of a) {{ for (const y of a) {{ t += x * y; }} }}"
+        " const m = new Map(); return [t, m]; }}",
+    ),
+    'go': (
+        "package main\n{body}",
+        "func f{i}(a []int) int {{ t := 0; for _, x := range a {{ for _, y := range a {{ t += x * y }} }}"
+        " m := make(map[int]int); m[0] = t; return f{i}(a[1:]) }}",
+    ),
+    'rust': (
+        "{body}",
+        "fn f{i}(a: &[i32]) -> i32 {{ let mut t = 0; for x in a {{ for y in a {{ t += x * y; }} }}"
+        " let v: Vec<i32> = Vec::new(); t + v.len() as i32 }}",
+    ),
+}
+
+
+def generate(language: str, index: int) -> str:
+    wrapper, function = TEMPLATES[language]
+    body = "\n".join(function.format(i=f"{index}_{i}") for i in range(FUNCTIONS_PER_FILE))
+    return wrapper.format(body=body)
+
+
+def main() -> None:
+    print(f"{'language':<12} {'compile ms':>10} {'files/s':>10} {'query-only files/s':>20} {'KB/file':>8}")
+    for language in _QUERY_SOURCES:
+        files = [generate(language, i) for i in range(FILES)]
+
+        start = time.perf_counter()
+        get_query(language)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for code in files:
+            analyze_structure(ParsedSource(code, language), language)
+        full_rate = FILES / (time.perf_counter() - start)
+
+        parsed = [ParsedSource(code, language) for code in files]
+        for source in parsed:
+            source.tree_sitter_tree
+        start = time.perf_counter()
+        for source in parsed:
+            analyze_structure(source, language)
+        query_rate = FILES / (time.perf_counter() - start)
+
+        kb = sum(len(code) for code in files) / FILES / 1024
+        print(f"{language:<12} {compile_ms:>10.1f} {full_rate:>10.0f} {query_rate:>20.0f} {kb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Data structure drawing benchmark: matplotlib PNG versus native SVG.
+
+Draws stacks and arrays of growing size, and a small adjacency-list
+graph, both ways: as the matplotlib chart they used to be (a figure
+rasterized at 150 dpi) and through ``structure_svg``. Reports time per drawing, peak traced memory and
+output size.
+
+    python -m benchmarks.bench_structure_svg
+"""
+
+from app.services.structure_svg import structure_svg
+from benchmarks._common import legacy_stack_png, measure, print_row
+
+SIZES = (5, 20, 100)
+
+
+def main() -> None:
+    legacy_stack_png([1])
+    for n in SIZES:
+        elements = list(range(n))
+        png, stats = measure(lambda: legacy_stack_png(elements))
+        print_row(f"stack of {n}, matplotlib png", stats, kb=round(len(png) / 1024, 1))
+        svg, stats = measure(lambda: structure_svg({"type": "stack", "elements": elements}), repeat=200)
+        print_row(f"stack of {n}, svg", stats, kb=round(len(svg) / 1024, 1), us=round(stats["seconds"] * 1e6, 1))
+        svg, stats = measure(lambda: structure_svg({"type": "array", "elements": elements}), repeat=200)
+        print_row(f"array of {n}, svg", stats, kb=round(len(svg) / 1024, 1), us=round(stats["seconds"] * 1e6, 1))
+
+    graph = {"type": "graph", "data": {
+        "nodes": list("ABCDEFGH"),
+        "edges": [{"from": a, "to": b} for a, b in zip("ABCDEFGH", "BCDEFGHA")],
+    }}
+    svg, stats = measure(lambda: structure_svg(graph), repeat=200)
+    print_row("graph of 8, svg", stats, kb=round(len(svg) / 1024, 1), us=round(stats["seconds"] * 1e6, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Trace export benchmark.
+
+Traces a program of about 8,700 steps (5,000 distinct states) that pushes
+and pops a stack and cycles a queue, then exports its frames in each
+format through ``export_trace`` on the render pool, against drawing every
+step as a matplotlib stack chart, as the service did before the pipeline, measured on the first ``LEGACY_STEPS`` steps and extrapolated.
+
+    python -m benchmarks.bench_trace_frames
+"""
+
+import asyncio
+import tempfile
+import time
+
+from app.services import image_store
+from app.services.execution_tracer import ExecutionTracer
+from app.services.image_store import ImageStore
+from app.services.render_pool import get_render_pool
+from app.services.trace_frames import FRAME_FORMATS, export_trace, step_states
+from benchmarks._common import legacy_stack_png
+
+CODE = '''
+def run():
+    stack = []
+    queue = []
+    for i in range(1250):
+        stack.append(i % 7)
+        if len(stack) > 6:
+            stack.pop()
+        queue.append(i % 3)
+        if len(queue) > 4:
+            queue.pop(0)
+run()
+'''
+LEGACY_STEPS = 50
+
+
+def legacy_seconds(trace) -> float:
+    start = time.perf_counter()
+    for step in trace[:LEGACY_STEPS]:
+        stack = step["data_structures"].get("stack", {}).get("elements", [])
+        legacy_stack_png(stack)
+    return (time.perf_counter() - start) / LEGACY_STEPS * len(trace)
+
+
+async def export(trace, frame_format):
+    events = 0
+    async for _ in export_trace(trace, frame_format):
+        events += 1
+    return events
+
+
+def main() -> None:
+    trace = [step for step in ExecutionTracer(CODE).run() if "data_structures" in step]
+    states, _ = step_states(trace)
+    print(f"steps={len(trace)} unique states={len(states)}")
+    print(f"{'legacy matplotlib, every step':<34} {legacy_seconds(trace):>8.1f} s (extrapolated)")
+
+    image_store.image_store = ImageStore(tempfile.mkdtemp())
+    get_render_pool().start()
+    for frame_format in FRAME_FORMATS:
+        start = time.perf_counter()
+        events = asyncio.run(export(trace, frame_format))
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        asyncio.run(export(trace, frame_format))
+        warm = time.perf_counter() - start
+        print(f"{frame_format + ' frames':<34} {cold:>8.2f} s cold {warm:>6.2f} s repeat  events={events}")
+    get_render_pool().shutdown()
+    image_store.image_store.clear()
+
+
+if __name__ == "__main__":
+    main()
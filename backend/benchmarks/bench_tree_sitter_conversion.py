@@ -0,0 +1,90 @@
+"""
+Benchmark tree-sitter tree conversion on large generated files.
+
+Compares the previous recursive converter, which copied the node text onto
+every node, with the cursor-based converter that only stores byte ranges.
+
+    python -m benchmarks.bench_tree_sitter_conversion
+"""
+
+import json
+import sys
+
+from app.core.config import settings
+from app.services.tree_sitter_parser import _tree_sitter_node_to_dict, get_parser
+from benchmarks._common import measure, print_row
+
+
+def _legacy_node_to_dict(node, code):
+    """The recursive converter this benchmark measures against"""
+    return {
+        "type": str(node.type),
+        "start_point": node.start_point,
+        "end_point": node.end_point,
+        "text": code[node.start_byte:node.end_byte],
+        "children": [_legacy_node_to_dict(child, code) for child in node.children],
+    }
+
+
+def generate_flat_python(functions: int) -> str:
+    """Many small functions: wide and shallow"""
+    return "\n".join(
+        f"def func_{i}(items):\n"
+        f"    total = 0\n"
+        f"    for item in items:\n"
+        f"        if item % {i + 2} == 0:\n"
+        f"            total += item * {i}\n"
+        f"    return total\n"
+        for i in range(functions)
+    )
+
+
+def generate_nested_java(depth: int) -> str:
+    """One deeply nested method: narrow and deep"""
+    body = "x += 1;"
+    for i in range(depth):
+        body = f"if (x > {i}) {{ {body} }}"
+    return f"class Deep {{ int run(int x) {{ {body} return x; }} }}"
+
+
+def _json_kb(value) -> str:
+    try:
+        return str(len(json.dumps(value)) // 1024)
+    except RecursionError:
+        return "n/a (too deep for json)"
+
+
+def run_case(label: str, code: str, language: str) -> None:
+    tree = get_parser(language).parse(code.encode("utf8"))
+
+    try:
+        legacy, legacy_stats = measure(lambda: _legacy_node_to_dict(tree.root_node, code))
+        print_row(f"{label} legacy", legacy_stats, json_kb=_json_kb(legacy))
+    except RecursionError:
+        print(f"{label + ' legacy':<40} RecursionError")
+
+    converted, stats = measure(lambda: _tree_sitter_node_to_dict(tree, 10 ** 6, 10 ** 7))
+    print_row(f"{label} iterative", stats, json_kb=_json_kb(converted), nodes=converted["node_count"])
+
+    capped, capped_stats = measure(
+        lambda: _tree_sitter_node_to_dict(tree, settings.MAX_AST_DEPTH, settings.MAX_AST_NODES)
+    )
+    print_row(
+        f"{label} iterative capped",
+        capped_stats,
+        json_kb=_json_kb(capped),
+        nodes=capped["node_count"],
+        truncated=capped["truncated"],
+    )
+
+
+def main() -> None:
+    sys.setrecursionlimit(3000)
+    run_case("python 2k functions", generate_flat_python(2000), "python")
+    run_case("python 8k functions", generate_flat_python(8000), "python")
+    run_case("java nesting depth 400", generate_nested_java(400), "java")
+    run_case("java nesting depth 2000", generate_nested_java(2000), "java")
+
+
+if __name__ == "__main__":
+    main()
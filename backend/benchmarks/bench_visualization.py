@@ -0,0 +1,50 @@
+"""
+Latency benchmark for VisualizationService.generate_visualizations.
+
+Compares a request that draws the static complexity and flow charts (as
+every request used to) with one that serves them from memory, for code
+that triggers no algorithm-specific chart, so only the static charts and
+the trace-driven memory chart are left.
+
+    python -m benchmarks.bench_visualization
+"""
+
+import asyncio
+
+from app.services import visualization
+from app.services.execution_tracer import trace_code
+from app.services.visualization import VisualizationService
+from benchmarks._common import measure, print_row
+
+PROGRAM = """total = 0
+for i in range(200):
+    total += i
+"""
+
+
+def main() -> None:
+    service = VisualizationService()
+    trace = trace_code(PROGRAM)["trace"]
+
+    def request():
+        return asyncio.run(service.generate_visualizations(PROGRAM, "python", [], trace))
+
+    def cold_request():
+        visualization._static_charts.clear()
+        return request()
+
+    _, cold = measure(cold_request, repeat=5)
+    print_row("static charts drawn per request", cold)
+    visualization.render_static_charts()
+    _, warm = measure(request, repeat=5)
+    print_row("static charts from memory", warm, speedup=f"{cold['seconds'] / warm['seconds']:.1f}x")
+
+    def no_trace():
+        return asyncio.run(service.generate_visualizations(PROGRAM, "python", []))
+
+    _, static_only = measure(no_trace, repeat=5)
+    print_row("static charts from memory, no trace", static_only)
+
+
+if __name__ == "__main__":
+    main()
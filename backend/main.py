@@ -17,9 +17,12 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.core.config import settings
 from app.core.database import init_db, close_db, get_db_status
+from app.core.cache import init_cache, close_cache
 from app.core.logging import setup_logging
 from app.api.v1.api import api_router
 from app.core.exceptions import CustomHTTPException
+from app.services.analysis_engine import get_analysis_engine
+from app.services.render_pool import get_render_pool
 
 # Setup logging
 setup_logging()
@@ -44,6 +47,16 @@ async def lifespan(app: FastAPI):
             logger.warning(f"Database connection failed: {db_status['error_message']}")
             logger.info("Application will continue with limited functionality")
         
+        # Optional Redis cache for analyzer results; analysis works without it
+        await init_cache()
+        
+        # Workers import and construct the analyzers once, before traffic arrives
+        await asyncio.to_thread(get_analysis_engine().start)
+        
+        if settings.ENABLE_VISUALIZATION:
+            # Render workers load fonts and build their figures up front
+            await asyncio.to_thread(get_render_pool().start)
+        
         logger.info("Application startup completed")
         
     except Exception as e:
@@ -56,6 +69,9 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down DSA Code Analysis Platform")
     try:
         await close_db()
+        get_analysis_engine().shutdown()
+        get_render_pool().shutdown()
+        await close_cache()
         logger.info("Application shutdown completed")
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
@@ -79,6 +95,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 # Add trusted host middleware for production
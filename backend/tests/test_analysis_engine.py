@@ -0,0 +1,114 @@
+"""
+Tests for the process-pool analysis engine
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core import cache
+from app.core.cache import CacheManager
+from app.core.config import settings
+from app.services import analysis_engine
+from app.services.analysis_engine import AnalysisEngine
+
+
+LOOP = "def total(items):\n    result = 0\n    for item in items:\n        result += item\n    return result\n"
+OPTIONS = {"analysis_types": ["complexity", "optimization"]}
+
+
+@pytest.fixture(scope="module")
+def pooled_engine():
+    engine = AnalysisEngine(workers=1, chunk_size=2)
+    engine.start()
+    yield engine
+    engine.shutdown()
+
+
+class TestAnalysisEngine:
+    """Test dispatch to worker processes and inline execution"""
+
+    def test_inline_matches_pool(self, pooled_engine):
+        """Test the worker processes return what in-process analysis does"""
+        files = [(LOOP, "python"), ("function f(a) { return a; }", "javascript"), (LOOP, "python")]
+
+        inline = asyncio.run(AnalysisEngine(workers=0, chunk_size=2).analyze_many(files, OPTIONS))
+        pooled = asyncio.run(pooled_engine.analyze_many(files, OPTIONS))
+
+        assert pooled == inline
+        assert [set(result["analysis"]) for result in pooled] == [{"complexity", "optimization"}] * 3
+        assert pooled[0]["analysis"]["complexity"]["time_complexity"] == "O(n)"
+
+    def test_failures_are_per_file(self):
+        """Test one failing file does not fail the rest of its chunk"""
+        files = [(LOOP, "python"), (None, "python")]
+
+        results = asyncio.run(AnalysisEngine(workers=0, chunk_size=2).analyze_many(files, {"analysis_types": ["ast"]}))
+
+        assert "analysis" in results[0]
+        assert "error" in results[1]
+
+    def test_single_file(self, pooled_engine):
+        """Test the one-file entry point and default options"""
+        result = asyncio.run(pooled_engine.analyze(LOOP, "python", {"analysis_types": ["ast"]}))
+
+        assert set(result["analysis"]) == {"ast"}
+
+    def test_inline_jobs_run_one_at_a_time(self, monkeypatch):
+        """Test concurrent inline requests do not run the shared analyzers at the same time"""
+        running, overlap = [], []
+        analyze_chunk = analysis_engine._analyze_chunk
+
+        def tracked(files, options, run=None):
+            running.append(1)
+            overlap.append(len(running))
+            time.sleep(0.02)
+            try:
+                return analyze_chunk(files, options, run)
+            finally:
+                running.pop()
+
+        monkeypatch.setattr(analysis_engine, "_analyze_chunk", tracked)
+        engine = AnalysisEngine(workers=0)
+
+        async def run():
+            return await asyncio.gather(*(engine.analyze(LOOP, "python", {"analysis_types": ["ast"]}) for _ in range(4)))
+
+        assert all("analysis" in result for result in asyncio.run(run()))
+        assert overlap == [1] * 4
+
+    def test_cache_refreshes_finish_with_the_job(self, monkeypatch):
+        """Test a refresh started by a stale cache hit completes before the job returns, even inline"""
+        manager = CacheManager(None)
+        monkeypatch.setattr(cache, "cache_manager", manager)
+        asyncio.run(manager.set("k", {"value": "old", "delta": 0.0, "expires": 0}))
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            return "new"
+
+        class StaleAnalyzer:
+            async def analyze_complexity(self, source, language):
+                return await manager.get_or_compute("k", compute)
+
+        if analysis_engine._worker_state is None:
+            analysis_engine._init_worker()
+        monkeypatch.setitem(analysis_engine._worker_state, "complexity", StaleAnalyzer())
+        analysis_engine._analyze_chunk([(LOOP, "python")], {"analysis_types": ["complexity"]}, asyncio.run)
+
+        assert asyncio.run(manager.get("k"))["value"] == "new"
+        assert not manager._refreshing
+
+    def test_concurrent_inline_requests_share_the_cache(self, monkeypatch):
+        """Test concurrent inline analyses of the same file, each on its own loop, all get the cached result"""
+        monkeypatch.setattr(cache, "cache_manager", CacheManager(None))
+        monkeypatch.setattr(settings, "RESULT_CACHE_ENABLED", True)
+        engine = AnalysisEngine(workers=0)
+
+        async def run():
+            return await asyncio.gather(*(engine.analyze(LOOP, "python", {"analysis_types": ["complexity"]}) for _ in range(4)))
+
+        results = asyncio.run(run())
+        assert [set(result) for result in results] == [{"analysis"}] * 4
+        assert all(result == results[0] for result in results)
@@ -0,0 +1,105 @@
+"""
+Tests for animated data-structure visualizations
+"""
+
+import asyncio
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services.animation import render_animation, sample_frames, simulate
+from app.services.visualization import EnhancedVisualizationService
+
+
+STACK_OPS = [{"type": "push", "value": 1}, {"type": "push", "value": 2}, {"type": "pop"}]
+
+
+class TestSimulate:
+    """Test replaying operations into frames"""
+
+    def test_stack(self):
+        """Test one frame per operation after the initial state"""
+        frames = simulate("stack", STACK_OPS)
+
+        assert [frame.elements for frame in frames] == [[], [1], [1, 2], [1]]
+        assert [frame.highlight for frame in frames] == [None, 0, 1, None]
+
+    def test_queue_and_array(self):
+        """Test the structures the old animation entry point could not handle"""
+        queue = simulate("queue", [{"type": "enqueue", "value": "a"}, {"type": "enqueue", "value": "b"}, {"type": "dequeue"}])
+        array = simulate("array", [{"type": "swap", "i": 0, "j": 2}, {"type": "set", "index": 1, "value": 7}], [3, 2, 1])
+
+        assert queue[-1].elements == ["b"]
+        assert array[-1].elements == [1, 7, 3]
+
+    def test_unsupported(self):
+        """Test unknown structures and operations are errors"""
+        with pytest.raises(ValueError):
+            simulate("heap", [])
+        with pytest.raises(ValueError):
+            simulate("stack", [{"type": "enqueue", "value": 1}])
+
+    def test_sampling_keeps_ends(self):
+        """Test capped runs keep the first and last frame"""
+        frames = simulate("stack", [{"type": "push", "value": i} for i in range(99)])
+        sampled = sample_frames(frames, 10)
+
+        assert len(sampled) == 10
+        assert sampled[0] is frames[0] and sampled[-1] is frames[-1]
+
+
+class TestRenderAnimation:
+    """Test encoding frames as one animated image"""
+
+    @pytest.mark.parametrize("animation_format", ["gif", "apng", "webp"])
+    def test_formats(self, animation_format):
+        """Test every frame ends up in the animation"""
+        result = render_animation("stack", simulate("stack", STACK_OPS), animation_format)
+        image = Image.open(io.BytesIO(result.data))
+
+        assert result.frames == 4
+        assert getattr(image, "n_frames", 1) == 4
+        assert result.render_ms_per_frame > 0
+
+    def test_frames_differ(self):
+        """Test updated artists show up in the frames"""
+        result = render_animation("array", simulate("array", [{"type": "set", "index": 0, "value": 5}], [1, 2]), "apng")
+        image = Image.open(io.BytesIO(result.data))
+        first = image.convert("RGB").tobytes()
+        image.seek(1)
+
+        assert image.convert("RGB").tobytes() != first
+
+
+class TestAnimationService:
+    """Test the service entry point"""
+
+    def test_image_with_timing(self):
+        """Test the response carries the image and its render timing"""
+        service = EnhancedVisualizationService()
+        animation = asyncio.run(service.generate_data_structure_animation("queue", [{"type": "enqueue", "value": 1}]))
+
+        assert animation["mime_type"] == "image/apng"
+        assert animation["frame_count"] == 2
+        assert "render_ms_per_frame" in animation and "encode_ms" in animation
+        assert base64.b64decode(animation["image"]).startswith(b"\x89PNG")
+
+    def test_frames_capped(self, monkeypatch):
+        """Test at most MAX_VISUALIZATION_POINTS frames are produced"""
+        monkeypatch.setattr(settings, "MAX_VISUALIZATION_POINTS", 5)
+        service = EnhancedVisualizationService()
+        ops = [{"type": "push", "value": i} for i in range(20)]
+        animation = asyncio.run(service.generate_data_structure_animation("stack", ops, output_format="spec"))
+
+        assert animation["sampled"] is True
+        assert len(animation["frames"]) == animation["frame_count"] == 5
+        assert animation["frames"][-1]["elements"] == list(range(20))
+
+    def test_failure_is_empty(self):
+        """Test an unsupported structure yields no animation"""
+        service = EnhancedVisualizationService()
+
+        assert asyncio.run(service.generate_data_structure_animation("heap", [])) == {}
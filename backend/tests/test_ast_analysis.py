@@ -0,0 +1,85 @@
+"""
+Tests for the single-pass AST analysis engine
+"""
+
+from app.services.ast_analysis import AnalysisPass, ASTAnalysisEngine
+from app.services.code_analyzer import ASTNode, CodeAnalyzer
+
+
+CODE = """numbers = [3, 1, 2]
+lookup = {"a": (1, 2)}
+
+def total(items):
+    result = 0
+    for item in items:
+        if item > 1:
+            result += item
+    while result > 10:
+        result -= 1
+    return result
+"""
+
+
+class TestASTAnalysisEngine:
+    """Test the shared traversal and its passes"""
+
+    def test_default_passes(self):
+        """Test that every analysis is produced from one walk"""
+        tree = CodeAnalyzer()._parse_python_ast(CODE)
+        result = ASTAnalysisEngine().run(tree)
+
+        assert list(result) == [
+            "ast", "statistics", "complexity_indicators", "data_structures",
+            "algorithms", "functions", "variables",
+        ]
+        stats = result["statistics"]
+        assert stats["loops"] == 2
+        assert stats["conditionals"] == 1
+        assert stats["function_definitions"] == 1
+        assert [i["type"] for i in result["complexity_indicators"]] == ["loop", "conditional", "loop"]
+        assert {d["type"] for d in result["data_structures"]} == {"List", "Dict", "Tuple"}
+        assert [v["line"] for v in result["variables"]] == [1, 2, 5, 8, 10]
+        assert result["ast"]["node_type"] == "Module"
+        assert len(result["ast"]["children"]) == 3
+
+    def test_tree_order_and_size(self):
+        """Test that the serialized tree keeps child order and every node"""
+        tree = ASTNode("Root", 1, 0, children=[
+            ASTNode("A", 1, 0, children=[ASTNode("A1", 2, 0)]),
+            ASTNode("B", 3, 0, value="b"),
+        ])
+        result = ASTAnalysisEngine().run(tree)
+
+        root = result["ast"]
+        assert [c["node_type"] for c in root["children"]] == ["A", "B"]
+        assert root["children"][0]["children"][0]["node_type"] == "A1"
+        assert root["children"][1]["value"] == "b"
+        assert result["statistics"]["total_nodes"] == 4
+        assert result["statistics"]["max_depth"] == 2
+
+    def test_handler_predicate_cached_per_type(self):
+        """Test that a pass is only asked once per distinct node type"""
+        asked = []
+
+        class CountingPass(AnalysisPass):
+            key = "counted"
+
+            @classmethod
+            def handles(cls, node_type):
+                asked.append(node_type)
+                return node_type == "Leaf"
+
+            def __init__(self):
+                self.count = 0
+
+            def visit(self, node, depth):
+                self.count += 1
+
+            def result(self, summary):
+                return self.count
+
+        tree = ASTNode("Root", 1, 0, children=[ASTNode("Leaf", 1, 0) for _ in range(50)])
+        engine = ASTAnalysisEngine([CountingPass])
+        assert engine.run(tree, include_tree=False) == {"counted": 50}
+        assert engine.run(tree, include_tree=False) == {"counted": 50}
+        assert sorted(asked) == ["Leaf", "Root"]
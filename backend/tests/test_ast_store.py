@@ -0,0 +1,68 @@
+"""
+Tests for the compact array-backed AST store
+"""
+
+import ast
+import asyncio
+
+from app.services.ast_store import ASTStore
+from app.services.code_analyzer import CodeAnalyzer
+
+
+CODE = """def grid(n):
+    total = 0
+    for i in range(n):
+        for j in range(n):
+            while total < i:
+                total += j
+    if total:
+        return total
+    return 0
+"""
+
+
+class TestASTStore:
+    """Test building, querying and encoding the AST store"""
+
+    def test_python_store_matches_astnode_tree(self):
+        """Test that the store holds the same nodes, in pre-order, as ASTNode"""
+        analyzer = CodeAnalyzer()
+        store = ASTStore.from_python_ast(ast.parse(CODE))
+        from_tree = ASTStore.from_ast_node(analyzer._parse_python_ast(CODE))
+
+        assert store.to_flat_dict() == from_tree.to_flat_dict()
+        assert store.parent[0] == -1
+        assert all(store.parent[i] < i for i in range(1, len(store)))
+
+    def test_vectorized_queries(self):
+        """Test counts by type, depth and loop nesting"""
+        store = ASTStore.from_python_ast(ast.parse(CODE))
+
+        counts = store.counts_by_type()
+        assert counts["For"] == 2
+        assert counts["While"] == 1
+        assert sum(counts.values()) == len(store)
+        assert store.max_depth() == max(store.depth)
+        assert store.max_loop_nesting() == 3
+
+    def test_loop_nesting_tree_sitter(self):
+        """Test loop nesting on a tree-sitter grammar"""
+        code = "void f(int n){ for(;;){ while(n){ do { n--; } while(n); } } for(;;){} }"
+        store = ASTStore.from_code(code, "cpp")
+
+        assert store.max_loop_nesting() == 3
+        leaves = [store.values[i] for i in sorted(store.values)]
+        assert "".join(leaves) == code.replace(" ", "")
+
+    def test_flat_analysis_matches_tree_analysis(self):
+        """Test that flat output gives the same analyses as the nested tree"""
+        analyzer = CodeAnalyzer()
+        for code, language in [(CODE, "python"), ("class A { int f(int n) { while (n > 0) n--; return n; } }", "java")]:
+            tree = asyncio.run(analyzer.analyze_ast(code, language))
+            flat = asyncio.run(analyzer.analyze_ast(code, language, ast_format="flat"))
+
+            flat_ast = flat.pop("ast")
+            tree.pop("ast")
+            assert flat == tree
+            assert flat_ast["format"] == "flat"
+            assert len(flat_ast["parent"]) == flat_ast["node_count"] == tree["statistics"]["total_nodes"]
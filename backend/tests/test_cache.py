@@ -0,0 +1,508 @@
+"""
+Tests for the two-tier cache: the in-process LRU and invalidation through Redis
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+
+import pytest
+
+from app.core import cache
+from app.core.cache import CacheManager, LocalCache, LocalLocks, RedisLocks
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis calls CacheManager makes, with pub/sub"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.sets = {}
+        self.gets = 0
+        self.unlinks = []
+        self.subscribers = []
+
+    async def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def pttl(self, key):
+        return self.ttls.get(key, -1) if key in self.data else -2
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+        self.ttls[key] = ttl * 1000
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def unlink(self, *keys):
+        self.unlinks.append(len(keys))
+        return sum(self.data.pop(key, None) is not None or self.sets.pop(key, None) is not None for key in keys)
+
+    async def keys(self, pattern):
+        raise AssertionError("KEYS blocks the server")
+
+    async def scan_iter(self, match, count=None):
+        for key in list(self.data):
+            if fnmatchcase(key, match):
+                yield key
+
+    async def zscan_iter(self, name, count=None):
+        for key, score in list(self.sets.get(name, {}).items()):
+            yield key, score
+
+    async def publish(self, channel, message):
+        for queue in self.subscribers:
+            queue.put_nowait({"type": "message", "data": message})
+        return len(self.subscribers)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def get(self, key):
+        self.commands.append(self.redis.get(key))
+
+    def mget(self, keys):
+        self.commands.append(self.redis.mget(keys))
+
+    def pttl(self, key):
+        self.commands.append(self.redis.pttl(key))
+
+    def setex(self, *args):
+        self.commands.append(self.redis.setex(*args))
+
+    def zadd(self, name, mapping):
+        self.redis.sets.setdefault(name, {}).update(mapping)
+
+    def zremrangebyscore(self, name, low, high):
+        members = self.redis.sets.get(name, {})
+        for key in [key for key, score in members.items() if score <= high]:
+            del members[key]
+
+    def expire(self, name, ttl, nx=False, gt=False):
+        pass
+
+    def publish(self, *args):
+        self.commands.append(self.redis.publish(*args))
+
+    async def execute(self):
+        return [await command for command in self.commands]
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.redis.subscribers.append(self.queue)
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def close(self):
+        self.redis.subscribers.remove(self.queue)
+
+
+class TestLocalCache:
+    """Test eviction by count, size and age"""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest unused entry goes first past the entry limit"""
+        local = LocalCache(max_entries=2)
+        local.set("a", "1", 60)
+        local.set("b", "2", 60)
+        local.get("a")
+        local.set("c", "3", 60)
+
+        assert local.get("b") is None
+        assert local.get("a") == "1" and local.get("c") == "3"
+
+    def test_evicts_by_size(self):
+        """Test entries are evicted to stay under the byte limit, and oversized values are not kept"""
+        local = LocalCache(max_bytes=10)
+        local.set("a", "x" * 6, 60)
+        local.set("b", "x" * 6, 60)
+        local.set("c", "x" * 11, 60)
+
+        assert len(local) == 1 and local.size == 6
+        assert local.get("b") == "x" * 6
+
+    def test_entries_expire(self, monkeypatch):
+        """Test each entry expires after its own TTL"""
+        now = [1000.0]
+        monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+        local = LocalCache()
+        local.set("short", "1", 5)
+        local.set("long", "2", 50)
+        now[0] += 10
+
+        assert local.get("short") is None
+        assert local.get("long") == "2"
+        assert local.size == 1
+
+    def test_delete_pattern(self):
+        """Test Redis-style globs select the keys to drop"""
+        local = LocalCache()
+        for key in ("analysis:a", "analysis:b", "other"):
+            local.set(key, "1", 60)
+
+        assert local.delete_pattern("analysis:*") == 2
+        assert local.get("other") == "1"
+
+
+class TestCacheManager:
+    """Test the local tier in front of Redis"""
+
+    def test_local_only(self):
+        """Test the cache works without Redis and hands out copies"""
+        manager = CacheManager(None)
+
+        async def run():
+            await manager.set("k", {"items": [1, 2]})
+            value = await manager.get("k")
+            value["items"].append(3)
+            return value, await manager.get("k"), await manager.delete("k"), await manager.get("k")
+
+        mutated, cached, deleted, missing = asyncio.run(run())
+        assert cached == {"items": [1, 2]} and mutated != cached
+        assert deleted and missing is None
+
+    def test_local_hits_skip_redis(self):
+        """Test a Redis hit fills the local tier and later hits make no round trip"""
+        redis = FakeRedis()
+        redis.data["k"] = '{"v": 1}'
+        manager = CacheManager(redis)
+
+        async def run():
+            return [await manager.get("k") for _ in range(3)]
+
+        assert asyncio.run(run()) == [{"v": 1}] * 3
+        assert redis.gets == 1
+
+    def test_many(self):
+        """Test get_many takes what it can from the local tier and the rest from Redis"""
+        redis = FakeRedis()
+        redis.data["remote"] = '"r"'
+        manager = CacheManager(redis)
+
+        async def run():
+            await manager.set_many({"local": "l"})
+            return await manager.get_many(["local", "remote", "missing"])
+
+        assert asyncio.run(run()) == {"local": "l", "remote": "r"}
+
+    def test_local_copy_expires_with_redis(self, monkeypatch):
+        """Test a Redis hit is kept locally no longer than the key has left in Redis"""
+        now = [1000.0]
+        monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+        monkeypatch.setattr(cache.settings, "CACHE_LOCAL_TTL", 60)
+        redis = FakeRedis()
+        for key in ("one", "many"):
+            redis.data[key] = '"v"'
+            redis.ttls[key] = 2000
+        manager = CacheManager(redis)
+
+        async def run():
+            await manager.get("one")
+            await manager.get_many(["many"])
+            now[0] += 3
+            return manager.local.get("one"), manager.local.get("many")
+
+        assert asyncio.run(run()) == (None, None)
+
+
+class TestClearing:
+    """Test pattern and tag invalidation"""
+
+    def test_clear_pattern_scans_and_unlinks_in_batches(self, monkeypatch):
+        """Test matching keys are found with SCAN and unlinked in batches"""
+        monkeypatch.setattr(cache, "DELETE_BATCH", 4)
+        redis = FakeRedis()
+        redis.data = {f"analysis:{i}": "1" for i in range(10)}
+        redis.data["other"] = "1"
+        manager = CacheManager(redis)
+
+        assert asyncio.run(manager.clear_pattern("analysis:*")) == 10
+        assert redis.unlinks == [4, 4, 2]
+        assert list(redis.data) == ["other"]
+
+    def test_invalidate_tags(self):
+        """Test only the keys under a tag are dropped, locally and in Redis"""
+        redis = FakeRedis()
+        manager = CacheManager(redis)
+
+        async def run():
+            await manager.set("java:1", 1, tags=["lang:java", "analyzer:complexity@v3"])
+            await manager.set_many({"java:2": 2, "java:3": 3}, tags=["lang:java"])
+            await manager.set("python:1", 4, tags=["lang:python", "analyzer:complexity@v3"])
+            cleared = await manager.invalidate_tags("lang:java")
+            return cleared, [await manager.get(key) for key in ("java:1", "java:3", "python:1")]
+
+        assert asyncio.run(run()) == (3, [None, None, 4])
+        assert set(redis.data) == {"python:1"}
+        assert set(redis.sets) == {"tags:analyzer:complexity@v3", "tags:lang:python"}
+
+    def test_expired_members_pruned(self, monkeypatch):
+        """Test a tagged write drops the keys under the tag whose entries have expired"""
+        now = [1000.0]
+        monkeypatch.setattr(cache.time, "time", lambda: now[0])
+        redis = FakeRedis()
+        manager = CacheManager(redis)
+
+        async def run():
+            await manager.set("old", 1, ttl=10, tags=["t"])
+            await manager.set("long", 2, ttl=100, tags=["t"])
+            now[0] += 50
+            await manager.set("new", 3, ttl=10, tags=["t"])
+
+        asyncio.run(run())
+        assert redis.sets["tags:t"] == {"long": 1100.0, "new": 1060.0}
+
+    def test_invalidate_tags_local_only(self):
+        """Test tags work without Redis, and evicted entries leave their tags"""
+        manager = CacheManager(None, LocalCache(max_entries=2))
+
+        async def run():
+            await manager.set("a", 1, tags=["t"])
+            await manager.set("b", 2, tags=["t"])
+            await manager.set("c", 3, tags=["u"])
+            return await manager.invalidate_tags("t", "u")
+
+        assert asyncio.run(run()) == 2
+        assert len(manager.local) == 0 and manager.local._tags == {}
+
+
+class TestInvalidation:
+    """Test writes in one process drop the local copies of another"""
+
+    def test_write_invalidates_other_process(self):
+        """Test a set and a delete published by one manager reach the other"""
+        redis = FakeRedis()
+        writer, reader = CacheManager(redis), CacheManager(redis)
+
+        async def settle():
+            for _ in range(3):
+                await asyncio.sleep(0)
+
+        async def run():
+            await writer.start_invalidation("invalidate")
+            await reader.start_invalidation("invalidate")
+            await writer.set("k", 1)
+            await settle()
+            seen = [await reader.get("k")]
+            await writer.set("k", 2)
+            await settle()
+            seen.append(await reader.get("k"))
+            await writer.delete("k")
+            await settle()
+            seen.append(await reader.get("k"))
+            # A manager ignores its own messages, so its fresh copy stays
+            await writer.set("k", 3)
+            await settle()
+            seen.append(len(writer.local))
+            await writer.stop_invalidation()
+            await reader.stop_invalidation()
+            return seen
+
+        assert asyncio.run(run()) == [1, 2, None, 1]
+        assert redis.subscribers == []
+
+    def test_malformed_messages_are_ignored(self):
+        """Test messages that are not invalidations leave the local tier alone"""
+        manager = CacheManager(None)
+        asyncio.run(manager.set("k", 1))
+
+        manager.invalidate("not json")
+        manager.invalidate('["k"]')
+
+        assert asyncio.run(manager.get("k")) == 1
+
+
+def counting(values, delay=0.01):
+    """A compute function returning ``values`` in turn, and the list of its calls"""
+    calls = []
+
+    async def compute():
+        calls.append(len(calls))
+        await asyncio.sleep(delay)
+        return values[min(len(calls), len(values)) - 1]
+    return compute, calls
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    return now
+
+
+class TestGetOrCompute:
+    """Test stampede protection"""
+
+    def test_concurrent_misses_compute_once(self):
+        """Test concurrent requests for a missing key in one process share one computation"""
+        manager = CacheManager(None)
+        compute, calls = counting(["v"])
+
+        async def run():
+            return await asyncio.gather(*(manager.get_or_compute("k", compute) for _ in range(10)))
+
+        assert asyncio.run(run()) == ["v"] * 10
+        assert calls == [0]
+
+    def test_first_caller_cancelled(self):
+        """Test cancelling the caller that started a computation does not cancel it for the others"""
+        manager = CacheManager(None)
+        compute, calls = counting(["v"], delay=0.05)
+
+        async def run():
+            first = asyncio.create_task(manager.get_or_compute("k", compute))
+            await asyncio.sleep(0)
+            others = asyncio.gather(*(manager.get_or_compute("k", compute) for _ in range(3)))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await others, await manager.get("k")
+
+        values, entry = asyncio.run(run())
+        assert values == ["v"] * 3 and entry["value"] == "v"
+        assert calls == [0]
+
+    def test_loops_in_threads(self):
+        """Test threads that each run their own event loop can share a manager"""
+        manager = CacheManager(None)
+        compute, calls = counting(["v"], delay=0.05)
+
+        def request():
+            async def run():
+                value = await manager.get_or_compute("k", compute)
+                await manager.drain_refreshes()
+                return value
+            return asyncio.run(run())
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            values = list(pool.map(lambda _: request(), range(4)))
+
+        assert values == ["v"] * 4
+        assert calls == [0]
+        assert manager._computing == {} and manager._refreshing == {}
+
+    def test_one_process_computes(self):
+        """Test a process that finds the key locked waits for the other's value"""
+        redis = FakeRedis()
+        first, second = CacheManager(redis), CacheManager(redis)
+        compute, calls = counting(["v"], delay=0.2)
+
+        async def run():
+            return await asyncio.gather(first.get_or_compute("k", compute), second.get_or_compute("k", compute))
+
+        assert asyncio.run(run()) == ["v", "v"]
+        assert calls == [0]
+        assert "lock:k" not in redis.data
+
+    def test_stale_served_while_refreshing(self, clock):
+        """Test an expired entry is served while one background refresh replaces it"""
+        manager = CacheManager(None)
+        compute, calls = counting(["old", "new"])
+
+        async def run():
+            first = await manager.get_or_compute("k", compute, ttl=60)
+            clock[0] += 61
+            stale = await asyncio.gather(*(manager.get_or_compute("k", compute, ttl=60) for _ in range(5)))
+            await manager.drain_refreshes()
+            return first, stale, await manager.get_or_compute("k", compute, ttl=60)
+
+        assert asyncio.run(run()) == ("old", ["old"] * 5, "new")
+        assert calls == [0, 1]
+
+    def test_early_refresh(self, clock, monkeypatch):
+        """Test a slow-to-compute entry near expiry may be refreshed early, and beta 0 turns that off"""
+        manager = CacheManager(None)
+        compute, calls = counting(["new"])
+        monkeypatch.setattr(cache.random, "random", lambda: 0.99)
+
+        async def run(beta):
+            monkeypatch.setattr(cache.settings, "CACHE_XFETCH_BETA", beta)
+            await manager.set("k", {"value": "old", "delta": 10.0, "expires": clock[0] + 5})
+            value = await manager.get_or_compute("k", compute)
+            await manager.drain_refreshes()
+            return value
+
+        assert asyncio.run(run(0.0)) == "old" and calls == []
+        assert asyncio.run(run(1.0)) == "old" and calls == [0]
+        assert asyncio.run(manager.get("k"))["value"] == "new"
+
+    def test_uncacheable_values(self):
+        """Test values the predicate rejects are returned but not stored"""
+        manager = CacheManager(None)
+        compute, calls = counting([{"error": "x"}], delay=0)
+
+        async def run():
+            return [await manager.get_or_compute("k", compute, cacheable=lambda v: "error" not in v) for _ in range(2)]
+
+        assert asyncio.run(run()) == [{"error": "x"}] * 2
+        assert calls == [0, 1]
+
+
+class TestLocks:
+    """Test per-key locks"""
+
+    def test_local_locks(self, monkeypatch):
+        """Test a held lock is refused until released or expired"""
+        now = [0.0]
+        monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+        locks = LocalLocks()
+
+        async def run():
+            token = await locks.acquire("k", 5)
+            refused = await locks.acquire("k", 5)
+            await locks.release("k", "other")
+            still_held = await locks.acquire("k", 5)
+            now[0] += 6
+            return token, refused, still_held, await locks.acquire("k", 5)
+
+        token, refused, still_held, expired = asyncio.run(run())
+        assert token and refused is None and still_held is None and expired
+
+    def test_redis_locks(self):
+        """Test SET NX locks only release with their own token"""
+        redis = FakeRedis()
+        locks = RedisLocks(redis)
+
+        async def run():
+            token = await locks.acquire("k", 1)
+            refused = await locks.acquire("k", 1)
+            await locks.release("k", "other")
+            held = "lock:k" in redis.data
+            await locks.release("k", token)
+            return refused, held, await locks.acquire("k", 1)
+
+        refused, held, again = asyncio.run(run())
+        assert refused is None and held and again
@@ -0,0 +1,75 @@
+"""
+Tests for the binary cache value encoding
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from app.core import cache_codecs
+from app.core.cache_codecs import COMPRESSORS, HEADER_FLAG, SERIALIZERS, decode_value, encode_value, register
+from app.core.config import settings
+
+LARGE = {"optimizations": [{"type": "nested_loops", "line": i, "description": "quadratic scan " * 4} for i in range(100)]}
+
+
+@pytest.fixture(params=sorted(COMPRESSORS))
+def codecs(request):
+    """Every serializer with each compressor"""
+    return [(SERIALIZERS[s], COMPRESSORS[request.param]) for s in sorted(SERIALIZERS)]
+
+
+class TestCodecs:
+    """Test the header, compression and fallbacks"""
+
+    def test_round_trips(self, codecs, monkeypatch):
+        """Test every pair decodes what it wrote, compressing only large values"""
+        for pair in codecs:
+            monkeypatch.setattr(cache_codecs, "_codecs", pair)
+            small = encode_value({"a": [1, 2.5, None, True, "x"]})
+            large = encode_value(LARGE)
+
+            assert small[0] == HEADER_FLAG | pair[0].id << 4
+            assert large[0] == HEADER_FLAG | pair[0].id << 4 | pair[1].id
+            assert decode_value(small) == {"a": [1, 2.5, None, True, "x"]}
+            assert decode_value(large) == LARGE
+
+    def test_compression_shrinks_large_values(self):
+        """Test the default codecs store a large result in far less than its JSON"""
+        encoded = encode_value(LARGE)
+
+        assert len(encoded) < len(json.dumps(LARGE)) / 4
+        assert len(json.dumps(LARGE)) > settings.CACHE_COMPRESS_MIN_BYTES
+
+    def test_legacy_json_entries(self):
+        """Test entries written as JSON text before the header existed still decode"""
+        assert decode_value(json.dumps(LARGE).encode()) == LARGE
+        assert decode_value('{"v": 1}') == {"v": 1}
+
+    @pytest.mark.parametrize("serializer", [0, 1])
+    def test_values_serializer_cannot_encode(self, serializer, monkeypatch):
+        """Test huge integers fall back to the standard library's JSON intact and numpy values are converted"""
+        monkeypatch.setattr(cache_codecs, "_codecs", (SERIALIZERS[serializer], COMPRESSORS[0]))
+
+        huge = encode_value({"n": 2 ** 70, "m": -(2 ** 64)})
+        assert huge[0] >> 4 & 0x7 == 2
+        assert repr(decode_value(huge)) == repr({"n": 2 ** 70, "m": -(2 ** 64)})
+        assert decode_value(encode_value({"a": np.arange(3), "x": np.float64(0.5)})) == {"a": [0, 1, 2], "x": 0.5}
+
+    def test_cycles_fall_back(self):
+        """Test a value that contains itself is still stored"""
+        value = {"a": 1}
+        value["self"] = value
+
+        assert decode_value(encode_value(value))["a"] == 1
+
+    def test_unknown_header(self):
+        """Test a header naming no registered codec is an error"""
+        with pytest.raises(ValueError):
+            decode_value(bytes([HEADER_FLAG | 7 << 4]) + b"data")
+
+    def test_ids_are_unique(self):
+        """Test a registered id cannot be reused"""
+        with pytest.raises(ValueError):
+            register(COMPRESSORS, 1, "other", bytes, bytes)
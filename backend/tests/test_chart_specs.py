@@ -0,0 +1,63 @@
+"""
+Tests for declarative chart specs
+"""
+
+import orjson
+
+from app.services.chart_specs import SPECS, chart_spec
+from app.services.charts import CHARTS
+
+
+DATA = {
+    "complexity_chart": {},
+    "execution_flow": {},
+    "memory_usage": {"usage": [120, 300, 280]},
+    "sorting_comparison": {"array": [3, 1, 2]},
+    "searching_visualization": {"array": [4, 7, 1, 7], "target": 7},
+    "graph_traversal": {
+        "nodes": ["A", "B", "C"],
+        "edges": [{"from": "A", "to": "B", "weight": 2}],
+        "traversal_order": ["B", "Z", "A"],
+    },
+    "tree_traversal": {"tree": {"value": 2, "left": {"value": 1}, "right": None}, "traversal_order": [2, 1]},
+    "dp_table": {"dp_table": [[0, 1], [1, 5]]},
+}
+
+
+class TestChartSpecs:
+    """Test the spec of each chart"""
+
+    def test_every_chart_has_a_spec(self):
+        """Test every drawable chart can also be sent as a spec"""
+        assert set(SPECS) == set(CHARTS) == set(DATA)
+
+    def test_json_ready(self):
+        """Test specs are tagged with their chart and encode as JSON"""
+        for chart, data in DATA.items():
+            spec = chart_spec(chart, data)
+            assert spec["chart"] == chart
+            assert orjson.loads(orjson.dumps(spec)) == spec
+
+    def test_searching_highlights(self):
+        """Test the target's positions and value are marked"""
+        spec = chart_spec("searching_visualization", DATA["searching_visualization"])
+
+        assert spec["highlights"] == [1, 3]
+        assert spec["reference_line"]["y"] == 7
+
+    def test_graph_matches_graph_visualizer(self):
+        """Test graph nodes are plain ids and the order skips unknown nodes"""
+        spec = chart_spec("graph_traversal", DATA["graph_traversal"])
+
+        assert spec["nodes"] == ["A", "B", "C"]
+        assert spec["edges"] == [{"from": "A", "to": "B"}]
+        assert spec["order"] == ["B", "A"]
+
+    def test_tree_and_heatmap(self):
+        """Test trees keep value/left/right and heatmaps carry their range"""
+        tree = chart_spec("tree_traversal", DATA["tree_traversal"])["tree"]
+        heatmap = chart_spec("dp_table", DATA["dp_table"])
+
+        assert tree == {"value": 2, "left": {"value": 1, "left": None, "right": None}, "right": None}
+        assert heatmap["cells"] == [[0, 1], [1, 5]]
+        assert heatmap["range"] == [0, 5]
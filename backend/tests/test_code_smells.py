@@ -0,0 +1,169 @@
+"""
+Tests for structural code-smell metrics and the rule-set pattern guards
+"""
+
+import asyncio
+import random
+import time
+
+import pytest
+from tree_sitter import Parser
+from tree_sitter_languages import get_language
+
+from app.services.ai_analyzer import AIAnalyzer
+from app.services.code_smells import duplicate_blocks, function_metrics
+from app.services.rule_engine import Rule, RuleSet, UnsafePatternError
+from app.services.tree_sitter_parser import parse_source
+
+
+NESTED_PYTHON = """class Worker:
+    def run(self, a, b, c):
+        for x in a:
+            if x:
+                while b:
+                    if c:
+                        pass
+                    elif b:
+                        pass
+        return a
+
+def helper():
+    return 1
+"""
+
+# Each adversarial input must be analyzed within this many seconds
+FUZZ_LIMIT = 5.0
+
+
+def metrics_by_name(code, language):
+    return {m.name: (m.line, m.length, m.parameters, m.max_nesting) for m in function_metrics(code, language)}
+
+
+class TestFunctionMetrics:
+    """Test function length, parameter count and nesting per language"""
+
+    def test_python(self):
+        """Test methods skip self and elif chains do not add a level"""
+        assert metrics_by_name(NESTED_PYTHON, "python") == {
+            "run": (2, 9, 3, 4),
+            "helper": (12, 2, 0, 0),
+        }
+
+    @pytest.mark.parametrize("language,code,expected", [
+        ("javascript", "function add(a, b) {\n  if (a) {\n    for (;;) {}\n  }\n}\n", {"add": (1, 5, 2, 2)}),
+        ("java", "class A {\n  int f(int a, int b, int c) {\n    while (a > 0) { a--; }\n    return a;\n  }\n}\n",
+         {"f": (2, 4, 3, 1)}),
+        ("go", "package m\nfunc f(a, b int, c string) {\n\tif a > b {\n\t}\n}\n", {"f": (2, 4, 3, 1)}),
+        ("c", "int f(int a, int b) {\n  if (a) { if (b) { return 1; } }\n  return 0;\n}\n", {"f": (1, 4, 2, 2)}),
+        ("rust", "fn f(a: i32) -> i32 {\n    if a > 0 { a } else { 0 }\n}\n", {"f": (1, 3, 1, 1)}),
+    ])
+    def test_other_languages(self, language, code, expected):
+        """Test the same metrics from other tree-sitter grammars"""
+        assert metrics_by_name(code, language) == expected
+
+    def test_language_without_grammar(self):
+        """Test that unsupported languages have no metrics"""
+        assert function_metrics("def f(): pass", "text") is None
+
+
+class TestDuplicateBlocks:
+    """Test detection of repeated line windows"""
+
+    def test_repeated_region_reported_once(self):
+        """Test a copied region is reported at its start with its full size"""
+        block = "total = 0\nfor item in items:\n    total += item\nprint(total)\ncount = len(items)\n"
+        code = block + "other = 1\n" + block
+
+        duplicates = duplicate_blocks(code)
+
+        assert [(d.line, d.first_line, d.lines) for d in duplicates] == [(7, 1, 5)]
+
+    def test_no_duplicates(self):
+        """Test distinct lines and short repeated lines are ignored"""
+        code = "\n".join(f"value_{i} = {i}" for i in range(20)) + "\n}\n}\n}\n}\n}\n"
+
+        assert duplicate_blocks(code) == []
+
+
+class TestPatternGuards:
+    """Test rejection of backtracking-prone patterns and the scan budget"""
+
+    @pytest.mark.parametrize("pattern", [r"(\s+){12,}(if|for)", r"(.{20,})\1", r"(a+)+b", r"(?:\w+\s*)*;"])
+    def test_unsafe_patterns_rejected(self, pattern):
+        """Test nested unbounded quantifiers and backreferences are refused"""
+        with pytest.raises(UnsafePatternError):
+            RuleSet([Rule("smell", pattern)])
+
+    def test_bounded_patterns_accepted(self):
+        """Test ordinary rule patterns still compile"""
+        RuleSet([Rule("a", r"for.*for"), Rule("b", r"(?:ab){3}"), Rule("c", r"\b\d{2,}\b(?!\s*[a-zA-Z_])")])
+
+    def test_budget_marks_scan_incomplete(self):
+        """Test a spent budget stops the scan and is reported"""
+        rule_set = RuleSet([Rule("words", "ab"), Rule("digits", r"\d")])
+        text = "ab " * 10000 + "1"
+
+        partial = rule_set.scan(text, budget=0)
+        full = rule_set.scan(text, budget=10)
+
+        assert not partial.complete
+        assert len(partial.matches[0]) < 10000
+        assert full.complete
+        assert [len(m) for m in full.matches] == [10000, 1]
+
+    def test_parse_timeout(self):
+        """Test a parse past its budget gives no tree and leaves the parser usable"""
+        parser = Parser()
+        parser.set_language(get_language("javascript"))
+        parser.set_timeout_micros(1000)
+        malformed = (("if a and b: " * 400 + "\n") * 20).encode()
+
+        assert parse_source(parser, malformed) is None
+        assert parse_source(parser, b"function f(a) {}").root_node.type == "program"
+
+
+class TestAdversarialInputs:
+    """Fuzz the smell detection with inputs that made the old regexes backtrack"""
+
+    @staticmethod
+    def random_soup(seed, size):
+        rng = random.Random(seed)
+        tokens = ["def f(", "if x:", "for i in y:", "(", ")", ":", "\n", "    ", " " * 13, "a" * 30, "{", "}", "12"]
+        return "".join(rng.choice(tokens) for _ in range(size))
+
+    @pytest.mark.parametrize("code", [
+        " " * 50000 + "if",
+        "a" * 100000,
+        "def f(" + " " * 50000,
+        "def f(a):\n" + "\n".join(" " * (4 * depth) + "if x:" for depth in range(1, 90)),
+        ("if a and b: " * 2000 + "\n") * 20,
+        "xyz" * 30000,
+    ], ids=["whitespace-before-if", "long-run", "open-signature", "deep-indent", "long-lines", "periodic"])
+    @pytest.mark.parametrize("language", ["python", "javascript", "text"])
+    def test_bounded_runtime(self, code, language):
+        """Test each pathological input is analyzed quickly"""
+        start = time.perf_counter()
+        result = asyncio.run(AIAnalyzer().analyze_code_intelligence(code, language))
+
+        assert "error" not in result
+        assert time.perf_counter() - start < FUZZ_LIMIT
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_token_soup(self, seed):
+        """Test seeded random mixes of code fragments"""
+        code = self.random_soup(seed, 20000)
+        start = time.perf_counter()
+        result = asyncio.run(AIAnalyzer().analyze_code_intelligence(code, "python"))
+
+        assert "error" not in result
+        assert time.perf_counter() - start < FUZZ_LIMIT
+
+    def test_smells_still_reported(self):
+        """Test long, deeply nested functions with many parameters are flagged"""
+        body = "\n".join(f"    x{i} = {i}" for i in range(60))
+        code = ("def f(a, b, c, d, e, g):\n" + body + "\n    if a:\n        for b in c:\n"
+                "            while d:\n                if e:\n                    pass\n")
+        result = asyncio.run(AIAnalyzer().analyze_code_intelligence(code, "python"))
+        titles = {i["title"] for i in result["insights"] if i["type"] == "code_smell"}
+
+        assert {"Long Function", "Deep Nesting", "Long Parameter List"} <= titles
@@ -0,0 +1,166 @@
+"""
+Tests for the DP table heatmap: windows, downsampling and viewport queries
+"""
+
+import io
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from app.api.v1.endpoints import visualization
+from app.core.config import settings
+from app.services import dp_table, image_store
+from app.services.chart_specs import chart_spec
+from app.services.charts import draw_dp_table
+from app.services.dp_table import DPTableStore, Window, as_array, downsample
+from app.services.image_store import ImageStore
+
+
+def drawn(data):
+    """The axes a DP table is drawn on"""
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    draw_dp_table(figure, data)
+    return figure.axes[0]
+
+
+@pytest.fixture
+def client(tmp_path):
+    dp_table.dp_table_store = None
+    image_store.image_store = ImageStore(str(tmp_path))
+    app = FastAPI()
+    app.include_router(visualization.router, prefix="/visualization")
+    yield TestClient(app)
+    dp_table.dp_table_store = None
+    image_store.image_store = None
+
+
+class TestTable:
+    """Test conversion, windows and downsampling"""
+
+    def test_blank_cells(self):
+        """Test ragged rows, non-numbers and infinities become NaN"""
+        array = as_array([[0, float("inf"), "x"], [1]])
+
+        assert array.shape == (2, 3)
+        assert array[0, 0] == 0 and array[1, 0] == 1
+        assert np.isnan(array[0, 1:]).all() and np.isnan(array[1, 1:]).all()
+
+    def test_window_clamps(self):
+        """Test windows stay inside the table and open ends stop after ``size`` cells"""
+        assert Window(5, 100, 0, None).clamp((20, 30)) == Window(5, 20, 0, 30)
+        assert Window(10).clamp((100, 100), size=8) == Window(10, 18, 0, 8)
+
+    def test_store_capped_by_bytes(self):
+        """Test the store evicts the least recently used tables once their cells exceed its budget"""
+        store = DPTableStore(max_bytes=3 * 100 * 8)
+        first, _ = store.put(np.zeros((10, 10)))
+        second, _ = store.put(np.ones((10, 10)))
+        store.get(first)
+        store.put(np.full((10, 20), 2.0))
+
+        assert store.get(first) is not None
+        assert store.get(second) is None
+        assert store._bytes == 300 * 8
+
+    def test_downsample_averages_blocks(self):
+        """Test blocks are averaged, ignoring the padding past the edge"""
+        shown, block = downsample(np.arange(25, dtype=float).reshape(5, 5), 3)
+
+        assert block == 2
+        assert shown.shape == (3, 3)
+        assert shown[0, 0] == np.mean([0, 1, 5, 6])
+        assert shown[2, 2] == 24
+
+
+class TestDrawing:
+    """Test the heatmap is one image, annotated only when small"""
+
+    def test_small_table_annotated(self):
+        """Test small tables show every value"""
+        ax = drawn({"dp_table": [[0, 1], [1, 5]]})
+
+        assert len(ax.images) == 1
+        assert sorted(text.get_text() for text in ax.texts) == ["0", "1", "1", "5"]
+
+    def test_large_table_downsampled(self):
+        """Test a large table is one bounded image without per-cell text"""
+        size = settings.DP_MAX_RENDER_SIZE * 2
+        ax = drawn({"dp_table": np.ones((size, size))})
+
+        assert not ax.texts
+        assert max(ax.images[0].get_array().shape) <= settings.DP_MAX_RENDER_SIZE
+        assert "cell averages" in ax.get_title()
+
+    def test_window_uses_table_indices(self):
+        """Test a window's axes are labelled with the rows and columns it shows"""
+        table = np.arange(100 * 100, dtype=float).reshape(100, 100)
+        ax = drawn({"dp_table": table, "window": {"row_start": 40, "row_end": 50, "col_start": 70, "col_end": 80}})
+
+        assert ax.images[0].get_array().shape == (10, 10)
+        assert ax.images[0].get_extent() == [69.5, 79.5, 49.5, 39.5]
+        assert "4070" in [text.get_text() for text in ax.texts]
+
+
+class TestSpec:
+    """Test heatmap specs send one viewport"""
+
+    def test_large_table_sends_a_viewport(self):
+        """Test a large table sends the default viewport and an overview"""
+        size = settings.DP_VIEWPORT_SIZE * 4
+        spec = chart_spec("dp_table", {"dp_table": np.ones((size, size))})
+
+        assert spec["shape"] == [size, size]
+        assert len(spec["cells"]) == len(spec["cells"][0]) == settings.DP_VIEWPORT_SIZE
+        assert len(spec["overview"]["cells"]) <= settings.DP_VIEWPORT_SIZE
+
+    def test_blank_cells_are_null(self):
+        """Test cells that are not numbers are sent as null"""
+        spec = chart_spec("dp_table", {"dp_table": [[0, float("inf")]]})
+
+        assert spec["cells"] == [[0, None]]
+        assert "overview" not in spec
+
+
+class TestViewportEndpoint:
+    """Test storing a table and querying its viewports"""
+
+    def test_spec_viewport(self, client):
+        """Test a stored table serves the requested window"""
+        table = [[i * 10 + j for j in range(10)] for i in range(10)]
+        stored = client.post("/visualization/dp-tables", json={"dp_table": table}).json()
+
+        assert stored["shape"] == [10, 10]
+        response = client.get(
+            f"/visualization/dp-tables/{stored['table_id']}",
+            params={"row_start": 2, "row_end": 4, "col_start": 5, "col_end": 7},
+        )
+        assert response.status_code == 200
+        assert response.json()["cells"] == [[25, 26], [35, 36]]
+
+    def test_png_viewport(self, client):
+        """Test a window renders as a PNG"""
+        table_id = client.post("/visualization/dp-tables", json={"dp_table": [[1, 2], [3, 4]]}).json()["table_id"]
+
+        response = client.get(f"/visualization/dp-tables/{table_id}", params={"format": "png"})
+
+        assert response.headers["content-type"] == "image/png"
+        assert Image.open(io.BytesIO(response.content)).format == "PNG"
+
+    def test_oversized_table_rejected(self, client, monkeypatch):
+        """Test a table over the cell limit is refused before it is stored"""
+        monkeypatch.setattr(settings, "DP_TABLE_MAX_CELLS", 50)
+
+        response = client.post("/visualization/dp-tables", json={"dp_table": [[1] * 10, [2]] * 3})
+
+        assert response.status_code == 413
+        assert not dp_table.get_dp_table_store()._tables
+
+    def test_unknown_table(self, client):
+        """Test an unknown or evicted table is a 404"""
+        assert client.get("/visualization/dp-tables/missing").status_code == 404
@@ -0,0 +1,132 @@
+"""
+Tests for the graph layout engine
+"""
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import graph_layout
+from app.services.graph_layout import _repulsion_exact, _repulsion_grid, layout_graph, reduce_graph
+from app.services.render_pool import RenderJob, render_chart
+
+
+def grid_graph(side):
+    nodes = list(range(side * side))
+    edges = []
+    for i in range(side):
+        for j in range(side):
+            if i + 1 < side:
+                edges.append({"from": i * side + j, "to": (i + 1) * side + j})
+            if j + 1 < side:
+                edges.append({"from": i * side + j, "to": i * side + j + 1})
+    return nodes, edges
+
+
+def edge_length_ratio(layout):
+    """Mean edge length over mean distance between random node pairs"""
+    positions = layout.positions
+    edge_length = np.linalg.norm(positions[layout.edges[:, 0]] - positions[layout.edges[:, 1]], axis=1).mean()
+    rng = np.random.default_rng(0)
+    a, b = rng.integers(0, len(positions), (2, 500))
+    return edge_length / np.linalg.norm(positions[a] - positions[b], axis=1).mean()
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    graph_layout._cache.clear()
+    yield
+    graph_layout._cache.clear()
+
+
+class TestLayouts:
+    """Test each layout engine"""
+
+    @pytest.mark.parametrize("engine", ["forceatlas2", "layered", "circular"])
+    def test_normalized_and_deterministic(self, engine):
+        """Test positions fill [-1, 1] and repeat for the same graph"""
+        nodes, edges = grid_graph(6)
+        first = layout_graph(nodes, edges, engine)
+        graph_layout._cache.clear()
+        second = layout_graph(nodes, edges, engine)
+
+        assert first.positions.shape == (36, 2)
+        assert np.abs(first.positions).max() == pytest.approx(1.0)
+        assert np.array_equal(first.positions, second.positions)
+
+    def test_force_directed_pulls_neighbours_together(self):
+        """Test connected nodes end up much closer than random pairs"""
+        nodes, edges = grid_graph(10)
+
+        assert edge_length_ratio(layout_graph(nodes, edges, "forceatlas2")) < 0.5
+
+    def test_layered_levels(self):
+        """Test the layered layout puts each BFS level on its own row"""
+        edges = [{"from": "root", "to": "a"}, {"from": "root", "to": "b"}, {"from": "a", "to": "c"}]
+        layout = layout_graph(["c", "b", "a", "root"], edges, "layered")
+        y = {node: layout.positions[layout.index[node], 1] for node in layout.nodes}
+
+        assert y["root"] > y["a"] == y["b"] > y["c"]
+
+    def test_barnes_hut_matches_exact(self):
+        """Test the grid approximation of repulsion stays close to the exact forces"""
+        rng = np.random.default_rng(1)
+        positions = rng.uniform(-20, 20, (600, 2))
+        mass = rng.integers(1, 4, 600).astype(float)
+        exact = _repulsion_exact(positions, mass)
+        error = np.linalg.norm(_repulsion_grid(positions, mass) - exact, axis=1) / np.linalg.norm(exact, axis=1)
+
+        assert np.percentile(error, 95) < 0.05
+
+    def test_unknown_engine(self):
+        """Test an unknown engine is an error"""
+        with pytest.raises(ValueError):
+            layout_graph([1, 2], [], "spring")
+
+
+class TestLevelOfDetail:
+    """Test reducing graphs over the configured limits"""
+
+    def test_keeps_highest_degree(self):
+        """Test the hub and its edges survive the node limit"""
+        pairs = np.array([[0, 1], [0, 2], [0, 3], [4, 5]])
+        nodes, kept = reduce_graph(["hub", "a", "b", "c", "d", "e"], pairs, 3, 10)
+
+        assert nodes == ["hub", "a", "b"]
+        assert kept.tolist() == [[0, 1], [0, 2]]
+
+    def test_limits_from_settings(self, monkeypatch):
+        """Test layouts respect MAX_GRAPH_NODES and MAX_GRAPH_EDGES"""
+        monkeypatch.setattr(settings, "MAX_GRAPH_NODES", 20)
+        monkeypatch.setattr(settings, "MAX_GRAPH_EDGES", 15)
+        nodes, edges = grid_graph(8)
+        layout = layout_graph(nodes, edges)
+
+        assert len(layout.nodes) == 20 and len(layout.edges) == 15
+        assert (layout.total_nodes, layout.total_edges) == (64, 112)
+        assert layout.reduced
+
+
+class TestLayoutCache:
+    """Test layouts are reused for the same graph"""
+
+    def test_traversal_frames_share_layout(self):
+        """Test charts of the same graph at different traversal steps reuse one layout"""
+        nodes, edges = grid_graph(5)
+        layout = layout_graph(nodes, edges)
+        for step in range(1, 4):
+            render_chart(RenderJob("graph_traversal", {"nodes": nodes, "edges": edges, "traversal_order": nodes[:step]}, dpi=20))
+
+        assert len(graph_layout._cache) == 1
+        assert layout_graph(nodes, edges) is layout
+
+    def test_bounded(self, monkeypatch):
+        """Test the cache evicts the least recently used layout"""
+        monkeypatch.setattr(settings, "GRAPH_LAYOUT_CACHE_SIZE", 2)
+        first = layout_graph([1, 2], [])
+        layout_graph([1, 2, 3], [])
+        layout_graph([1, 2], [])
+        layout_graph([1, 2, 3, 4], [])
+
+        assert len(graph_layout._cache) == 2
+        assert layout_graph([1, 2], []) is first
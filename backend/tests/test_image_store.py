@@ -0,0 +1,147 @@
+"""
+Tests for the content-addressed image store and the image endpoints
+"""
+
+import asyncio
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import visualization as visualization_endpoints
+from app.services import dp_table, image_store, visualization
+from app.services.image_store import ImageStore, image_key
+from app.services.visualization import EnhancedVisualizationService, chart_output
+
+
+@pytest.fixture
+def store(tmp_path):
+    image_store.image_store = ImageStore(str(tmp_path))
+    yield image_store.image_store
+    image_store.image_store = None
+
+
+@pytest.fixture
+def client(store):
+    dp_table.dp_table_store = None
+    app = FastAPI()
+    app.include_router(visualization_endpoints.router, prefix="/api/v1/visualization")
+    yield TestClient(app)
+    dp_table.dp_table_store = None
+
+
+class TestImageStore:
+    """Test storage, eviction and sharing between processes"""
+
+    def test_round_trip(self, store):
+        """Test an image comes back by key and extension"""
+        store.put("a" * 32, "png", b"png bytes")
+
+        assert store.get("a" * 32, "png") == b"png bytes"
+        assert store.get("a" * 32, "svg") is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test the oldest unused image goes first once the store is full"""
+        store = ImageStore(str(tmp_path), max_bytes=25)
+        store.put("a" * 32, "png", b"x" * 10)
+        store.put("b" * 32, "png", b"x" * 10)
+        store.get("a" * 32, "png")
+        store.put("c" * 32, "png", b"x" * 10)
+
+        assert store.contains("a" * 32, "png") and store.contains("c" * 32, "png")
+        assert not store.contains("b" * 32, "png")
+        assert store.size == 20
+        assert sorted(os.listdir(tmp_path)) == ["a" * 32 + ".png", "c" * 32 + ".png"]
+
+    def test_reloads_and_adopts(self, tmp_path):
+        """Test a new store indexes existing files and picks up files written after it loaded"""
+        ImageStore(str(tmp_path)).put("a" * 32, "png", b"first")
+        store = ImageStore(str(tmp_path))
+        assert store.get("a" * 32, "png") == b"first"
+
+        ImageStore(str(tmp_path)).put("b" * 32, "png", b"second")
+        assert store.get("b" * 32, "png") == b"second"
+        assert store.size == len(b"first") + len(b"second")
+
+    def test_shared_directory_bounded(self, tmp_path):
+        """Test processes sharing the directory evict by its total size, not only what each wrote"""
+        stores = [ImageStore(str(tmp_path), max_bytes=40) for _ in range(3)]
+        for i in range(12):
+            stores[i % 3].put(f"{i:032x}", "png", b"x" * 10)
+
+        on_disk = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+        assert on_disk <= 40
+        assert stores[2].contains(f"{11:032x}", "png")
+
+    def test_key_covers_the_input(self):
+        """Test the key changes with the data and options, and only with them"""
+        assert image_key("chart", "stack", {"stack": [1]}) == image_key("chart", "stack", {"stack": [1]})
+        assert image_key("chart", "stack", {"stack": [1]}) != image_key("chart", "stack", {"stack": [2]})
+
+
+class TestRefOutput:
+    """Test analysis outputs reference stored images"""
+
+    def test_chart_rendered_once(self, store, monkeypatch):
+        """Test a repeated chart is served from the store instead of rendered again"""
+        calls = []
+        render = visualization.get_render_pool().render
+
+        async def counting(*args, **kwargs):
+            calls.append(args[0])
+            return await render(*args, **kwargs)
+
+        monkeypatch.setattr(visualization.get_render_pool(), "render", counting)
+        data = {"array": [3, 1, 2]}
+        first = asyncio.run(chart_output("sorting_comparison", data, "ref"))
+        second = asyncio.run(chart_output("sorting_comparison", data, "ref"))
+
+        assert first == second
+        assert first["url"] == f"/api/v1/visualization/{first['hash']}.png"
+        assert calls == ["sorting_comparison"]
+
+    def test_animation_ref(self, store):
+        """Test animations are stored under their own format"""
+        service = EnhancedVisualizationService()
+        result = asyncio.run(service.generate_data_structure_animation(
+            "stack", [{"type": "push", "value": 1}], output_format="ref", animation_format="gif"
+        ))
+
+        assert result["url"].endswith(".gif")
+        assert result["mime_type"] == "image/gif"
+        assert store.get(result["hash"], "gif").startswith(b"GIF")
+
+
+class TestImageEndpoint:
+    """Test caching headers and conditional requests"""
+
+    def test_served_with_caching_headers(self, client):
+        """Test images are immutable with a strong ETag, and 304 when the client has them"""
+        ref = asyncio.run(chart_output("memory_usage", {"usage": [120, 300, 280]}, "ref"))
+
+        response = client.get(ref["url"])
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+        assert response.headers["etag"] == f'"{ref["hash"]}"'
+        assert "immutable" in response.headers["cache-control"]
+
+        cached = client.get(ref["url"], headers={"If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304
+        assert not cached.content
+
+    def test_unknown_images(self, client):
+        """Test unknown keys, malformed names and unknown extensions are 404s"""
+        assert client.get(f"/api/v1/visualization/{'0' * 32}.png").status_code == 404
+        assert client.get("/api/v1/visualization/not-a-key.png").status_code == 404
+        assert client.get(f"/api/v1/visualization/{'0' * 32}.exe").status_code == 404
+
+    def test_dp_viewport_conditional(self, client):
+        """Test a DP viewport PNG carries an ETag and is not rendered again for a matching request"""
+        table_id = client.post("/api/v1/visualization/dp-tables", json={"dp_table": [[1, 2], [3, 4]]}).json()["table_id"]
+        url = f"/api/v1/visualization/dp-tables/{table_id}"
+
+        response = client.get(url, params={"format": "png"})
+        etag = response.headers["etag"]
+        assert client.get(url, params={"format": "png"}, headers={"If-None-Match": etag}).status_code == 304
+        assert client.get(url, params={"format": "ref"}).json()["hash"] == etag.strip('"')
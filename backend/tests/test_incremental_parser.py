@@ -0,0 +1,107 @@
+"""
+Tests for incremental tree-sitter parse sessions
+"""
+
+import pytest
+
+from app.services import incremental_parser
+from app.services.incremental_parser import IncrementalParseManager, get_parse_session_manager
+from app.services.tree_sitter_parser import get_parser
+
+
+SOURCE = """def first(x):
+    return x
+
+def second(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+"""
+
+
+class TestIncrementalParsing:
+    """Test session-based incremental reparsing"""
+
+    def test_open_session_summarizes_file(self):
+        """Test that opening a session parses the whole file once"""
+        manager = IncrementalParseManager()
+        result = manager.open_session(SOURCE, "python")
+
+        assert result["session_id"]
+        assert result["version"] == 0
+        assert result["summary"]["loops"] == 1
+        names = [f["name"] for f in result["summary"]["functions"]]
+        assert names == ["first", "second"]
+
+    def test_edit_matches_full_reparse(self):
+        """Test that the incremental tree equals a from-scratch parse"""
+        manager = IncrementalParseManager()
+        session_id = manager.open_session(SOURCE, "python")["session_id"]
+        position = SOURCE.index("return x") + len("return x")
+
+        result = manager.apply_edits(session_id, [
+            {"start_byte": position, "old_end_byte": position, "text": " * 2"},
+        ])
+
+        session = manager._sessions[session_id]
+        fresh = get_parser("python").parse(session.source)
+        assert session.tree.root_node.sexp() == fresh.root_node.sexp()
+        assert result["version"] == 1
+        # Only the edited statement is re-analyzed, not the whole file
+        assert len(result["regions"]) == 1
+        assert result["regions"][0]["node_type"] == "return_statement"
+
+    def test_sequential_edits_use_updated_offsets(self):
+        """Test that each edit is applied against the previous edit's result"""
+        manager = IncrementalParseManager()
+        session_id = manager.open_session("a = 1\n", "python")["session_id"]
+
+        manager.apply_edits(session_id, [
+            {"start_byte": 4, "old_end_byte": 5, "text": "10"},
+            {"start_byte": 7, "old_end_byte": 7, "text": "b = 2\n"},
+        ])
+
+        assert manager._sessions[session_id].source == b"a = 10\nb = 2\n"
+
+    def test_invalid_edit_leaves_session_untouched(self):
+        """Test that a bad edit is rejected before the tree is modified"""
+        manager = IncrementalParseManager()
+        session_id = manager.open_session("a = 1\n", "python")["session_id"]
+
+        with pytest.raises(ValueError):
+            manager.apply_edits(session_id, [
+                {"start_byte": 0, "old_end_byte": 1, "text": "b"},
+                {"start_byte": 4, "old_end_byte": 50, "text": ""},
+            ])
+
+        session = manager._sessions[session_id]
+        assert session.source == b"a = 1\n"
+        assert session.version == 0
+
+    def test_unknown_session(self):
+        """Test editing a session that does not exist"""
+        manager = IncrementalParseManager()
+        with pytest.raises(KeyError):
+            manager.apply_edits("missing", [])
+
+    def test_idle_and_capacity_eviction(self):
+        """Test that idle sessions and the least recently used session are evicted"""
+        manager = IncrementalParseManager(idle_timeout=60, max_sessions=2)
+        first = manager.open_session("a = 1\n", "python")["session_id"]
+        manager.open_session("b = 2\n", "python")
+        manager.open_session("c = 3\n", "python")
+
+        assert len(manager) == 2
+        assert first not in manager._sessions
+
+        manager.evict_idle(now=float("inf"))
+        assert len(manager) == 0
+
+    def test_empty_manager_is_kept(self, monkeypatch):
+        """Test the global manager is created once, not again while it has no sessions"""
+        monkeypatch.setattr(incremental_parser, "parse_session_manager", None)
+        manager = get_parse_session_manager()
+
+        assert len(manager) == 0
+        assert get_parse_session_manager() is manager
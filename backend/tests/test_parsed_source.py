@@ -0,0 +1,74 @@
+"""
+Tests for the shared parsed-source context
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.ai_analyzer import AIAnalyzer
+from app.services.code_analyzer import CodeAnalyzer
+from app.services.complexity_analyzer import ComplexityAnalyzer
+from app.services.optimization_service import OptimizationService
+from app.services.parsed_source import ParsedSource
+
+
+CODE = """def search(items, target):
+    for i in range(len(items)):
+        if items[i] == target:
+            return i
+    return -1
+"""
+
+
+class TestParsedSource:
+    """Test memoization of parse results across analyzers"""
+
+    def test_python_parsed_once_per_request(self):
+        """Test that all analyzers share a single ast.parse"""
+        source = ParsedSource(CODE, "python")
+
+        asyncio.run(CodeAnalyzer().analyze_ast(source, "python"))
+        asyncio.run(ComplexityAnalyzer().analyze_complexity(source, "python"))
+        asyncio.run(OptimizationService().analyze_optimization_opportunities(source, "python"))
+        asyncio.run(AIAnalyzer().analyze_code_intelligence(source, "python"))
+
+        assert source.parse_counts["python_ast"] == 1
+
+    def test_tree_sitter_parsed_once_per_request(self):
+        """Test that tree-sitter languages parse once per request"""
+        code = "class A { int f(int n) { while (n > 0) n--; return n; } }"
+        source = ParsedSource(code, "java")
+
+        asyncio.run(CodeAnalyzer().analyze_ast(source, "java"))
+        asyncio.run(CodeAnalyzer().analyze_ast(source, "java", ast_format="flat"))
+        asyncio.run(ComplexityAnalyzer().analyze_complexity(source, "java"))
+
+        assert source.parse_counts["tree_sitter"] == 1
+        assert source.parse_counts["structure"] == 1
+
+    def test_plain_strings_still_accepted(self):
+        """Test that analyzers give the same result for str and ParsedSource"""
+        analyzer = ComplexityAnalyzer()
+        from_str = asyncio.run(analyzer.analyze_complexity(CODE, "python"))
+        from_source = asyncio.run(analyzer.analyze_complexity(ParsedSource(CODE, "python"), "python"))
+
+        assert from_str == from_source
+
+    def test_syntax_error_is_memoized(self):
+        """Test that invalid code is not reparsed on every access"""
+        source = ParsedSource("def broken(:\n", "python")
+
+        for _ in range(3):
+            with pytest.raises(SyntaxError):
+                source.python_ast
+        assert source.parse_counts["python_ast"] == 1
+
+    def test_line_numbers_and_tokens(self):
+        """Test offset-to-line lookup and tokenization"""
+        source = ParsedSource(CODE, "python")
+
+        for position in (0, 10, CODE.index("return i"), len(CODE) - 1):
+            assert source.line_number(position) == CODE[:position].count("\n") + 1
+        assert source.tokens[:3] == ["def", "search", "("]
+        assert ParsedSource("a+=b;", "cpp").tokens == ["a", "+", "=", "b", ";"]
@@ -0,0 +1,76 @@
+"""
+Tests for the render pool and its chart functions
+"""
+
+import asyncio
+import sys
+
+import pytest
+
+from app.services.charts import CHARTS
+from app.services.render_pool import RenderJob, RenderPool, render_chart
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+JOBS = [
+    RenderJob("sorting_comparison", {"array": [5, 3, 8, 1]}, size=(15, 6)),
+    RenderJob("dp_table", {"dp_table": [[0, 1], [1, 2]]}, size=(10, 8)),
+    RenderJob("graph_traversal", {"nodes": [1, 2, 3], "edges": [{"from": 1, "to": 2}], "traversal_order": [1, 2]}),
+    RenderJob("memory_usage", {"usage": [100, 240, 180]}),
+]
+
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(workers=2, mode="thread")
+    yield pool
+    pool.shutdown()
+
+
+class TestRenderChart:
+    """Test rendering on a reused figure"""
+
+    def test_png_bytes(self):
+        """Test every job comes back as a PNG"""
+        for job in JOBS:
+            assert render_chart(job).startswith(PNG_SIGNATURE)
+
+    def test_reused_figure_matches_fresh_one(self):
+        """Test a job renders the same after other jobs used the figure"""
+        first = [render_chart(job) for job in JOBS]
+        second = [render_chart(job) for job in reversed(JOBS)]
+
+        assert first == list(reversed(second))
+
+    def test_unknown_chart(self):
+        """Test an unknown chart name is an error"""
+        with pytest.raises(KeyError):
+            render_chart(RenderJob("no_such_chart"))
+
+    def test_no_pyplot(self):
+        """Test charts do not pull in pyplot's global state"""
+        assert CHARTS
+        assert "matplotlib.pyplot" not in sys.modules
+
+
+class TestRenderPool:
+    """Test rendering jobs on the pool"""
+
+    def test_concurrent_jobs(self, pool):
+        """Test concurrent jobs on several workers render like sequential ones"""
+        expected = [render_chart(job) for job in JOBS]
+
+        async def render_all():
+            return await asyncio.gather(*(
+                pool.render(job.chart, job.data, size=job.size) for job in JOBS * 3
+            ))
+
+        assert asyncio.run(render_all()) == expected * 3
+
+    def test_started_on_first_job(self, pool):
+        """Test the pool starts itself when it gets its first job"""
+        png = asyncio.run(pool.render("complexity_chart", dpi=20))
+
+        assert png.startswith(PNG_SIGNATURE)
+        assert pool._executor is not None
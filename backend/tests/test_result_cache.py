@@ -0,0 +1,192 @@
+"""
+Tests for normalized-code cache keys and the analyzer result cache
+"""
+
+import asyncio
+
+import pytest
+
+from app.core import cache
+from app.core.config import settings
+from app.services.code_normalizer import normalize_code
+from app.services.complexity_analyzer import ComplexityAnalyzer
+from app.services.optimization_service import OptimizationService
+from app.services.result_cache import invalidate_results
+
+
+ORIGINAL = """def pairs(items):
+    count = 0
+    for a in items:
+        for b in items:
+            if a in [1, 2]:
+                count += 1
+    return count
+"""
+
+# Same program: other local names, comments, blank lines and spacing
+VARIANT = """# Count pairs
+
+
+def pairs(values):
+    total = 0   # running count
+    for x in values:
+
+        for y in values:
+            if x in [1, 2]: total += 1
+    return total
+"""
+
+
+class DictRedis:
+    """In-memory stand-in for the Redis calls CacheManager makes here"""
+
+    def __init__(self):
+        self.data = {}
+        self.tags = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+
+    async def zscan_iter(self, name, count=None):
+        for key, score in list(self.tags.get(name, {}).items()):
+            yield key, score
+
+    async def unlink(self, *keys):
+        return sum(self.data.pop(key, None) is not None or self.tags.pop(key, None) is not None for key in keys)
+
+    def pipeline(self):
+        return DictPipeline(self)
+
+
+class DictPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.results = []
+
+    def get(self, key):
+        self.results.append(self.redis.data.get(key))
+
+    def pttl(self, key):
+        self.results.append(-1 if key in self.redis.data else -2)
+
+    def setex(self, key, ttl, value):
+        self.redis.data[key] = value
+
+    def zadd(self, name, mapping):
+        self.redis.tags.setdefault(name, {}).update(mapping)
+
+    def zremrangebyscore(self, name, low, high):
+        pass
+
+    def expire(self, name, ttl, nx=False, gt=False):
+        pass
+
+    async def execute(self):
+        return self.results
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    store = DictRedis()
+    monkeypatch.setattr(cache, "cache_manager", cache.CacheManager(store))
+    return store
+
+
+def fresh(coroutine_factory, monkeypatch):
+    """Compute with an empty cache"""
+    monkeypatch.setattr(cache, "cache_manager", cache.CacheManager(None))
+    return asyncio.run(coroutine_factory())
+
+
+class TestNormalizeCode:
+    """Test which differences the normalized digest ignores"""
+
+    def test_python_formatting_comments_and_locals(self):
+        """Test formatting, comments and local names do not change the digest"""
+        assert normalize_code(ORIGINAL, "python").digest == normalize_code(VARIANT, "python").digest
+        assert normalize_code(ORIGINAL, "python").form == "python-ast"
+
+    def test_python_semantic_changes(self):
+        """Test constants, function names and called names are kept"""
+        digest = normalize_code(ORIGINAL, "python").digest
+
+        assert normalize_code(ORIGINAL.replace("[1, 2]", "[1, 3]"), "python").digest != digest
+        assert normalize_code(ORIGINAL.replace("def pairs", "def count_pairs"), "python").digest != digest
+        called = "def f(g, x):\n    return g(x)\n"
+        assert normalize_code(called, "python").digest != normalize_code(called.replace("g", "h"), "python").digest
+
+    def test_locals_renaming_is_optional(self):
+        """Test renaming can be turned off"""
+        renamed = normalize_code(VARIANT.replace("total", "count").replace("values", "items"), "python", False)
+
+        assert renamed.digest != normalize_code(VARIANT, "python", False).digest
+
+    def test_token_stream_ignores_comments(self):
+        """Test other languages compare tokens without comments"""
+        a = "function f(a) { // add one\n  return a + 1;\n}"
+        b = "function f(a){return a+1;} /* done */"
+
+        assert normalize_code(a, "javascript").digest == normalize_code(b, "javascript").digest
+        assert normalize_code(a, "javascript").digest != normalize_code(b.replace("1", "2"), "javascript").digest
+
+    def test_raw_fallback(self):
+        """Test unparsable code and unsupported languages use the raw text"""
+        assert normalize_code("def broken(:", "python").form == "raw"
+        assert normalize_code("some text", "text").form == "raw"
+
+
+class TestResultCache:
+    """Test caching of analyzer results under normalized keys"""
+
+    def test_optimization_hit_remaps_lines(self, redis_cache, monkeypatch):
+        """Test a formatting variant hits and gets its own line numbers"""
+        service = OptimizationService()
+        asyncio.run(service.analyze_optimization_opportunities(ORIGINAL, "python"))
+        cached = asyncio.run(service.analyze_optimization_opportunities(VARIANT, "python"))
+
+        assert len(redis_cache.data) == 1
+        assert cached == fresh(lambda: service.analyze_optimization_opportunities(VARIANT, "python"), monkeypatch)
+        assert [o["line"] for o in cached["optimizations"] if "line" in o] == [8, 9]
+
+    def test_pattern_findings_are_part_of_the_key(self, redis_cache):
+        """Test a comment that changes regex findings is not a hit"""
+        service = OptimizationService()
+        asyncio.run(service.analyze_optimization_opportunities(ORIGINAL, "python"))
+        result = asyncio.run(service.analyze_optimization_opportunities("# recursive\n" + ORIGINAL, "python"))
+
+        assert len(redis_cache.data) == 2
+        assert "recursive_to_iterative" in {o["type"] for o in result["optimizations"]}
+
+    def test_complexity_hit(self, redis_cache, monkeypatch):
+        """Test complexity results are shared between variants"""
+        analyzer = ComplexityAnalyzer()
+        asyncio.run(analyzer.analyze_complexity(ORIGINAL, "python"))
+        cached = asyncio.run(analyzer.analyze_complexity(VARIANT, "python"))
+
+        assert len(redis_cache.data) == 1
+        assert cached == fresh(lambda: analyzer.analyze_complexity(VARIANT, "python"), monkeypatch)
+        assert cached["time_complexity"] == "O(n²)"
+
+    def test_invalidate_analyzer_version(self, redis_cache):
+        """Test results are tagged by analyzer version and language, and one analyzer can be dropped"""
+        asyncio.run(ComplexityAnalyzer().analyze_complexity(ORIGINAL, "python"))
+        asyncio.run(OptimizationService().analyze_optimization_opportunities(ORIGINAL, "python"))
+
+        assert set(redis_cache.tags) == {
+            "tags:lang:python", f"tags:analyzer:complexity@v{settings.VERSION}", f"tags:analyzer:optimization@v{settings.VERSION}",
+        }
+        assert asyncio.run(invalidate_results("complexity")) == 1
+        assert [key.split(":")[1] for key in redis_cache.data] == ["optimization"]
@@ -0,0 +1,118 @@
+"""
+Tests for the multi-pattern rule engine
+"""
+
+import asyncio
+import re
+
+import pytest
+
+from app.services.ai_analyzer import AIAnalyzer
+from app.services.optimization_service import OptimizationService
+from app.services.rule_engine import Rule, RuleSet, literal_prefix
+
+
+BINARY_SEARCH = """def search(arr, target):
+    left, right = 0, len(arr) - 1
+    while left <= right:
+        mid = (left + right) // 2
+        if arr[mid] == target:
+            return mid
+        elif arr[mid] < target:
+            left = mid + 1
+        else:
+            right = mid - 1
+    return -1
+"""
+
+RULES = [
+    Rule("loops", r"for.*for", re.IGNORECASE, first_only=True),
+    Rule("loops", r"for\s+\w+", re.IGNORECASE),
+    Rule("calls", r"eval\(", re.IGNORECASE),
+    Rule("calls", r"ev\w+", 0),
+    Rule("words", "mid", re.IGNORECASE),
+    Rule("numbers", r"\b\d{2,}\b"),
+    Rule.literal("phrases", "binary search", re.IGNORECASE, first_only=True),
+]
+
+
+def per_pattern(rules, text):
+    """What the separate re.search / re.finditer loops returned"""
+    results = []
+    for rule in rules:
+        if rule.first_only:
+            match = re.search(rule.pattern, text, rule.flags)
+            results.append([(match.start(), match.group())] if match else [])
+        else:
+            results.append([(m.start(), m.group()) for m in re.finditer(rule.pattern, text, rule.flags)])
+    return results
+
+
+def scanned(rule_set, text):
+    return [[(m.start(), m.group()) for m in matches] for _, matches in rule_set.scan(text)]
+
+
+class TestRuleSet:
+    """Test that one scan gives the same matches as per-pattern loops"""
+
+    @pytest.mark.parametrize("text", [
+        BINARY_SEARCH,
+        "For x in a: for y in b: eval(x) # Binary Search 100 EVAL( 7 evaluate",
+        "formidable forfor evaleval(eval( midmid MID 12 345",
+        "",
+    ])
+    def test_matches_per_pattern_loops(self, text):
+        """Test finditer and search semantics, including overlapping prefixes"""
+        rule_set = RuleSet(RULES)
+
+        assert scanned(rule_set, text) == per_pattern(RULES, text)
+
+    def test_lowercase_length_change_falls_back(self):
+        """Test text whose lowercase form has a different length"""
+        text = "İİ for i in x: for j in y: eval(1)"
+        rule_set = RuleSet(RULES)
+
+        assert len(text.lower()) != len(text)
+        assert scanned(rule_set, text) == per_pattern(RULES, text)
+
+    def test_literal_prefix(self):
+        """Test prefix extraction used to index rules"""
+        assert literal_prefix(r"heapq\.heappush") == ("heapq.heappush", True)
+        assert literal_prefix(r"while\s+left") == ("while", False)
+        assert literal_prefix(r"(\s+){12,}if") == ("", False)
+
+    def test_group_helpers(self):
+        """Test per-group access to a scan"""
+        result = RuleSet(RULES).scan(BINARY_SEARCH)
+
+        assert result.matched("words") == 1
+        assert result.matched("loops") == 0
+        assert [len(matches) for _, matches in result.group("words")] == [6]
+
+
+class TestAnalyzerRules:
+    """Test the analyzers built on compiled rule sets"""
+
+    def test_algorithm_detection(self):
+        """Test algorithm confidence counts matching patterns"""
+        result = asyncio.run(AIAnalyzer().analyze_code_intelligence(BINARY_SEARCH, "python"))
+        detected = {algo["name"]: algo["confidence"] for algo in result["detected_algorithms"]}
+
+        assert detected["binary_search"] == 1.0
+
+    def test_security_insights_in_order(self):
+        """Test security matches are reported per pattern, in source order"""
+        code = "exec(a)\nos.system(b)\nexec(c)\n"
+        result = asyncio.run(AIAnalyzer().analyze_code_intelligence(code, "python"))
+        security = [(i["line_number"], i["code_snippet"]) for i in result["insights"] if i["type"] == "security"]
+
+        assert security == [(2, "os.system("), (1, "exec("), (3, "exec(")]
+
+    def test_optimization_patterns(self):
+        """Test the first matching pattern of each optimization type is reported"""
+        code = "def fibonacci(n):\n    for i in range(len(items)):\n        pass\n"
+        result = asyncio.run(OptimizationService().analyze_optimization_opportunities(code, "java"))
+        patterns = {o["type"]: o["pattern"] for o in result["optimizations"]}
+
+        assert patterns["recursive_to_iterative"] == "def.*fibonacci"
+        assert patterns["unnecessary_computations"] == "range\\(len\\(.*\\)\\)"
@@ -0,0 +1,125 @@
+"""
+Tests for JSON serialization of analysis results and traces
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.serialization import (
+    CYCLE_MARKER,
+    DEPTH_MARKER,
+    FastJSONResponse,
+    dumps,
+    to_jsonable,
+)
+from app.services.code_analyzer import CodeAnalyzer
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class TestToJsonable:
+    """Test conversion of arbitrary values to JSON-native types"""
+
+    def test_matches_previous_conversion(self):
+        """Test the conversions the tracer relied on are unchanged"""
+        value = {
+            1: (1, 2.5, "a", None, True),
+            "type": int,
+            "func": len,
+            "point": Point(1, [2]),
+            "set": {3},
+            "counts": defaultdict(int, a=1),
+        }
+
+        assert to_jsonable(value) == {
+            "1": [1, 2.5, "a", None, True],
+            "type": "<type 'int'>",
+            "func": "<function 'len'>",
+            "point": {"x": 1, "y": [2]},
+            "set": "{3}",
+            "counts": {"a": 1},
+        }
+
+    def test_cycles_are_marked(self):
+        """Test that self-referencing containers do not recurse forever"""
+        items = [1]
+        items.append(items)
+        node = Point(1, None)
+        node.y = node
+
+        assert to_jsonable(items) == [1, CYCLE_MARKER]
+        assert to_jsonable(node) == {"x": 1, "y": CYCLE_MARKER}
+        # Shared but acyclic references are kept
+        shared = [1]
+        assert to_jsonable([shared, shared]) == [[1], [1]]
+
+    def test_depth_and_size_caps(self):
+        """Test that deep nesting and long containers are cut off"""
+        nested = []
+        current = nested
+        for _ in range(10):
+            current.append([])
+            current = current[0]
+
+        assert json.dumps(to_jsonable(nested, max_depth=3)) == json.dumps([[[DEPTH_MARKER]]])
+        assert to_jsonable(list(range(5)), max_items=2) == [0, 1, "<3 more items>"]
+        assert to_jsonable(dict.fromkeys("abc", 0), max_items=1) == {"a": 0, "<truncated>": "<2 more items>"}
+
+    def test_numpy_and_non_finite_values(self):
+        """Test numpy values and NaN/infinity"""
+        assert to_jsonable({"a": np.arange(3), "b": np.float64(1.5), "c": float("inf")}) == {
+            "a": [0, 1, 2],
+            "b": 1.5,
+            "c": None,
+        }
+
+
+class TestDumps:
+    """Test encoding to bytes and the response class"""
+
+    def test_dumps_matches_json(self):
+        """Test that plain values encode as the standard library would"""
+        value = {"a": [1, 2.5, "é", None], "b": {"c": True}}
+
+        assert json.loads(dumps(value)) == value
+        assert json.loads(dumps({1: {2}})) == {"1": "{2}"}
+
+    def test_dumps_falls_back_for_cycles(self):
+        """Test that values orjson rejects are converted first"""
+        data = {"name": "loop"}
+        data["self"] = data
+
+        assert json.loads(dumps(data)) == {"name": "loop", "self": CYCLE_MARKER}
+
+    def test_fast_json_response(self):
+        """Test the response class through a FastAPI app"""
+        app = FastAPI()
+
+        @app.get("/trace", response_class=FastJSONResponse)
+        async def trace():
+            return {"steps": [{"line": 1, "locals": {"x": 1}}]}
+
+        response = TestClient(app).get("/trace")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"steps": [{"line": 1, "locals": {"x": 1}}]}
+
+    def test_trace_is_json_ready(self):
+        """Test that traced locals are converted when they are recorded"""
+        code = "class Node:\n    pass\nnode = Node()\nnode.next = node\nvalues = [1, 2]\n"
+        trace = asyncio.run(CodeAnalyzer().execute_with_trace(code, "python", []))
+
+        last = trace[-1]["locals"]
+        assert last["node"] == {"next": CYCLE_MARKER}
+        assert last["Node"] == "<type 'Node'>"
+        assert json.loads(dumps(trace)) == json.loads(json.dumps(trace))
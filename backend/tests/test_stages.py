@@ -0,0 +1,121 @@
+"""
+Tests for concurrent analysis stages and the /analyze fan-out
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import analysis
+from app.core import stages as stages_module
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.stages import STATUS_ERROR, STATUS_OK, STATUS_TIMEOUT, Stage, run_stages
+
+
+async def busy(seconds, value):
+    """A coroutine that computes without awaiting, like the analyzers"""
+    time.sleep(seconds)
+    return value
+
+
+async def failing():
+    raise ValueError("bad input")
+
+
+class TestRunStages:
+    """Test concurrency, timeouts and partial results"""
+
+    def test_stages_run_concurrently(self):
+        """Test offloaded stages overlap instead of running back to back"""
+        stages = [Stage(f"s{i}", busy, (0.2, i)) for i in range(4)]
+
+        start = time.perf_counter()
+        report = asyncio.run(run_stages(stages))
+        elapsed = time.perf_counter() - start
+
+        assert report.values() == {"s0": 0, "s1": 1, "s2": 2, "s3": 3}
+        assert elapsed < 0.6
+
+    def test_partial_results(self):
+        """Test a slow or failing stage does not lose the others"""
+        stages = [
+            Stage("fast", busy, (0, "done")),
+            Stage("slow", busy, (1.0, "late"), timeout=0.05),
+            Stage("broken", failing),
+        ]
+
+        report = asyncio.run(run_stages(stages, timeout=5))
+        statuses = report.statuses()
+
+        assert report.values() == {"fast": "done"}
+        assert statuses["fast"]["status"] == STATUS_OK
+        assert statuses["slow"]["status"] == STATUS_TIMEOUT
+        assert statuses["broken"] == {
+            "status": STATUS_ERROR,
+            "duration_ms": statuses["broken"]["duration_ms"],
+            "error": "bad input",
+        }
+
+    def test_server_timing(self):
+        """Test the header lists every stage with its duration and failures"""
+        stages = [Stage("ast", busy, (0, 1)), Stage("broken", failing, offload=False)]
+
+        header = asyncio.run(run_stages(stages)).server_timing()
+        entries = [entry.split(";") for entry in header.split(", ")]
+
+        assert [entry[0] for entry in entries] == ["ast", "broken"]
+        assert all(entry[1].startswith("dur=") for entry in entries)
+        assert entries[1][2] == 'desc="error"'
+
+    def test_budget_starts_when_the_stage_does(self, monkeypatch):
+        """Test time spent queued for a thread is not charged to the stage"""
+        monkeypatch.setattr(stages_module, "_executor", ThreadPoolExecutor(max_workers=1))
+        stages = [Stage("first", busy, (0.3, 1)), Stage("queued", busy, (0.1, 2), timeout=0.25)]
+
+        report = asyncio.run(run_stages(stages, timeout=1))
+
+        assert report.values() == {"first": 1, "queued": 2}
+
+    def test_abandoned_stages_are_capped(self, monkeypatch):
+        """Test new offloaded stages fail fast while timed-out ones hold threads"""
+        monkeypatch.setattr(stages_module, "_executor", ThreadPoolExecutor(max_workers=2))
+        monkeypatch.setattr(settings, "ANALYSIS_STAGE_MAX_ABANDONED", 1)
+        while stages_module._abandoned:  # left behind by earlier tests
+            time.sleep(0.05)
+
+        slow = asyncio.run(run_stages([Stage("slow", busy, (0.4, 1), timeout=0.05)]))
+        refused = asyncio.run(run_stages([Stage("next", busy, (0, 2))]))
+        time.sleep(0.5)
+        later = asyncio.run(run_stages([Stage("next", busy, (0, 2))]))
+
+        assert slow.statuses()["slow"]["status"] == STATUS_TIMEOUT
+        assert refused.statuses()["next"]["status"] == STATUS_ERROR
+        assert later.values() == {"next": 2}
+        assert stages_module._abandoned == 0
+
+
+class TestAnalyzeEndpoint:
+    """Test the /analyze endpoint built on the stages"""
+
+    def test_analyze_reports_stages(self):
+        """Test results, per-stage status and the Server-Timing header"""
+        app = FastAPI()
+        app.include_router(analysis.router)
+        app.dependency_overrides[get_db] = lambda: None
+
+        response = TestClient(app).post("/analyze", json={
+            "code": "def f(n):\n    for i in range(n):\n        print(i)\n",
+            "language": "python",
+            "include_visualization": False,
+        })
+        body = response.json()["result"]
+
+        assert response.status_code == 200
+        assert set(body["analysis"]) == {"ast", "complexity", "ai_insights", "optimization"}
+        assert {info["status"] for info in body["stages"].values()} == {STATUS_OK}
+        timing = response.headers["server-timing"]
+        assert [entry.split(";")[0] for entry in timing.split(", ")] == list(body["stages"])
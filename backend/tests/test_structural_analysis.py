@@ -0,0 +1,85 @@
+"""
+Tests for tree-sitter query based structural analysis
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.complexity_analyzer import ComplexityAnalyzer
+from app.services.parsed_source import ParsedSource
+from app.services.structural_analysis import analyze_structure, get_query
+
+
+NESTED_LOOPS = {
+    'java': "class A { int f(int[] a) { int t = 0; for (int x : a) { for (int y : a) { t++; } } return t; } }",
+    'cpp': "int f(std::vector<int>& a) { int t = 0; for (int x : a) { for (int y : a) { t++; } } return t; }",
+    'c': "int f(int n) { int t = 0; for (int i = 0; i < n; i++) { while (t < i) { t++; } } return t; }",
+    'javascript': "function f(a) { let t = 0; for (const x of a) { for (const y of a) { t++; } } return t; }",
+    'go': "package main\nfunc f(a []int) int { t := 0; for range a { for range a { t++ } }; return t }",
+    'rust': "fn f(a: &[i32]) -> i32 { let mut t = 0; for x in a { for y in a { t += 1; } } t }",
+}
+
+FIBONACCI = {
+    'java': "class A { int fib(int n) { return n < 2 ? n : fib(n - 1) + fib(n - 2); } }",
+    'cpp': "int fib(int n) { return n < 2 ? n : fib(n - 1) + fib(n - 2); }",
+    'c': "int fib(int n) { return n < 2 ? n : fib(n - 1) + fib(n - 2); }",
+    'javascript': "function fib(n) { return n < 2 ? n : fib(n - 1) + fib(n - 2); }",
+    'go': "package main\nfunc fib(n int) int { if n < 2 { return n }; return fib(n-1) + fib(n-2) }",
+    'rust': "fn fib(n: u32) -> u32 { if n < 2 { n } else { fib(n - 1) + fib(n - 2) } }",
+}
+
+
+class TestStructuralAnalysis:
+    """Test the per-language queries and the complexity derived from them"""
+
+    @pytest.mark.parametrize("language", sorted(NESTED_LOOPS))
+    def test_nested_loops(self, language):
+        """Test that loop nesting is measured for every language"""
+        summary = analyze_structure(NESTED_LOOPS[language], language)
+
+        assert summary.loops == 2
+        assert summary.max_loop_depth == 2
+        assert summary.recursive_functions == {}
+
+    @pytest.mark.parametrize("language", sorted(FIBONACCI))
+    def test_recursion(self, language):
+        """Test that self-calls are attributed to the enclosing function"""
+        summary = analyze_structure(FIBONACCI[language], language)
+
+        assert summary.functions == ["fib"]
+        assert summary.recursive_functions == {"fib": 2}
+
+    def test_allocations(self):
+        """Test allocation and collection captures"""
+        code = "void f(int n) { for (int i = 0; i < n; i++) { int* p = new int[n]; } std::vector<int> v; void* q = malloc(8); }"
+        summary = analyze_structure(code, "cpp")
+
+        assert summary.allocations == 2
+        assert summary.allocations_in_loops == 1
+        assert summary.collections == 1
+
+    def test_query_compiled_once(self):
+        """Test that the compiled query is cached per language"""
+        assert get_query("java") is get_query("JAVA")
+        assert get_query("kotlin") is None
+
+    def test_complexity_from_structure(self):
+        """Test the complexity analyzer uses structure, once per source"""
+        analyzer = ComplexityAnalyzer()
+        source = ParsedSource(NESTED_LOOPS["java"], "java")
+        result = asyncio.run(analyzer.analyze_complexity(source, "java"))
+
+        assert result["time_complexity"] == "O(n²)"
+        assert result["time_details"]["max_loop_depth"] == 2
+        assert source.parse_counts["structure"] == 1
+
+        fib = asyncio.run(analyzer.analyze_complexity(FIBONACCI["go"], "go"))
+        assert fib["time_complexity"] == "O(2ⁿ)"
+        assert fib["space_complexity"] == "O(n)"
+
+    def test_unsupported_language_falls_back_to_patterns(self):
+        """Test languages without a query keep the phrase heuristics"""
+        result = ComplexityAnalyzer().analyze_time_complexity("// bubble sort with nested loops", "kotlin")
+
+        assert result["complexity"] == "O(n²)"
@@ -0,0 +1,126 @@
+"""
+Tests for the SVG renderer of traced data structures
+"""
+
+import asyncio
+import xml.etree.ElementTree as ET
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import visualization as visualization_endpoints
+from app.core.config import settings
+from app.services import image_store
+from app.services.execution_tracer import ExecutionTracer
+from app.services.image_store import ImageStore
+from app.services.structure_svg import RENDERERS, iter_structure_svg, structure_svg
+from app.services.visualization import EnhancedVisualizationService
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+STRUCTURES = {
+    "stack": {"type": "stack", "elements": [1, 2, 3], "top": 3},
+    "queue": {"type": "queue", "elements": ["a", "b"], "front": "a", "rear": "b"},
+    "array": {"type": "array", "elements": [5, 4, 3], "length": 3},
+    "linked_list": {"type": "linked_list", "elements": [1, 2]},
+    "dictionary": {"type": "dictionary", "keys": ["a", "b"], "values": [1, [2, 3]]},
+    "graph": {"type": "graph", "data": {"nodes": ["A", "B"], "edges": [{"from": "A", "to": "B"}, {"from": "B", "to": "C"}]}},
+}
+
+
+def texts(svg):
+    return [node.text for node in ET.fromstring(svg).iter(f"{SVG}text")]
+
+
+class TestStructureSvg:
+    """Test the markup drawn for each structure"""
+
+    def test_every_structure_is_valid_svg(self):
+        """Test every renderer writes well-formed SVG with its elements as text"""
+        assert set(RENDERERS) == set(STRUCTURES)
+        for structure in STRUCTURES.values():
+            root = ET.fromstring(structure_svg(structure))
+            assert root.tag == f"{SVG}svg"
+
+        assert {"1", "2", "3", "top"} <= set(texts(structure_svg(STRUCTURES["stack"])))
+        assert {"A", "B", "C"} <= set(texts(structure_svg(STRUCTURES["graph"])))
+
+    def test_labels_are_escaped_and_truncated(self):
+        """Test markup in values is escaped and long values are shortened"""
+        svg = structure_svg({"type": "array", "elements": ["<b>&", "x" * 50]})
+
+        assert "<b>" not in svg
+        assert "<b>&" in texts(svg)
+        assert max(len(text) for text in texts(svg)) < 50
+
+    def test_large_structures_are_capped(self):
+        """Test only MAX_SVG_CELLS elements are drawn and the rest are counted"""
+        elements = list(range(settings.MAX_SVG_CELLS + 25))
+        svg = structure_svg({"type": "array", "elements": elements})
+
+        assert svg.count("<rect") == settings.MAX_SVG_CELLS + 1
+        assert "+25" in texts(svg)
+
+    def test_weighted_adjacency(self):
+        """Test [node, weight] targets are drawn as their node"""
+        svg = structure_svg({"type": "graph", "data": {"nodes": ["A"], "edges": [{"from": "A", "to": ["B", 2]}]}})
+
+        assert sorted(texts(svg)[1:]) == ["A", "B"]
+
+    def test_pair_nodes(self):
+        """Test nodes that are pairs, such as grid cells, are not read as weighted targets"""
+        tracer = ExecutionTracer("")
+        grid = tracer._to_jsonable(tracer._detect_data_structures({"grid": {(0, 0): [(0, 1)], (0, 1): [(0, 0)]}}))
+        weighted = {"nodes": [[0, 0]], "edges": [{"from": [0, 0], "to": [[0, 1], 5]}]}
+
+        assert sorted(texts(structure_svg(grid["grid"]))[1:]) == ["(0, 0)", "(0, 1)"]
+        assert sorted(texts(structure_svg({"type": "graph", "data": weighted}))[1:]) == ["(0, 0)", "(0, 1)"]
+
+    def test_traced_structures(self):
+        """Test the structures the tracer detects can all be drawn"""
+        tracer = ExecutionTracer("")
+        structures = tracer._detect_data_structures({"graph": {"A": ["B"]}, "items": [1, 2], "pair": (1, 2)})
+
+        for structure in structures.values():
+            ET.fromstring(structure_svg(structure))
+
+    def test_unknown_type(self):
+        """Test unknown structure types are rejected"""
+        with pytest.raises(ValueError):
+            iter_structure_svg({"type": "heap"})
+
+
+class TestStructureVisualizations:
+    """Test the service and endpoint around the renderer"""
+
+    def test_inline_spec_and_ref(self, tmp_path):
+        """Test each output format, and that unknown structures are skipped"""
+        image_store.image_store = ImageStore(str(tmp_path))
+        try:
+            service = EnhancedVisualizationService()
+            structures = {"s": STRUCTURES["stack"], "x": {"type": "heap"}}
+
+            inline = asyncio.run(service.generate_structure_visualizations(structures))
+            spec = asyncio.run(service.generate_structure_visualizations(structures, "spec"))
+            ref = asyncio.run(service.generate_structure_visualizations(structures, "ref"))
+        finally:
+            image_store.image_store = None
+
+        assert list(inline) == list(spec) == list(ref) == ["s"]
+        assert inline["s"]["image"].startswith("<svg")
+        assert spec["s"]["elements"] == [1, 2, 3]
+        assert ref["s"]["url"].endswith(".svg")
+        assert (tmp_path / f"{ref['s']['hash']}.svg").read_text() == inline["s"]["image"]
+
+    def test_streamed_endpoint(self):
+        """Test the endpoint streams the SVG and rejects unknown types"""
+        app = FastAPI()
+        app.include_router(visualization_endpoints.router, prefix="/visualization")
+        client = TestClient(app)
+        structure = {"type": "array", "elements": list(range(80))}
+
+        response = client.post("/visualization/structures/svg", json={"structure": structure})
+        assert response.headers["content-type"].startswith("image/svg+xml")
+        assert response.text == structure_svg(structure)
+        assert client.post("/visualization/structures/svg", json={"structure": {"type": "heap"}}).status_code == 400
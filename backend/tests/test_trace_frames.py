@@ -0,0 +1,130 @@
+"""
+Tests for exporting the frames of a traced execution
+"""
+
+import asyncio
+import io
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.api.v1.endpoints import visualization as visualization_endpoints
+from app.services import image_store, trace_frames
+from app.services.image_store import ImageStore
+from app.services.trace_frames import STEP_MS, export_trace, step_states
+from app.services.visualization import EnhancedVisualizationService
+
+
+def step(**structures):
+    return {"line_number": 1, "data_structures": structures}
+
+
+def stack(*elements):
+    return {"type": "stack", "elements": list(elements)}
+
+
+# Five steps, three states: the second state lasts three steps
+TRACE = [
+    step(s=stack(1)),
+    step(s=stack(1, 2)),
+    step(s=stack(1, 2)),
+    step(s=stack(1, 2), n={"type": "int", "value": 3}),
+    step(s=stack(1, 2, 3), q={"type": "queue", "elements": ["a"]}),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    image_store.image_store = ImageStore(str(tmp_path))
+    yield image_store.image_store
+    image_store.image_store = None
+
+
+def events(trace, frame_format):
+    async def collect():
+        return [event async for event in export_trace(trace, frame_format)]
+    return asyncio.run(collect())
+
+
+class TestStepStates:
+    """Test consecutive identical states are merged"""
+
+    def test_dedup_and_index(self):
+        """Test each step points at its state and structures that cannot be drawn are ignored"""
+        states, index = step_states(TRACE)
+
+        assert index == [0, 1, 1, 1, 2]
+        assert states == [{"s": stack(1)}, {"s": stack(1, 2)}, {"s": stack(1, 2, 3), "q": {"type": "queue", "elements": ["a"]}}]
+
+    def test_steps_without_structures(self):
+        """Test steps without structures share one empty state"""
+        assert step_states([{}, {"data_structures": None}]) == ([{}], [0, 0])
+
+
+class TestExport:
+    """Test each frame format and the events around it"""
+
+    def test_svg_frames(self, store):
+        """Test SVG frames carry their steps and the done event the step index"""
+        result = events(TRACE, "svg")
+
+        assert result[0] == {"event": "start", "format": "svg", "steps": 5, "frames": 3}
+        frames = sorted((e for e in result if e["event"] == "frame"), key=lambda e: e["frame"])
+        assert [frame["steps"] for frame in frames] == [[0, 0], [1, 3], [4, 4]]
+        assert set(frames[2]["structures"]) == {"s", "q"}
+        assert frames[2]["structures"]["s"].startswith("<svg")
+        assert result[-2] == {"event": "progress", "done": 3, "total": 3}
+        assert result[-1] == {"event": "done", "format": "svg", "index": [0, 1, 1, 1, 2]}
+
+    def test_png_frames_stored_once(self, store, monkeypatch):
+        """Test PNG frames go to the store and a repeated export renders nothing"""
+        first = [e for e in events(TRACE, "png") if e["event"] == "frame"]
+        sizes = {Image.open(io.BytesIO(store.get(e["hash"], "png"))).size for e in first}
+        assert len(first) == 3 and len(sizes) == 1
+
+        def fail(*args):
+            raise AssertionError("rendered again")
+
+        monkeypatch.setattr(trace_frames, "render_states", fail)
+        again = [e for e in events(TRACE, "png") if e["event"] == "frame"]
+        assert sorted(e["hash"] for e in again) == sorted(e["hash"] for e in first)
+
+    def test_gif_durations(self, store):
+        """Test an animation has one frame per state, shown as long as its steps"""
+        done = events(TRACE, "gif")[-1]
+
+        assert done["mime_type"] == "image/gif"
+        gif = Image.open(io.BytesIO(store.get(done["hash"], "gif")))
+        durations = []
+        for frame in range(gif.n_frames):
+            gif.seek(frame)
+            durations.append(gif.info["duration"])
+        assert durations == [STEP_MS, 3 * STEP_MS, STEP_MS]
+
+    def test_service_collects_frames(self, store):
+        """Test the service returns frames in order, and {} for an unknown format"""
+        service = EnhancedVisualizationService()
+        result = asyncio.run(service.generate_trace_frames(TRACE, "png"))
+
+        assert result["index"] == [0, 1, 1, 1, 2]
+        assert [frame["steps"] for frame in result["frames"]] == [[0, 0], [1, 3], [4, 4]]
+        assert asyncio.run(service.generate_trace_frames(TRACE, "mp4")) == {}
+
+
+class TestEndpoint:
+    """Test the NDJSON endpoint"""
+
+    def test_streams_events(self, store):
+        """Test events arrive one per line and unknown formats are rejected"""
+        app = FastAPI()
+        app.include_router(visualization_endpoints.router, prefix="/visualization")
+        client = TestClient(app)
+
+        response = client.post("/visualization/trace-frames", json={"trace": TRACE})
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["event"] == "start" and lines[-1]["event"] == "done"
+        assert client.post("/visualization/trace-frames", json={"trace": TRACE, "format": "mp4"}).status_code == 400
@@ -0,0 +1,53 @@
+"""
+Tests for tree-sitter tree conversion
+"""
+
+from app.services.tree_sitter_parser import node_text, parse_code_with_tree_sitter
+
+
+def _walk(node):
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(current["children"])
+
+
+class TestTreeSitterConversion:
+    """Test the iterative tree-sitter converter"""
+
+    def test_nodes_carry_byte_ranges_not_text(self):
+        """Test that node text is resolved from byte ranges on demand"""
+        code = "name = 'é'\n"
+        tree = parse_code_with_tree_sitter(code, "python")
+
+        assert not tree["truncated"]
+        assert tree["node_count"] == sum(1 for _ in _walk(tree))
+        assert all("text" not in node for node in _walk(tree))
+        strings = [node for node in _walk(tree) if node["type"] == "string"]
+        assert node_text(code, strings[0]) == "'é'"
+
+    def test_deep_nesting_does_not_recurse(self):
+        """Test that nesting deeper than the recursion limit converts"""
+        body = "x += 1;"
+        for i in range(1500):
+            body = f"if (x > {i}) {{ {body} }}"
+        code = f"class Deep {{ int run(int x) {{ {body} return x; }} }}"
+
+        tree = parse_code_with_tree_sitter(code, "java", max_depth=10 ** 6, max_nodes=10 ** 7)
+
+        assert "error" not in tree
+        assert not tree["truncated"]
+
+    def test_depth_and_node_caps(self):
+        """Test that the depth and node caps truncate the tree"""
+        code = "def f(a):\n    for i in a:\n        if i:\n            print(i)\n"
+
+        shallow = parse_code_with_tree_sitter(code, "python", max_depth=2)
+        assert shallow["truncated"]
+        assert max(len(n["children"]) for n in _walk(shallow)) > 0
+
+        small = parse_code_with_tree_sitter(code, "python", max_nodes=5)
+        assert small["truncated"]
+        assert small["node_count"] == 5
+        assert sum(1 for _ in _walk(small)) == 5
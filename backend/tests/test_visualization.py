@@ -0,0 +1,117 @@
+"""
+Tests for the visualization service's static and trace-driven charts
+"""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import visualization as visualization_endpoints
+from app.core.serialization import dumps
+from app.services import visualization
+from app.services.execution_tracer import trace_code
+from app.services.visualization import VisualizationService, memory_profile, static_chart
+
+
+PROGRAM = """values = []
+for i in range(20):
+    values.append(i * i)
+"""
+
+
+class TestStaticCharts:
+    """Test charts that do not depend on the submission"""
+
+    def test_rendered_once(self, monkeypatch):
+        """Test a static chart is drawn on first use and then reused"""
+        calls = []
+
+        async def render(chart, data=None, **options):
+            calls.append(chart)
+            return "png"
+
+        monkeypatch.setattr(visualization, "_static_charts", {})
+        monkeypatch.setattr(visualization, "render_base64", render)
+
+        assert asyncio.run(static_chart("complexity_chart")) == "png"
+        assert asyncio.run(static_chart("complexity_chart")) == "png"
+        assert calls == ["complexity_chart"]
+
+    def test_served_with_each_request(self):
+        """Test every request gets the same static charts"""
+        service = VisualizationService()
+        first = asyncio.run(service.generate_visualizations("x = 1", "python", []))
+        second = asyncio.run(service.generate_visualizations("y = 2", "python", []))
+
+        assert first["complexity_chart"] and first["execution_flow"]
+        assert first["complexity_chart"] is second["complexity_chart"]
+        assert first["execution_flow"] is second["execution_flow"]
+
+
+class TestMemoryUsage:
+    """Test the memory chart is drawn from the execution trace"""
+
+    def test_profile_follows_trace(self):
+        """Test the profile grows with the traced locals"""
+        usage = memory_profile(trace_code(PROGRAM)["trace"])
+
+        assert len(usage) > 20
+        assert usage[-1] > usage[0]
+
+    def test_profile_skips_error_steps(self):
+        """Test steps without locals are not plotted"""
+        assert memory_profile([{"error": "boom"}, {"line": 1, "locals": {"a": [1, 2]}}]) == [len(b'{"a":[1,2]}')]
+
+    def test_chart_needs_trace(self):
+        """Test the chart is left out without a trace, and drawn with it"""
+        service = VisualizationService()
+        trace = trace_code(PROGRAM)["trace"]
+
+        assert "memory_usage" not in asyncio.run(service.generate_visualizations("x = 1", "python", []))
+        assert asyncio.run(service.generate_visualizations(PROGRAM, "python", [], trace))["memory_usage"]
+
+    def test_endpoint_charts_a_trace(self):
+        """Test the endpoint draws a tracer's output, and refuses a trace without locals"""
+        app = FastAPI()
+        app.include_router(visualization_endpoints.router, prefix="/visualization")
+        client = TestClient(app)
+        trace = trace_code(PROGRAM)["trace"]
+
+        spec = client.post("/visualization/memory-usage", json={"trace": trace, "format": "spec"})
+        empty = client.post("/visualization/memory-usage", json={"trace": [{"line": 1}]})
+
+        assert spec.status_code == 200
+        assert spec.json()["memory_usage"]["kind"] == "area"
+        assert empty.status_code == 400
+
+
+class TestSpecFormat:
+    """Test the declarative spec output format"""
+
+    def test_nothing_rendered(self, monkeypatch):
+        """Test spec output draws no PNGs"""
+        async def render(chart, data=None, **options):
+            raise AssertionError(f"rendered {chart}")
+
+        monkeypatch.setattr(visualization, "render_base64", render)
+        monkeypatch.setattr(visualization, "_static_charts", {})
+        service = VisualizationService()
+        specs = asyncio.run(service.generate_visualizations(
+            "def bubble_sort(a): pass", "python", [3, 1, 2], trace_code(PROGRAM)["trace"], output_format="spec"
+        ))
+
+        assert specs["complexity_chart"]["kind"] == "line"
+        assert specs["execution_flow"]["kind"] == "flow"
+        assert specs["memory_usage"]["kind"] == "area"
+        assert [row["after"] for row in specs["sorting_comparison"]["rows"]] == [1, 2, 3]
+
+    def test_smaller_than_png(self):
+        """Test specs are a fraction of the size of the images"""
+        service = VisualizationService()
+        args = ("def binary_search(a, t): pass", "python", [1, 3, 5, 7, 5], trace_code(PROGRAM)["trace"])
+        png = asyncio.run(service.generate_visualizations(*args))
+        spec = asyncio.run(service.generate_visualizations(*args, output_format="spec"))
+
+        assert set(png) == set(spec)
+        assert len(dumps(spec)) * 10 < len(dumps(png))
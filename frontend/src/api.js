@@ -67,6 +67,14 @@ export const getComplexityAnalysis = (id) =>
 export const getVisualization = (id) =>
   apiClient.get(`/analysis/visualization/${id}`);
 
+// Incremental parse sessions: edits are {start_byte, old_end_byte, text}
+export const openParseSession = (data) =>
+  apiClient.post('/analysis/sessions', data);
+export const applyParseEdits = (sessionId, edits) =>
+  apiClient.post(`/analysis/sessions/${sessionId}/edits`, { edits });
+export const closeParseSession = (sessionId) =>
+  apiClient.delete(`/analysis/sessions/${sessionId}`);
+
 export const executeCode = (data) => apiClient.post('/execution/execute', data);
 export const testCode = (data) => apiClient.post('/execution/test', data);
 
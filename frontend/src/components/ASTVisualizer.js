@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useMemo, useState } from 'react';
 import { Box, Typography, IconButton } from '@mui/material';
 import ExpandMoreIcon from '@mui/icons-material/ExpandMore';
 import ChevronRightIcon from '@mui/icons-material/ChevronRight';
@@ -45,14 +45,91 @@ function ASTNodeTree({ node, depth = 0 }) {
   );
 }
 
+// Flat ASTs list nodes in pre-order with a parent index per node. One loop
+// builds the child lists, and nodes are only materialized when expanded.
+function buildChildIndex(ast) {
+  const children = ast.parent.map(() => []);
+  ast.parent.forEach((parent, idx) => {
+    if (parent >= 0) children[parent].push(idx);
+  });
+  return children;
+}
+
+function flatNode(ast, childIndex, idx) {
+  return {
+    node_type: ast.node_types[ast.type[idx]],
+    line_number: ast.line[idx],
+    column: ast.column[idx],
+    value: ast.values?.[idx],
+    children: childIndex[idx],
+  };
+}
+
+function FlatASTNodeTree({ ast, childIndex, idx = 0, depth = 0 }) {
+  const [open, setOpen] = useState(depth === 0);
+  const node = flatNode(ast, childIndex, idx);
+  const hasChildren = node.children.length > 0;
+  return (
+    <Box ml={depth * 2}>
+      <Box display="flex" alignItems="center">
+        {hasChildren && (
+          <IconButton size="small" onClick={() => setOpen((o) => !o)}>
+            {open ? (
+              <ExpandMoreIcon fontSize="small" />
+            ) : (
+              <ChevronRightIcon fontSize="small" />
+            )}
+          </IconButton>
+        )}
+        <Typography
+          variant="body2"
+          component="span"
+          sx={{ fontWeight: depth === 0 ? 'bold' : 'normal' }}
+        >
+          {node.node_type} (line {node.line_number}, col {node.column})
+        </Typography>
+        {node.value && (
+          <Typography variant="caption" color="text.secondary" ml={1}>
+            {String(node.value).slice(0, 40)}
+          </Typography>
+        )}
+      </Box>
+      {hasChildren && open && (
+        <Box>
+          {node.children.map((child) => (
+            <FlatASTNodeTree
+              key={child}
+              ast={ast}
+              childIndex={childIndex}
+              idx={child}
+              depth={depth + 1}
+            />
+          ))}
+        </Box>
+      )}
+    </Box>
+  );
+}
+
 export default function ASTVisualizer({ ast }) {
-  if (!ast) return <Typography>No AST available.</Typography>;
+  const isFlat = ast?.format === 'flat';
+  const childIndex = useMemo(
+    () => (isFlat ? buildChildIndex(ast) : null),
+    [ast, isFlat]
+  );
+  if (!ast || (isFlat && ast.parent.length === 0)) {
+    return <Typography>No AST available.</Typography>;
+  }
   return (
     <Box mt={2}>
       <Typography variant="h6" gutterBottom>
         AST Visualization
       </Typography>
-      <ASTNodeTree node={ast} />
+      {isFlat ? (
+        <FlatASTNodeTree ast={ast} childIndex={childIndex} />
+      ) : (
+        <ASTNodeTree node={ast} />
+      )}
     </Box>
   );
 }